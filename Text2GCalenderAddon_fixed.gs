@@ -73,6 +73,33 @@ const API_KEY = 'my_secure_api_key_2025_discord_bot';
 // タスク完了管理機能
 // =====================================================================
 
+/**
+ * Bot側のインデックスが解決したイベントキー（exportEventsSince_ の key）からイベントを取得
+ * 今日のイベントを全件走査せずに1件だけ更新できる
+ * @param {string} eventKey - "イベントID@開始時刻(ms)"
+ * @return {CalendarEvent|null} イベント（削除済み・時刻変更済みならnull）
+ */
+function findEventByKey_(eventKey) {
+  if (!eventKey || typeof eventKey !== 'string') return null;
+  const at = eventKey.lastIndexOf('@');
+  if (at <= 0) return null;
+  const id = eventKey.slice(0, at);
+  const startMs = Number(eventKey.slice(at + 1));
+  if (!startMs) return null;
+
+  const calendar = CalendarApp.getDefaultCalendar();
+  const event = calendar.getEventById(id);
+  if (event && event.getStartTime().getTime() === startMs) return event;
+
+  // 繰り返し予定は同じIDを共有するので、その開始時刻の1分間だけを検索する
+  const start = new Date(startMs);
+  const candidates = calendar.getEvents(start, new Date(startMs + 60 * 1000));
+  for (const ev of candidates) {
+    if (ev.getId() === id && ev.getStartTime().getTime() === startMs) return ev;
+  }
+  return null;
+}
+
 /**
  * 今日の進捗レポートを生成
  * @return {Object} 進捗情報
@@ -164,12 +191,21 @@ function generateDailyProgress_() {
 /**
  * タスクを完了にマーク
  * @param {string} taskTitle - タスクタイトル（部分一致）
+ * @param {string|null} eventKey - Bot側で解決済みのイベントキー（あれば走査しない）
  * @return {Object} 結果
  */
-function markTaskAsComplete_(taskTitle) {
+function markTaskAsComplete_(taskTitle, eventKey) {
   const tz = SETTINGS.TIMEZONE;
   const now = new Date();
   
+  const target = findEventByKey_(eventKey);
+  if (target && !target.isAllDayEvent() && !target.getTitle().includes('✓')) {
+    const updated = target.getTitle() + ' ✓';
+    target.setTitle(updated);
+    console.log(`✅ タスク完了（キー指定）: "${updated}"`);
+    return { ok: true, message: `✅ タスク完了: ${updated}`, event_key: eventKey };
+  }
+  
   // 今日のイベントを取得
   const startOfDay = new Date(now.getFullYear(), now.getMonth(), now.getDate(), 0, 0, 0);
   const endOfDay = new Date(now.getFullYear(), now.getMonth(), now.getDate(), 23, 59, 59);
@@ -208,12 +244,21 @@ function markTaskAsComplete_(taskTitle) {
 /**
  * タスクの完了マークを解除
  * @param {string} taskTitle - タスクタイトル（部分一致）
+ * @param {string|null} eventKey - Bot側で解決済みのイベントキー（あれば走査しない）
  * @return {Object} 結果
  */
-function unmarkTaskAsComplete_(taskTitle) {
+function unmarkTaskAsComplete_(taskTitle, eventKey) {
   const tz = SETTINGS.TIMEZONE;
   const now = new Date();
   
+  const target = findEventByKey_(eventKey);
+  if (target && !target.isAllDayEvent() && target.getTitle().includes('✓')) {
+    const updated = target.getTitle().replace(/\s*✓\s*$/, '').trim();
+    target.setTitle(updated);
+    console.log(`↩️  タスク未完了に戻す（キー指定）: "${updated}"`);
+    return { ok: true, message: `↩️ タスク未完了に戻しました: ${updated}`, event_key: eventKey };
+  }
+  
   // 今日のイベントを取得
   const startOfDay = new Date(now.getFullYear(), now.getMonth(), now.getDate(), 0, 0, 0);
   const endOfDay = new Date(now.getFullYear(), now.getMonth(), now.getDate(), 23, 59, 59);
@@ -249,12 +294,91 @@ function unmarkTaskAsComplete_(taskTitle) {
   };
 }
 
+/**
+ * 複数タスクの完了マーク / 解除を1回の呼び出しで行う
+ * 今日のイベントは1回だけ取得し、各タスクは markTaskAsComplete_ / unmarkTaskAsComplete_ と同じ規則で決める
+ * （キーがあればキー、無ければ開始順で最初の部分一致。同じバッチで更新済みのイベントは再度選ばない）
+ * @param {Array<Object>} items - [{task, event_key}]
+ * @param {boolean} complete - true: ✓を付ける / false: ✓を外す
+ * @return {Object} 結果（results にタスクごとの ok・message）
+ */
+function setTasksCompleteBatch_(items, complete) {
+  const now = new Date();
+  const startOfDay = new Date(now.getFullYear(), now.getMonth(), now.getDate(), 0, 0, 0);
+  const endOfDay = new Date(now.getFullYear(), now.getMonth(), now.getDate(), 23, 59, 59);
+  
+  const calendar = CalendarApp.getDefaultCalendar();
+  const events = calendar.getEvents(startOfDay, endOfDay).filter(ev => !ev.isAllDayEvent());
+  const byKey = {};
+  for (const ev of events) {
+    byKey[`${ev.getId()}@${ev.getStartTime().getTime()}`] = ev;
+  }
+  
+  const isTarget = (title) => complete ? !title.includes('✓') : title.includes('✓');
+  const results = [];
+  let succeeded = 0;
+  
+  for (const item of items) {
+    const taskTitle = (item && item.task) || '';
+    const eventKey = (item && item.event_key) || null;
+    let target = null;
+    
+    if (eventKey) {
+      // 今日の予定ならAPIを呼ばずに決まる（明日以降のキーだけ個別に取得）
+      target = byKey[eventKey] || findEventByKey_(eventKey);
+      if (target && (target.isAllDayEvent() || !isTarget(target.getTitle()))) target = null;
+    }
+    if (!target && taskTitle) {
+      for (const ev of events) {
+        const title = ev.getTitle();
+        if (isTarget(title) && title.includes(taskTitle)) {
+          target = ev;
+          break;
+        }
+      }
+    }
+    
+    if (!target) {
+      results.push({
+        task: taskTitle,
+        ok: false,
+        message: complete ? `⚠️ タスクが見つかりません: "${taskTitle}"` : `⚠️ 完了タスクが見つかりません: "${taskTitle}"`
+      });
+      continue;
+    }
+    
+    const title = target.getTitle();
+    const updated = complete ? title + ' ✓' : title.replace(/\s*✓\s*$/, '').trim();
+    target.setTitle(updated);
+    succeeded++;
+    console.log(`${complete ? '✅ タスク完了' : '↩️  タスク未完了に戻す'}（一括）: "${title}" → "${updated}"`);
+    results.push({
+      task: taskTitle,
+      ok: true,
+      message: complete ? `✅ タスク完了: ${updated}` : `↩️ タスク未完了に戻しました: ${updated}`,
+      event_key: `${target.getId()}@${target.getStartTime().getTime()}`,
+      title: updated
+    });
+  }
+  
+  return {
+    ok: succeeded > 0,
+    mode: complete ? 'mark_complete_batch' : 'unmark_complete_batch',
+    succeeded: succeeded,
+    failed: results.length - succeeded,
+    results: results,
+    message: `${succeeded}/${results.length}件のタスクを更新しました`
+  };
+}
+
 /**
  * マストワンタスクを設定（今日の主役タスクに☆マークを付ける）
+ * 既存の☆を外すために今日のイベントは走査するが、対象はキーがあればキーで決める
  * @param {string} taskTitle - タスクタイトル（部分一致）
+ * @param {string|null} eventKey - Bot側で解決済みのイベントキー
  * @return {Object} 結果
  */
-function setMustOneTask_(taskTitle) {
+function setMustOneTask_(taskTitle, eventKey) {
   const tz = SETTINGS.TIMEZONE;
   const now = new Date();
   
@@ -283,7 +407,14 @@ function setMustOneTask_(taskTitle) {
     }
   }
   
-  // 指定されたタスクに☆を追加
+  // 指定されたタスクに☆を追加（キーで見つかればそれを使う）
+  const target = findEventByKey_(eventKey);
+  if (target && !target.isAllDayEvent() && !target.getTitle().includes('✓')) {
+    updatedTitle = '☆ ' + target.getTitle().replace(/☆+/g, '').trim();
+    target.setTitle(updatedTitle);
+    console.log(`🌟 マストワン設定（キー指定）: "${updatedTitle}"`);
+    return { ok: true, message: `🌟 今日の主役タスクに設定しました: ${updatedTitle}`, event_key: eventKey };
+  }
   for (const event of events) {
     const title = event.getTitle();
     
@@ -513,6 +644,18 @@ function extractPriorityFromTitle_(title) {
   return 'other';
 }
 
+/**
+ * "yyyy-MM-dd" をスクリプトのタイムゾーンの0時の Date にする
+ * @param {string} text - 日付文字列
+ * @return {Date|null} 不正な形式なら null
+ */
+function parseYmd_(text) {
+  const m = /^(\d{4})-(\d{2})-(\d{2})$/.exec(text || '');
+  if (!m) return null;
+  const d = new Date(Number(m[1]), Number(m[2]) - 1, Number(m[3]), 0, 0, 0);
+  return d.getDate() === Number(m[3]) ? d : null;
+}
+
 /**
  * 既存カレンダーイベントの自動フォーマット機能
  * A/B/Cを★★★/★★/★に変換し、統一された表示にする
@@ -809,6 +952,67 @@ function formatEventForResponse_(event, timezone) {
   };
 }
 
+// =====================================================================
+// イベント差分エクスポート（Bot側ミラー用）
+// =====================================================================
+
+/**
+ * 指定期間のイベントのうち、カーソル以降に更新されたものを返す
+ * Bot側のローカルミラーはこの差分で増分同期する
+ * @param {string|null} since - 前回同期時のカーソル（ISO文字列）。nullなら全件
+ * @param {number} daysBack - 今日から何日前まで対象にするか
+ * @param {number} daysForward - 今日から何日先まで対象にするか
+ * @param {string|null} knownStart - Bot側が保持している期間の開始（ISO文字列）
+ * @param {string|null} knownEnd - Bot側が保持している期間の終了（ISO文字列）
+ * @return {Object} { cursor, window, full, events, keys }
+ */
+function exportEventsSince_(since, daysBack, daysForward, knownStart, knownEnd) {
+  const tz = SETTINGS.TIMEZONE;
+  // 取得中の更新を取りこぼさないよう、カーソルは取得前の時刻にする
+  const cursor = new Date();
+  const now = cursor;
+  const startDate = new Date(now.getFullYear(), now.getMonth(), now.getDate() - daysBack, 0, 0, 0);
+  const endDate = new Date(now.getFullYear(), now.getMonth(), now.getDate() + daysForward, 23, 59, 59);
+
+  const sinceDate = since ? new Date(since) : null;
+  const known = (knownStart && knownEnd) ? { start: new Date(knownStart), end: new Date(knownEnd) } : null;
+
+  const calendar = CalendarApp.getDefaultCalendar();
+  const events = calendar.getEvents(startDate, endDate);
+
+  const changed = [];
+  const keys = [];
+  events.forEach(event => {
+    const start = event.getStartTime();
+    // 繰り返し予定は同じIDを共有するため、開始時刻と組み合わせてキーにする
+    const key = `${event.getId()}@${start.getTime()}`;
+    keys.push(key);
+
+    // Bot側がまだ持っていない期間に入ってきたイベントは更新日時に関係なく送る
+    const outsideKnown = known && (start < known.start || start > known.end);
+    if (!sinceDate || outsideKnown || event.getLastUpdated() > sinceDate) {
+      const formatted = formatEventForResponse_(event, tz);
+      formatted.key = key;
+      formatted.id = event.getId();
+      formatted.allDay = event.isAllDayEvent();
+      changed.push(formatted);
+    }
+  });
+
+  console.log(`🔄 イベント差分エクスポート: 変更${changed.length}件 / 全${keys.length}件`);
+
+  return {
+    cursor: cursor.toISOString(),
+    window: {
+      start: startDate.toISOString(),
+      end: endDate.toISOString()
+    },
+    full: !sinceDate,
+    events: changed,
+    keys: keys
+  };
+}
+
 // =====================================================================
 // 既存予定取得機能
 // =====================================================================
@@ -1720,7 +1924,49 @@ function goHome_() {
 
 // ===== Web API =====
 
+/**
+ * 冪等キー（idempotency_key）付きのリクエストは、同じキーの再送に前回の結果を返す
+ * Bot側のリトライキューがタイムアウト後に再送しても、予定を二重に作成・更新しない
+ */
+const IDEMPOTENCY_TTL_SECONDS = 21600; // CacheServiceの上限（6時間）
+const IDEMPOTENCY_MAX_BYTES = 90000;   // CacheServiceの値は100KBまで
+
+function getIdempotencyKey_(e) {
+  const keyParam = (e.parameter && e.parameter.key) || null;
+  if (keyParam !== API_KEY || !e.postData || !e.postData.contents) return null;
+  try {
+    const key = JSON.parse(e.postData.contents).idempotency_key;
+    return (typeof key === 'string' && key && key.length <= 200) ? key : null;
+  } catch (err) {
+    return null;
+  }
+}
+
 function doPost(e) {
+  const idemKey = getIdempotencyKey_(e);
+  if (!idemKey) return handlePost_(e);
+
+  const cache = CacheService.getScriptCache();
+  const cacheKey = 'idem:' + idemKey;
+  const cached = cache.get(cacheKey);
+  if (cached) {
+    console.log(`♻️ 冪等キー一致のため前回の結果を返します: ${idemKey}`);
+    return ContentService.createTextOutput(cached).setMimeType(ContentService.MimeType.JSON);
+  }
+
+  const output = handlePost_(e);
+  try {
+    const content = output.getContent();
+    if (content.length <= IDEMPOTENCY_MAX_BYTES && JSON.parse(content).ok) {
+      cache.put(cacheKey, content, IDEMPOTENCY_TTL_SECONDS);
+    }
+  } catch (err) {
+    console.log('⚠️ 冪等キャッシュ保存エラー:', err.toString());
+  }
+  return output;
+}
+
+function handlePost_(e) {
   try {
     const keyParam = (e.parameter && e.parameter.key) || null;
     if (keyParam !== API_KEY) {
@@ -1799,7 +2045,7 @@ function doPost(e) {
         .setMimeType(ContentService.MimeType.JSON);
       }
       
-      const result = markTaskAsComplete_(taskToComplete);
+      const result = markTaskAsComplete_(taskToComplete, body.event_key || null);
       return ContentService.createTextOutput(JSON.stringify(result))
         .setMimeType(ContentService.MimeType.JSON);
     }
@@ -1815,7 +2061,23 @@ function doPost(e) {
         .setMimeType(ContentService.MimeType.JSON);
       }
       
-      const result = unmarkTaskAsComplete_(taskToUnmark);
+      const result = unmarkTaskAsComplete_(taskToUnmark, body.event_key || null);
+      return ContentService.createTextOutput(JSON.stringify(result))
+        .setMimeType(ContentService.MimeType.JSON);
+    }
+
+    // 🆕 複数タスクの完了マーク / 解除（1回のPOSTで今日のイベントを1回だけ取得）
+    if (mode === 'mark_complete_batch' || mode === 'unmark_complete_batch') {
+      const items = Array.isArray(body.items) ? body.items : [];
+      if (items.length === 0) {
+        return ContentService.createTextOutput(JSON.stringify({ 
+          ok: false, 
+          error: 'パラメータ "items" が必要です（[{"task": "...", "event_key": "..."}]）' 
+        }))
+        .setMimeType(ContentService.MimeType.JSON);
+      }
+      
+      const result = setTasksCompleteBatch_(items, mode === 'mark_complete_batch');
       return ContentService.createTextOutput(JSON.stringify(result))
         .setMimeType(ContentService.MimeType.JSON);
     }
@@ -1831,7 +2093,7 @@ function doPost(e) {
         .setMimeType(ContentService.MimeType.JSON);
       }
       
-      const result = setMustOneTask_(taskToMark);
+      const result = setMustOneTask_(taskToMark, body.event_key || null);
       return ContentService.createTextOutput(JSON.stringify(result))
         .setMimeType(ContentService.MimeType.JSON);
     }
@@ -1843,20 +2105,53 @@ function doPost(e) {
         .setMimeType(ContentService.MimeType.JSON);
     }
 
+    // 🆕 イベント差分エクスポート（Bot側ローカルミラーの同期用）
+    if (mode === 'export_events') {
+      const result = exportEventsSince_(
+        body.since || null,
+        body.days_back || 7,
+        body.days_forward || 30,
+        body.known_start || null,
+        body.known_end || null
+      );
+      return ContentService.createTextOutput(JSON.stringify({
+        ok: true,
+        mode: 'export_events',
+        ...result
+      }))
+      .setMimeType(ContentService.MimeType.JSON);
+    }
+
     // 🆕 既存イベント自動フォーマット
     if (mode === 'format_events') {
       const daysBack = body.days_back || 7;  // デフォルト7日前から
       const daysForward = body.days_forward || 30;  // デフォルト30日先まで
       
       const now = new Date();
-      const startDate = new Date(now.getFullYear(), now.getMonth(), now.getDate() - daysBack, 0, 0, 0);
-      const endDate = new Date(now.getFullYear(), now.getMonth(), now.getDate() + daysForward, 23, 59, 59);
+      let startDate = new Date(now.getFullYear(), now.getMonth(), now.getDate() - daysBack, 0, 0, 0);
+      let endDate = new Date(now.getFullYear(), now.getMonth(), now.getDate() + daysForward, 23, 59, 59);
+      
+      // Botが期間を数日ずつのウィンドウに分けて送る場合（"yyyy-MM-dd"、両端の日を含む）
+      const windowStart = parseYmd_(body.start);
+      const windowEnd = parseYmd_(body.end);
+      if (body.start || body.end) {
+        if (!windowStart || !windowEnd || windowStart > windowEnd) {
+          return ContentService.createTextOutput(JSON.stringify({
+            ok: false,
+            error: 'パラメータ "start"・"end" は yyyy-MM-dd 形式で指定してください'
+          }))
+          .setMimeType(ContentService.MimeType.JSON);
+        }
+        startDate = windowStart;
+        endDate = new Date(windowEnd.getFullYear(), windowEnd.getMonth(), windowEnd.getDate(), 23, 59, 59);
+      }
       
       const result = formatExistingEvents_(startDate, endDate);
       
       return ContentService.createTextOutput(JSON.stringify({
         ok: true,
         mode: 'format_events',
+        window: { start: body.start || null, end: body.end || null },
         result: result
       }))
       .setMimeType(ContentService.MimeType.JSON);
@@ -2024,9 +2319,11 @@ function doGet(e) {
         'get_schedule': 'POST with {"mode":"get_schedule", "date":"今日", "days":1}',
         'weekly_report': 'POST with {"mode":"weekly_report"}',
         'progress': 'POST with {"mode":"progress"}',
-        'mark_complete': 'POST with {"mode":"mark_complete", "task":"task_name"}',
+        'mark_complete': 'POST with {"mode":"mark_complete", "task":"task_name", "event_key":"(optional)"}',
         'unmark_complete': 'POST with {"mode":"unmark_complete", "task":"task_name"}',
-        'format_events': 'POST with {"mode":"format_events", "days_back":7, "days_forward":30}'
+        'mark_complete_batch': 'POST with {"mode":"mark_complete_batch", "items":[{"task":"task_name", "event_key":"(optional)"}]}',
+        'unmark_complete_batch': 'POST with {"mode":"unmark_complete_batch", "items":[{"task":"task_name", "event_key":"(optional)"}]}',
+        'format_events': 'POST with {"mode":"format_events", "days_back":7, "days_forward":30} or {"mode":"format_events", "start":"yyyy-MM-dd", "end":"yyyy-MM-dd"}'
       }
     }))
     .setMimeType(ContentService.MimeType.JSON);
@@ -2063,6 +2360,7 @@ function doGet(e) {
  *   例: "細胞継代 ★★★" → "細胞継代 ★★★ ✓"
  * - 完了マークAPI: {"mode":"mark_complete", "task":"細胞継代"}
  * - 完了解除API: {"mode":"unmark_complete", "task":"細胞継代"}
+ * - 一括完了API: {"mode":"mark_complete_batch", "items":[{"task":"細胞継代"},{"task":"データ解析"}]}
  * - 進捗レポート: {"mode":"progress"} で今日の達成率を取得
  * - 自動通知: 13:00と20:00に進捗レポート送信（トリガー設定必要）
  * 
@@ -0,0 +1,129 @@
+# benchmarks/bench_bulk_done.py
+# /done・/undone の一括指定（mark_complete_batch / unmark_complete_batch）の確認と計測
+# - GASの setTasksCompleteBatch_ と同じ規則のスタブで、1件ずつ送った場合と同じタスクが更新されること
+# - 成功した項目だけが書き込みリスナー（進捗モデル）に1件ずつ通知され、モデルがGASと一致すること
+# - N件を1回のPOSTにまとめたときの所要時間（1件ずつN回送る場合との比較）
+#
+# 使い方: python benchmarks/bench_bulk_done.py [タスク数] [GASの1回あたりの遅延秒]
+
+import asyncio
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bench_progress_model import TODAY, FakeDayCalendar  # noqa: E402
+from calendar_store import JST  # noqa: E402
+from gas_client import GasClient  # noqa: E402
+from progress_model import ProgressModel  # noqa: E402
+from stub_gas import StubGas  # noqa: E402
+
+
+class KeyedCalendar(FakeDayCalendar):
+    """更新したイベントのキー（"ID@開始ms"）も返すフェイクカレンダー"""
+
+    def _key(self, ev):
+        return f"ev{id(ev)}@{int(ev['start'].replace(tzinfo=JST).timestamp() * 1000)}"
+
+    def _set(self, text, complete):
+        for ev in self._tasks():
+            if ("✓" in ev["title"]) != complete and text in ev["title"]:
+                title = ev["title"]
+                ev["title"] = title + " ✓" if complete else title.rstrip(" ✓").strip()
+                return {"ok": True, "event_key": self._key(ev), "message": ev["title"]}
+        return {"ok": False, "message": f"⚠️ タスクが見つかりません: \"{text}\""}
+
+    def handle(self, body):
+        """doPost の mark_complete(_batch) / unmark_complete(_batch) 相当"""
+        mode = body.get("mode")
+        if mode in ("mark_complete", "unmark_complete"):
+            return self._set(body["task"], mode == "mark_complete")
+        if mode in ("mark_complete_batch", "unmark_complete_batch"):
+            complete = mode == "mark_complete_batch"
+            # 今日のイベントの取得は1回（スタブの遅延も1回分）
+            results = [dict(self._set(item["task"], complete), task=item["task"]) for item in body["items"]]
+            succeeded = sum(1 for r in results if r["ok"])
+            return {"ok": succeeded > 0, "mode": mode, "succeeded": succeeded,
+                    "failed": len(results) - succeeded, "results": results}
+        return {"ok": False, "error": f"unknown mode {mode}"}
+
+
+async def check_batch_matches_single(n):
+    """同じ入力を一括と1件ずつで送り、カレンダーとモデルが同じ状態になること"""
+    rng = random.Random(5)
+    tasks = [f"タスク{rng.randrange(n + 5)}" for _ in range(n)] + ["存在しないタスク", "タスク1"]
+    states = []
+    for batched in (True, False):
+        cal = KeyedCalendar(n, random.Random(1))
+        stub = StubGas(latency=0, handler=cal.handle).start_in_thread()
+        client = GasClient(stub.url, "bench")
+        model = ProgressModel("bench", now=lambda: TODAY)
+        model.reconcile(cal.progress(), TODAY)
+        client.add_write_listener(model.apply_write)
+        try:
+            if batched:
+                data = await client.post({"mode": "mark_complete_batch", "items": [{"task": t} for t in tasks]})
+                assert len(data["results"]) == len(tasks)
+                assert not data["results"][-2]["ok"], "存在しないタスクは失敗として返る"
+                assert len(stub.requests) == 1
+            else:
+                for t in tasks:
+                    await client.post({"mode": "mark_complete", "task": t})
+            assert model.progress(TODAY) == cal.progress(), "進捗モデルがGASとずれた"
+            states.append([ev["title"] for ev in cal.events])
+        finally:
+            await client.close()
+            stub.stop_thread()
+    assert states[0] == states[1], "一括と1件ずつで更新されたタスクが違う"
+
+    # 取り消しも同じ
+    cal = KeyedCalendar(n, random.Random(1))
+    for t in ("タスク2", "タスク3"):
+        cal.mark_complete(t)
+    stub = StubGas(latency=0, handler=cal.handle).start_in_thread()
+    client = GasClient(stub.url, "bench")
+    model = ProgressModel("bench", now=lambda: TODAY)
+    model.reconcile(cal.progress(), TODAY)
+    client.add_write_listener(model.apply_write)
+    try:
+        data = await client.post({"mode": "unmark_complete_batch",
+                                  "items": [{"task": "タスク2"}, {"task": "タスク3"}, {"task": "タスク4"}]})
+        assert [r["ok"] for r in data["results"]] == [True, True, False]
+        assert model.progress(TODAY) == cal.progress()
+    finally:
+        await client.close()
+        stub.stop_thread()
+    print(f"✅ {len(tasks)}件の一括完了・取り消しが1件ずつの場合と同じ結果になり、進捗モデルとも一致")
+
+
+async def bench_latency(n, latency):
+    results = {}
+    for batched in (False, True):
+        cal = KeyedCalendar(n, random.Random(1))
+        stub = StubGas(latency=latency, handler=cal.handle).start_in_thread()
+        client = GasClient(stub.url, "bench")
+        tasks = [f"タスク{i} " for i in range(n)]
+        try:
+            started = time.perf_counter()
+            if batched:
+                await client.post({"mode": "mark_complete_batch", "items": [{"task": t} for t in tasks]})
+            else:
+                # /done を続けて打つのと同じく1件ずつ順番に送る
+                for t in tasks:
+                    await client.post({"mode": "mark_complete", "task": t})
+            results[batched] = (time.perf_counter() - started, len(stub.requests))
+        finally:
+            await client.close()
+            stub.stop_thread()
+    print(f"\n{n}件の完了マーク（GAS 1回あたり {latency * 1000:.0f}ms）:")
+    print(f"  1件ずつ : {results[False][0] * 1000:7.0f}ms（POST {results[False][1]}回）")
+    print(f"  一括    : {results[True][0] * 1000:7.0f}ms（POST {results[True][1]}回）")
+
+
+if __name__ == "__main__":
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 10
+    latency = float(sys.argv[2]) if len(sys.argv) > 2 else 0.2
+    asyncio.run(check_batch_matches_single(n))
+    asyncio.run(bench_latency(n, latency))
@@ -0,0 +1,158 @@
+# benchmarks/bench_calendar_links.py
+# Googleカレンダーリンクの一括生成（calendar_links.calendar_links）の確認と計測
+# - オフセット無しの時刻を、イベントごとに zoneinfo で変換した場合と同じUTCにすること
+#   （夏時間の切り替わり前後・30分ずれの夏時間・UTC+5:30 などを含む複数のタイムゾーンで）
+# - オフセット付きの時刻（/t2g の created の "...Z"）はタイムゾーンによらず同じUTCになること
+#   （変更前の generate_calendar_link は "Z" の時刻からさらに9時間引いていた）
+# - 1万件のリンク生成の時間（変更前の1件ずつの生成との比較）
+#
+# 使い方: python benchmarks/bench_calendar_links.py [イベント数]
+
+import os
+import random
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+from urllib.parse import parse_qs, quote_plus, urlparse
+from zoneinfo import ZoneInfo
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from calendar_links import FALLBACK_URL, calendar_links  # noqa: E402
+
+ZONES = ["Asia/Tokyo", "UTC", "America/New_York", "Europe/London", "Australia/Lord_Howe",
+         "Asia/Kolkata", "America/Sao_Paulo", "Pacific/Chatham"]
+
+
+def legacy_generate_calendar_link(event_title, start_datetime, end_datetime):
+    """変更前の main.generate_calendar_link（比較用）"""
+    try:
+        if isinstance(start_datetime, str):
+            start_dt = datetime.fromisoformat(start_datetime.replace('Z', '+00:00'))
+        else:
+            start_dt = start_datetime
+        if isinstance(end_datetime, str):
+            end_dt = datetime.fromisoformat(end_datetime.replace('Z', '+00:00'))
+        else:
+            end_dt = end_datetime
+        from datetime import timedelta
+        start_utc = start_dt.replace(tzinfo=None) - timedelta(hours=9)
+        end_utc = end_dt.replace(tzinfo=None) - timedelta(hours=9)
+        start_str = start_utc.strftime('%Y%m%dT%H%M%SZ')
+        end_str = end_utc.strftime('%Y%m%dT%H%M%SZ')
+        base_url = "https://calendar.google.com/calendar/render"
+        params = {'action': 'TEMPLATE', 'text': event_title, 'dates': f"{start_str}/{end_str}", 'ctz': 'Asia/Tokyo'}
+        query_string = "&".join([f"{key}={quote_plus(str(value))}" for key, value in params.items()])
+        return f"{base_url}?{query_string}"
+    except Exception as e:
+        print(f"カレンダーリンク生成エラー: {e}")
+        return "https://calendar.google.com/"
+
+
+def reference_stamp(value, zone):
+    """1件ずつ zoneinfo で変換した期待値"""
+    if value.endswith("Z"):
+        dt = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    else:
+        dt = datetime.fromisoformat(value).replace(tzinfo=zone)
+    return dt.astimezone(timezone.utc).strftime("%Y%m%dT%H%M%SZ")
+
+
+def dates_of(url):
+    query = parse_qs(urlparse(url).query)
+    return query["dates"][0].split("/"), query["ctz"][0], query["text"][0]
+
+
+def random_events(rng, n, utc=False):
+    events = []
+    base = datetime(2026, 1, 1)
+    for i in range(n):
+        start = base + timedelta(minutes=rng.randrange(0, 365 * 24 * 4) * 15)
+        end = start + timedelta(minutes=rng.choice((15, 30, 60, 90, 180)))
+        if utc:
+            s, e = start.strftime("%Y-%m-%dT%H:%M:%S.000Z"), end.strftime("%Y-%m-%dT%H:%M:%S.000Z")
+        else:
+            s, e = start.strftime("%Y-%m-%dT%H:%M:%S"), end.strftime("%Y-%m-%dT%H:%M:%S")
+        events.append({"title": f"タスク{i} ★★ & 会議?#", "start": s, "end": e})
+    return events
+
+
+def check_correctness():
+    rng = random.Random(8)
+    events = random_events(rng, 3000)
+    # 夏時間の切り替わり前後（存在しない時刻・2回ある時刻も、zoneinfo の fold=0 と同じ結果）
+    for day, hours in (("2026-03-08", range(0, 5)), ("2026-11-01", range(0, 4)), ("2026-03-29", range(0, 4)),
+                       ("2026-10-25", range(0, 4)), ("2026-04-05", range(0, 4)), ("2026-10-04", range(0, 4))):
+        for h in hours:
+            for m in (0, 15, 30, 45):
+                t = f"{day}T{h:02d}:{m:02d}:00"
+                events.append({"title": "DST", "start": t, "end": t})
+    utc_events = random_events(rng, 500, utc=True)
+    for name in ZONES:
+        zone = ZoneInfo(name)
+        for ev, url in zip(events, calendar_links(events, name)):
+            (s, e), ctz, text = dates_of(url)
+            assert (s, e) == (reference_stamp(ev["start"], zone), reference_stamp(ev["end"], zone)), (name, ev)
+            assert ctz == name and text == ev["title"]
+        for ev, url in zip(utc_events, calendar_links(utc_events, name)):
+            (s, _), _, _ = dates_of(url)
+            assert s == reference_stamp(ev["start"], zone), (name, ev)
+    # 終日・datetime・解釈できない時刻
+    links = calendar_links([
+        {"title": "休日", "start": "2026-10-19", "end": "2026-10-20"},
+        {"title": "dt", "start": datetime(2026, 10, 19, 9), "end": datetime(2026, 10, 19, 10, tzinfo=timezone.utc)},
+        {"title": "壊れた時刻", "start": "不明", "end": None},
+        {"title": "時刻なし"},
+    ], "Asia/Tokyo")
+    assert dates_of(links[0])[0] == ["20261019", "20261020"]
+    assert dates_of(links[1])[0] == ["20261019T000000Z", "20261019T100000Z"]
+    assert links[2:] == [FALLBACK_URL, FALLBACK_URL]
+
+    # 変更前の実装は "Z" の時刻からさらに9時間引いていた
+    ev = {"title": "t", "start": "2026-10-19T00:00:00.000Z", "end": "2026-10-19T01:00:00.000Z"}
+    assert dates_of(legacy_generate_calendar_link(ev["title"], ev["start"], ev["end"]))[0][0] == "20261018T150000Z"
+    assert dates_of(calendar_links([ev])[0])[0][0] == "20261019T000000Z"
+    print(f"✅ {len(ZONES)}タイムゾーン × {len(events)}件（夏時間の切り替わり前後を含む）が1件ずつの zoneinfo 変換と一致、"
+          f"UTCの時刻はタイムゾーンによらず同じ")
+
+
+def packed_events(n):
+    """/t2g で作った予定のように、前の予定の終了と次の予定の開始が同じ"""
+    events = []
+    start = datetime(2026, 10, 19, 9)
+    for i in range(n):
+        end = start + timedelta(minutes=30)
+        events.append({"title": f"タスク{i} ★★", "start": start.strftime("%Y-%m-%dT%H:%M:%S"),
+                       "end": end.strftime("%Y-%m-%dT%H:%M:%S")})
+        start = end
+    return events
+
+
+def bench(n, repeat=5):
+    for label, events in (("ランダムな時刻", random_events(random.Random(1), n)), ("連続した予定", packed_events(n))):
+        bench_events(label, events, repeat)
+
+
+def bench_events(label, events, repeat):
+    n = len(events)
+
+    def old():
+        return [legacy_generate_calendar_link(ev["title"], ev["start"], ev["end"]) for ev in events]
+
+    def new():
+        return calendar_links(events, "Asia/Tokyo")
+
+    print(f"\n{n}件のリンク生成（{label}）:")
+    for name, fn in (("1件ずつ（従来）", old), ("一括", new)):
+        fn()
+        started = time.perf_counter()
+        for _ in range(repeat):
+            fn()
+        per_call = (time.perf_counter() - started) / repeat
+        print(f"  {name:10}: {per_call * 1000:7.1f}ms（1件 {per_call / n * 1e6:5.2f}µs）")
+
+
+if __name__ == "__main__":
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+    check_correctness()
+    bench(n)
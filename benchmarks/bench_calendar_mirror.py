@@ -0,0 +1,99 @@
+# benchmarks/bench_calendar_mirror.py
+# カレンダーミラーの増分同期と、ローカル読み取りのレイテンシを確認する
+# 定型の差分（全件 → 追加・更新・削除）を返すフェイクGASに対して同期する
+#
+# 使い方: python benchmarks/bench_calendar_mirror.py [1日あたりのイベント数] [GAS遅延秒]
+
+import asyncio
+import os
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from calendar_store import CalendarMirror, now_jst  # noqa: E402
+from gas_client import GasClient  # noqa: E402
+from stub_gas import StubGas  # noqa: E402
+
+
+def make_event(key, start, minutes, title):
+    end = start + timedelta(minutes=minutes)
+    return {
+        "key": key, "id": key.split("@")[0], "title": title, "allDay": False,
+        "start": start.strftime("%Y-%m-%dT%H:%M:%S"), "end": end.strftime("%Y-%m-%dT%H:%M:%S"),
+        "startTime": start.strftime("%H:%M"), "endTime": end.strftime("%H:%M"),
+    }
+
+
+class FakeCalendarGas:
+    """export_events に定型の差分を返し、それ以外は固定レスポンスを返すフェイクGAS"""
+
+    def __init__(self, per_day):
+        today = now_jst().replace(hour=8, minute=0, second=0, microsecond=0)
+        self.events = {}
+        for day in range(-7, 31):
+            for i in range(per_day):
+                start = today + timedelta(days=day, minutes=15 * i)
+                key = f"ev{day}_{i}@{int(start.timestamp())}"
+                self.events[key] = make_event(key, start, 10, f"タスク{day}_{i} ★★")
+        self.changed = set()
+        self.window = {
+            "start": (datetime.now(timezone.utc) - timedelta(days=8)).strftime("%Y-%m-%dT%H:%M:%S.000Z"),
+            "end": (datetime.now(timezone.utc) + timedelta(days=31)).strftime("%Y-%m-%dT%H:%M:%S.000Z"),
+        }
+
+    def __call__(self, body):
+        if body.get("mode") == "export_events":
+            since = body.get("since")
+            events = list(self.events.values()) if not since else [self.events[k] for k in self.changed]
+            self.changed = set()
+            return {"ok": True, "cursor": datetime.now(timezone.utc).isoformat(), "full": not since,
+                    "window": self.window, "events": events, "keys": list(self.events)}
+        if body.get("mode") == "get_schedule":
+            return {"ok": True, "events": list(self.events.values())[:20]}
+        return {"ok": True}
+
+
+async def main(per_day, latency):
+    fake = FakeCalendarGas(per_day)
+    stub = StubGas(latency=latency, handler=fake).start_in_thread()
+    client = GasClient(stub.url, "bench")
+    mirror = CalendarMirror(client)
+    try:
+        summary = await mirror.sync()
+        print(f"初回同期: {summary}")
+
+        # 差分: 1件完了、1件削除
+        first = next(iter(fake.events))
+        fake.events[first]["title"] = "✓ " + fake.events[first]["title"]
+        fake.changed.add(first)
+        del fake.events[list(fake.events)[-1]]
+        summary = await mirror.sync()
+        print(f"増分同期: {summary}")
+        assert summary["upserted"] == 1 and summary["removed"] == 1
+
+        started = time.perf_counter()
+        await client.call("get_schedule", date="今日", days=1)
+        gas_ms = (time.perf_counter() - started) * 1000
+
+        rounds = 1000
+        started = time.perf_counter()
+        for _ in range(rounds):
+            events = mirror.schedule("今日", 1)
+            progress = mirror.progress()
+        local_ms = (time.perf_counter() - started) * 1000 / rounds
+
+        print(f"GAS経由 /schedule: {gas_ms:.1f}ms")
+        print(f"ローカル /schedule+/progress: {local_ms:.3f}ms "
+              f"({len(events)}件, 完了 {progress['completedCount']}/{progress['totalTasks']})")
+        print(mirror.freshness_label())
+    finally:
+        await client.close()
+        stub.stop_thread()
+
+
+if __name__ == "__main__":
+    per_day = int(sys.argv[1]) if len(sys.argv) > 1 else 20
+    latency = float(sys.argv[2]) if len(sys.argv) > 2 else 0.5
+    asyncio.run(main(per_day, latency))
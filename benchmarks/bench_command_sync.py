@@ -0,0 +1,130 @@
+# benchmarks/bench_command_sync.py
+# スラッシュコマンドの差分同期（command_sync.sync_if_changed）の確認と計測
+# - 定義のハッシュは登録順によらず同じで、説明・引数・選択肢が変われば変わること
+# - 2回目以降の起動・再接続では tree.sync() を呼ばず、定義を変えたときだけ呼ぶこと
+# - 同期に失敗したらハッシュを保存せず、次の起動で再試行すること
+# - 起動からコマンドを使えるようになるまでの時間（毎回同期する従来の起動との比較。sync のREST呼び出しはフェイク）
+#
+# 使い方: python benchmarks/bench_command_sync.py [tree.sync の所要秒]
+
+import asyncio
+import os
+import sys
+import tempfile
+import time
+
+import discord
+from discord import app_commands
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from command_sync import SyncState, scope_key, sync_if_changed, tree_hash  # noqa: E402
+
+
+class FakeTree(app_commands.CommandTree):
+    """sync() だけRESTを呼ばずに待つ CommandTree"""
+
+    def __init__(self, client, latency=0.0, fail=False):
+        super().__init__(client)
+        self.latency = latency
+        self.fail = fail
+        self.syncs = 0
+
+    async def sync(self, *, guild=None):
+        self.syncs += 1
+        await asyncio.sleep(self.latency)
+        if self.fail:
+            raise discord.HTTPException(_FakeResponse(), "同期失敗")
+        return self.get_commands(guild=guild)
+
+
+class _FakeResponse:
+    status = 500
+    reason = "Internal Server Error"
+
+
+def build_tree(latency=0.0, order=1, describe="今日の予定を表示", fail=False):
+    """calendar_bot.commands と同じ形のコマンドを、order=-1 なら逆順に登録する"""
+    client = discord.Client(intents=discord.Intents.none())
+    tree = FakeTree(client, latency, fail)
+
+    async def schedule(interaction: discord.Interaction, date: str = "今日", days: int = 1):
+        pass
+
+    async def done(interaction: discord.Interaction, task: str, task2: str = None):
+        pass
+
+    async def report(interaction: discord.Interaction, period: str = "week"):
+        pass
+
+    commands = [
+        app_commands.Command(name="schedule", description=describe, callback=schedule),
+        app_commands.Command(name="done", description="タスクを完了にする", callback=done),
+        app_commands.Command(name="report", description="週間レポート", callback=report),
+    ]
+    for i in range(10):
+        async def extra(interaction: discord.Interaction, text: str):
+            pass
+        commands.append(app_commands.Command(name=f"cmd{i}", description=f"コマンド{i}", callback=extra))
+    for command in commands[::order]:
+        tree.add_command(command)
+    return tree
+
+
+async def check():
+    assert tree_hash(build_tree()) == tree_hash(build_tree(order=-1)), "登録順でハッシュが変わった"
+    assert tree_hash(build_tree()) != tree_hash(build_tree(describe="予定を表示")), "説明の変更を検出できない"
+
+    path = os.path.join(tempfile.mkdtemp(), "command_sync.json")
+    state = SyncState(path)
+    tree = build_tree()
+    first = await sync_if_changed(tree, state, 1)
+    again = await sync_if_changed(build_tree(), SyncState(path), 1)  # 再起動
+    assert first["synced"] and not again["synced"] and tree.syncs == 1
+    assert (await sync_if_changed(build_tree(), state, 1, guild=discord.Object(id=5)))["synced"], "ギルドは別に数える"
+    assert (await sync_if_changed(build_tree(), state, 2))["synced"], "アプリケーションが違えば同期する"
+    assert (await sync_if_changed(build_tree(), state, 1, force=True))["synced"]
+    assert (await sync_if_changed(build_tree(describe="予定を表示"), state, 1))["synced"], "定義を変えたら同期する"
+
+    # 失敗したらハッシュを保存しない
+    before = state.get(scope_key(1))
+    try:
+        await sync_if_changed(build_tree(describe="失敗する定義", fail=True), state, 1)
+        raise AssertionError("例外にならなかった")
+    except discord.HTTPException:
+        pass
+    assert state.get(scope_key(1)) == before
+    assert (await sync_if_changed(build_tree(describe="失敗する定義"), state, 1))["synced"], "次の起動で再試行する"
+
+    # 壊れたファイルは「未同期」として扱う
+    with open(path, "w", encoding="utf-8") as f:
+        f.write("{壊れた")
+    assert (await sync_if_changed(build_tree(), SyncState(path), 1))["synced"]
+    print("✅ ハッシュは登録順によらず定義の変更を検出・再起動では同期しない・失敗したら次回再試行")
+
+
+async def bench(latency, restarts=5):
+    print(f"\n起動 {restarts}回（tree.sync {latency:.1f}秒）でコマンドを使えるようになるまで:")
+    for label, skip in (("毎回同期（従来）", False), ("変わったときだけ同期", True)):
+        path = os.path.join(tempfile.mkdtemp(), "command_sync.json")
+        times, syncs = [], 0
+        for _ in range(restarts):
+            tree = build_tree(latency)
+            started = time.perf_counter()
+            if skip:
+                await sync_if_changed(tree, SyncState(path), 1)
+            else:
+                await tree.sync()
+            times.append(time.perf_counter() - started)
+            syncs += tree.syncs
+        print(f"  {label:14}: 初回 {times[0]:6.3f}s  2回目以降 平均 {sum(times[1:]) / (restarts - 1) * 1000:8.2f}ms"
+              f"  sync呼び出し {syncs}回")
+
+
+async def main(latency):
+    await check()
+    await bench(latency)
+
+
+if __name__ == "__main__":
+    asyncio.run(main(float(sys.argv[1]) if len(sys.argv) > 1 else 1.5))
@@ -0,0 +1,135 @@
+# benchmarks/bench_format_windows.py
+# /format のウィンドウ分割・並列実行・再開の確認と計測
+# - GASの formatExistingEvents_ の所要時間がイベント数に比例するフェイクで、
+#   61日を1回で送るとタイムアウトする量でもウィンドウに分ければ全件変換できること
+# - 1日でもタイムアウトする日があれば、その日だけ失敗として残り、次の実行はそこだけを処理すること
+#   （カーソルで再開した合計件数が、止まらずに全件処理した場合と同じになること）
+# - 同時実行数を超えてGASを呼ばないこと
+#
+# 使い方: python benchmarks/bench_format_windows.py [1日あたりのイベント数] [1件あたりの処理秒]
+
+import asyncio
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from format_runner import FormatCursor, pending_windows, run_windows, split_windows  # noqa: E402
+from gas_client import GasTimeout  # noqa: E402
+
+TODAY = date(2026, 10, 19)
+START, END = TODAY - timedelta(days=30), TODAY + timedelta(days=30)
+
+
+class FakeFormatGas:
+    """日ごとのイベント（A/B/C付きかどうか）を持ち、format_events の時間をイベント数に比例させる"""
+
+    def __init__(self, per_day, cost, rng, slow_days=()):
+        self.cost = cost
+        self.slow_days = set(slow_days)  # 1日分でもタイムアウトする日
+        self.events = {}
+        for i in range((END - START).days + 1):
+            day = START + timedelta(days=i)
+            self.events[day] = [f"タスク{j} {rng.choice('ABC')}" if rng.random() < 0.5 else f"タスク{j} ★"
+                                for j in range(per_day)]
+        self.calls = 0
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    async def call(self, mode, timeout=None, start=None, end=None):
+        assert mode == "format_events"
+        self.calls += 1
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            first, last = date.fromisoformat(start), date.fromisoformat(end)
+            days = [first + timedelta(days=i) for i in range((last - first).days + 1)]
+            seconds = sum(len(self.events[d]) for d in days) * self.cost
+            if seconds > timeout or self.slow_days & set(days):
+                await asyncio.sleep(timeout / 100)  # 待ち時間は縮めて、タイムアウトしたことにする
+                raise GasTimeout(mode, timeout)
+            await asyncio.sleep(seconds)
+            converted, skipped, results = 0, 0, []
+            for d in days:
+                for k, title in enumerate(self.events[d]):
+                    if title[-1] in "ABC":
+                        self.events[d][k] = title[:-1] + "★" * (3 - "ABC".index(title[-1]))
+                        converted += 1
+                        results.append({"original": title, "converted": self.events[d][k], "date": d.isoformat()})
+                    else:
+                        skipped += 1
+            return {"ok": True, "window": {"start": start, "end": end}, "result": {"converted": converted, "skipped": skipped, "results": results}}
+        finally:
+            self.in_flight -= 1
+
+
+async def check_resume(per_day, cost):
+    rng = random.Random(4)
+    expected = FakeFormatGas(per_day, cost, random.Random(4))
+    to_convert = sum(1 for titles in expected.events.values() for t in titles if t[-1] in "ABC")
+
+    gas = FakeFormatGas(per_day, cost, rng, slow_days={TODAY + timedelta(days=3)})
+    cursor = FormatCursor(os.path.join(tempfile.mkdtemp(), "format_cursor.db"))
+    windows = split_windows(START, END, 7)
+    timeout = per_day * 7 * cost * 1.5
+
+    async def on_window(window, window_result):
+        if window_result is not None:
+            await cursor.complete("t", window, window_result["converted"], window_result["skipped"])
+
+    try:
+        assert await cursor.begin("t", START, END, 7) is None
+        first = await run_windows(gas, windows, concurrency=4, timeout=timeout, on_window=on_window)
+        assert [w for w, _ in first["failed"]] == [(TODAY + timedelta(days=3),) * 2], first["failed"]
+        assert gas.max_in_flight <= 4
+
+        # 遅い日が直った後の2回目（別インスタンスで開き直す＝Botの再起動）
+        await cursor.close()
+        cursor = FormatCursor(cursor.path)
+        gas.slow_days.clear()
+        done = await cursor.begin("t", START, END, 7)
+        pending = pending_windows(windows, done)
+        assert pending == [(TODAY + timedelta(days=3),) * 2], pending
+        calls_before = gas.calls
+        second = await run_windows(gas, pending, concurrency=4, timeout=timeout, on_window=on_window)
+        assert not second["failed"] and gas.calls == calls_before + 1
+        total = sum(c for *_, c, _ in done) + second["converted"]
+        assert total == to_convert, (total, to_convert)
+        assert all(t[-1] not in "ABC" for titles in gas.events.values() for t in titles)
+        await cursor.finish("t")
+        assert await cursor.begin("t", START, END, 7) is None, "完了後は最初から"
+    finally:
+        await cursor.close()
+    print(f"✅ タイムアウトした日だけが残り、再開後の合計 {to_convert}件が一括処理と一致（同時実行 ≤ 4）")
+
+
+async def bench(per_day, cost):
+    timeout = 20 * cost / 0.01  # 1件10ms相当のとき GAS の20秒
+    print(f"\n61日 × {per_day}件/日（1件 {cost * 1000:.1f}ms、タイムアウト {timeout:.1f}s）:")
+    gas = FakeFormatGas(per_day, cost, random.Random(1))
+    started = time.perf_counter()
+    try:
+        await gas.call("format_events", timeout=timeout, start=START.isoformat(), end=END.isoformat())
+        outcome = "成功"
+    except GasTimeout:
+        outcome = "タイムアウト（0件から再実行）"
+    print(f"  {'1回で全期間（従来）':14}: {time.perf_counter() - started:6.2f}s  {outcome}")
+    for label, days, concurrency in (("61日・半分ずつ分割", 61, 1), ("7日ずつ・直列", 7, 1),
+                                     ("7日ずつ・並列4", 7, 4), ("1日ずつ・並列4", 1, 4)):
+        gas = FakeFormatGas(per_day, cost, random.Random(1))
+        started = time.perf_counter()
+        result = await run_windows(gas, split_windows(START, END, days), concurrency=concurrency, timeout=timeout)
+        wall = time.perf_counter() - started
+        print(f"  {label:14}: {wall:6.2f}s  変換 {result['converted']:5d}件  GAS呼び出し {gas.calls:3d}回"
+              f"  失敗 {len(result['failed'])}")
+
+
+if __name__ == "__main__":
+    per_day = int(sys.argv[1]) if len(sys.argv) > 1 else 40
+    cost = float(sys.argv[2]) if len(sys.argv) > 2 else 0.0005
+    asyncio.run(check_resume(per_day, cost))
+    asyncio.run(bench(per_day, cost))
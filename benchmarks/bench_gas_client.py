@@ -0,0 +1,69 @@
+# benchmarks/bench_gas_client.py
+# 同時インタラクション時のGAS呼び出しレイテンシ比較
+#   before: イベントループ上で requests.post を直接呼ぶ（旧実装）
+#   after : GasClient（aiohttp）で非同期に呼ぶ
+#
+# 使い方: python benchmarks/bench_gas_client.py [同時ユーザー数] [GAS遅延秒]
+# 旧実装との比較に requests を使う（Bot本体は使わないため requirements.txt には無い。pip install requests）
+
+import asyncio
+import os
+import statistics
+import sys
+import time
+
+import requests
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from gas_client import GasClient  # noqa: E402
+from stub_gas import StubGas  # noqa: E402
+
+
+def percentile(values, p):
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(p / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+# レイテンシは「全員が同時にコマンドを送った時刻」から各自の応答完了までを測る
+async def fake_interaction_blocking(url, arrived, latencies):
+    r = requests.post(f"{url}?key=bench", json={"mode": "progress"}, timeout=30)
+    r.raise_for_status()
+    r.json()
+    latencies.append(time.perf_counter() - arrived)
+
+
+async def fake_interaction_async(client, arrived, latencies):
+    await client.call("progress")
+    latencies.append(time.perf_counter() - arrived)
+
+
+def report(label, latencies, wall):
+    print(f"{label:<8} p50={statistics.median(latencies) * 1000:8.1f}ms "
+          f"p99={percentile(latencies, 99) * 1000:8.1f}ms wall={wall:.2f}s")
+
+
+async def main(users, latency):
+    stub = StubGas(latency=latency).start_in_thread()
+    try:
+        latencies = []
+        started = time.perf_counter()
+        await asyncio.gather(*(fake_interaction_blocking(stub.url, started, latencies) for _ in range(users)))
+        report("before", latencies, time.perf_counter() - started)
+
+        client = GasClient(stub.url, "bench")
+        latencies = []
+        started = time.perf_counter()
+        await asyncio.gather(*(fake_interaction_async(client, started, latencies) for _ in range(users)))
+        report("after", latencies, time.perf_counter() - started)
+        await client.close()
+    finally:
+        stub.stop_thread()
+
+
+if __name__ == "__main__":
+    users = int(sys.argv[1]) if len(sys.argv) > 1 else 20
+    latency = float(sys.argv[2]) if len(sys.argv) > 2 else 0.2
+    print(f"同時ユーザー数={users}, GAS遅延={latency}s")
+    asyncio.run(main(users, latency))
@@ -0,0 +1,210 @@
+# benchmarks/bench_gas_guard.py
+# レート制限とサーキットブレーカーの動作確認
+# 前半は偽の時計で状態遷移を決定的にチェックし、後半はGASスタブの障害中に
+# ブレーカー有り／無しでハンドラが待たされる時間を比べる
+#
+# 使い方: python benchmarks/bench_gas_guard.py [障害中の呼び出し数]
+
+import asyncio
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from aiohttp import web  # noqa: E402
+
+from gas_cache import GasCache  # noqa: E402
+from gas_client import GasCircuitOpen, GasClient, GasHTTPError, GasTimeout  # noqa: E402
+from gas_guard import CircuitBreaker, TokenBucket  # noqa: E402
+from stub_gas import StubGas  # noqa: E402
+
+
+class FakeClock:
+    """time.monotonic / asyncio.sleep の代わりに使う、手動で進める時計"""
+
+    def __init__(self):
+        self.now = 1000.0
+        self.slept = []
+
+    def __call__(self):
+        return self.now
+
+    def advance(self, seconds):
+        self.now += seconds
+
+    async def sleep(self, seconds):
+        self.slept.append(seconds)
+        self.now += seconds
+
+
+async def check_token_bucket():
+    clock = FakeClock()
+    bucket = TokenBucket(rate=2, capacity=3, clock=clock, sleep=clock.sleep)
+
+    # バースト分（3件）は待たずに送れ、4件目からは 1/rate 秒ずつ待つ
+    assert [bucket.try_acquire() for _ in range(3)] == [0, 0, 0]
+    assert bucket.try_acquire() == 0.5
+    assert bucket.try_acquire() == 1.0, "待機中の呼び出し同士で同じトークンを取り合わない"
+    clock.advance(1.0)
+    assert bucket.try_acquire() == 0.5
+
+    # 429で半分に減速し、成功ごとに元のレートまで戻る
+    bucket.penalize()
+    assert bucket.rate == 1.0
+    bucket.penalize()
+    bucket.penalize()
+    bucket.penalize()
+    assert bucket.rate == 0.2, "min_rate より下げない"
+    for _ in range(100):
+        bucket.reward()
+    assert bucket.rate == 2, "base_rate より上げない"
+
+    # acquire() は必要な秒数だけ sleep する
+    clock2 = FakeClock()
+    bucket2 = TokenBucket(rate=4, capacity=1, clock=clock2, sleep=clock2.sleep)
+
+    for _ in range(5):
+        await bucket2.acquire()
+    assert clock2.slept == [0.25] * 4, clock2.slept
+    print("✅ TokenBucket: バースト・待機時間・429での減速と回復")
+
+
+def check_circuit_breaker():
+    clock = FakeClock()
+    breaker = CircuitBreaker(failure_threshold=3, reset_timeout=30, clock=clock)
+
+    # 連続失敗がしきい値未満なら閉じたまま、成功でリセット
+    breaker.record_failure()
+    breaker.record_failure()
+    breaker.record_success()
+    breaker.record_failure()
+    breaker.record_failure()
+    assert breaker.state == "closed" and breaker.allow()
+
+    # 3回連続で open、以降は即時失敗
+    breaker.record_failure()
+    assert breaker.state == "open"
+    assert not breaker.allow()
+    assert breaker.retry_after() == 30
+    clock.advance(29.9)
+    assert not breaker.allow()
+
+    # reset_timeout 経過で half_open、試行は1件だけ
+    clock.advance(0.1)
+    assert breaker.state == "half_open"
+    assert breaker.allow()
+    assert not breaker.allow(), "half_open では同時に1件しか試さない"
+
+    # 試行が失敗すると再び open（タイマーもリセット）
+    breaker.record_failure()
+    assert breaker.state == "open" and breaker.retry_after() == 30
+    clock.advance(30)
+
+    # 試行がキャンセルされたら枠を返す
+    assert breaker.allow()
+    breaker.release()
+    assert breaker.allow()
+
+    # 試行が成功すると closed
+    breaker.record_success()
+    assert breaker.state == "closed" and breaker.consecutive_failures == 0
+    assert breaker.times_opened == 2 and breaker.rejected == 3
+    print("✅ CircuitBreaker: closed → open → half_open → open → half_open → closed")
+
+
+async def check_client_degraded():
+    """ブレーカーが開いている間、GASを呼ばずにキャッシュの古い値・即時失敗を返す"""
+    state = {"down": False}
+
+    def handler(body):
+        if state["down"]:
+            return web.Response(status=503, text="Service Unavailable")
+        return {"ok": True, "mode": body["mode"], "events": [{"title": "会議"}]}
+
+    clock = FakeClock()
+    stub = StubGas(latency=0, handler=handler).start_in_thread()
+    client = GasClient(
+        stub.url, "bench",
+        cache=GasCache(ttls={"get_schedule": 60}, clock=clock),
+        breaker=CircuitBreaker(failure_threshold=2, reset_timeout=30, clock=clock),
+    )
+    try:
+        fresh = await client.call("get_schedule", date="今日", days=1)
+        assert fresh["ok"] and "degraded" not in fresh
+
+        # キャッシュ期限切れ後にGAS障害 → 2回の503でブレーカーが開く
+        clock.advance(61)
+        state["down"] = True
+        for _ in range(2):
+            try:
+                await client.call("get_schedule", date="今日", days=1)
+                raise AssertionError("503 のはず")
+            except GasHTTPError as e:
+                assert e.status_code == 503
+        assert client.circuit_open
+
+        sent = len(stub.requests)
+        degraded = await client.call("get_schedule", date="今日", days=1)
+        assert degraded["degraded"] and degraded["events"] == fresh["events"]
+        try:
+            await client.call("mark_complete", task="会議")
+            raise AssertionError("GasCircuitOpen のはず")
+        except GasCircuitOpen as e:
+            assert e.retry_after == 30
+        assert len(stub.requests) == sent, "open の間はGASを呼ばない"
+
+        # 復旧後、reset_timeout 経過で half_open → 成功で closed
+        state["down"] = False
+        clock.advance(30)
+        recovered = await client.call("mark_complete", task="会議")
+        assert recovered["ok"] and not client.circuit_open
+        print(f"✅ GasClient: 障害中はキャッシュの古い値で代替応答・書き込みは即時失敗 "
+              f"(代替応答 {client.degraded_responses}件)")
+    finally:
+        await client.close()
+        stub.stop_thread()
+
+
+async def outage_wall_time(calls, with_breaker):
+    """GASが応答しない障害中に calls 件のコマンドが来たとき、全員が応答を得るまでの時間"""
+    stub = StubGas(latency=5).start_in_thread()
+    breaker = CircuitBreaker(failure_threshold=3, reset_timeout=30) if with_breaker else None
+    client = GasClient(stub.url, "bench", default_timeout=0.5, breaker=breaker)
+    handler_times = []
+
+    async def command():
+        started = time.perf_counter()
+        try:
+            await client.call("mark_complete", task="会議")
+        except (GasTimeout, GasCircuitOpen):
+            pass
+        handler_times.append(time.perf_counter() - started)
+
+    try:
+        started = time.perf_counter()
+        # ユーザーが順番にコマンドを実行する（前の人がエラーを受け取ってから次の人）
+        for _ in range(calls):
+            await command()
+        wall = time.perf_counter() - started
+        return wall, len(stub.requests), handler_times[-1]
+    finally:
+        await client.close()
+        stub.stop_thread()
+
+
+async def main(calls):
+    await check_token_bucket()
+    check_circuit_breaker()
+    await check_client_degraded()
+
+    print(f"\nGAS無応答（タイムアウト0.5秒）中に {calls}件の書き込みコマンド:")
+    for with_breaker in (False, True):
+        wall, sent, last = await outage_wall_time(calls, with_breaker)
+        label = "ブレーカー有り" if with_breaker else "ブレーカー無し"
+        print(f"  {label}: 合計 {wall:.2f}s / GASへの送信 {sent}件 / 最後の1件 {last * 1000:.1f}ms")
+
+
+if __name__ == "__main__":
+    calls = int(sys.argv[1]) if len(sys.argv) > 1 else 10
+    asyncio.run(main(calls))
@@ -0,0 +1,140 @@
+# benchmarks/bench_importtime.py
+# 起動時のモジュール読み込み時間（python -X importtime）の確認と計測
+# - calendar_bot・calendar_bot.config の読み込みでは discord.py・aiohttp を読み込まないこと
+# - 設定が足りないときは discord.py を読み込む前に RuntimeError で終了すること
+# - metrics は /metrics のサーバーを起動するまで aiohttp.web を読み込まないこと、どのモジュールも requests を使わないこと
+# - GASの設定が無くても calendar_bot.commands などを読み込めること（Bot・テナントは create_app() で作る）
+# - Bot全体（calendar_bot.startup）の読み込み時間と、時間のかかっているパッケージ
+#   上限ミリ秒を指定すると、Bot全体の読み込みが上限を超えたとき終了コード1で終わる（CIで起動時間の悪化を検出する）
+#
+# 使い方: python benchmarks/bench_importtime.py [回数] [上限ミリ秒]
+
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+TARGETS = [
+    ("calendar_bot", "パッケージ"),
+    ("calendar_bot.config", "設定"),
+    ("metrics", "メトリクスの定義"),
+    ("calendar_bot.renderers", "整形（discord.py を含む）"),
+    ("calendar_bot.startup", "Bot全体"),
+]
+
+
+def bot_env(**extra):
+    """読み込みに必要なダミーの設定（.env は読まず、データは一時ディレクトリに置く）"""
+    env = {key: value for key, value in os.environ.items()
+           if key in ("PATH", "HOME", "SYSTEMROOT", "LANG", "VIRTUAL_ENV")}
+    env.update(DISCORD_TOKEN="x", GAS_ENDPOINT="http://127.0.0.1:1/exec", API_KEY="k",
+               DATA_DIR=tempfile.mkdtemp(), PYTHONDONTWRITEBYTECODE="1")
+    env.update(extra)
+    return env
+
+
+def importtime(code, env=None):
+    """python -X importtime -c code を実行し、(読み込んだモジュール -> (self, cumulative, 深さ), stderr, 終了コード)"""
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", code], cwd=ROOT,
+                            env=env or bot_env(), capture_output=True, text=True)
+    modules = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative, name = line[len("import time:"):].split("|")
+        depth = (len(name) - len(name.lstrip())) // 2
+        modules[name.strip()] = (int(self_us) / 1000, int(cumulative) / 1000, depth)
+    return modules, result.stderr, result.returncode
+
+
+_interpreter = None
+
+
+def total_ms(modules):
+    """最上位の読み込み（深さ0）の cumulative の合計 = その import 文にかかった時間（インタプリタ自体の起動分を除く）"""
+    global _interpreter
+    if _interpreter is None:
+        _interpreter = set(importtime("pass")[0])
+    return sum(cumulative for name, (_, cumulative, depth) in modules.items()
+               if depth == 0 and name not in _interpreter)
+
+
+def loaded(modules, package):
+    return any(name == package or name.startswith(package + ".") for name in modules)
+
+
+def check():
+    for target in ("calendar_bot", "calendar_bot.config"):
+        modules, stderr, code = importtime(f"import {target}")
+        assert code == 0, stderr
+        assert not loaded(modules, "discord") and not loaded(modules, "aiohttp"), f"{target} が重いモジュールを読み込んだ"
+
+    # 設定が足りなければ discord.py を読み込む前に終了する
+    env = bot_env(DISCORD_TOKEN="")
+    modules, stderr, code = importtime("import runpy; runpy.run_module('calendar_bot', run_name='__main__')", env)
+    assert code != 0 and "RuntimeError" in stderr and "DISCORD_TOKEN" in stderr, stderr[-500:]
+    assert not loaded(modules, "discord"), "設定の確認より先に discord.py を読み込んだ"
+
+    modules, stderr, code = importtime("import metrics")
+    assert code == 0 and not loaded(modules, "aiohttp"), "metrics が aiohttp を読み込んだ"
+
+    # GASの設定が無くても全モジュールを読み込める（テナント・Botは create_app() まで作らない）
+    env = bot_env(GAS_ENDPOINT="", API_KEY="")
+    modules, stderr, code = importtime(
+        "import calendar_bot.startup, calendar_bot.commands; from calendar_bot import app; "
+        "assert app.bot is None and app.tenants is None", env)
+    assert code == 0, stderr[-2000:]
+
+    # Bot全体を読み込んでも bot.run() は呼ばれず、requests は読み込まない
+    modules, stderr, code = importtime(
+        "import calendar_bot.startup as s; bot = s.create_app(); "
+        "assert s.create_app() is bot and len(bot.tree.get_commands()) == 13, bot.tree.get_commands()")
+    assert code == 0, stderr[-2000:]
+    assert not loaded(modules, "requests"), "requests を読み込んだ"
+    assert not loaded(modules, "aiohttp.web"), "起動前に aiohttp.web を読み込んだ"
+    print("✅ パッケージ・設定は discord.py なしで読み込める・設定ミスは読み込み前に終了・GASの設定なしでも全モジュールを読み込める・"
+          "aiohttp.web/requests は読み込まない")
+
+
+def bench(repeat):
+    print(f"\n読み込み時間（{repeat}回の中央値・python -X importtime）:")
+    full = None
+    for target, label in TARGETS:
+        runs = [importtime(f"import {target}")[0] for _ in range(repeat)]
+        ms = statistics.median(total_ms(modules) for modules in runs)
+        print(f"  {target:24} {label:20}: {ms:7.1f}ms")
+        full = runs[-1], ms
+    # 変更前（metrics が先頭で aiohttp.web を読み込んでいた）との比較
+    eager = statistics.median(total_ms(importtime("import calendar_bot.startup, aiohttp.web")[0])
+                              for _ in range(repeat))
+    print(f"  {'＋ aiohttp.web':24} {'Bot全体（変更前）':20}: {eager:7.1f}ms")
+
+    modules, ms = full
+    packages = {}
+    for name, (self_ms, _, _) in modules.items():
+        if name not in _interpreter:
+            package = name.split(".")[0]
+            packages[package] = packages.get(package, 0) + self_ms
+    print("\nBot全体の読み込みで時間のかかっているパッケージ（self の合計）:")
+    for package, spent in sorted(packages.items(), key=lambda item: -item[1])[:8]:
+        print(f"  {package:24} {spent:7.1f}ms")
+    return ms
+
+
+def main(repeat, budget):
+    check()
+    ms = bench(repeat)
+    if budget is not None:
+        if ms > budget:
+            print(f"\n❌ Bot全体の読み込み {ms:.1f}ms が上限 {budget:.0f}ms を超えました")
+            sys.exit(1)
+        print(f"\n✅ Bot全体の読み込み {ms:.1f}ms（上限 {budget:.0f}ms 以内）")
+
+
+if __name__ == "__main__":
+    repeat = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+    budget = float(sys.argv[2]) if len(sys.argv) > 2 else None
+    main(repeat, budget)
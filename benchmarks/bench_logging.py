@@ -0,0 +1,102 @@
+# benchmarks/bench_logging.py
+# 500件の予定を含む /schedule のGASレスポンスを、従来の print() でそのまま出力した場合と
+# jsonlog（切り詰め・伏せ字・サンプリング・別スレッド書き込み）で出力した場合のログ量と
+# 呼び出し側（イベントループ）で掛かる時間を比べる
+#
+# 使い方: python benchmarks/bench_logging.py [呼び出し回数]
+
+import io
+import json
+import logging
+import os
+import sys
+import tempfile
+import time
+from contextlib import redirect_stdout
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import jsonlog  # noqa: E402
+
+SECRET = "社外秘の打ち合わせ"
+
+
+def schedule_response(n=500):
+    events = []
+    for i in range(n):
+        day, slot = divmod(i, 20)
+        hour, minute = 8 + slot // 2, (slot % 2) * 30
+        events.append({
+            "id": f"evt{i:04d}@google.com",
+            "title": f"★★ {SECRET} {i}件目 - 資料レビューと議事録の整理",
+            "start": f"2025-11-{day + 1:02d}T{hour:02d}:{minute:02d}:00+09:00",
+            "end": f"2025-11-{day + 1:02d}T{hour:02d}:{minute + 29:02d}:00+09:00",
+            "description": "参加者: 山田・佐藤・鈴木\n" * 3,
+        })
+    return {"ok": True, "mode": "get_schedule", "events": events}
+
+
+def legacy(data, calls):
+    """従来の print(f"GAS APIレスポンス内容: {data}")"""
+    out = io.StringIO()
+    started = time.perf_counter()
+    with redirect_stdout(out):
+        for _ in range(calls):
+            print(f"GAS APIレスポンス内容: {data}")
+    elapsed = time.perf_counter() - started
+    return elapsed, len(out.getvalue().encode("utf-8")), out.getvalue()
+
+
+def structured(data, calls, level, sample):
+    with tempfile.NamedTemporaryFile("w+", encoding="utf-8", suffix=".log", delete=False) as f:
+        path = f.name
+    try:
+        with open(path, "w", encoding="utf-8") as stream:
+            jsonlog.setup(level, stream=stream)
+            log = jsonlog.get_logger("gas")
+            started = time.perf_counter()
+            for _ in range(calls):
+                # gas_client._request と同じ呼び出し方
+                if log.enabled(jsonlog.DEBUG):
+                    log.debug("gas_response", sample=sample, mode="get_schedule",
+                              summary=jsonlog.summarize(data), response=data)
+            elapsed = time.perf_counter() - started
+            jsonlog.shutdown()
+        with open(path, encoding="utf-8") as f:
+            text = f.read()
+        return elapsed, len(text.encode("utf-8")), text
+    finally:
+        os.remove(path)
+        logging.getLogger().handlers.clear()
+
+
+def main(calls):
+    data = schedule_response()
+    print(f"/schedule レスポンス: 予定{len(data['events'])}件 × {calls}回\n")
+
+    rows = [("print（従来）", legacy(data, calls))]
+    rows.append(("jsonlog INFO（debugは出力しない）", structured(data, calls, "INFO", None)))
+    rows.append(("jsonlog DEBUG（全件）", structured(data, calls, "DEBUG", None)))
+    rows.append(("jsonlog DEBUG（サンプリング10%）", structured(data, calls, "DEBUG", 0.1)))
+
+    base_bytes = rows[0][1][1]
+    for label, (elapsed, size, _) in rows:
+        ratio = f"{size / base_bytes * 100:6.2f}%" if base_bytes else "-"
+        print(f"  {label:<34}: 呼び出し側 {elapsed / calls * 1e6:9.1f}µs/回 / ログ量 {size:>10,} bytes ({ratio})")
+
+    # 伏せ字の確認: 予定名・説明がログに残らない
+    full = rows[2][1][2]
+    assert SECRET in rows[0][1][2], "従来の print は予定名をそのまま出力する"
+    assert SECRET not in full, "jsonlog は予定名を出力しない"
+    lines = full.splitlines()
+    assert len(lines) == calls
+    entry = json.loads(lines[0])
+    assert entry["event"] == "gas_response" and entry["summary"]["events"] == 500
+    assert entry["response"]["events"][-1] == "…(+495件)"
+    assert rows[1][1][1] == 0
+    print(f"\n✅ 伏せ字・切り詰めOK（1行 {len(lines[0].encode('utf-8'))} bytes）")
+
+
+if __name__ == "__main__":
+    calls = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    main(calls)
@@ -0,0 +1,149 @@
+# benchmarks/bench_message_chunks.py
+# 応答メッセージ分割（message_chunks.iter_chunks）の性質の確認と計測
+# - ランダムな入力（巨大な1行・日本語/絵文字・コードブロック混じり）で、
+#   全チャンクが上限以下・各チャンクのコードブロックが閉じている・内容が欠けない/増えないこと
+# - 1000件の /schedule を、全文を連結して旧 split_message で分ける場合と、
+#   行を作りながら分ける場合の時間と一時メモリ
+# - 上限が短すぎて1文字も入らないときは無限ループせずに ValueError になること
+#
+# 使い方: python benchmarks/bench_message_chunks.py [ランダム入力の数] [予定の件数]
+
+import os
+import random
+import re
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from message_chunks import FENCE, iter_chunks, split_message  # noqa: E402
+
+WORDS = ["細胞継代", "データ解析", "Weekly", "sync", "★★★", "✓", "🎉", "`code`", "a" * 30, "**太字**", "https://example.com/x"]
+_FENCE_LINE = re.compile(r"^\s*```[\w+-]{0,20}\s*$")
+
+
+def legacy_split_message(content, max_length=1900):
+    """変更前の main.split_message（比較用）"""
+    if len(content) <= max_length:
+        return [content]
+    chunks = []
+    current_chunk = ""
+    for line in content.split('\n'):
+        if len(current_chunk) + len(line) + 1 > max_length:
+            chunks.append(current_chunk)
+            current_chunk = line + '\n'
+        else:
+            current_chunk += line + '\n'
+    if current_chunk:
+        chunks.append(current_chunk)
+    return chunks
+
+
+def random_text(rng):
+    lines = []
+    in_fence = False
+    for _ in range(rng.randrange(1, 400)):
+        r = rng.random()
+        if r < 0.05:
+            lines.append(FENCE if in_fence else rng.choice([FENCE, "```py", "```diff"]))
+            in_fence = not in_fence
+        elif r < 0.08:
+            lines.append(" ".join(rng.choice(WORDS) for _ in range(rng.randrange(100, 1500))))  # 巨大な1行
+        elif r < 0.1:
+            lines.append("x" * rng.randrange(1900, 5000))  # 空白の無い巨大な1行
+        elif r < 0.15:
+            lines.append("")
+        else:
+            lines.append(" ".join(rng.choice(WORDS) for _ in range(rng.randrange(1, 12))))
+    if in_fence:
+        lines.append(FENCE)
+    return "\n".join(lines)
+
+
+def content_of(text):
+    """比較用: コードブロックの開閉行と空白を除いた中身"""
+    return re.sub(r"\s", "", "\n".join(line for line in text.split("\n") if not _FENCE_LINE.match(line)))
+
+
+def check_properties(cases):
+    rng = random.Random(11)
+    chunk_total = 0
+    for case in range(cases):
+        text = random_text(rng)
+        max_length = rng.choice([100, 500, 1900, 2000])
+        chunks = list(iter_chunks(text, max_length))
+        chunk_total += len(chunks)
+        for chunk in chunks:
+            assert 0 < len(chunk) <= max_length, (case, len(chunk), max_length)
+            assert chunk.count(FENCE) % 2 == 0, f"case {case}: コードブロックが閉じていない"
+        assert content_of("\n".join(chunks)) == content_of(text), f"case {case}: 内容が変わった"
+        # 行の列で渡しても文字列で渡しても同じ
+        assert list(iter_chunks(text.split("\n"), max_length)) == chunks
+    assert split_message("短い") == ["短い"]
+    assert list(iter_chunks("")) == [] and list(iter_chunks(["", "  "])) == []
+    # コードブロックを開いた直後で分かれるときは、空のブロックを作らず次のチャンクで開く
+    chunks = list(iter_chunks(["a" * 90, "```py", "b" * 50], 100))
+    assert chunks == ["a" * 90, "```py\n" + "b" * 50], chunks
+    # コードブロックの開閉の行も入らない上限は分けられない（無限ループせずに ValueError）
+    for content, max_length in (("x" * 10, 5), ("x" * 9, 8), (["a", "```", "b"], 7)):
+        try:
+            split_message(content, max_length)
+        except ValueError:
+            continue
+        raise AssertionError(f"max_length={max_length} で ValueError にならない")
+    # 分ける必要がなければ上限が短くても従来どおりそのまま返す
+    assert split_message("ok", 5) == ["ok"]
+    chunks = split_message(["x" * 30, "```", "y" * 30, "```"], 20)
+    assert all(len(chunk) <= 20 and chunk.count(FENCE) % 2 == 0 for chunk in chunks), chunks
+    assert content_of("\n".join(chunks)) == "x" * 30 + "y" * 30, chunks
+    print(f"✅ ランダム入力 {cases}件（{chunk_total}チャンク）: 上限以下・コードブロックは各チャンクで閉じる・内容は欠けない")
+
+
+def schedule_lines(events):
+    yield f"**📅 今日の予定 ({len(events)}個)**\n"
+    for title, start, end in events:
+        yield f"• {title} `{start}-{end}`"
+    yield "\n**🔗 Googleカレンダーで開く:**"
+    for title, start, end in events:
+        yield f"📅 [{title}](<https://calendar.google.com/calendar/render?action=TEMPLATE&text={title}>)"
+
+
+def bench(n, repeat=20):
+    rng = random.Random(2)
+    events = [(f"{rng.choice(WORDS)} {i} ★★", "09:00", "10:00") for i in range(n)]
+
+    def old():
+        # 変更前の /schedule: 全文を作ってから分割
+        lines = [f"**📅 今日の予定 ({len(events)}個)**\n"]
+        links = []
+        for title, start, end in events:
+            lines.append(f"• {title} `{start}-{end}`")
+            links.append(f"📅 [{title}](<https://calendar.google.com/calendar/render?action=TEMPLATE&text={title}>)")
+        result = "\n".join(lines)
+        result += "\n\n**🔗 Googleカレンダーで開く:**\n" + "\n".join(links)
+        return legacy_split_message(result)
+
+    def new():
+        return split_message(schedule_lines(events))
+
+    for label, fn in (("全文を連結して分割（従来）", old), ("行を作りながら分割", new)):
+        started = time.perf_counter()
+        for _ in range(repeat):
+            chunks = fn()
+        per_call = (time.perf_counter() - started) / repeat
+        tracemalloc.start()
+        fn()
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        over = sum(1 for c in chunks if len(c) > 2000)
+        print(f"  {label:16}: {per_call * 1000:7.2f}ms  一時メモリ {peak / 1024:7.0f}KiB  "
+              f"{len(chunks)}チャンク（2000字超 {over}）")
+
+
+if __name__ == "__main__":
+    cases = int(sys.argv[1]) if len(sys.argv) > 1 else 300
+    n = int(sys.argv[2]) if len(sys.argv) > 2 else 1000
+    check_properties(cases)
+    print(f"\n/schedule {n}件の応答の分割:")
+    bench(n)
@@ -0,0 +1,106 @@
+# benchmarks/bench_metrics.py
+# メトリクスの出力形式の確認と、observe() / inc() の1回あたりのコスト計測
+# ハンドラのホットパスで呼ぶため、GAS往復（数百ms）に対して無視できる大きさであることを確かめる
+#
+# 使い方: python benchmarks/bench_metrics.py [回数]
+
+import asyncio
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import aiohttp  # noqa: E402
+
+import metrics  # noqa: E402
+
+
+def check_exposition():
+    registry = metrics.Registry()
+    seconds = metrics.histogram("bench_seconds", "テスト用", ("mode",), buckets=(0.1, 1), registry=registry)
+    errors = metrics.counter("bench_errors_total", "テスト用", ("error",), registry=registry)
+    metrics.gauge("bench_state", "テスト用", lambda: 2, registry=registry)
+    metrics.gauge("bench_unsynced", "テスト用", lambda: None, registry=registry)
+
+    seconds.observe(0.05, mode="progress")
+    seconds.observe(0.5, mode="progress")
+    seconds.observe(3, mode="progress")
+    errors.inc(error='http_"503"')
+
+    text = registry.render()
+    expected = [
+        "# TYPE bench_seconds histogram",
+        'bench_seconds_bucket{mode="progress",le="0.1"} 1',
+        'bench_seconds_bucket{mode="progress",le="1"} 2',
+        'bench_seconds_bucket{mode="progress",le="+Inf"} 3',
+        'bench_seconds_sum{mode="progress"} 3.55',
+        'bench_seconds_count{mode="progress"} 3',
+        '# TYPE bench_errors_total counter',
+        'bench_errors_total{error="http_\\"503\\""} 1',
+        "bench_state 2",
+    ]
+    for line in expected:
+        assert line in text.splitlines(), f"{line!r} がありません:\n{text}"
+    assert not any(line.startswith("bench_unsynced") for line in text.splitlines()), "None のゲージは値を出力しない"
+
+    try:
+        seconds.observe(1, command="progress")
+        raise AssertionError("ラベル名の間違いは ValueError のはず")
+    except ValueError:
+        pass
+    print("✅ 出力形式: 累積バケット・_sum/_count・ラベルのエスケープ・値なしゲージ")
+    return registry
+
+
+async def check_http(registry):
+    runner = await metrics.start_http_server(0, registry=registry)
+    try:
+        port = runner.addresses[0][1]
+        async with aiohttp.ClientSession() as session:
+            async with session.get(f"http://127.0.0.1:{port}/metrics") as resp:
+                body = await resp.text()
+                assert resp.status == 200
+                assert resp.headers["Content-Type"].startswith("text/plain; version=0.0.4")
+        assert body == registry.render()
+        print(f"✅ GET /metrics: {len(body.splitlines())}行")
+    finally:
+        await runner.cleanup()
+
+
+def bench_overhead(n):
+    registry = metrics.Registry()
+    seconds = metrics.histogram("bench_seconds", "テスト用", ("command", "outcome"), registry=registry)
+    errors = metrics.counter("bench_errors_total", "テスト用", ("command", "error"), registry=registry)
+
+    started = time.perf_counter()
+    for i in range(n):
+        seconds.observe(i % 100 / 10, command="schedule", outcome="ok")
+    observe = (time.perf_counter() - started) / n
+
+    started = time.perf_counter()
+    for _ in range(n):
+        errors.inc(command="schedule", error="GasTimeout")
+    inc = (time.perf_counter() - started) / n
+
+    started = time.perf_counter()
+    for _ in range(n):
+        with seconds.time(command="schedule", outcome="ok"):
+            pass
+    timed = (time.perf_counter() - started) / n
+
+    print(f"\n{n}回の平均コスト:")
+    print(f"  Histogram.observe : {observe * 1e6:.2f}µs")
+    print(f"  Counter.inc       : {inc * 1e6:.2f}µs")
+    print(f"  Histogram.time    : {timed * 1e6:.2f}µs")
+
+
+async def main(n):
+    registry = check_exposition()
+    await check_http(registry)
+    bench_overhead(n)
+
+
+if __name__ == "__main__":
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    asyncio.run(main(n))
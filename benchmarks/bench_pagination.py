@@ -0,0 +1,156 @@
+# benchmarks/bench_pagination.py
+# /schedule・/progress のページ送り表示（paginator.PagedEmbed / PageView）の確認と計測
+# - 全ページを合わせると全項目がちょうど1回ずつ出ること、各ページの説明文が Embed の上限以下であること
+# - ボタン操作はそのページの描画だけで、GASを呼ばず、時間が全件数によらないこと
+# - 変更前の送り方（全文を作って split_message で分け、followup を連投）とのメッセージ数・時間の比較
+#
+# 使い方: python benchmarks/bench_pagination.py [予定の件数]
+
+import asyncio
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from calendar_bot.renderers import schedule_pages  # noqa: E402
+from calendar_links import calendar_links  # noqa: E402
+from message_chunks import split_message  # noqa: E402
+from paginator import EMBED_DESCRIPTION_LIMIT, PagedEmbed, PageView  # noqa: E402
+
+WORDS = ["細胞継代", "データ解析", "Weekly sync", "論文執筆", "ミーティング", "🎉", "a" * 40]
+
+
+def make_events(rng, n):
+    events = []
+    for i in range(n):
+        h, m = divmod(rng.randrange(0, 24 * 4) * 15, 60)
+        title = f"{rng.choice(WORDS)} {i} {'★' * rng.randrange(0, 4)}"
+        events.append({"title": title, "start": f"2026-10-19T{h:02d}:{m:02d}:00",
+                       "end": f"2026-10-19T{h:02d}:{m:02d}:00"})
+    return events
+
+
+def legacy_schedule_messages(events):
+    """変更前の /schedule: 一覧とリンクの全文を行にして分割し、チャンクごとに followup を送る"""
+    def lines():
+        yield f"**📅 今日の予定 ({len(events)}個)**\n"
+        for ev in events:
+            yield f"• {ev['title']} `{ev['start'][11:16]}-{ev['end'][11:16]}`"
+        yield "\n**🔗 Googleカレンダーで開く:**"
+        for ev, url in zip(events, calendar_links(events)):
+            yield f"📅 [{ev['title']}](<{url}>)"
+    return split_message(lines())
+
+
+def schedule_source(events, page_size=10):
+    return schedule_pages("今日", events, "🕒 ミラー: 12秒前", page_size=page_size)
+
+
+def progress_source(completed, pending, page_size=20):
+    items = [(f"✅ 完了タスク ({len(completed)}個)", t) for t in completed]
+    items += [(f"⏳ 未完了タスク ({len(pending)}個)", t) for t in pending]
+    return PagedEmbed("progress", "📊 今日の進捗レポート", items,
+                      lambda tasks: [f"• {t['title']} `{t['start']}-{t['end']}`" for t in tasks],
+                      page_size=page_size, header=["**達成率:** 50% `█████░░░░░`", "**完了:** 1/2 タスク"])
+
+
+class FakeResponse:
+    def __init__(self):
+        self.edits = []
+
+    async def edit_message(self, **kwargs):
+        self.edits.append(kwargs)
+
+
+class FakeUser:
+    def __init__(self, user_id):
+        self.id = user_id
+
+
+class FakeInteraction:
+    def __init__(self, user_id=1):
+        self.user = FakeUser(user_id)
+        self.response = FakeResponse()
+
+
+def check_pages():
+    rng = random.Random(5)
+    for n, size in ((0, 10), (1, 10), (10, 10), (11, 10), (537, 10), (300, 7)):
+        events = make_events(rng, n)
+        source = schedule_source(events, size)
+        assert source.pages == max(1, -(-n // size))
+        seen = []
+        for i in range(source.pages):
+            text = source.description(i)
+            assert len(text) <= EMBED_DESCRIPTION_LIMIT, (n, i, len(text))
+            seen += [line for line in text.split("\n") if line.startswith("• ")]
+        assert len(seen) == n and all(ev["title"] in line for ev, line in zip(events, seen)), n
+
+    # 見出しはページをまたいだら「（続き）」を付けて出し直す
+    completed = [{"title": f"完了{i}", "start": "09:00", "end": "10:00"} for i in range(25)]
+    pending = [{"title": f"未完了{i}", "start": "11:00", "end": "12:00"} for i in range(5)]
+    source = progress_source(completed, pending)
+    first, second = source.description(0), source.description(1)
+    assert "**✅ 完了タスク (25個)**" in first and "⏳" not in first
+    assert "**✅ 完了タスク (25個)（続き）**" in second and "**⏳ 未完了タスク (5個)**" in second
+    assert second.startswith("**達成率:**")
+
+    # 1行が長すぎて上限を超えるページは、行単位で省略した件数を書く
+    long_events = [{"title": "長" * 400, "start": "2026-10-19T09:00:00", "end": "2026-10-19T10:00:00"}] * 10
+    text = schedule_source(long_events).description(0)
+    assert len(text) <= EMBED_DESCRIPTION_LIMIT and "行省略）" in text and text.endswith("ミラー: 12秒前")
+    print("✅ 全項目が1回ずつ・説明文は Embed の上限以下・見出しの続き・長すぎるページの省略")
+
+
+async def check_view():
+    source = schedule_source(make_events(random.Random(6), 35))
+    view = PageView(source, user_id=1)
+    assert view.previous.disabled and not view.next.disabled and view.position.label == "1/4"
+    interaction = FakeInteraction()
+    for _ in range(5):  # 最後のページより先には進まない
+        await view.show(interaction, 1)
+    assert view.index == 3 and view.next.disabled and view.position.label == "4/4"
+    await view.show(interaction, -1)
+    assert view.index == 2 and not view.next.disabled
+    assert len(interaction.response.edits) == 6
+    assert interaction.response.edits[-1]["embed"].footer.text == "ページ 3/4（全35件）"
+    assert await view.interaction_check(FakeInteraction(1)) and not await view.interaction_check(FakeInteraction(2))
+    view.stop()
+    print("✅ ボタン操作: 1回ごとに元のメッセージを1回編集するだけ・最初/最後のページでボタンを無効化・他人の操作は拒否")
+
+
+async def bench(n, repeat=20):
+    events = make_events(random.Random(1), n)
+    started = time.perf_counter()
+    chunks = legacy_schedule_messages(events)
+    old = time.perf_counter() - started
+
+    started = time.perf_counter()
+    source = schedule_source(events)
+    source.embed(0)
+    first = time.perf_counter() - started
+
+    view = PageView(source, user_id=1)
+    interaction = FakeInteraction()
+    started = time.perf_counter()
+    for _ in range(repeat):
+        await view.show(interaction, 1)
+    per_press = (time.perf_counter() - started) / repeat
+    view.stop()
+    print(f"\n/schedule {n}件:")
+    print(f"  {'全文を分割して連投（従来）':16}: {old * 1000:7.2f}ms  メッセージ {len(chunks)}件")
+    print(f"  {'ページ送り・最初のページ':16}: {first * 1000:7.2f}ms  メッセージ 1件（{source.pages}ページ）")
+    print(f"  {'ページ送り・ボタン1回':17}: {per_press * 1000:7.2f}ms  GAS呼び出し 0回")
+
+
+async def main(n):
+    check_pages()
+    await check_view()
+    for count in (100, n):
+        await bench(count)
+
+
+if __name__ == "__main__":
+    asyncio.run(main(int(sys.argv[1]) if len(sys.argv) > 1 else 10000))
@@ -0,0 +1,236 @@
+# benchmarks/bench_progress_model.py
+# Bot内の進捗モデルの確認と計測
+# - GASの markTaskAsComplete_ などと同じ規則で動くフェイクカレンダーにランダムな書き込みを行い、
+#   書き込みリスナー経由で更新したモデルが generateDailyProgress_ の結果と一致し続けること
+# - カレンダーを直接編集された場合に、照合でずれ（ドリフト）が記録されること
+# - テナントのタイムゾーンで今日の日付・作成したイベント・イベントキーの時刻・ミラーの今日を扱うこと
+# - /progress 1回あたりの時間（モデル / カレンダーミラーの走査 / GAS往復）
+#
+# 使い方: python benchmarks/bench_progress_model.py [今日のタスク数] [書き込み回数]
+
+import os
+import random
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+from zoneinfo import ZoneInfo
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from calendar_store import JST, CalendarMirror  # noqa: E402
+from progress_model import ProgressModel  # noqa: E402
+
+TODAY = datetime(2026, 10, 19, 12, 0)  # JST（オフセット無し）
+
+
+class FakeDayCalendar:
+    """GASの今日のイベント操作（Text2GCalenderAddon_fixed.gs）をそのまま移したもの"""
+
+    def __init__(self, n, rng):
+        self.rng = rng
+        self.events = []  # [{"title", "start", "end", "allDay"}] 開始時刻順
+        base = TODAY.replace(hour=8, minute=0)
+        for i in range(n):
+            start = base + timedelta(minutes=10 * i)
+            self.events.append({"title": f"タスク{i} ★★", "start": start,
+                                "end": start + timedelta(minutes=rng.choice((10, 30, 60))), "allDay": False})
+        self.events.append({"title": "休日", "start": base.replace(hour=0), "end": base.replace(hour=23),
+                            "allDay": True})
+        self.events.sort(key=lambda ev: ev["start"])
+
+    def _tasks(self):
+        """GASと同じく今日の終日以外のイベント"""
+        return [ev for ev in self.events if not ev["allDay"] and ev["start"].date() == TODAY.date()]
+
+    def mark_complete(self, text):
+        for ev in self._tasks():
+            if "✓" not in ev["title"] and text in ev["title"]:
+                ev["title"] += " ✓"
+                return {"ok": True}
+        return {"ok": False}
+
+    def unmark_complete(self, text):
+        for ev in self._tasks():
+            if "✓" in ev["title"] and text in ev["title"]:
+                ev["title"] = ev["title"].rstrip(" ✓").strip()
+                return {"ok": True}
+        return {"ok": False}
+
+    def set_must_one(self, text):
+        for ev in self._tasks():
+            if "☆" in ev["title"]:
+                ev["title"] = ev["title"].replace("☆", "").strip()
+        for ev in self._tasks():
+            if "✓" not in ev["title"] and text in ev["title"]:
+                ev["title"] = "☆ " + ev["title"]
+                return {"ok": True}
+        return {"ok": False}
+
+    def mark_all_complete(self):
+        for ev in self._tasks():
+            if "✓" not in ev["title"]:
+                ev["title"] += " ✓"
+        return {"ok": True}
+
+    def create(self, title, start, minutes):
+        ev = {"title": title, "start": start, "end": start + timedelta(minutes=minutes), "allDay": False}
+        self.events.append(ev)
+        self.events.sort(key=lambda e: e["start"])
+
+        def iso(dt):  # GASの Date は JSON で UTC の toISOString() になる
+            return dt.replace(tzinfo=JST).astimezone(timezone.utc).strftime("%Y-%m-%dT%H:%M:%S.000Z")
+        return {"ok": True, "created": [{"title": title, "start": iso(ev["start"]), "end": iso(ev["end"])}]}
+
+    def progress(self):
+        completed, pending, must_one = [], [], None
+        for ev in self._tasks():
+            task = {"title": ev["title"], "start": ev["start"].strftime("%H:%M"),
+                    "end": ev["end"].strftime("%H:%M"),
+                    "duration": round((ev["end"] - ev["start"]).total_seconds() / 60)}
+            if "✓" in ev["title"]:
+                completed.append(dict(task, title=ev["title"].replace("✓", "", 1).strip()))
+            else:
+                if "☆" in ev["title"] and must_one is None:
+                    must_one = task
+                pending.append(task)
+        total = len(completed) + len(pending)
+        return {"date": TODAY.strftime("%Y-%m-%d (%a)"), "totalTasks": total,
+                "completedCount": len(completed), "pendingCount": len(pending),
+                "completionRate": round(len(completed) / total * 100) if total else 0,
+                "completed": completed, "pending": pending, "mustOne": must_one}
+
+    def export(self):
+        events = []
+        for i, ev in enumerate(self.events):
+            events.append({"key": f"ev{i}", "title": ev["title"], "allDay": ev["allDay"],
+                           "start": ev["start"].strftime("%Y-%m-%dT%H:%M:%S"),
+                           "end": ev["end"].strftime("%Y-%m-%dT%H:%M:%S")})
+        now = datetime.now(timezone.utc)
+        return {"ok": True, "full": True, "cursor": "c", "events": events,
+                "window": {"start": (now - timedelta(days=400)).strftime("%Y-%m-%dT%H:%M:%S.000Z"),
+                           "end": (now + timedelta(days=400)).strftime("%Y-%m-%dT%H:%M:%S.000Z")}}
+
+
+def random_write(cal, rng, n):
+    """ランダムな書き込みを1つ行い、(mode, payload, data) を返す"""
+    kind = rng.random()
+    text = f"タスク{rng.randrange(n + 20)}"
+    if kind < 0.4:
+        payload = {"mode": "mark_complete", "task": text}
+        return payload, cal.mark_complete(text)
+    if kind < 0.6:
+        payload = {"mode": "unmark_complete", "task": text}
+        return payload, cal.unmark_complete(text)
+    if kind < 0.75:
+        payload = {"mode": "set_must_one", "task": text}
+        return payload, cal.set_must_one(text)
+    if kind < 0.97:
+        start = TODAY.replace(hour=rng.randrange(6, 22), minute=rng.choice((0, 15, 30, 45)))
+        if rng.random() < 0.2:
+            start += timedelta(days=1)  # 明日の予定は今日の進捗に入らない
+        payload = {"mode": "create"}
+        return payload, cal.create(f"追加{rng.randrange(10000)} ★", start, rng.choice((15, 30)))
+    payload = {"mode": "mark_all_complete"}
+    return payload, cal.mark_all_complete()
+
+
+def check_consistency(n, writes):
+    rng = random.Random(7)
+    cal = FakeDayCalendar(n, rng)
+    model = ProgressModel("bench", now=lambda: TODAY)
+    model.reconcile(cal.progress())
+    for i in range(writes):
+        payload, data = random_write(cal, rng, n)
+        # GasClient は成功した書き込みだけリスナーに通知する（/must_one は失敗時も calendar_bot.commands が反映）
+        if data.get("ok") or payload["mode"] == "set_must_one":
+            model.apply_write(payload["mode"], payload, data)
+        if i % 50 == 0:
+            assert model.progress() == cal.progress(), f"{i}回目の書き込み後にずれ: {payload}"
+    assert model.progress() == cal.progress()
+    drift = model.reconcile(cal.progress())
+    assert not any(drift.values()), drift
+    print(f"✅ {writes}回のランダムな書き込み後もモデルとGASの進捗が一致（ずれ 0）")
+
+    # Googleカレンダーで直接編集された（Botを経由しない）変更は照合で見つかる
+    cal.mark_complete("タスク1")
+    cal.create("カレンダーで直接追加", TODAY.replace(hour=9), 30)
+    drift = model.reconcile(cal.progress())
+    assert drift["completed"] == 1 and drift["total"] == 1 and drift["tasks"] >= 2, drift
+    assert model.drifted == 1 and model.progress() == cal.progress()
+    print(f"✅ Botを経由しない変更は照合でずれとして記録: {drift}")
+    return cal, model
+
+
+def check_timezone():
+    # ロサンゼルスの 10/19 08:00 は JST では 10/20 00:00（日付が違う）
+    tz = ZoneInfo("America/Los_Angeles")
+    model = ProgressModel("bench", now=lambda: datetime(2026, 10, 19, 8, 0), tz=tz)
+    model.reconcile({"completed": [], "pending": []})
+    model.apply_write("create", {"mode": "create"}, {"ok": True, "created": [
+        {"title": "朝会", "start": "2026-10-19T16:00:00.000Z", "end": "2026-10-19T16:30:00.000Z"},
+        {"title": "夜の作業", "start": "2026-10-20T02:00:00.000Z", "end": "2026-10-20T03:00:00.000Z"},
+        {"title": "昨日の予定", "start": "2026-10-19T05:00:00.000Z", "end": "2026-10-19T06:00:00.000Z"},
+    ]})
+    progress = model.progress()
+    assert [(t["title"], t["start"], t["end"]) for t in progress["pending"]] == [
+        ("朝会", "09:00", "09:30"), ("夜の作業", "19:00", "20:00")], progress["pending"]
+    assert progress["date"].startswith("2026-10-19") and progress["totalTasks"] == 2
+
+    # イベントキー（開始時刻のUTCミリ秒）もテナントのタイムゾーンの今日として扱う（JSTでは 10/20）
+    key = f"abc@{int(datetime(2026, 10, 19, 16, tzinfo=timezone.utc).timestamp() * 1000)}"
+    model.apply_write("mark_complete", {"task": "朝会", "event_key": key}, {"ok": True})
+    progress = model.progress()
+    assert progress["completedCount"] == 1 and progress["completed"][0]["start"] == "09:00", progress
+    # 今日に置けないキーの書き込みは、進捗を古いまま返さず次の照合まで使わない
+    key = f"def@{int(datetime(2026, 10, 20, 16, tzinfo=timezone.utc).timestamp() * 1000)}"
+    model.apply_write("mark_complete", {"task": "夜の作業", "event_key": key}, {"ok": True})
+    assert model.stale and model.progress() is None
+
+    # カレンダーミラーも同じタイムゾーンの今日を返し、モデルとの照合でずれにならない
+    mirror = CalendarMirror(gas=None, tz=tz)
+    mirror.apply_export({"full": True, "events": [
+        {"key": "a@1", "title": "朝会 ✓", "start": "2026-10-19T09:00:00", "end": "2026-10-19T09:30:00"},
+        {"key": "b@1", "title": "夜の作業", "start": "2026-10-19T19:00:00", "end": "2026-10-19T20:00:00"},
+        {"key": "c@1", "title": "翌日（JSTの今日）", "start": "2026-10-20T09:00:00", "end": "2026-10-20T10:00:00"},
+    ], "window": {"start": "2026-10-12T00:00:00.000Z", "end": "2026-11-19T00:00:00.000Z"}})
+    drift = model.reconcile(mirror.progress(now=model._now()))
+    assert drift is not None and not any(drift.values()), drift
+
+    # now を渡さなければテナントのタイムゾーンの現在時刻
+    model = ProgressModel("bench", tz=tz)
+    assert abs(model._now() - datetime.now(tz).replace(tzinfo=None)) < timedelta(seconds=5)
+    print("✅ テナントのタイムゾーンで今日の日付・作成したイベント・イベントキー・ミラーの今日を扱う")
+
+
+def bench_reads(cal, model, gas_latency, repeat=2000):
+    mirror = CalendarMirror(gas=None)
+    mirror.apply_export(cal.export())
+
+    def per_call(fn):
+        started = time.perf_counter()
+        for _ in range(repeat):
+            fn()
+        return (time.perf_counter() - started) / repeat
+
+    model_seconds = per_call(model.progress)
+    mirror_seconds = per_call(lambda: mirror.progress(now=TODAY))
+    # 書き込み直後の再計算（モデルの更新＋1回目の progress）
+    payload = {"mode": "set_must_one", "task": "タスク3"}
+
+    def after_write():
+        model.apply_write(payload["mode"], payload, {"ok": True})
+        model.progress()
+    write_seconds = per_call(after_write)
+    print(f"\n/progress 1回あたり（今日のタスク {model.total}件）:")
+    print(f"  進捗モデル（書き込み間）  : {model_seconds * 1e6:9.2f}µs")
+    print(f"  進捗モデル（書き込み直後）: {write_seconds * 1e6:9.2f}µs")
+    print(f"  カレンダーミラーを走査    : {mirror_seconds * 1e6:9.2f}µs")
+    print(f"  GASで再計算（往復）       : {gas_latency * 1e6:9.0f}µs（想定）")
+
+
+if __name__ == "__main__":
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 40
+    writes = int(sys.argv[2]) if len(sys.argv) > 2 else 2000
+    cal, model = check_consistency(n, writes)
+    check_timezone()
+    bench_reads(cal, model, gas_latency=1.5)
@@ -0,0 +1,234 @@
+# benchmarks/bench_report_scheduler.py
+# 定期レポートのスケジューラーの確認と計測
+# - cron式の解釈とタイムゾーン（JSTの13:00が UTC 04:00 になること、夏時間の切り替え）
+# - 保存したスケジュールが再起動後も残ること、停止中に過ぎた時刻の扱い
+# - 送信エラーは print せず、schedule_id・channel_id 付きの構造化ログ（jsonlog）に出ること
+# - 同じ時刻に数千チャンネルが重なったときの一斉送信
+#   （従来の1件ずつ送るループ と 同時実行数を制限した並列送信 の比較）
+#
+# 使い方: python benchmarks/bench_report_scheduler.py [チャンネル数] [送信1件の秒数]
+
+import asyncio
+import io
+import json
+import os
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+from zoneinfo import ZoneInfo
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import jsonlog  # noqa: E402
+from report_scheduler import CronSchedule, ReportScheduler, ScheduleError, report_time_cron  # noqa: E402
+from tenants import parse_report_time  # noqa: E402
+
+UTC = timezone.utc
+TOKYO = ZoneInfo("Asia/Tokyo")
+NEW_YORK = ZoneInfo("America/New_York")
+
+
+def utc(*args):
+    return datetime(*args, tzinfo=UTC)
+
+
+def check_cron():
+    daily = CronSchedule(report_time_cron(parse_report_time("13:00")))
+    # 従来の tasks.loop(time=time(13, 0)) は UTC 13:00（JST 22:00）に送っていた
+    assert daily.next_after(utc(2026, 10, 18, 0, 0), TOKYO) == datetime(2026, 10, 18, 13, 0, tzinfo=TOKYO)
+    assert daily.next_after(utc(2026, 10, 18, 0, 0), TOKYO).astimezone(UTC) == utc(2026, 10, 18, 4, 0)
+    assert daily.next_after(utc(2026, 10, 18, 4, 0), TOKYO).astimezone(UTC) == utc(2026, 10, 19, 4, 0), \
+        "ちょうどその時刻の直後は翌日"
+
+    weekdays = CronSchedule("30 9 * * 1-5")
+    fire = weekdays.next_after(utc(2026, 10, 16, 1, 0), TOKYO)  # 金曜 JST 10:00
+    assert fire == datetime(2026, 10, 19, 9, 30, tzinfo=TOKYO), fire  # 月曜
+
+    steps = CronSchedule("*/15 8-9 1,15 * *")
+    assert steps.minutes == [0, 15, 30, 45] and steps.hours == [8, 9] and steps.days == {1, 15}
+    assert CronSchedule("0 0 1 * 0").next_after(utc(2026, 10, 18, 0, 0), UTC) == utc(2026, 10, 25, 0, 0), \
+        "日と曜日の両方を指定したらどちらかに一致"
+    assert CronSchedule("0 0 29 2 *").next_after(utc(2026, 3, 1), UTC) == utc(2028, 2, 29)
+
+    # 夏時間: 現地の9:00はUTCの時刻が変わる。存在しない2:30は切り替え後の同じ瞬間に1回だけ
+    nine = CronSchedule("0 9 * * *")
+    assert nine.next_after(utc(2026, 3, 7, 15), NEW_YORK).astimezone(UTC) == utc(2026, 3, 8, 13)
+    assert nine.next_after(utc(2026, 3, 6, 15), NEW_YORK).astimezone(UTC) == utc(2026, 3, 7, 14)
+    gap = CronSchedule("30 2 * * *").next_after(utc(2026, 3, 8, 5), NEW_YORK)
+    assert gap.astimezone(UTC) == utc(2026, 3, 8, 7, 30), gap.astimezone(UTC)
+    fall = CronSchedule("30 1 * * *")
+    first = fall.next_after(utc(2026, 11, 1, 4), NEW_YORK)
+    assert fall.next_after(first.astimezone(UTC), NEW_YORK).day == 2, "重複する1:30は1回だけ"
+
+    for expr in ("0 25 * * *", "* * *", "x * * * *", "0 0 31 2 *", "5-1 * * * *", "*/0 * * * *"):
+        try:
+            CronSchedule(expr).next_after(utc(2026, 1, 1), UTC)
+            raise AssertionError(f"{expr!r} はエラーのはず")
+        except ScheduleError:
+            pass
+    print("✅ cron式・タイムゾーン（JST 13:00 = UTC 04:00、夏時間の切り替え）")
+
+
+class FakeClock:
+    def __init__(self, now):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+async def check_persistence(data_dir):
+    path = os.path.join(data_dir, "schedules.db")
+    clock = FakeClock(utc(2026, 10, 18, 3, 0).timestamp())  # JST 12:00
+    fired = []
+
+    async def fire(schedule):
+        fired.append(schedule["id"])
+
+    scheduler = ReportScheduler(path, fire, clock=clock, grace=600)
+    await scheduler.start()
+    assert await scheduler.seed("default", 100, ["0 13 * * *", "0 20 * * *"], "Asia/Tokyo") == 2
+    row = await scheduler.add("team-b", 200, "0 9 * * *", "America/New_York", guild_id=300)
+    assert await scheduler.remove(row["id"], channel_id=999) is False, "他のチャンネルのものは消さない"
+    await scheduler.close()
+
+    # 再起動: 登録済みのチャンネルには再登録しない。JST 13:05 なら13:00の分は猶予内なので送る
+    clock.now = utc(2026, 10, 18, 4, 5).timestamp()
+    scheduler = ReportScheduler(path, fire, clock=clock, grace=600)
+    await scheduler.start()
+    assert await scheduler.seed("default", 100, ["0 13 * * *"], "Asia/Tokyo") == 0
+    assert len(scheduler.list()) == 3 and len(scheduler.list(channel_id=100)) == 2
+    for _ in range(20):
+        await asyncio.sleep(0.01)
+    assert len(fired) == 1, fired
+    next_13 = [r for r in scheduler.list(channel_id=100) if r["cron"] == "0 13 * * *"][0]["next_fire"]
+    assert next_13 == utc(2026, 10, 19, 4, 0).timestamp()
+    await scheduler.close()
+
+    # 長く止まっていた場合（猶予を過ぎた時刻）は送らずに次の時刻へ
+    clock.now = utc(2026, 10, 18, 12, 0).timestamp()  # JST 21:00（20:00から1時間）
+    scheduler = ReportScheduler(path, fire, clock=clock, grace=600)
+    await scheduler.start()
+    for _ in range(20):
+        await asyncio.sleep(0.01)
+    assert len(fired) == 1, fired
+    await scheduler.close()
+    print("✅ 保存・再起動・停止中に過ぎた時刻（猶予内は送信、それ以外は次回へ）")
+
+
+async def check_seed_before_start(data_dir):
+    """Botの起動時と同じ順（テナント設定の seed → start）でも登録・送信できること"""
+    path = os.path.join(data_dir, "seed_first.db")
+    clock = FakeClock(utc(2026, 10, 18, 3, 0).timestamp())  # JST 12:00
+    fired = []
+
+    async def fire(schedule):
+        fired.append(schedule["id"])
+
+    scheduler = ReportScheduler(path, fire, clock=clock, grace=600)
+    assert await scheduler.seed("default", 100, ["0 13 * * *"], "Asia/Tokyo") == 1
+    clock.now = utc(2026, 10, 18, 4, 0, 30).timestamp()  # JST 13:00:30
+    await scheduler.start()
+    assert len(scheduler.list()) == 1, "start() で同じスケジュールを二重に読み込んだ"
+    for _ in range(20):
+        await asyncio.sleep(0.01)
+    assert len(fired) == 1, fired
+    # start() の後に seed したチャンネルもヒープに入って送られる
+    assert await scheduler.seed("default", 200, ["1 13 * * *"], "Asia/Tokyo") == 1
+    clock.now = utc(2026, 10, 18, 4, 1, 30).timestamp()
+    scheduler._wake()
+    for _ in range(20):
+        await asyncio.sleep(0.01)
+    assert len(fired) == 2, fired
+    await scheduler.close()
+    print("✅ start() より前の seed()（起動時の順）・start() 後の seed() も送信される")
+
+
+async def check_fire_errors(data_dir):
+    path = os.path.join(data_dir, "errors.db")
+
+    async def fire(schedule):
+        raise RuntimeError("Missing Access")
+
+    scheduler = ReportScheduler(path, fire)
+    await scheduler.start()
+    rows = [await scheduler.add("team-a", 300 + i, "0 0 1 1 *", "Asia/Tokyo") for i in range(3)]
+    for row in scheduler.list():
+        row["next_fire"] = time.time()
+        scheduler._track(row, scheduler._crons[row["id"]])
+    stream = io.StringIO()
+    jsonlog.setup("INFO", stream=stream)
+    try:
+        scheduler._wake()
+        for _ in range(50):
+            if scheduler.failed == len(rows):
+                break
+            await asyncio.sleep(0.01)
+        await scheduler.close()
+    finally:
+        jsonlog.shutdown()
+    errors = [entry for entry in map(json.loads, stream.getvalue().splitlines())
+              if entry["event"] == "report_fire_failed"]
+    assert scheduler.failed == 3 and len(errors) == 3, (scheduler.failed, errors)
+    assert sorted(e["channel_id"] for e in errors) == [300, 301, 302]
+    assert {e["schedule_id"] for e in errors} == {row["id"] for row in rows}
+    assert all(e["tenant"] == "team-a" and "Missing Access" in e["error"] for e in errors), errors
+    print("✅ 送信エラーは schedule_id・channel_id 付きの構造化ログに出る")
+
+
+async def fan_out(data_dir, n, send_seconds, concurrency):
+    """n チャンネルが同じ時刻のときに、全件送り終わるまでの秒数"""
+    path = os.path.join(data_dir, f"fan_out_{concurrency}.db")
+    done = asyncio.Event()
+    state = {"sent": 0, "in_flight": 0, "peak": 0}
+
+    async def fire(schedule):
+        state["in_flight"] += 1
+        state["peak"] = max(state["peak"], state["in_flight"])
+        await asyncio.sleep(send_seconds)  # Discordへの送信（GASはミラーから読む想定）
+        state["in_flight"] -= 1
+        state["sent"] += 1
+        if state["sent"] == n:
+            done.set()
+
+    scheduler = ReportScheduler(path, fire, concurrency=concurrency)
+    await scheduler.start()
+    for i in range(n):
+        # 計測中に本来の時刻が来て二重に送らないよう、年1回の時刻にしておく
+        await scheduler.add("default", 10_000 + i, "0 0 1 1 *", "Asia/Tokyo")
+    # 全件の次回時刻を今に揃えて一斉に実行させる
+    fire_at = time.time()
+    for row in scheduler.list():
+        row["next_fire"] = fire_at
+        scheduler._track(row, scheduler._crons[row["id"]])
+    started = time.perf_counter()
+    scheduler._wake()
+    await asyncio.wait_for(done.wait(), timeout=max(60, n * send_seconds * 2))
+    elapsed = time.perf_counter() - started
+    stats = scheduler.stats()
+    await scheduler.close()
+    assert stats["fired"] == n and state["peak"] <= concurrency
+    return elapsed, state["peak"], stats["last_batch"] or {}
+
+
+async def main(n, send_seconds):
+    check_cron()
+    with tempfile.TemporaryDirectory() as data_dir:
+        await check_persistence(data_dir)
+        await check_seed_before_start(data_dir)
+        await check_fire_errors(data_dir)
+
+        print(f"\n{n}チャンネルが同じ時刻（送信1件 {send_seconds * 1000:.0f}ms）:")
+        serial = n * send_seconds  # 従来: 対象を順に await すると件数×送信時間
+        print(f"  1件ずつ送信（従来・推定）: {serial:7.2f}秒")
+        for concurrency in (10, 50):
+            elapsed, peak, batch = await fan_out(data_dir, n, send_seconds, concurrency)
+            print(f"  同時実行 {concurrency:>3}            : {elapsed:7.2f}秒"
+                  f"（最大同時 {peak}・最大遅れ {batch.get('lateness', 0):.2f}秒）")
+
+
+if __name__ == "__main__":
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    send_seconds = float(sys.argv[2]) if len(sys.argv) > 2 else 0.05
+    asyncio.run(main(n, send_seconds))
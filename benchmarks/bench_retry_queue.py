@@ -0,0 +1,141 @@
+# benchmarks/bench_retry_queue.py
+# リトライキューが一時的な障害（503）を越えて全ジョブを1回ずつ反映することを確認する
+# - 冪等キー: GASと同じく、成功済みキーの再送には前回の結果を返すスタブで二重反映が無いこと
+# - 永続化: 起動前に登録したジョブが、別インスタンスで開き直しても実行されること
+# - 同時実行数: ワーカー数を超えてGASを呼ばないこと
+# - chain: 同じ chain のジョブが登録順に反映されること
+# - デッドレター: 上限回数まで失敗したジョブが通知されること
+# - ログ: 登録・再試行・成功・デッドレターが jsonlog の構造化ログ（mode・attempts など）で出ること
+#
+# 使い方: python benchmarks/bench_retry_queue.py [ジョブ数] [失敗率]
+
+import asyncio
+import io
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from aiohttp import web  # noqa: E402
+
+import jsonlog  # noqa: E402
+from gas_client import GasClient  # noqa: E402
+from retry_queue import RetryQueue  # noqa: E402
+from stub_gas import StubGas  # noqa: E402
+
+
+class FlakyGas:
+    """一定の確率で503を返し、冪等キーごとの反映回数を数えるGASスタブのハンドラ"""
+
+    def __init__(self, failure_rate, always_fail=()):
+        self.failure_rate = failure_rate
+        self.always_fail = set(always_fail)
+        self.applied = {}   # idempotency_key -> 反映回数
+        self.order = []     # 反映された task の順番
+        self.results = {}   # GASの CacheService 相当
+
+    def __call__(self, body):
+        key = body.get("idempotency_key")
+        if key in self.results:
+            return self.results[key]
+        if body.get("task") in self.always_fail or random.random() < self.failure_rate:
+            return web.Response(status=503, text="Service Unavailable")
+        self.applied[key] = self.applied.get(key, 0) + 1
+        self.order.append(body.get("task"))
+        result = {"ok": True, "mode": body.get("mode"), "message": f"{body.get('task')} を完了にしました"}
+        self.results[key] = result
+        return result
+
+
+class CountingGas:
+    """GasClient を包み、同時に実行中の post 数の最大値を記録する"""
+
+    def __init__(self, client):
+        self.client = client
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    async def post(self, payload, timeout=None):
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            return await self.client.post(payload, timeout=timeout)
+        finally:
+            self.in_flight -= 1
+
+
+async def main(jobs, failure_rate):
+    random.seed(1)
+    handler = FlakyGas(failure_rate, always_fail={"dead"})
+    stub = StubGas(latency=0.01, handler=handler).start_in_thread()
+    client = GasClient(stub.url, "bench")
+    gas = CountingGas(client)
+    path = os.path.join(tempfile.mkdtemp(), "retry_queue.db")
+
+    notified = []
+    finished = asyncio.Event()
+
+    async def notifier(job, data, error):
+        notified.append((job["payload"]["task"], "dead" if error else "done"))
+        if len(notified) == jobs + 1:
+            finished.set()
+
+    options = dict(workers=4, base_delay=0.01, max_delay=0.2, max_attempts=12, notifier=notifier)
+    stream = io.StringIO()
+    jsonlog.setup("INFO", stream=stream)
+    try:
+        # ワーカーを起動せずに登録 → 閉じる（Botの再起動を模擬）
+        first = RetryQueue(gas, path, **options)
+        await first._run(first._open)
+        for i in range(jobs):
+            # 偶数番は同じ chain（登録順に反映されるはず）、奇数番は独立
+            chain = "user:1" if i % 2 == 0 else None
+            await first.enqueue({"mode": "mark_complete", "task": f"task{i}"}, chain=chain, delay=0)
+        await first.enqueue({"mode": "mark_complete", "task": "dead"}, delay=0)
+        await first.close()
+
+        queue = RetryQueue(gas, path, **options)
+        started = time.perf_counter()
+        await queue.start()
+        await asyncio.wait_for(finished.wait(), timeout=60)
+        wall = time.perf_counter() - started
+        stats = await queue.stats()
+        await queue.close()
+
+        print(f"ジョブ {jobs}件 + デッドレター1件 / 503率 {failure_rate:.0%}: {wall * 1000:.0f}ms")
+        print(f"GASリクエスト {len(stub.requests)}件 / 最大同時実行 {gas.max_in_flight} / {stats}")
+
+        assert all(count == 1 for count in handler.applied.values()), "同じジョブが二重に反映された"
+        assert len(handler.applied) == jobs, "反映されていないジョブがある"
+        assert gas.max_in_flight <= options["workers"], "同時実行数がワーカー数を超えた"
+        chained = [t for t in handler.order if t in {f"task{i}" for i in range(0, jobs, 2)}]
+        assert chained == [f"task{i}" for i in range(0, jobs, 2)], "chain の順序が崩れた"
+        assert ("dead", "dead") in notified, "デッドレターが通知されていない"
+        assert stats["done"] == jobs and stats["dead"] == 1 and stats["pending"] == 0
+
+        jsonlog.shutdown()
+        events = {}
+        for line in stream.getvalue().splitlines():
+            entry = json.loads(line)
+            if entry["logger"] == "retry":
+                events.setdefault(entry["event"], []).append(entry)
+        assert len(events["retry_enqueued"]) == jobs + 1 and len(events["retry_succeeded"]) == jobs, \
+            {name: len(entries) for name, entries in events.items()}
+        dead = events["retry_dead_lettered"]
+        assert len(dead) == 1 and dead[0]["mode"] == "mark_complete" and dead[0]["attempts"] == 12, dead
+        assert all("attempts" in e and "error" in e for e in events.get("retry_scheduled", []))
+        print("✅ 全チェックOK（ログは構造化された1行JSON）")
+    finally:
+        jsonlog.shutdown()
+        await client.close()
+        stub.stop_thread()
+
+
+if __name__ == "__main__":
+    jobs = int(sys.argv[1]) if len(sys.argv) > 1 else 40
+    failure_rate = float(sys.argv[2]) if len(sys.argv) > 2 else 0.3
+    asyncio.run(main(jobs, failure_rate))
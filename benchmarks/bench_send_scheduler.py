@@ -0,0 +1,200 @@
+# benchmarks/bench_send_scheduler.py
+# 送信スケジューラ（send_scheduler.SendScheduler）の確認と計測
+# - 送信先ごと・全体の「window 秒に limit 件」を一度も超えない（429を受けない）こと
+# - 同じ送信先の順序を保ち、隣り合う短いメッセージを上限文字数以内でまとめること
+# - コマンドへの応答（interactive）が一斉送信（broadcast）より先に送られること
+# - 定期レポートの一斉送信と複数チャンクの応答が重なったときの、直接送る場合（従来）との比較
+#   （フェイクのDiscordはDiscordと同じく窓ごとの件数で429を返し、discord.py と同じくリセットまで待って再送する）
+#
+# 使い方: python benchmarks/bench_send_scheduler.py [一斉送信中の応答数] [チャンネル数]
+
+import asyncio
+import os
+import random
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from send_scheduler import BROADCAST, INTERACTIVE, SendScheduler  # noqa: E402
+
+SCALE = 0.1  # 時間を縮める（Discordの 5件/5秒 → 5件/0.5秒、全体 50件/秒 → 50件/0.1秒）
+LIMIT, WINDOW = 5, 5 * SCALE
+GLOBAL_LIMIT, GLOBAL_WINDOW = 50, 1 * SCALE
+LATENCY = 0.005
+
+
+class FakeDiscord:
+    """送信先ごと・全体の固定窓でメッセージ数を数え、超えたら429（discord.py のようにリセットまで待って再送）"""
+
+    def __init__(self):
+        self.windows = {}  # 送信先 -> (窓の開始, 件数)
+        self.global_window = (0.0, 0)
+        self.locks = {}
+        self.messages = []  # (送信先, 内容, 時刻)
+        self.rate_limited = 0
+
+    def _hit(self, key, limit, window, now):
+        start, count = self.windows.get(key, (now, 0)) if key else self.global_window
+        if now - start >= window:
+            start, count = now, 0
+        if count >= limit:
+            return start + window - now
+        if key:
+            self.windows[key] = (start, count + 1)
+        else:
+            self.global_window = (start, count + 1)
+        return 0.0
+
+    async def send(self, dest, content):
+        # discord.py はバケットごとにロックを持ち、429のあいだ同じバケットの送信を止める
+        lock = self.locks.setdefault(dest, asyncio.Lock())
+        async with lock:
+            while True:
+                now = time.perf_counter()
+                wait = self._hit(None, GLOBAL_LIMIT, GLOBAL_WINDOW, now) or self._hit(dest, LIMIT, WINDOW, now)
+                if not wait:
+                    break
+                self.rate_limited += 1
+                await asyncio.sleep(wait)
+            await asyncio.sleep(LATENCY)
+            self.messages.append((dest, content, time.perf_counter()))
+            return len(self.messages)
+
+    def sender(self, dest):
+        async def send(content):
+            return await self.send(dest, content)
+        return send
+
+
+def workload(replies, chunks, channels, rng):
+    """定期レポート（同じチャンネルに複数テナントの短い通知）と、複数チャンクの応答"""
+    reports = [(f"channel:{rng.randrange(channels)}", f"🕐 **09:00 進捗レポート** テナント{i}\n達成率: {rng.randrange(100)}%")
+               for i in range(channels * 3)]
+    answers = [(f"followup:{i}", [f"**(続き {k + 1}/{chunks})**\n" + "x" * 1800 for k in range(chunks)])
+               for i in range(replies)]
+    return reports, answers
+
+
+async def run_direct(discord, reports, answers):
+    async def report(dest, content):
+        await discord.send(dest, content)
+
+    async def answer(dest, chunks):
+        for chunk in chunks:  # 従来: followup.send をチャンクごとに await
+            await discord.send(dest, chunk)
+        return time.perf_counter()
+
+    started = time.perf_counter()
+    tasks = [asyncio.create_task(report(d, c)) for d, c in reports]
+    done = await asyncio.gather(*(answer(d, c) for d, c in answers))
+    await asyncio.gather(*tasks)
+    return [t - started for t in done], time.perf_counter() - started
+
+
+async def run_scheduled(discord, reports, answers):
+    scheduler = SendScheduler(LIMIT, WINDOW, int(GLOBAL_LIMIT * 0.8), GLOBAL_WINDOW)
+    senders = {}
+
+    def sender(dest):
+        return senders.setdefault(dest, discord.sender(dest))  # channel.send と同じく送信先ごとに同じ関数
+
+    async def answer(dest, chunks):
+        await scheduler.send_all(dest, sender(dest), chunks, INTERACTIVE)
+        return time.perf_counter()
+
+    started = time.perf_counter()
+    tasks = [asyncio.create_task(scheduler.send(d, sender(d), c, BROADCAST)) for d, c in reports]
+    done = await asyncio.gather(*(answer(d, c) for d, c in answers))
+    await asyncio.gather(*tasks)
+    elapsed = time.perf_counter() - started
+    stats = scheduler.stats()
+    await scheduler.close()
+    return [t - started for t in done], elapsed, stats
+
+
+def check_limits(discord):
+    """送信記録を後から数えて、どの窓でも制限を超えていないこと"""
+    by_dest = {}
+    for dest, _, at in discord.messages:
+        by_dest.setdefault(dest, []).append(at)
+    for times in by_dest.values():
+        for i in range(LIMIT, len(times)):
+            assert times[i] - times[i - LIMIT] >= WINDOW * 0.99, "送信先の制限を超えた"
+    assert discord.rate_limited == 0, discord.rate_limited
+
+
+async def check_behaviour():
+    sent = []
+
+    async def send(content):
+        await asyncio.sleep(0.01)
+        sent.append(content)
+        return len(sent)
+
+    async def other(content):
+        sent.append(("other", content))
+        return len(sent)
+
+    scheduler = SendScheduler(limit=1, window=0.05, global_limit=1000)
+    # 1件目の送信中に積まれた短いメッセージは、上限内で1件にまとめる。送信関数が違えばまとめない
+    first = asyncio.create_task(scheduler.send("c", send, "a"))
+    await asyncio.sleep(0.005)  # "a" の送信中
+    rest = asyncio.gather(scheduler.send_all("c", send, ["b", "c", "x" * 1997, "d"]), scheduler.send("c", other, "e"))
+    results, other_result = await asyncio.gather(first, rest)
+    assert sent == ["a", "b\nc", "x" * 1997 + "\nd", ("other", "e")], sent
+    assert results == 1 and other_result[0] == [2, 2, 3, 3]
+    assert scheduler.stats()["merged"] == 2
+
+    # 送信待ちの中では interactive が broadcast より先
+    sent.clear()
+    blocker = asyncio.create_task(scheduler.send("p", send, "blocker"))
+    await asyncio.sleep(0.005)
+    later = [asyncio.create_task(scheduler.send("p", send, f"b{i}", BROADCAST)) for i in range(2)]
+    await asyncio.sleep(0)
+    urgent = asyncio.create_task(scheduler.send("p", other, "reply", INTERACTIVE))
+    await asyncio.gather(blocker, urgent, *later)
+    assert sent[:2] == ["blocker", ("other", "reply")], sent
+
+    # 失敗は同じバッチの全員に伝わり、キューは止まらない
+    async def broken(content):
+        raise RuntimeError("送信失敗")
+    results = await asyncio.gather(scheduler.send("e", broken, "1"), scheduler.send("e", send, "2"),
+                                   return_exceptions=True)
+    assert isinstance(results[0], RuntimeError) and results[1] and scheduler.stats()["failed"] == 1
+    await scheduler.close()
+    print("✅ 隣り合う短いメッセージは上限内でまとめる・interactive が先・失敗しても後続は送る")
+
+
+async def bench(replies, chunks, channels):
+    rng = random.Random(3)
+    reports, answers = workload(replies, chunks, channels, rng)
+    total = len(reports) + sum(len(c) for _, c in answers)
+    print(f"\n定期レポート {len(reports)}件（{channels}チャンネル）＋ {chunks}チャンクの応答 {replies}件（計 {total}件）:")
+
+    discord = FakeDiscord()
+    latencies, elapsed = await run_direct(discord, reports, answers)
+    print(f"  {'直接送る（従来）':14}: 応答の完了 中央値 {statistics.median(latencies):5.2f}s 最大 {max(latencies):5.2f}s"
+          f"  全体 {elapsed:5.2f}s  送信 {len(discord.messages):4d}件  429 {discord.rate_limited:4d}回")
+
+    discord = FakeDiscord()
+    latencies, elapsed, stats = await run_scheduled(discord, reports, answers)
+    check_limits(discord)
+    print(f"  {'送信スケジューラ':14}: 応答の完了 中央値 {statistics.median(latencies):5.2f}s 最大 {max(latencies):5.2f}s"
+          f"  全体 {elapsed:5.2f}s  送信 {len(discord.messages):4d}件  429 {discord.rate_limited:4d}回"
+          f"（まとめた {stats['merged']}件）")
+
+
+async def main(replies, channels):
+    await check_behaviour()
+    # 定期レポートの一斉送信の最中に届いた応答
+    await bench(replies, 3, channels)
+    # 応答が送信先ごとの制限（5件）を超えるチャンク数のとき
+    await bench(20, 8, 30)
+
+
+if __name__ == "__main__":
+    replies = int(sys.argv[1]) if len(sys.argv) > 1 else 10
+    channels = int(sys.argv[2]) if len(sys.argv) > 2 else 200
+    asyncio.run(main(replies, channels))
@@ -0,0 +1,108 @@
+# benchmarks/bench_sharding.py
+# シャード設定の解釈と、複数プロセスにシャードを分けたときに
+# 各テナントの定期レポートがちょうど1プロセスから送られることの確認、
+# およびシャード統計（ShardStats.record）の1件あたりのコスト計測
+#
+# 使い方: python benchmarks/bench_sharding.py [テナント数] [総シャード数] [プロセス数]
+
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import sharding  # noqa: E402
+
+
+class FakeTenant:
+    def __init__(self, name, guild_ids=(), default=False):
+        self.name = name
+        self.guild_ids = set(guild_ids)
+        self.default = default
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+def random_guild_id(rng):
+    # Discordのスノーフレーク（上位ビットが作成時刻）に近い値
+    return (rng.randrange(1 << 40) << 22) | rng.randrange(1 << 22)
+
+
+def check_options():
+    assert sharding.bot_options(None, None) is None
+    assert sharding.bot_options("auto") == {}
+    assert sharding.bot_options("8", "0-3") == {"shard_count": 8, "shard_ids": [0, 1, 2, 3]}
+    assert sharding.parse_shard_ids("0,2, 4-5") == [0, 2, 4, 5]
+    for count, ids in (("auto", "0-1"), ("4", "3-5"), ("x", None), ("4", "2-1"), (None, "0")):
+        try:
+            sharding.bot_options(count, ids)
+            raise AssertionError(f"SHARD_COUNT={count} SHARD_IDS={ids} はエラーのはず")
+        except sharding.ShardConfigError:
+            pass
+    assert sharding.shard_for_guild(41771983423143937, 1) == 0
+    assert sharding.shard_for_guild(41771983423143937, 16) == (41771983423143937 >> 22) % 16
+    print("✅ SHARD_COUNT / SHARD_IDS の解釈・シャード番号の計算")
+
+
+def check_ownership(n_tenants, shard_count, processes):
+    rng = random.Random(1)
+    tenants = [FakeTenant("default", default=True), FakeTenant("alice")]
+    for i in range(n_tenants - 2):
+        tenants.append(FakeTenant(f"team-{i}", [random_guild_id(rng) for _ in range(rng.randint(1, 3))]))
+
+    shards = list(range(shard_count))
+    per_process = [set(shards[i::processes]) for i in range(processes)]
+    sends = {t.name: 0 for t in tenants}
+    for local in per_process:
+        for t in tenants:
+            if sharding.owns(t, shard_count, local):
+                sends[t.name] += 1
+                # レポートを送るプロセスでは必ずミラーも同期している
+                assert sharding.serves(t, shard_count, local)
+    assert all(count == 1 for count in sends.values()), [n for n, c in sends.items() if c != 1]
+    assert all(sharding.owns(t, shard_count, None) for t in tenants), "単一プロセスなら全テナント担当"
+
+    load = [sum(sharding.owns(t, shard_count, local) for t in tenants) for local in per_process]
+    print(f"✅ {n_tenants}テナント / {shard_count}シャード / {processes}プロセス: "
+          f"定期レポートは各テナント1回（プロセスごとの担当数 {load}）")
+
+
+def check_stats():
+    clock = FakeClock()
+    stats = sharding.ShardStats(window=60, clock=clock)
+    for _ in range(120):
+        stats.record(3)
+        clock.now += 0.5
+    assert stats.totals[3] == 120
+    assert abs(stats.rate(3) - 2.0) < 0.05, stats.rate(3)
+    clock.now += 30
+    assert abs(stats.rate(3) - 1.0) < 0.05, "window より古い件数は数えない"
+    clock.now += 60
+    assert stats.rate(3) == 0 and stats.rate(9) == 0
+    print("✅ ShardStats: 直近60秒のレート")
+
+
+def bench_record(n):
+    stats = sharding.ShardStats()
+    started = time.perf_counter()
+    for i in range(n):
+        stats.record(i & 15)
+    elapsed = time.perf_counter() - started
+    print(f"\nShardStats.record: {elapsed / n * 1e6:.2f}µs/件（{n}件・16シャード）")
+
+
+if __name__ == "__main__":
+    n_tenants = int(sys.argv[1]) if len(sys.argv) > 1 else 500
+    shard_count = int(sys.argv[2]) if len(sys.argv) > 2 else 16
+    processes = int(sys.argv[3]) if len(sys.argv) > 3 else 4
+    check_options()
+    check_ownership(n_tenants, shard_count, processes)
+    check_stats()
+    bench_record(200000)
@@ -0,0 +1,45 @@
+# benchmarks/bench_single_flight.py
+# 同一payloadの同時読み取りがGASへの1リクエストにまとめられることを確認する
+#
+# 使い方: python benchmarks/bench_single_flight.py [同時ユーザー数] [GAS遅延秒]
+
+import asyncio
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from gas_client import GasClient  # noqa: E402
+from stub_gas import StubGas  # noqa: E402
+
+
+async def main(users, latency):
+    stub = StubGas(latency=latency).start_in_thread()
+    client = GasClient(stub.url, "bench")
+    try:
+        started = time.perf_counter()
+        results = await asyncio.gather(*(client.call("progress") for _ in range(users)))
+        wall = time.perf_counter() - started
+
+        assert all(r == results[0] for r in results), "全員が同じ結果を受け取るはず"
+        stats = client.coalescing_stats()
+        print(f"同時 /progress: {users}件 → GASリクエスト {len(stub.requests)}件 "
+              f"(統合 {stats['deduplicated']}件, {wall * 1000:.0f}ms)")
+        assert len(stub.requests) == 1
+        assert stats["deduplicated"] == users - 1
+
+        # 書き込み系は統合しない
+        stub.requests.clear()
+        await asyncio.gather(*(client.call("mark_complete", task="A") for _ in range(3)))
+        print(f"同時 /done: 3件 → GASリクエスト {len(stub.requests)}件")
+        assert len(stub.requests) == 3
+    finally:
+        await client.close()
+        stub.stop_thread()
+
+
+if __name__ == "__main__":
+    users = int(sys.argv[1]) if len(sys.argv) > 1 else 10
+    latency = float(sys.argv[2]) if len(sys.argv) > 2 else 0.3
+    asyncio.run(main(users, latency))
@@ -0,0 +1,178 @@
+# benchmarks/bench_slot_finder.py
+# 空き時間検索: GAS版の線形走査（忠実な移植）と slot_finder（マージ区間＋二分探索）の比較
+# 1週間あたり 1k〜10k 件の合成イベントで、タスク配置にかかる時間と結果の一致率を測る
+# 結果は原則GAS版と一致し、違ってよいのは次の意図的な変更だけ（それ以外の不一致は失敗にする）
+# - 重なり合う予定はマージし、すべての予定の後に GAP を空ける。GAS版は直前にジャンプした予定の後にしか
+#   GAP を空けないため、重なっていた別の予定の終了から GAP 未満の位置に配置することがある
+# - GAS版は MAX_TRIES 回の試行で諦める（予定が多い週）。slot_finder は諦めずに空きを探す
+#
+# 使い方: python benchmarks/bench_slot_finder.py [タスク数]
+
+import os
+import random
+import sys
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from slot_finder import GAP, MAX_SEARCH_DAYS, WORK_END, WORK_START, BusyIndex, NoSlotError, at, find_next_slot  # noqa: E402
+
+MAX_TRIES = 500
+
+
+# ---------- GAS版（isTimeSlotAvailable_ / findNextAvailableTime_ / findNextAvailableSlot_）の移植 ----------
+
+def linear_is_available(check_start, check_end, events):
+    for ev_start, ev_end in events:
+        if ((ev_start <= check_start < ev_end)
+                or (ev_start < check_end <= ev_end)
+                or (check_start <= ev_start and check_end >= ev_end)):
+            return False
+    return True
+
+
+def linear_next_time(current, day_end, events):
+    earliest = None
+    for ev_start, ev_end in events:
+        if ev_start.date() == current.date() and ev_end > current:
+            if earliest is None or ev_end < earliest:
+                earliest = ev_end
+    if earliest is not None and earliest <= day_end:
+        return earliest + GAP
+    return current + GAP
+
+
+def linear_find_slot(cursor, day_end, minutes, events):
+    length = timedelta(minutes=minutes)
+    current, current_day_end = cursor, day_end
+    tries = days = 0
+    while tries < MAX_TRIES and days < MAX_SEARCH_DAYS:
+        proposed_end = current + length
+        if proposed_end > current_day_end:
+            next_day = datetime(current.year, current.month, current.day) + timedelta(days=1)
+            current, current_day_end = at(next_day, WORK_START), at(next_day, WORK_END)
+            days += 1
+            tries += 1
+            continue
+        if linear_is_available(current, proposed_end, events):
+            return current
+        current = linear_next_time(current, current_day_end, events)
+        tries += 1
+    raise NoSlotError()
+
+
+# ---------- 確認 ----------
+
+def t(hhmm):
+    return datetime(2025, 11, 3, *map(int, hhmm.split(":")))
+
+
+# (既存予定, カーソル, 分, GAS版の開始, slot_finder の開始)
+CASES = [
+    ([], "08:00", 30, "08:00", "08:00"),
+    ([("09:00", "10:00")], "09:00", 30, "10:05", "10:05"),
+    ([("09:00", "10:00")], "08:00", 55, "08:00", "08:00"),   # 予定の開始にちょうど接するのは可
+    ([("09:00", "10:00")], "08:30", 31, "10:05", "10:05"),
+    ([("09:00", "10:00"), ("10:00", "10:30")], "09:00", 30, "10:35", "10:35"),
+    ([("20:00", "20:50")], "20:00", 30, None, None),          # 今日は入らず翌日の営業開始（下で別扱い）
+    # 意図的な違い: 9:50 に終わる予定と重なる 9:52 までの予定の後にも GAP を空ける
+    ([("09:00", "09:50"), ("09:30", "09:52")], "09:00", 30, "09:55", "09:57"),
+]
+
+
+def check_cases():
+    for events, cursor, minutes, linear_expected, fast_expected in CASES:
+        events = [(t(a), t(b)) for a, b in events]
+        day_end = at(t(cursor), WORK_END)
+        linear = linear_find_slot(t(cursor), day_end, minutes, events)
+        fast = find_next_slot(BusyIndex(events), t(cursor), day_end, minutes)["start"]
+        if linear_expected is None:
+            tomorrow = at(t(cursor) + timedelta(days=1), WORK_START)
+            assert linear == fast == tomorrow, (events, cursor, linear, fast)
+            continue
+        assert linear == t(linear_expected), (events, cursor, "GAS版", linear)
+        assert fast == t(fast_expected), (events, cursor, "slot_finder", fast)
+        assert classify(linear, fast, minutes, events) == ("same" if linear == fast else "gap"), (events, cursor)
+    print(f"✅ 手書きのケース {len(CASES)}件（意図的な違い: 重なった予定の後の GAP）")
+
+
+def is_free(start, minutes, events):
+    """予定と重ならず、どの予定の終了からも GAP 以上空いている"""
+    end = start + timedelta(minutes=minutes)
+    return all(not (ev_start < end and start < ev_end + GAP) for ev_start, ev_end in events)
+
+
+def classify(linear, fast, minutes, events):
+    """GAS版との違いの種類: "same"・"gap"（重なった予定の後の GAP）・"gave_up"（GAS版の打ち切り）・None（想定外）"""
+    if linear == fast:
+        return "same"
+    if linear is None:
+        return "gave_up"
+    # GAS版の位置は予定と重ならないが、ある予定の終了から GAP 未満（slot_finder はその先を選ぶ）
+    if (linear < fast and linear_is_available(linear, linear + timedelta(minutes=minutes), events)
+            and any(ev_end <= linear < ev_end + GAP for _, ev_end in events)):
+        return "gap"
+    return None
+
+
+# ---------- ベンチマーク ----------
+
+def synthetic_week(per_week, monday, seed=1):
+    """営業時間内に 10〜60分のイベントをランダムに配置した1週間分"""
+    rng = random.Random(seed)
+    events = []
+    for _ in range(per_week):
+        day = monday + timedelta(days=rng.randrange(7))
+        start = at(day, WORK_START) + timedelta(minutes=5 * rng.randrange(13 * 12))
+        events.append((start, start + timedelta(minutes=rng.choice((10, 15, 30, 45, 60)))))
+    return events
+
+
+def run(per_week, task_count):
+    monday = datetime(2025, 11, 3)
+    events = synthetic_week(per_week, monday)
+    rng = random.Random(2)
+    durations = [rng.choice((15, 30, 60, 90)) for _ in range(task_count)]
+
+    # 同じカーソル列に対して両方式で検索する（片方の結果が次の検索に影響しないように）
+    cursors = []
+    index = BusyIndex(events)
+    cursor, day_end = at(monday, WORK_START), at(monday, WORK_END)
+    for minutes in durations:
+        cursors.append((cursor, day_end, minutes))
+        start = find_next_slot(index, cursor, day_end, minutes)["start"]
+        cursor = start + timedelta(minutes=minutes) + GAP
+        day_end = at(cursor, WORK_END)
+
+    started = time.perf_counter()
+    linear = []
+    for c, d, m in cursors:
+        try:
+            linear.append(linear_find_slot(c, d, m, events))
+        except NoSlotError:
+            linear.append(None)  # MAX_TRIES 回で諦めた（GASはこの場合カーソル位置に強制配置する）
+    linear_s = time.perf_counter() - started
+
+    started = time.perf_counter()
+    index = BusyIndex(events)
+    fast = [find_next_slot(index, c, d, m)["start"] for c, d, m in cursors]
+    fast_s = time.perf_counter() - started
+
+    # 不一致は先頭のコメントの意図的な変更だけ（slot_finder の結果は常に空いている）
+    kinds = {"same": 0, "gap": 0, "gave_up": 0}
+    for (c, d, m), a, b in zip(cursors, linear, fast):
+        assert b >= c and b + timedelta(minutes=m) <= at(b, WORK_END) and is_free(b, m, events), (c, m, b)
+        kind = classify(a, b, m, events)
+        assert kind is not None, f"想定外の不一致: カーソル {c} {m}分 GAS版 {a} slot_finder {b}"
+        kinds[kind] += 1
+    print(f"{per_week:>6}件/週 線形 {linear_s * 1000:9.1f}ms  区間 {fast_s * 1000:7.1f}ms "
+          f"(x{linear_s / fast_s:,.0f})  配置一致 {kinds['same']}/{task_count} "
+          f"(重なった予定の後の GAP {kinds['gap']} / 線形が打ち切り {kinds['gave_up']})")
+
+
+if __name__ == "__main__":
+    tasks = int(sys.argv[1]) if len(sys.argv) > 1 else 20
+    check_cases()
+    for per_week in (1000, 2500, 5000, 10000):
+        run(per_week, tasks)
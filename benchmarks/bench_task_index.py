@@ -0,0 +1,134 @@
+# benchmarks/bench_task_index.py
+# /done・/undone・/must_one のタスク名インデックスの確認と計測
+# - 前方一致・部分一致・タイプミス（トライグラムの類似度）で候補が出ること
+# - 入力からイベントキーを決める規則がGASの部分一致（今日・開始順で最初）と同じこと
+# - キー指定の書き込みが進捗モデルでも同じタスクに反映されること
+# - オートコンプリート1回あたりの時間（Discordの3秒制限に対して 10ms 未満が目標）
+#
+# 使い方: python benchmarks/bench_task_index.py [1日あたりのタスク数] [日数]
+
+import os
+import random
+import sys
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from calendar_store import JST  # noqa: E402
+from progress_model import ProgressModel  # noqa: E402
+from task_index import TaskIndex, key_start, normalize  # noqa: E402
+
+NOW = datetime(2026, 10, 19, 7, 30)  # JST（オフセット無し）
+WORDS = ["細胞継代", "データ解析", "メンテ", "論文執筆", "ミーティング", "レポート作成", "Weekly Sync",
+         "実験準備", "発表練習", "メール返信", "コードレビュー", "試薬発注", "装置点検", "文献調査"]
+
+
+def millis(dt):
+    return int(dt.replace(tzinfo=JST).timestamp() * 1000)
+
+
+def make_events(per_day, days, rng):
+    events = []
+    for day in range(days + 1):
+        base = datetime(NOW.year, NOW.month, NOW.day, 8) + timedelta(days=day)
+        for i in range(per_day):
+            start = base + timedelta(minutes=15 * i)
+            title = f"{rng.choice(WORDS)} {day}-{i} {rng.choice(['★', '★★', '★★★'])}"
+            events.append({"key": f"ev{day}_{i}@google.com@{millis(start)}", "title": title,
+                           "_start": start, "allDay": False})
+    events.append({"key": "allday@1", "title": "休日", "_start": NOW, "allDay": True})
+    return events
+
+
+def check_search():
+    index = TaskIndex(days=7)
+    index.rebuild([
+        {"key": "a@1760828400000", "title": "細胞継代 ★★★", "_start": datetime(2026, 10, 19, 8)},
+        {"key": "b@1760832000000", "title": "データ解析 ★★ ✓", "_start": datetime(2026, 10, 19, 9)},
+        {"key": "c@1760835600000", "title": "☆ Weekly Sync ★", "_start": datetime(2026, 10, 19, 10)},
+        {"key": "d@1760922000000", "title": "細胞継代 ★★★", "_start": datetime(2026, 10, 20, 10)},
+        {"key": "e@1", "title": "休日", "_start": datetime(2026, 10, 19), "allDay": True},
+    ], NOW)
+    assert len(index) == 4, "終日予定は入れない"
+    assert [e["key"] for e in index.search("細胞")] == ["a@1760828400000", "d@1760922000000"], "今日を先に"
+    assert [e["key"] for e in index.search("継代")][0] == "a@1760828400000", "2文字の語中一致"
+    assert [e["key"] for e in index.search("ｗｅｅｋｌｙ")] == ["c@1760835600000"], "全角・大文字小文字"
+    assert [e["key"] for e in index.search("細胞継大")][0] == "a@1760828400000", "タイプミス"
+    assert [e["key"] for e in index.search("weekyl sync")] == ["c@1760835600000"], "入れ替わり"
+    assert [e["key"] for e in index.search("", done=True)] == ["b@1760832000000"]
+    assert index.search("解析", done=False) == [], "/done には完了済みを出さない"
+    assert index.search("zzzz") == []
+
+    # GASの markTaskAsComplete_ と同じく、今日の予定を開始順に見て最初の部分一致
+    assert index.resolve("継代", done=False)["key"] == "a@1760828400000"
+    assert index.resolve("解析", done=True)["key"] == "b@1760832000000"
+    assert index.resolve("解析", done=False) is None
+    assert key_start(f"x@google.com@{millis(datetime(2026, 10, 19, 8))}") == datetime(2026, 10, 19, 8)
+    assert key_start("タスク名") is None and normalize(" ☆ Ａ  b ✓") == "a b"
+
+    index.apply_write("mark_complete", {"event_key": "a@1760828400000"}, {"ok": True})
+    assert index.get("a@1760828400000")["title"].endswith("✓")
+    index.apply_write("set_must_one", {"event_key": "d@1760922000000"}, {"ok": True})
+    assert index.get("d@1760922000000")["title"].startswith("☆") and "☆" not in index.get("c@1760835600000")["title"]
+    print("✅ 前方一致・部分一致・タイプミスの候補、GASと同じイベントの決定、書き込みの反映")
+
+
+def check_progress_by_key():
+    """同じタイトルが2つあるとき、キーで選んだ方だけが完了になる"""
+    model = ProgressModel("bench", now=lambda: NOW)
+    task = {"title": "会議 ★", "duration": 30}
+    model.load({"pending": [dict(task, start="09:00", end="09:30"), dict(task, start="15:00", end="15:30")]}, NOW)
+    key = f"x@{millis(datetime(2026, 10, 19, 15))}"
+    model.apply_write("mark_complete", {"task": "会議 ★", "event_key": key}, {"ok": True})
+    snapshot = model.progress()
+    assert [t["start"] for t in snapshot["completed"]] == ["15:00"], snapshot
+    key = f"y@{millis(datetime(2026, 10, 20, 9))}"
+    model.apply_write("mark_complete", {"task": "会議 ★", "event_key": key}, {"ok": True})
+    assert model.progress() is None and model.stale, "今日に置けない書き込みは次の照合まで使わない"
+    print("✅ キー指定の完了は進捗モデルでも同じ時刻のタスクに反映・今日以外のキーは照合待ち")
+
+
+def bench_autocomplete(per_day, days):
+    rng = random.Random(3)
+    events = make_events(per_day, days, rng)
+    index = TaskIndex(days=days)
+    started = time.perf_counter()
+    index.rebuild(events, NOW)
+    build = time.perf_counter() - started
+
+    queries = []
+    for word in WORDS:
+        for n in range(1, len(word) + 1):
+            queries.append(word[:n])  # 1文字ずつ入力していく
+        queries.append(word[1:] + word[0])  # タイプミス
+    samples = []
+    for _ in range(5):
+        for q in queries:
+            t = time.perf_counter()
+            index.search(q, done=False)
+            samples.append(time.perf_counter() - t)
+    samples.sort()
+    p50 = samples[len(samples) // 2]
+    p99 = samples[int(len(samples) * 0.99)]
+
+    # 比較: インデックス無しで全タイトルを正規化して部分一致（GASの走査と同じ量の仕事）
+    t = time.perf_counter()
+    for q in queries:
+        qn = normalize(q)
+        [ev for ev in events if qn in normalize(ev["title"])]
+    scan = (time.perf_counter() - t) / len(queries)
+
+    print(f"\nオートコンプリート（{len(index)}件・{index.stats()['grams']}トライグラム、構築 {build * 1000:.1f}ms）:")
+    print(f"  インデックス p50 : {p50 * 1000:7.3f}ms")
+    print(f"  インデックス p99 : {p99 * 1000:7.3f}ms")
+    print(f"  全件走査（参考） : {scan * 1000:7.3f}ms")
+    assert p99 < 0.010, f"p99 {p99 * 1000:.1f}ms が 10ms を超えています"
+
+
+if __name__ == "__main__":
+    per_day = int(sys.argv[1]) if len(sys.argv) > 1 else 40
+    days = int(sys.argv[2]) if len(sys.argv) > 2 else 7
+    check_search()
+    check_progress_by_key()
+    bench_autocomplete(per_day, days)
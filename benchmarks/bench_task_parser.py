@@ -0,0 +1,80 @@
+# benchmarks/bench_task_parser.py
+# task_parser（GAS parseLine_ 等のPython移植）の適合チェックと解析スループット計測
+# 期待値は .gs の正規表現の挙動（JavaScriptのASCII単語境界 \b など）に合わせている
+#
+# 使い方: python benchmarks/bench_task_parser.py [行数]
+
+import os
+import sys
+import time
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from task_parser import parse_text  # noqa: E402
+
+NOW = datetime(2025, 10, 29, 10, 0)  # 水曜日
+
+# (入力, [(タイトル, 分, 優先度, 日付, 固定開始)], 無視される行)
+CASES = [
+    ("会議 1h A", [("会議", 60, "A", None, None)], []),
+    ("明日 レポート作成 2h A", [("レポート作成", 120, "A", "2025-10-30", None)], []),
+    ("@14:00 会議 1h B", [("会議", 60, "B", None, "14:00")], []),
+    ("251101 プレゼン準備 3h A", [("プレゼン準備", 180, "A", "2025-11-01", None)], []),
+    ("251031 細胞継代 1h A", [("細胞継代", 60, "A", "2025-10-31", None)], []),
+    ("今日 レポート作成 2h B", [("レポート作成", 120, "B", "2025-10-29", None)], []),
+    ("タスク 1h", [("タスク", 60, "C", None, None)], []),
+    ("金 ジム 1.5h", [("ジム", 90, "C", "2025-10-31", None)], []),
+    ("10:00-11:30 打ち合わせ", [("打ち合わせ", 90, "C", None, "10:00")], []),
+    ("@午後3時 歯医者 1h", [("歯医者", 60, "C", None, "15:00")], []),
+    # ★指定時は分離で補われた末尾の "C" がタイトルに残る（GASと同じ）
+    ("★★ 会議 1h", [("会議 C", 60, "B", None, None)], []),
+    # 期間の後ろの★は複数タスク分離で落ちる（GASと同じ）
+    ("会議 1h ★★", [("会議", 60, "C", None, None)], []),
+    # 改行区切り（"30min" は先頭の "m" に一致するため優先度Bは読まれない）
+    ("251030 タスクA 1h A\nタスクB 30min B",
+     [("タスクA", 60, "A", "2025-10-30", None), ("タスクB", 30, "C", None, None)], []),
+    # 1行に複数タスク（日付プレフィックスは各タスクに付く。先頭の "C" は優先度記号として除去される）
+    ("251031 C2T5657メンテ 2h B データ解析 1h A",
+     [("2T5657メンテ", 120, "B", "2025-10-31", None), ("データ解析", 60, "A", "2025-10-31", None)], []),
+    # 「分」「時間」の直後が英数字でないと \b が成立せず、期間として読まれない
+    ("読書 30分 C", [], ["読書 30分 C"]),
+    ("会議 2時間 B", [], ["会議 2時間 B"]),
+    ("メモだけ", [], ["メモだけ"]),
+]
+
+
+def summarize(task):
+    return (
+        task["title"], task["minutes"], task["priority"],
+        task["dayAnchor"].date().isoformat() if task["dayAnchor"] else None,
+        task["fixedStart"].strftime("%H:%M") if task["fixedStart"] else None,
+    )
+
+
+def check_conformance():
+    failures = 0
+    for raw, expected, skipped in CASES:
+        result = parse_text(raw, NOW)
+        actual = [summarize(t) for t in result["tasks"]]
+        if actual != expected or result["skipped"] != skipped:
+            failures += 1
+            print(f"❌ {raw!r}\n   期待: {expected} {skipped}\n   実際: {actual} {result['skipped']}")
+    print(f"適合チェック: {len(CASES) - failures}/{len(CASES)} 件一致")
+    return failures == 0
+
+
+def bench_throughput(lines):
+    samples = [raw for raw, _, _ in CASES]
+    text = "\n".join(samples[i % len(samples)] for i in range(lines))
+    started = time.perf_counter()
+    result = parse_text(text, NOW)
+    elapsed = time.perf_counter() - started
+    print(f"解析: {lines}行 → {len(result['tasks'])}タスク {elapsed * 1000:.1f}ms "
+          f"({lines / elapsed:,.0f}行/秒)")
+
+
+if __name__ == "__main__":
+    ok = check_conformance()
+    bench_throughput(int(sys.argv[1]) if len(sys.argv) > 1 else 10000)
+    sys.exit(0 if ok else 1)
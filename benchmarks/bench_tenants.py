@@ -0,0 +1,115 @@
+# benchmarks/bench_tenants.py
+# テナント設定の読み込み・振り分けの確認と、遅いテナントが他のテナントを待たせないことの確認
+# 「遅いチーム」のGASが応答に時間が掛かり接続プールを使い切っている間に、
+# 「速いチーム」のコマンドが従来の1クライアント共有と比べてどれだけ待たされるかを測る
+#
+# 使い方: python benchmarks/bench_tenants.py [テナント数]
+
+import asyncio
+import json
+import os
+import sys
+import tempfile
+import time
+from datetime import time as dtime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from gas_client import GasClient  # noqa: E402
+from stub_gas import StubGas  # noqa: E402
+from tenants import TenantConfigError, load_tenants  # noqa: E402
+
+
+def write_config(config):
+    f = tempfile.NamedTemporaryFile("w", suffix=".json", delete=False, encoding="utf-8")
+    json.dump(config, f)
+    f.close()
+    return f.name
+
+
+def check_config(n, data_dir):
+    os.environ["BENCH_TEAM_KEY"] = "secret"
+    tenants = [{"name": f"team-{i}", "gas_endpoint": f"https://example.invalid/{i}", "api_key": "k",
+                "guild_ids": [1000 + i], "channel_id": 2000 + i} for i in range(n)]
+    tenants[0].update(default=True, api_key_env="BENCH_TEAM_KEY", report_times=["09:00"])
+    tenants[1]["user_ids"] = [42]
+    path = write_config({"defaults": {"pool_size": 4, "report_times": ["13:00", "20:00"]}, "tenants": tenants})
+    try:
+        registry = load_tenants(path, {"pool_size": 10, "cache_size": 64}, data_dir=data_dir)
+    finally:
+        os.remove(path)
+
+    assert len(registry) == n
+    team0, team1, team2 = registry.get("team-0"), registry.get("team-1"), registry.get("team-2")
+    assert registry.resolve(guild_id=1002) is team2
+    assert registry.resolve(guild_id=1002, user_id=42) is team1, "ユーザーの割り当てを優先"
+    assert registry.resolve(guild_id=999) is team0, "未登録のギルドは default"
+    assert team2.gas.pool_size == 4 and team2.gas.cache.max_size == 64, "defaults → 環境変数の既定値の順"
+    assert team0.gas is not team2.gas and team0.gas.cache is not team2.gas.cache
+    assert team0.report_times == [dtime(9, 0)] and team2.report_times == [dtime(13, 0), dtime(20, 0)]
+    assert team0.timezone == "Asia/Tokyo"
+
+    for broken, message in (
+        ({"tenants": [tenants[2], dict(tenants[3], guild_ids=[1002])]}, "ギルドの重複"),
+        ({"tenants": [dict(tenants[2], pool=1)]}, "不明な項目"),
+        ({"tenants": [dict(tenants[2], name="../x")]}, "不正な名前"),
+        ({"tenants": [dict(tenants[2], timezone="Mars/Base")]}, "不明なタイムゾーン"),
+    ):
+        path = write_config(broken)
+        try:
+            load_tenants(path, data_dir=data_dir)
+            raise AssertionError(f"{message} は TenantConfigError のはず")
+        except TenantConfigError:
+            pass
+        finally:
+            os.remove(path)
+    print(f"✅ テナント設定: {n}件の読み込み・ギルド/ユーザー/defaultの振り分け・レポート時刻・設定エラー")
+    return registry
+
+
+async def fast_latency(shared, slow_calls=20, fast_calls=5):
+    """遅いテナントが接続プールを使い切っている間の、速いテナントの応答時間"""
+    slow_stub = StubGas(latency=1.0).start_in_thread()
+    fast_stub = StubGas(latency=0.02).start_in_thread()
+    if shared:
+        # 従来: 1つのクライアント（接続プール4）を全チームで共有
+        slow_client = fast_client = GasClient(slow_stub.url, "k", pool_size=4)
+    else:
+        slow_client = GasClient(slow_stub.url, "k", pool_size=4, name="slow")
+        fast_client = GasClient(fast_stub.url, "k", pool_size=4, name="fast")
+    try:
+        slow = [asyncio.ensure_future(slow_client.call("mark_complete", task=f"t{i}"))
+                for i in range(slow_calls)]
+        await asyncio.sleep(0.05)
+        started = time.perf_counter()
+        if shared:
+            # 共有時は同じプールから速いチームのGASにも送る（送信先だけ差し替える）
+            fast_client._url = f"{fast_stub.url}?key=k"
+        await asyncio.gather(*(fast_client.call("mark_complete", task=f"f{i}") for i in range(fast_calls)))
+        elapsed = time.perf_counter() - started
+        await asyncio.gather(*slow)
+        return elapsed
+    finally:
+        await slow_client.close()
+        if fast_client is not slow_client:
+            await fast_client.close()
+        slow_stub.stop_thread()
+        fast_stub.stop_thread()
+
+
+async def main(n):
+    with tempfile.TemporaryDirectory() as data_dir:
+        registry = check_config(n, data_dir)
+        await registry.gather(lambda t: t.close())
+
+    print("\n遅いテナント（GAS 1秒・20件）が実行中に、速いテナント（GAS 20ms）で5件:")
+    shared = await fast_latency(shared=True)
+    isolated = await fast_latency(shared=False)
+    print(f"  接続プール共有（従来）  : {shared * 1000:7.1f}ms")
+    print(f"  テナントごとに分離      : {isolated * 1000:7.1f}ms")
+    assert isolated < shared
+
+
+if __name__ == "__main__":
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 30
+    asyncio.run(main(n))
@@ -0,0 +1,87 @@
+# benchmarks/stub_gas.py
+# ベンチマーク用のローカルGASスタブサーバー
+# doPost と同じ {"mode": ...} 形式のリクエストに、指定した遅延の後で定型レスポンスを返す
+
+import asyncio
+import json
+import threading
+
+from aiohttp import web
+
+
+def _canned_response(body):
+    mode = body.get("mode", "create")
+    if mode == "progress":
+        return {"ok": True, "mode": mode, "progress": {
+            "date": "2025-11-06", "totalTasks": 4, "completedCount": 2,
+            "pendingCount": 2, "completionRate": 50,
+            "completed": [], "pending": [], "mustOne": None,
+        }}
+    if mode == "get_schedule":
+        return {"ok": True, "mode": mode, "events": []}
+    if mode == "create":
+        return {"ok": True, "mode": mode, "created": []}
+    return {"ok": True, "mode": mode}
+
+
+class StubGas:
+    """遅延を注入できるGASスタブ（127.0.0.1の空きポートで起動）
+
+    ブロッキングなクライアントと同じループで動かすとデッドロックするため、
+    start_in_thread() で専用スレッドのイベントループ上に起動する。
+    """
+
+    def __init__(self, latency=0.2, handler=None):
+        self.latency = latency
+        self.handler = handler or _canned_response
+        self.requests = []
+        self._runner = None
+        self._loop = None
+        self._thread = None
+        self.url = None
+
+    async def _post(self, request):
+        body = json.loads(await request.text() or "{}")
+        self.requests.append(body)
+        await asyncio.sleep(self.latency)
+        result = self.handler(body)
+        if isinstance(result, web.Response):
+            return result
+        return web.json_response(result)
+
+    async def start(self):
+        app = web.Application()
+        app.router.add_post("/exec", self._post)
+        self._runner = web.AppRunner(app)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, "127.0.0.1", 0)
+        await site.start()
+        port = site._server.sockets[0].getsockname()[1]
+        self.url = f"http://127.0.0.1:{port}/exec"
+        return self
+
+    async def stop(self):
+        if self._runner is not None:
+            await self._runner.cleanup()
+
+    def start_in_thread(self):
+        """専用スレッドでサーバーを起動し、URLが確定するまで待つ"""
+        ready = threading.Event()
+
+        def run():
+            self._loop = asyncio.new_event_loop()
+            self._loop.run_until_complete(self.start())
+            ready.set()
+            self._loop.run_forever()
+            self._loop.run_until_complete(self.stop())
+            self._loop.close()
+
+        self._thread = threading.Thread(target=run, daemon=True)
+        self._thread.start()
+        ready.wait()
+        return self
+
+    def stop_thread(self):
+        if self._loop is not None:
+            self._loop.call_soon_threadsafe(self._loop.stop)
+            self._thread.join()
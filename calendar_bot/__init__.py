@@ -0,0 +1,12 @@
+# calendar_bot/__init__.py
+# Discord Calendar Bot v2.6.0
+# 1行のテキストでGoogleカレンダーにタスクを追加、進捗管理も自動化
+# https://github.com/Nodee-1014/discord-calendar-bot
+#
+# 起動: python -m calendar_bot（main.py からも起動できる）
+# モジュール構成（discord.py を読み込むのは app 以降だけ）:
+#   config    設定（環境変数）        renderers 応答メッセージの整形
+#   app       Bot本体・コマンド共通処理 commands  スラッシュコマンド
+#   scheduler 定期実行                startup   起動処理・bot.run
+
+__version__ = "2.6.0"
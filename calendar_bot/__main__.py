@@ -0,0 +1,27 @@
+# calendar_bot/__main__.py
+# python -m calendar_bot の入口
+# 設定を確認してから discord.py などの重いモジュールを読み込む（設定ミスなら読み込みを待たずに終了する）
+
+from time import perf_counter
+STARTED_AT = perf_counter()  # 起動時間の計測の起点（discord.py などの読み込みも含める）
+
+import logging
+
+import jsonlog
+
+
+def main():
+    from . import config
+    config.validate()
+
+    # ログ（1行1JSON・別スレッドで書き込み）
+    jsonlog.setup(config.LOG_LEVEL, redact=config.LOG_REDACT)
+    # discord.py のDEBUGログはゲートウェイの全イベントを出すので、INFOより細かくしない
+    logging.getLogger("discord").setLevel(max(logging.INFO, jsonlog.LEVELS.get(config.LOG_LEVEL, logging.INFO)))
+
+    from . import startup
+    startup.run(STARTED_AT)
+
+
+if __name__ == "__main__":
+    main()
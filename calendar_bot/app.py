@@ -0,0 +1,314 @@
+# calendar_bot/app.py
+# Botの本体（discord.py の Bot・テナント・送信スケジューラ）と、コマンド共通の処理
+# 読み込んだだけでは Bot・テナントを作らない（startup.create_app() → create_bot() が作り、
+# コマンドは commands、定期実行は scheduler、起動処理は startup が bot に登録する）
+
+import functools
+import os
+from time import perf_counter
+
+import discord
+from discord.ext import commands
+
+import jsonlog
+import metrics
+import sharding
+from format_runner import FormatCursor
+from retry_queue import is_retryable
+from send_scheduler import BROADCAST, SendScheduler, channel_bucket, interaction_bucket, user_bucket
+from tenants import Tenant, TenantRegistry, load_tenants
+
+from .config import (
+    API_KEY, CHANNEL_ID, DATA_DIR, DISCORD_GLOBAL_SEND_LIMIT, DISCORD_SEND_LIMIT, DISCORD_SEND_WINDOW,
+    GAS_ENDPOINT, MIRROR_ENABLED, RETRY_ENABLED, SHARD_COUNT, SHARD_IDS, TENANT_DEFAULTS, TENANTS_FILE,
+)
+from .renderers import error_message, render_created, split_message
+
+log = jsonlog.get_logger("bot")
+
+# ---------- メトリクス（/metrics で公開） ----------
+COMMAND_SECONDS = metrics.histogram(
+    "discord_command_seconds", "コマンドの処理時間（応答開始から最後の応答まで、秒）", ("command", "outcome"))
+COMMAND_ACK_SECONDS = metrics.histogram(
+    "discord_command_ack_seconds", "インタラクション作成からハンドラ開始までの時間（秒）", ("command",))
+COMMAND_ERRORS = metrics.counter(
+    "discord_command_errors_total", "コマンドのエラー件数（種類別）", ("command", "error"))
+SEND_SECONDS = metrics.histogram(
+    "discord_send_seconds", "応答メッセージ1件の送信時間（秒）", ("command",))
+AUTOCOMPLETE_SECONDS = metrics.histogram(
+    "discord_autocomplete_seconds", "オートコンプリート候補の計算時間（秒）", ("command",),
+    buckets=(0.0001, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.1))
+SHARD_INTERACTIONS = metrics.counter(
+    "discord_shard_interactions_total", "シャードごとに受け取ったインタラクション数", ("shard",))
+# ----------------------------------------------
+
+SHARD_OPTIONS = sharding.bot_options(SHARD_COUNT, SHARD_IDS)
+
+class CalendarBot(commands.AutoShardedBot if SHARD_OPTIONS is not None else commands.Bot):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.closers = []  # 終了時に呼ぶコルーチン関数（後から登録したものから順に呼ぶ）
+
+    async def close(self):
+        for close in reversed(self.closers):
+            await close()
+        await super().close()
+
+# create_bot() が作る（読み込んだだけでは作らない。テナントの作成には GAS_ENDPOINT などの設定が必要）
+bot = None
+tenants = None
+shard_stats = None
+send_scheduler = None
+format_cursor = None
+
+def shard_count() -> int:
+    return bot.shard_count or 1
+
+def local_shards():
+    """このプロセスが担当するシャード（全シャードを担当しているならNone）"""
+    if not SHARD_OPTIONS or "shard_ids" not in SHARD_OPTIONS:
+        return None
+    return set(SHARD_OPTIONS["shard_ids"])
+
+def served_tenants():
+    """このプロセスにコマンドが届きうるテナント（カレンダーミラーを同期する）"""
+    return [t for t in tenants if sharding.serves(t, shard_count(), local_shards())]
+
+def shard_latencies():
+    """[(シャード番号, 秒)]（シャーディングしていなければシャード0の1件）"""
+    if SHARD_OPTIONS is not None:
+        return list(bot.latencies)
+    return [(0, bot.latency)]
+
+async def notify_retry_result(job, data, error):
+    """リトライしたジョブの結果をDMで通知（DMできなければ元のチャンネルでメンション）"""
+    notify = job["notify"]
+    label = notify.get("label") or job["payload"].get("mode")
+    if error:
+        msg = (f"❌ **リトライを断念しました:** `{label}`\n{error[:200]}\n"
+               f"💡 時間をおいてもう一度実行してください")
+    elif data.get("ok"):
+        detail = data.get("message") or ""
+        if data.get("created"):
+            detail = render_created(data["created"])
+        elif "total" in data:
+            detail = f"{data['total']}個のタスクを処理しました"
+        msg = f"✅ **リトライで完了しました:** `{label}`\n{detail}"
+    else:
+        msg = f"⚠️ **リトライしましたが失敗しました:** `{label}`\n{data.get('message') or data.get('error', 'Unknown error')}"
+
+    user_id = notify.get("user_id")
+    try:
+        user = bot.get_user(user_id) or await bot.fetch_user(user_id)
+        await send_scheduler.send_all(user_bucket(user), user.send, split_message(msg), BROADCAST)
+        return
+    except (discord.HTTPException, TypeError) as e:
+        log.warning("retry_dm_failed", user_id=user_id, channel_id=notify.get("channel_id"),
+                    error=f"{type(e).__name__}: {e}")
+    channel = bot.get_channel(notify.get("channel_id") or 0)
+    if channel is not None:
+        await broadcast(channel, f"<@{user_id}> {msg}")
+
+def can_retry(error):
+    return RETRY_ENABLED and is_retryable(error)
+
+async def queue_write(interaction: discord.Interaction, payload, label):
+    """書き込みpayloadを、結果の通知先（実行ユーザー）付きでテナントのリトライキューに入れる"""
+    await current_tenant(interaction).retry_queue.enqueue(
+        payload,
+        notify={"user_id": interaction.user.id, "channel_id": interaction.channel_id, "label": label},
+        chain=f"user:{interaction.user.id}",  # 同じユーザーの操作は実行順を保つ
+    )
+
+async def enqueue_retry(interaction: discord.Interaction, payload, label, error):
+    """一時的な障害で失敗した書き込みをリトライキューに入れ、ユーザーに伝える"""
+    await queue_write(interaction, payload, label)
+    log.warning("write_queued_for_retry", command=interaction.command.name if interaction.command else None,
+                mode=payload.get("mode"), error=f"{type(error).__name__}: {error}")
+    await reply(
+        interaction,
+        f"⏳ GASが一時的に応答しません（{type(error).__name__}）。\n"
+        f"`{label}` をリトライキューに登録しました。完了したらDMでお知らせします。",
+    )
+
+# ---------- コマンド共通の計測とエラー処理 ----------
+def current_tenant(interaction: discord.Interaction) -> Tenant:
+    """command_handler が割り当てた、このコマンドのテナント"""
+    return interaction.extras["tenant"]
+
+def track_write(interaction: discord.Interaction, payload, label):
+    """GASの一時的な障害で失敗したら、リトライキューに入れる書き込みとして記録する"""
+    interaction.extras["retry"] = (payload, label)
+
+async def reply(interaction: discord.Interaction, content):
+    """応答の状態に合わせて送る（未応答なら送信、送信済みメッセージは編集、defer中はfollowup）"""
+    if not interaction.response.is_done():
+        await interaction.response.send_message(content, ephemeral=True)
+    elif interaction.response.type == discord.InteractionResponseType.channel_message:
+        await interaction.edit_original_response(content=content)
+    else:
+        await interaction.followup.send(content, ephemeral=True)
+
+async def send_chunks(interaction: discord.Interaction, content):
+    """2000文字制限に合わせて分割し、followupで順に送る（content は文字列または行の列）"""
+    await send_followups(interaction, split_message(content))
+
+async def send_followups(interaction: discord.Interaction, chunks, first=0, total=None):
+    """分割済みのチャンクを「(続き i/n)」を付けて送信スケジューラ経由のfollowupで送る
+
+    他の応答・定期レポートと合わせて送信ペースを抑えるので、429で待たされない。
+    first はこのチャンクの前に別の方法で送った件数（番号合わせ用）。
+    """
+    command = interaction.command.name if interaction.command else "unknown"
+    total = total or first + len(chunks)
+
+    async def followup(chunk):
+        with SEND_SECONDS.time(command=command):
+            return await interaction.followup.send(chunk, ephemeral=True)
+
+    await send_scheduler.send_all(interaction_bucket(interaction), followup, [
+        f"**(続き {first + i + 1}/{total})**\n{chunk}" if first + i > 0 else chunk
+        for i, chunk in enumerate(chunks)])
+
+async def broadcast(channel, content):
+    """定期レポート・通知をチャンネルに送る（コマンドへの応答を優先し、同じチャンネルへの短い通知はまとめる）"""
+    return await send_scheduler.send_all(channel_bucket(channel), channel.send, split_message(content), BROADCAST)
+
+def command_handler(func):
+    """全スラッシュコマンド共通のラッパー
+
+    処理時間・エラー件数をメトリクスに記録し、例外はユーザー向けの応答に変換する。
+    track_write() で記録した書き込みが一時的な障害で失敗した場合はリトライキューに入れる。
+    """
+    @functools.wraps(func)
+    async def wrapper(interaction: discord.Interaction, *args, **kwargs):
+        command = interaction.command.name if interaction.command else func.__name__
+        ack = (discord.utils.utcnow() - interaction.created_at).total_seconds()
+        COMMAND_ACK_SECONDS.observe(max(0.0, ack), command=command)
+        started = perf_counter()
+        outcome = "ok"
+        tenant = tenants.resolve(interaction.guild_id, interaction.user.id)
+        if tenant is None:
+            COMMAND_SECONDS.observe(perf_counter() - started, command=command, outcome="no_tenant")
+            await reply(interaction, "⚠️ このサーバー（ユーザー）にはカレンダーが設定されていません。Botの管理者に連絡してください。")
+            return
+        interaction.extras["tenant"] = tenant
+        try:
+            await func(interaction, *args, **kwargs)
+        except Exception as e:
+            outcome = type(e).__name__
+            COMMAND_ERRORS.inc(command=command, error=outcome)
+            write = interaction.extras.get("retry")
+            try:
+                if write is not None and can_retry(e):
+                    outcome = "queued"
+                    await enqueue_retry(interaction, write[0], write[1], e)
+                else:
+                    log.error("command_failed", command=command, error=f"{type(e).__name__}: {e}")
+                    await reply(interaction, error_message(e))
+            except discord.HTTPException as send_error:
+                log.error("command_error_reply_failed", command=command, error=str(send_error))
+        finally:
+            COMMAND_SECONDS.observe(perf_counter() - started, command=command, outcome=outcome)
+    return wrapper
+
+# ---------- シャードごとの統計 ----------
+async def count_interaction(interaction: discord.Interaction):
+    if interaction.guild is not None:
+        shard_id = interaction.guild.shard_id
+    elif interaction.guild_id is not None:
+        shard_id = sharding.shard_for_guild(interaction.guild_id, shard_count())
+    else:
+        shard_id = 0  # DMはシャード0に届く
+    shard_stats.record(shard_id)
+    SHARD_INTERACTIONS.inc(shard=shard_id)
+
+async def shard_connected(shard_id):
+    shard_stats.connects[shard_id] += 1
+    log.info("shard_connected", shard=shard_id)
+
+async def shard_disconnected(shard_id):
+    shard_stats.disconnects[shard_id] += 1
+    log.warning("shard_disconnected", shard=shard_id)
+
+# ---------- 今日の進捗（/progress・定期レポート共通） ----------
+async def fetch_progress(tenant):
+    """今日の進捗を (data, 鮮度表示) で返す
+
+    Bot内の進捗モデル → カレンダーミラー → GAS の順に使い、
+    ミラー・GASから取れた結果でモデルを照合し直す。
+    """
+    local = tenant.progress.progress()
+    if local is not None:
+        return {"ok": True, "progress": local}, tenant.progress.freshness_label()
+    freshness = None
+    local = tenant.mirror.progress(allow_stale=tenant.gas.circuit_open) if MIRROR_ENABLED else None
+    if local is not None:
+        data, freshness = {"ok": True, "progress": local}, tenant.mirror.freshness_label()
+    else:
+        # タイムアウトを短縮してレスポンス改善
+        data = await tenant.gas.call("progress", timeout=15)
+    if data.get("ok") and not data.get("degraded"):
+        tenant.progress.reconcile(data.get("progress", {}))
+    return data, freshness
+
+# ---------- 起動時に作るもの ----------
+def build_tenants() -> TenantRegistry:
+    """テナント（チームごとのGASエンドポイント・キャッシュ・リトライキュー）を作る
+
+    TENANTS_FILE が無ければ、.env の GAS_ENDPOINT/API_KEY/CHANNEL_ID で1テナントだけ作る。
+    """
+    if TENANTS_FILE:
+        return load_tenants(TENANTS_FILE, TENANT_DEFAULTS, data_dir=DATA_DIR, notifier=notify_retry_result)
+    return TenantRegistry([Tenant(
+        "default", GAS_ENDPOINT, API_KEY, channel_id=CHANNEL_ID, default=True,
+        data_dir=DATA_DIR, notifier=notify_retry_result, **TENANT_DEFAULTS,
+    )])
+
+def create_bot():
+    """Bot・テナント・送信スケジューラを作り、シャードの統計とゲージを登録する（2回目以降は同じ bot を返す）"""
+    global bot, tenants, shard_stats, send_scheduler, format_cursor
+    if bot is not None:
+        return bot
+    tenants = build_tenants()
+    bot = CalendarBot(command_prefix="!", intents=discord.Intents.default(), **(SHARD_OPTIONS or {}))
+    shard_stats = sharding.ShardStats()
+    send_scheduler = SendScheduler(DISCORD_SEND_LIMIT, DISCORD_SEND_WINDOW, DISCORD_GLOBAL_SEND_LIMIT)
+    format_cursor = FormatCursor(os.path.join(DATA_DIR, "format_cursor.db"))
+    bot.closers += [lambda: tenants.gather(Tenant.close), format_cursor.close, send_scheduler.close]
+    bot.add_listener(count_interaction, "on_interaction")
+    bot.add_listener(shard_connected, "on_shard_connect")
+    bot.add_listener(shard_disconnected, "on_shard_disconnect")
+    register_gauges()
+    return bot
+
+def register_gauges():
+    """出力時に各コンポーネントの状態を読むゲージ（テナント別・優先度別・シャード別）"""
+    def per_tenant(func):
+        return lambda: [({"tenant": t.name}, func(t)) for t in tenants]
+
+    metrics.gauge("gas_breaker_state", "サーキットブレーカーの状態（0=closed, 1=half_open, 2=open）",
+                  per_tenant(lambda t: {"closed": 0, "half_open": 1, "open": 2}[t.gas.breaker.state]),
+                  labels=("tenant",))
+    metrics.gauge("gas_rate_limit_per_second", "現在のGAS送信レート（429で減速）",
+                  per_tenant(lambda t: t.gas.limiter.rate), labels=("tenant",))
+    metrics.gauge("gas_pool_open_connections", "GAS接続プールのオープン中の接続数",
+                  per_tenant(lambda t: t.gas.pool_stats()["open_connections"]), labels=("tenant",))
+    metrics.gauge("gas_cache_entries", "GASレスポンスキャッシュのエントリ数",
+                  per_tenant(lambda t: t.gas.cache.stats()["size"]), labels=("tenant",))
+    metrics.gauge("calendar_mirror_age_seconds", "カレンダーミラーの最終同期からの経過秒数（未同期なら出力しない）",
+                  per_tenant(lambda t: t.mirror.age if MIRROR_ENABLED else None), labels=("tenant",))
+    metrics.gauge("retry_queue_jobs", "起動後にリトライキューが処理したジョブ数（結果別）",
+                  lambda: [({"tenant": t.name, "result": result}, getattr(t.retry_queue, result))
+                           for t in tenants for result in ("retried", "succeeded", "dead_lettered")],
+                  labels=("tenant", "result"))
+    metrics.gauge("discord_send_queue_depth", "送信スケジューラの送信待ちメッセージ数（優先度別）",
+                  lambda: [({"priority": name}, depth) for name, depth in send_scheduler.depth().items()],
+                  labels=("priority",))
+    metrics.gauge("discord_shard_latency_seconds", "シャードごとのゲートウェイのハートビート遅延（秒）",
+                  lambda: [({"shard": shard_id}, None if latency != latency else latency)  # 未接続はNaN
+                           for shard_id, latency in shard_latencies()],
+                  labels=("shard",))
+    metrics.gauge("discord_shard_interactions_per_second", "シャードごとの直近60秒のインタラクション到着レート",
+                  lambda: [({"shard": shard_id}, shard_stats.rate(shard_id)) for shard_id in shard_stats.shard_ids()],
+                  labels=("shard",))
@@ -0,0 +1,952 @@
+# calendar_bot/commands.py
+# スラッシュコマンド（register() で bot.tree に登録する）
+
+from datetime import datetime, timedelta
+from time import perf_counter
+
+import discord
+from discord import app_commands
+
+from format_runner import pending_windows, run_windows, split_windows
+from gas_client import GasHTTPError
+from paginator import PagedEmbed, send_pages
+from report_scheduler import ScheduleError, parse_timezone
+from retry_queue import with_idempotency_key
+from send_scheduler import SEND_WAIT_SECONDS
+from slot_finder import LOOKAHEAD_DAYS, plan_tasks
+from t2g_batch import run_batches, split_batches
+from task_index import strip_done
+from task_parser import parse_text
+
+from . import app, scheduler
+from .app import (
+    AUTOCOMPLETE_SECONDS, command_handler, current_tenant, fetch_progress, log, queue_write, send_chunks,
+    send_followups, shard_latencies, track_write,
+)
+from .config import (
+    FORMAT_CONCURRENCY, FORMAT_DAYS_BACK, FORMAT_DAYS_FORWARD, FORMAT_WINDOW_DAYS, FORMAT_WINDOW_TIMEOUT,
+    MAX_BULK_TASKS, MIRROR_ENABLED, PROGRESS_PAGE_SIZE, RETRY_ENABLED, STATS_SHARD_ROWS, T2G_BATCH_SIZE,
+    TASK_SEPARATORS,
+)
+from .renderers import DEGRADED_NOTE, render_created, render_parsed, render_skipped, schedule_pages, split_message
+
+def plan_preview(tasks, mirror):
+    """カレンダーミラーの予定を使ってBot側で配置を見積もる（ミラーが古ければNone）"""
+    now = mirror.now()
+    horizon = now + timedelta(days=LOOKAHEAD_DAYS)
+    if not MIRROR_ENABLED or not mirror.covers(now, horizon):
+        return None
+    return plan_tasks(tasks, mirror.busy_intervals(now, horizon), now)
+
+async def t2g_batched(interaction: discord.Interaction, batches):
+    """大量入力の /t2g: バッチごとに作成し、元のメッセージに進捗を表示する"""
+    tenant = current_tenant(interaction)
+    total = sum(len(batch) for batch in batches)
+    print(f"バッチ作成開始: {total}行 / {len(batches)}バッチ")
+    
+    if tenant.batch_slots.locked():
+        await interaction.edit_original_response(content=f"⏳ **順番待ち中...** （{total}行）")
+    
+    async def on_progress(done, total, created_count):
+        await interaction.edit_original_response(
+            content=f"⏳ **タスク作成中...** {done}/{total}行 処理済み（{created_count}件作成）"
+        )
+    
+    async with tenant.batch_slots:
+        await interaction.edit_original_response(content=f"⏳ **タスク作成中...** 0/{total}行 処理済み")
+        result = await run_batches(tenant.gas, batches, on_progress)
+    
+    created = result["created"]
+    problems = []
+    
+    # 一時的な障害で止まったバッチと、その後の未送信行はリトライキューに入れる
+    queued = []
+    if RETRY_ENABLED:
+        for batch in result["failed"] + result["unknown"]:
+            if batch["retryable"]:
+                queued.append((batch["payload"], batch["lines"]))
+        if queued:
+            unsent = result["unsent"]
+            for i in range(0, len(unsent), T2G_BATCH_SIZE):
+                lines = unsent[i:i + T2G_BATCH_SIZE]
+                queued.append((with_idempotency_key({"mode": "create", "text": "\n".join(lines)}), lines))
+            result["failed"] = [b for b in result["failed"] if not b["retryable"]]
+            result["unknown"] = [b for b in result["unknown"] if not b["retryable"]]
+            result["unsent"] = []
+    for payload, lines in queued:
+        await queue_write(interaction, payload, f"/t2g {len(lines)}行（{lines[0][:30]}…）")
+    if queued:
+        queued_lines = [line for _, lines in queued for line in lines]
+        problems.append(f"🔁 リトライキューに登録（{len(queued_lines)}行・完了したらDMでお知らせします）")
+        problems.extend(f"  • {line}" for line in queued_lines)
+    
+    for batch in result["failed"]:
+        problems.append(f"❌ エラー（{len(batch['lines'])}行）: {batch['error']}")
+        problems.extend(f"  • {line}" for line in batch["lines"])
+    for batch in result["unknown"]:
+        problems.append(f"⚠️ 結果不明（{len(batch['lines'])}行・カレンダーを確認してください）: {batch['error']}")
+        problems.extend(f"  • {line}" for line in batch["lines"])
+    if result["unsent"]:
+        problems.append(f"⏸️ 未送信（{len(result['unsent'])}行）: 通信エラーのため中断しました")
+        problems.extend(f"  • {line}" for line in result["unsent"])
+    
+    status = f"{'✅' if not problems else '⚠️'} **完了:** {total}行中 {len(created)}件のタスクを作成"
+    await interaction.edit_original_response(content=status)
+    
+    result_msg = render_created(created, tenant.timezone) if created else "作成対象がありません。"
+    if problems:
+        result_msg += "\n\n**⚠️ 作成できなかった行:**\n```\n" + "\n".join(problems) + "\n```"
+    
+    # メッセージを分割して送信（2000文字制限対応）
+    await send_chunks(interaction, result_msg)
+
+@app_commands.command(name="t2g", description="Text→Google Calendar")
+@app_commands.describe(
+    text="改行でタスク（例: '251030 タスクA 1h A\\nタスクB 30min B'）",
+    preview="Trueで作成せずに解析結果だけ表示（GASを呼ばない）",
+)
+@command_handler
+async def t2g(interaction: discord.Interaction, text: str, preview: bool = False):
+    tenant = current_tenant(interaction)
+    mode = "create"
+
+    # 入力の解析・検証はBot側で即座に行う（GASへの往復なし）
+    parsed = parse_text(text, tenant.now())
+    if preview or not parsed["tasks"]:
+        if parsed["tasks"]:
+            planned = plan_preview(parsed["tasks"], tenant.mirror)
+            msg = (f"**👀 プレビュー（{len(parsed['tasks'])}件・未作成）**\n```\n"
+                   f"{render_parsed(planned or parsed['tasks'])}\n```")
+            if planned:
+                msg += f"\n💡 時刻はBot側の見積もりです（作成時にGASが再計算します）\n{tenant.mirror.freshness_label()}"
+        else:
+            msg = "**⚠️ 作成できるタスクがありません**"
+        msg += render_skipped(parsed["skipped"])
+        chunks = split_message(msg)
+        await interaction.response.send_message(chunks[0], ephemeral=True)
+        if len(chunks) > 1:
+            await send_followups(interaction, chunks[1:], first=1)
+        return
+
+    await interaction.response.defer(thinking=True, ephemeral=True)
+    
+    # 大量入力はバッチに分けて順番に作成する（失敗したバッチは t2g_batched 内でキューに入れる）
+    batches = split_batches(text, T2G_BATCH_SIZE)
+    if len(batches) > 1:
+        await t2g_batched(interaction, batches)
+        return
+    
+    log.info("command", command="t2g", mode=mode, text=text)
+    payload = with_idempotency_key({"mode": mode, "text": text})
+    track_write(interaction, payload, f"/t2g {text[:40]}")
+    resp = await tenant.gas.post(payload)
+    if not resp.get("ok"):
+        error_msg = resp.get('error', 'Unknown error')
+        log.warning("gas_error_response", command="t2g", error=error_msg)
+        await interaction.followup.send(f"エラー: {error_msg}", ephemeral=True)
+        return
+
+    created = resp.get("created", [])
+    if not created:
+        await interaction.followup.send("作成対象がありません。", ephemeral=True)
+        return
+    
+    result_msg = render_created(created, tenant.timezone) + render_skipped(parsed["skipped"])
+    
+    # メッセージを分割して送信（2000文字制限対応）
+    await send_chunks(interaction, result_msg)
+
+@app_commands.command(name="schedule", description="カレンダーの予定を取得")
+@app_commands.describe(
+    date="日付（今日/明日/2025-10-30など）",
+    days="何日分取得するか（デフォルト: 1）"
+)
+@command_handler
+async def schedule(interaction: discord.Interaction, date: str = "今日", days: int = 1):
+    tenant = current_tenant(interaction)
+    await interaction.response.defer(thinking=True, ephemeral=True)
+    log.info("command", command="schedule", date=date, days=days)
+    # ローカルミラーで答えられればGASを呼ばない
+    # GAS障害中（ブレーカーが開いている間）は古いミラーでも使う
+    local_events = (tenant.mirror.schedule(date, days, allow_stale=tenant.gas.circuit_open)
+                    if MIRROR_ENABLED else None)
+    if local_events is not None:
+        data = {"ok": True, "events": local_events}
+    else:
+        data = await tenant.gas.call("get_schedule", date=date, days=days)
+    
+    if not data.get("ok"):
+        error_msg = data.get('error', 'Unknown error')
+        await interaction.followup.send(f"エラー: {error_msg}", ephemeral=True)
+        return
+    
+    events = data.get("events", [])
+    freshness = f"\n{tenant.mirror.freshness_label()}" if local_events is not None else ""
+    if data.get("degraded"):
+        freshness = f"\n{DEGRADED_NOTE}"
+    if not events:
+        await interaction.followup.send(f"**{date}の予定**\n予定はありません。{freshness}", ephemeral=True)
+        return
+    
+    # 1件のメッセージに最初のページを表示し、残りはボタンで送る（2000文字制限・連投の回避）
+    await send_pages(interaction, schedule_pages(date, events, freshness.lstrip("\n"), tenant.timezone))
+    
+
+@app_commands.command(name="report", description="週間レポートを取得")
+@app_commands.describe(period="期間（week/month）")
+@command_handler
+async def report(interaction: discord.Interaction, period: str = "week"):
+    tenant = current_tenant(interaction)
+    await interaction.response.defer(thinking=True, ephemeral=True)
+    log.info("command", command="report", period=period)
+    data = await tenant.gas.call("weekly_report", period=period)
+    
+    if not data.get("ok"):
+        error_msg = data.get('error', 'Unknown error')
+        await interaction.followup.send(f"エラー: {error_msg}", ephemeral=True)
+        return
+    
+    report_data = data.get("report", {})
+    total = report_data.get("total", 0)
+    byPriority = report_data.get("byPriority", {})
+    byDay = report_data.get("byDay", {})
+    
+    # レポート整形
+    lines = ["**📊 週間レポート**\n"]
+    lines.append(f"**総作業時間:** {total:.1f}時間\n")
+    lines.append("**優先度別:**")
+    lines.append(f"★★★ (A): {byPriority.get('A', 0):.1f}時間")
+    lines.append(f"★★ (B): {byPriority.get('B', 0):.1f}時間")
+    lines.append(f"★ (C): {byPriority.get('C', 0):.1f}時間")
+    lines.append(f"その他: {byPriority.get('other', 0):.1f}時間")
+    
+    # 日別サマリー
+    if byDay:
+        lines.append("\n**日別作業時間:**")
+        for day in sorted(byDay.keys()):
+            lines.append(f"{day}: {byDay[day]:.1f}時間")
+    
+    result = "\n".join(lines)
+    await interaction.followup.send(result, ephemeral=True)
+    
+
+# =====================================================================
+# 🆕 タスク完了管理コマンド
+# =====================================================================
+
+def task_index(tenant):
+    """ミラーが同期されていれば作り直したタスク名インデックス（ミラー無効なら空のまま）"""
+    if MIRROR_ENABLED:
+        tenant.task_index.refresh(tenant.mirror, tenant.now())
+    return tenant.task_index
+
+def resolve_task(tenant, task: str, done: bool):
+    """入力（オートコンプリートのイベントキーまたはタスク名）を (GASに送るタスク名, イベントキー) にする
+
+    インデックスで決まらなければ入力をそのまま送り、GAS側の部分一致に任せる。
+    """
+    index = task_index(tenant)
+    entry = index.get(task) or index.resolve(task, done)
+    if entry is None:
+        return task, None
+    # キーが古くなっていてもGAS側の部分一致で同じイベントに当たるよう、✓☆を除いたタイトルも送る
+    return strip_done(entry["title"]).replace("☆", "").strip(), entry["key"]
+
+def task_choices(interaction: discord.Interaction, current: str, done: bool):
+    command = interaction.command.name if interaction.command else "unknown"
+    with AUTOCOMPLETE_SECONDS.time(command=command):
+        tenant = app.tenants.resolve(interaction.guild_id, interaction.user.id)
+        if tenant is None:
+            return []
+        # 同じコマンドの他の欄（task2〜）で選んだタスクは候補から外す
+        picked = {value for _, value in interaction.namespace if isinstance(value, str) and value != current}
+        index = task_index(tenant)
+        choices = []
+        for entry in index.search(current, done=done, limit=25 + len(picked)):
+            # 値の上限は100文字（長すぎるキーはタイトルで送り、GAS側で部分一致させる）
+            value = entry["key"] if len(entry["key"]) <= 100 else strip_done(entry["title"])[:100]
+            if value in picked:
+                continue
+            choices.append(app_commands.Choice(name=index.label(entry), value=value))
+        return choices[:25]
+
+def not_found_hint(tenant, task: str, done: bool) -> str:
+    """見つからなかったときの「もしかして」（タイプミス向けの近いタスク名）"""
+    candidates = task_index(tenant).search(task, done=done, limit=3, today_only=True)
+    if not candidates:
+        return ""
+    return "\n💡 もしかして: " + " / ".join(f"`{strip_done(c['title'])}`" for c in candidates)
+
+def split_tasks(*values) -> list:
+    """/done・/undone の入力（改行・カンマ区切り、task2〜の欄）をタスクのリストにする（重複は1つに）"""
+    tasks = []
+    for value in values:
+        for part in TASK_SEPARATORS.split(value or ""):
+            part = part.strip()
+            if part and part not in tasks:
+                tasks.append(part)
+    return tasks
+
+async def set_tasks_complete(interaction: discord.Interaction, tasks: list, done: bool):
+    """複数タスクの✓をまとめて付け外しする（GASへは1回のPOST）"""
+    command = "done" if done else "undone"
+    tenant = current_tenant(interaction)
+    if len(tasks) > MAX_BULK_TASKS:
+        await interaction.followup.send(
+            f"⚠️ 一度に指定できるタスクは{MAX_BULK_TASKS}個までです（{len(tasks)}個指定されました）", ephemeral=True)
+        return
+    items = []
+    for task in tasks:
+        # /done は未完了、/undone は完了済みのタスクから選ぶ
+        text, key = resolve_task(tenant, task, done=not done)
+        items.append({"task": text, **({"event_key": key} if key else {})})
+    mode = "mark_complete_batch" if done else "unmark_complete_batch"
+    payload = with_idempotency_key({"mode": mode, "items": items})
+    track_write(interaction, payload, f"/{command} {', '.join(item['task'] for item in items)}"[:100])
+    log.info("command", command=command, tasks=len(items),
+             resolved=sum(1 for item in items if "event_key" in item))
+    data = await tenant.gas.post(payload)
+
+    results = data.get("results")
+    if not isinstance(results, list):
+        # 一括modeに対応していないGAS（再デプロイ前）など
+        await interaction.followup.send(
+            f"⚠️ {data.get('error') or data.get('message') or 'タスクを更新できませんでした'}", ephemeral=True)
+        return
+    succeeded = sum(1 for r in results if r.get("ok"))
+    icon = "✅" if done else "↩️"
+    lines = [f"**{icon} {succeeded}/{len(results)}個のタスクを{'完了にしました' if done else '未完了に戻しました'}**"]
+    for task, result in zip(tasks, results):
+        if result.get("ok"):
+            lines.append(f"{result.get('message', icon)}")
+        else:
+            lines.append(f"{result.get('message', f'⚠️ 見つかりません: {task}')}"
+                         f"{not_found_hint(tenant, task, done=not done)}")
+    await send_chunks(interaction, "\n".join(lines))
+
+@app_commands.command(name="done", description="タスクを完了にマーク（✓を追加・複数はカンマ区切り）")
+@app_commands.describe(
+    task="完了したタスク名（部分一致・候補から選ぶと確実・カンマ/改行区切りで複数可）",
+    task2="一緒に完了にするタスク（候補から選べます）",
+    task3="一緒に完了にするタスク",
+    task4="一緒に完了にするタスク",
+    task5="一緒に完了にするタスク",
+)
+@command_handler
+async def done(interaction: discord.Interaction, task: str, task2: str = None, task3: str = None,
+               task4: str = None, task5: str = None):
+    tenant = current_tenant(interaction)
+    await interaction.response.defer(thinking=True, ephemeral=True)
+    tasks = split_tasks(task, task2, task3, task4, task5)
+    if len(tasks) > 1:
+        await set_tasks_complete(interaction, tasks, done=True)
+        return
+    task = tasks[0] if tasks else task
+    text, key = resolve_task(tenant, task, done=False)
+    payload = with_idempotency_key({"mode": "mark_complete", "task": text, **({"event_key": key} if key else {})})
+    track_write(interaction, payload, f"/done {text}")
+    log.info("command", command="done", task=text, resolved=key is not None)
+    data = await tenant.gas.post(payload)
+    
+    if data.get("ok"):
+        await interaction.followup.send(f"✅ {data.get('message', 'タスクを完了にマークしました')}", ephemeral=True)
+    else:
+        await interaction.followup.send(f"⚠️ {data.get('message', 'タスクが見つかりませんでした')}"
+                                        f"{not_found_hint(tenant, task, done=False)}", ephemeral=True)
+        
+
+@app_commands.command(name="undone", description="タスクの完了マークを解除（✓を削除・複数はカンマ区切り）")
+@app_commands.describe(
+    task="完了を取り消すタスク名（部分一致・候補から選ぶと確実・カンマ/改行区切りで複数可）",
+    task2="一緒に取り消すタスク（候補から選べます）",
+    task3="一緒に取り消すタスク",
+    task4="一緒に取り消すタスク",
+    task5="一緒に取り消すタスク",
+)
+@command_handler
+async def undone(interaction: discord.Interaction, task: str, task2: str = None, task3: str = None,
+                 task4: str = None, task5: str = None):
+    tenant = current_tenant(interaction)
+    await interaction.response.defer(thinking=True, ephemeral=True)
+    tasks = split_tasks(task, task2, task3, task4, task5)
+    if len(tasks) > 1:
+        await set_tasks_complete(interaction, tasks, done=False)
+        return
+    task = tasks[0] if tasks else task
+    text, key = resolve_task(tenant, task, done=True)
+    payload = with_idempotency_key({"mode": "unmark_complete", "task": text, **({"event_key": key} if key else {})})
+    track_write(interaction, payload, f"/undone {text}")
+    log.info("command", command="undone", task=text, resolved=key is not None)
+    data = await tenant.gas.post(payload)
+    
+    if data.get("ok"):
+        await interaction.followup.send(f"↩️ {data.get('message', 'タスクの完了を取り消しました')}", ephemeral=True)
+    else:
+        await interaction.followup.send(f"⚠️ {data.get('message', '完了タスクが見つかりませんでした')}"
+                                        f"{not_found_hint(tenant, task, done=True)}", ephemeral=True)
+        
+
+@app_commands.command(name="ad", description="今日のタスク全てを完了にする（All Done）")
+@command_handler
+async def all_done(interaction: discord.Interaction):
+    tenant = current_tenant(interaction)
+    await interaction.response.defer(thinking=True, ephemeral=True)
+    payload = with_idempotency_key({"mode": "mark_all_complete"})
+    track_write(interaction, payload, "/ad")
+    log.info("command", command="ad")
+    data = await tenant.gas.post(payload)
+    
+    if data.get("ok"):
+        completed = data.get('completed', [])
+        already_done = data.get('already_done', [])
+        total = data.get('total', 0)
+        
+        # 結果メッセージを作成
+        lines = ["**✅ 今日のタスクを全て完了にしました！**\n"]
+        
+        if completed:
+            lines.append(f"**完了マークを追加 ({len(completed)}個):**")
+            lines.append("```")
+            for task in completed:
+                lines.append(f"• {task}")
+            lines.append("```")
+        
+        if already_done:
+            lines.append(f"\n**すでに完了済み ({len(already_done)}個):**")
+            lines.append("```")
+            for task in already_done:
+                lines.append(f"• {task}")
+            lines.append("```")
+        
+        if total == 0:
+            lines = ["**📭 今日のタスクはありません**"]
+        else:
+            lines.append(f"\n**合計: {total}個のタスクを処理しました**")
+        
+        result_msg = "\n".join(lines)
+        await interaction.followup.send(result_msg, ephemeral=True)
+    else:
+        await interaction.followup.send(f"⚠️ {data.get('message', 'エラーが発生しました')}", ephemeral=True)
+        
+
+@app_commands.command(name="must_one", description="今日の主役タスクに☆マークをつける（マストワンシステム）")
+@app_commands.describe(task="主役にするタスク名（部分一致・候補から選ぶと確実）")
+@command_handler
+async def must_one(interaction: discord.Interaction, task: str):
+    tenant = current_tenant(interaction)
+    await interaction.response.defer(thinking=True, ephemeral=True)
+    text, key = resolve_task(tenant, task, done=False)
+    payload = with_idempotency_key({"mode": "set_must_one", "task": text, **({"event_key": key} if key else {})})
+    track_write(interaction, payload, f"/must_one {text}")
+    log.info("command", command="must_one", task=text, resolved=key is not None)
+    data = await tenant.gas.post(payload)
+    
+    if data.get("ok"):
+        await interaction.followup.send(f"🌟 {data.get('message', 'タスクを今日の主役に設定しました')}", ephemeral=True)
+    else:
+        # 一致するタスクが無くてもGASは既存の☆を外しているので、進捗モデルにも反映する
+        tenant.progress.apply_write("set_must_one", payload, data)
+        await interaction.followup.send(f"⚠️ {data.get('message', 'タスクが見つかりませんでした')}"
+                                        f"{not_found_hint(tenant, task, done=False)}", ephemeral=True)
+        
+
+@done.autocomplete("task")
+@done.autocomplete("task2")
+@done.autocomplete("task3")
+@done.autocomplete("task4")
+@done.autocomplete("task5")
+async def done_task_autocomplete(interaction: discord.Interaction, current: str):
+    return task_choices(interaction, current, done=False)
+
+@undone.autocomplete("task")
+@undone.autocomplete("task2")
+@undone.autocomplete("task3")
+@undone.autocomplete("task4")
+@undone.autocomplete("task5")
+async def undone_task_autocomplete(interaction: discord.Interaction, current: str):
+    return task_choices(interaction, current, done=True)
+
+@must_one.autocomplete("task")
+async def must_one_task_autocomplete(interaction: discord.Interaction, current: str):
+    return task_choices(interaction, current, done=False)
+
+@app_commands.command(name="progress", description="今日のタスク進捗を表示")
+@command_handler
+async def progress(interaction: discord.Interaction):
+    tenant = current_tenant(interaction)
+    # 即座に応答（3秒タイムアウト回避）
+    await interaction.response.send_message("📊 進捗レポートを取得中...", ephemeral=True)
+    
+    print("📊 進捗レポート取得開始")
+    data, freshness = await fetch_progress(tenant)
+    print(f"📋 取得成功: {data.get('ok', False)}")
+    
+    if not data.get("ok"):
+        error_msg = data.get('error', 'Unknown error')
+        await interaction.edit_original_response(content=f"❌ エラー: {error_msg}")
+        return
+    
+    progress_data = data.get("progress", {})
+    date = progress_data.get("date", "")
+    total = progress_data.get("totalTasks", 0)
+    completed_count = progress_data.get("completedCount", 0)
+    pending_count = progress_data.get("pendingCount", 0)
+    completion_rate = progress_data.get("completionRate", 0)
+    completed_tasks = progress_data.get("completed", [])
+    pending_tasks = progress_data.get("pending", [])
+    must_one_task = progress_data.get("mustOne", None)  # 🆕 マストワンタスク
+    
+    # 進捗レポートを整形（達成率・主役タスクは全ページの先頭に出す）
+    progress_bar = "█" * (completion_rate // 10) + "░" * (10 - completion_rate // 10)
+    header = [f"**達成率:** {completion_rate}% `{progress_bar}`",
+              f"**完了:** {completed_count}/{total} タスク"]
+    if must_one_task:
+        # 🆕 マストワンタスク（最優先表示）
+        header.append(f"\n**🌟 今日の主役タスク:**\n☆ {must_one_task['title']} "
+                      f"`{must_one_task['start']}-{must_one_task['end']}`")
+    
+    # 完了タスク → 未完了タスクの順に全タスクをページに分ける
+    items = [(f"✅ 完了タスク ({len(completed_tasks)}個)", task) for task in completed_tasks]
+    items += [(f"⏳ 未完了タスク ({len(pending_tasks)}個)", task) for task in pending_tasks]
+    
+    if freshness:
+        note = freshness
+    elif data.get("degraded"):
+        note = DEGRADED_NOTE
+    else:
+        note = ""
+    
+    pages = PagedEmbed(
+        "progress", f"📊 今日の進捗レポート ({date})", items,
+        lambda tasks: [f"• {task['title']} `{task['start']}-{task['end']}`" for task in tasks],
+        page_size=PROGRESS_PAGE_SIZE, header=header, note=note,
+        empty="\n今日予定されているタスクはありません。" if total == 0 else "",
+        color=discord.Color.green())
+    
+    # 結果を元のメッセージに表示（followupの代わり。ページはボタンで送る）
+    await send_pages(interaction, pages)
+    
+
+@app_commands.command(name="format", description="既存カレンダーイベントを自動フォーマット（A/B/C → ★）")
+@command_handler
+async def format_events(interaction: discord.Interaction):
+    tenant = current_tenant(interaction)
+    # 即座に応答（3秒タイムアウト回避）
+    await interaction.response.send_message("🔄 カレンダーイベントをフォーマット中...", ephemeral=True)
+    
+    print("🔧 手動フォーマットコマンド実行")
+    # 過去1ヶ月から未来1ヶ月の範囲を FORMAT_WINDOW_DAYS 日ずつに分けて処理（既存イベント含む）
+    today = tenant.now().date()
+    range_start = today - timedelta(days=FORMAT_DAYS_BACK)
+    range_end = today + timedelta(days=FORMAT_DAYS_FORWARD)
+    windows = split_windows(range_start, range_end, FORMAT_WINDOW_DAYS)
+    done = await app.format_cursor.begin(tenant.name, range_start, range_end, FORMAT_WINDOW_DAYS) or []
+    pending = pending_windows(windows, done)
+    total_days = (range_end - range_start).days + 1
+    progress = {
+        "days": sum((end - start).days + 1 for start, end, *_ in done),
+        "converted": sum(c for *_, c, _ in done),
+        "skipped": sum(k for *_, k in done),
+        "edited_at": 0.0,
+    }
+    resumed = f"（前回の続きから・{progress['days']}/{total_days}日 処理済み）" if done else ""
+    log.info("command", command="format", windows=len(pending), resumed=bool(done))
+
+    async def on_window(window, window_result):
+        if window_result is not None:
+            await app.format_cursor.complete(tenant.name, window,
+                                         window_result.get("converted", 0), window_result.get("skipped", 0))
+            progress["days"] += (window[1] - window[0]).days + 1
+            progress["converted"] += window_result.get("converted", 0)
+            progress["skipped"] += window_result.get("skipped", 0)
+        # 編集は1秒に1回まで（Discordのレート制限）
+        if perf_counter() - progress["edited_at"] < 1.0:
+            return
+        progress["edited_at"] = perf_counter()
+        try:
+            await interaction.edit_original_response(
+                content=f"🔄 **フォーマット中...**{resumed} {progress['days']}/{total_days}日 処理済み\n"
+                        f"🌟 変換 {progress['converted']}件 / 📋 スキップ {progress['skipped']}件")
+        except discord.HTTPException:
+            pass
+
+    result = await run_windows(tenant.gas, pending, concurrency=FORMAT_CONCURRENCY,
+                               timeout=FORMAT_WINDOW_TIMEOUT, on_window=on_window, tenant=tenant.name)
+    print(f"📋 フォーマット: {len(pending) - len(result['failed'])}/{len(pending)}ウィンドウ成功")
+    if not result["failed"]:
+        await app.format_cursor.finish(tenant.name)
+    
+    if result["failed"] and progress["days"] == 0:
+        error_msg = result["failed"][0][1]
+        await interaction.edit_original_response(content=f"❌ **エラーが発生しました**\n詳細: {error_msg}")
+        return
+    
+    converted = progress["converted"]
+    skipped = progress["skipped"]
+    changes = result["changes"]
+    
+    # 結果を整形
+    if converted > 0:
+        lines = [f"🌟 **{converted}件のイベントを自動フォーマットしました！**{resumed}\n"]
+        
+        for i, change in enumerate(changes[:5]):  # 最大5件表示
+            original = change.get('original', '')
+            converted_title = change.get('converted', '')
+            date = change.get('date', '')
+            lines.append(f"`{i+1}.` **{date}**")
+            lines.append(f"   `{original}` → `{converted_title}`")
+        
+        if converted > 5:
+            lines.append(f"\n... 他 **{converted - min(len(changes), 5)}件** も変換されました")
+            
+        lines.append(f"\n📋 **スキップ:** {skipped}件（既にフォーマット済み）")
+        
+    elif skipped > 0:
+        lines = [
+            f"✅ **すべてのイベントは既にフォーマット済みです**",
+            f"📋 **確認済み:** {skipped}件のイベント",
+            "",
+            f"💡 **新しいイベントには自動的に★が付与されます**"
+        ]
+    else:
+        lines = [
+            f"📅 **対象となるイベントが見つかりませんでした**",
+            "",
+            f"🔍 **確認範囲:** {range_start:%m/%d}〜{range_end:%m/%d}",
+            f"💡 **新しくタスクを作成すると自動で★が付きます**"
+        ]
+    
+    lines.append(f"\n📝 **フォーマットルール:**")
+    lines.append(f"• **A** → ★★★ (最高優先度)")
+    lines.append(f"• **B** → ★★ (中優先度)")
+    lines.append(f"• **C** → ★ (低優先度)")
+    lines.append(f"• **自動判定** 緊急・会議 → ★★★")
+    
+    if result["failed"]:
+        failed_days = sum((end - start).days + 1 for (start, end), _ in result["failed"])
+        lines.append(f"\n⚠️ **{failed_days}日分を処理できませんでした**（{result['failed'][0][1]}）")
+        lines.append("💡 もう一度 `/format` を実行すると、残りの期間だけを処理します")
+    
+    result_text = "\n".join(lines)
+    
+    # 結果を元のメッセージに更新
+    try:
+        await interaction.edit_original_response(content=result_text)
+    except (RuntimeError, Exception) as edit_error:
+        # Discord接続エラーの場合は再試行
+        print(f"⚠️ 編集エラー（再試行）: {edit_error}")
+        try:
+            await interaction.followup.send(result_text, ephemeral=True)
+        except:
+            print("❌ followupも失敗")
+    
+
+@app_commands.command(name="stats", description="Botの内部統計を表示（GAS接続プールなど）")
+@command_handler
+async def stats(interaction: discord.Interaction):
+    tenant = current_tenant(interaction)
+    pool = tenant.gas.pool_stats()
+    flight = tenant.gas.coalescing_stats()
+    lines = [
+        f"**📈 Bot統計**（テナント: {tenant.name} / 全{len(app.tenants)}件）\n",
+        "**🔌 GAS接続プール:**",
+        "```",
+        f"リクエスト数      : {pool['requests']}",
+        f"新規接続          : {pool['connections_created']}",
+        f"接続再利用        : {pool['connections_reused']}",
+        f"オープン中の接続  : {pool['open_connections']} (使用中 {pool['in_use']} / 待機 {pool['idle']})",
+        f"プール上限        : {pool['pool_size']}",
+        f"同時呼び出し統合  : {flight['deduplicated']} (実行中 {flight['in_flight']})",
+        "```",
+    ]
+    guard = tenant.gas.guard_stats()
+    if guard["breaker"] is not None:
+        b = guard["breaker"]
+        state = {"closed": "正常 (closed)", "open": f"停止中 (open・あと{b['retry_after']:.0f}秒)",
+                 "half_open": "試行中 (half-open)"}[b["state"]]
+        lines += [
+            "**⚡ サーキットブレーカー:**",
+            "```",
+            f"状態              : {state}",
+            f"連続失敗          : {b['consecutive_failures']} / {b['failure_threshold']}",
+            f"オープン回数      : {b['times_opened']}",
+            f"即時失敗した呼出  : {b['rejected']}",
+            f"代替応答（キャッシュ）: {guard['degraded_responses']}",
+            "```",
+        ]
+    if guard["limiter"] is not None:
+        r = guard["limiter"]
+        lines += [
+            "**🚦 レート制限:**",
+            "```",
+            f"送信レート        : {r['rate']:.1f} / {r['base_rate']:.1f} 件/秒（バースト {r['capacity']:.0f}）",
+            f"残りトークン      : {r['tokens']:.1f}",
+            f"待機 / 429で減速  : {r['waits']}回 ({r['waited_seconds']:.1f}秒) / {r['penalties']}回",
+            "```",
+        ]
+    if tenant.gas.cache is not None:
+        cache = tenant.gas.cache.stats()
+        lines += [
+            "**🗃️ レスポンスキャッシュ:**",
+            "```",
+            f"ヒット / ミス     : {cache['hits']} / {cache['misses']} ({cache['hit_rate']:.1f}%)",
+            f"エントリ数        : {cache['size']} / {cache['max_size']}",
+            f"無効化            : {cache['invalidations']}",
+            "```",
+        ]
+    if MIRROR_ENABLED:
+        m = tenant.mirror.stats()
+        lines += [
+            "**🪞 カレンダーミラー:**",
+            "```",
+            f"イベント数        : {m['events']}",
+            f"同期回数          : {m['syncs']}",
+            f"ローカル応答      : {m['local_reads']}",
+            f"状態              : {'最新' if m['fresh'] else '古い/未同期'}",
+            f"直近のエラー      : {m['last_error'] or 'なし'}",
+            f"タスク名索引      : {tenant.task_index.stats()['entries']}件（候補検索 {tenant.task_index.stats()['lookups']}回）",
+            "```",
+            tenant.mirror.freshness_label(),
+        ]
+    lines += ["**🛰️ シャード:**", "```"]
+    guilds = {}
+    for guild in app.bot.guilds:
+        guilds[guild.shard_id] = guilds.get(guild.shard_id, 0) + 1
+    shards = shard_latencies()
+    if len(shards) > STATS_SHARD_ROWS:
+        # シャードが多いときは未接続・遅延の大きいものだけ1行ずつ出し、残りは1行にまとめる
+        shards.sort(key=lambda item: -item[1] if item[1] == item[1] else float("-inf"))
+        shards, rest = shards[:STATS_SHARD_ROWS], shards[STATS_SHARD_ROWS:]
+    else:
+        rest = []
+    for shard_id, latency in shards:
+        latency_str = f"{latency * 1000:.0f}ms" if latency == latency else "未接続"
+        lines.append(f"#{shard_id:<3} 遅延 {latency_str:>6} / ギルド {guilds.get(shard_id, 0)} / "
+                     f"{app.shard_stats.rate(shard_id) * 60:.1f}件/分 (計{app.shard_stats.totals[shard_id]}) / "
+                     f"切断 {app.shard_stats.disconnects[shard_id]}回")
+    if rest:
+        ids = [shard_id for shard_id, _ in rest]
+        slowest = max((latency for _, latency in rest if latency == latency), default=float("nan"))
+        slowest_str = f"最大{slowest * 1000:.0f}ms" if slowest == slowest else "未接続"
+        lines.append(f"ほか{len(rest)}シャード 遅延 {slowest_str} / "
+                     f"ギルド {sum(guilds.get(i, 0) for i in ids)} / "
+                     f"{sum(app.shard_stats.rate(i) for i in ids) * 60:.1f}件/分 / "
+                     f"切断 {sum(app.shard_stats.disconnects[i] for i in ids)}回")
+    lines.append("```")
+    p = tenant.progress.stats()
+    drift = p["last_drift"]
+    lines += [
+        "**🧮 進捗モデル:**",
+        "```",
+        f"今日の件数        : {p['completed']} / {p['total']}（{'使用中' if p['usable'] else '照合待ち'}）",
+        f"ローカル応答 / 更新: {p['local_reads']} / {p['updates']}",
+        f"GASとの照合       : {p['reconciles']}回（ずれ {p['drifted']}回）",
+        "直近のずれ        : " + (", ".join(f"{k}={v}" for k, v in drift.items() if k in
+                                          ("total", "completed", "pending", "mustOne", "tasks") and v)
+                                if drift else "なし"),
+        "```",
+    ]
+    sched = scheduler.report_scheduler.stats()
+    last = sched["last_batch"]
+    lines += [
+        "**🗓️ 定期レポート:**",
+        "```",
+        f"スケジュール数    : {sched['schedules']}（このテナント {len(scheduler.report_scheduler.list(tenant=tenant.name))}）",
+        f"送信 / 失敗       : {sched['fired']} / {sched['failed']}",
+        f"直近の一斉送信    : " + (f"{last['size']}件 {last['seconds']:.1f}秒（最大遅れ {last['lateness']:.1f}秒）"
+                                   if last else "なし"),
+        "```",
+    ]
+    sends = app.send_scheduler.stats()
+    waits = {name: SEND_WAIT_SECONDS.snapshot(priority=name) for name in sends["depth"]}
+    lines += [
+        "**📤 送信キュー:**",
+        "```",
+        f"送信待ち          : 応答 {sends['depth']['interactive']} / 一斉送信 {sends['depth']['broadcast']}"
+        f"（{sends['buckets']}送信先）",
+        f"送信 / まとめた数 : {sends['sent']} / {sends['merged']}（失敗 {sends['failed']}）",
+        f"ペース調整で待った: {sends['throttled']}回",
+        "平均待ち時間      : " + " / ".join(
+            f"{name} {w['sum'] / w['count']:.2f}秒" if w["count"] else f"{name} -" for name, w in waits.items()),
+        "```",
+    ]
+    if RETRY_ENABLED:
+        q = await tenant.retry_queue.stats()
+        lines += [
+            "**🔁 リトライキュー:**",
+            "```",
+            f"待機中            : {q['pending']}",
+            f"完了 / デッドレター: {q['done']} / {q['dead']}",
+            f"再送回数          : {q['retried']}",
+            "```",
+        ]
+    # シャード・テナントが多いと2000文字を超えるので分割して送る
+    chunks = split_message(lines)
+    await interaction.response.send_message(chunks[0], ephemeral=True)
+    if len(chunks) > 1:
+        await send_followups(interaction, chunks[1:], first=1)
+
+@app_commands.command(name="resync", description="カレンダーミラーを強制的に全件再同期")
+@command_handler
+async def resync(interaction: discord.Interaction):
+    tenant = current_tenant(interaction)
+    await interaction.response.defer(thinking=True, ephemeral=True)
+    if not MIRROR_ENABLED:
+        await interaction.followup.send("⚠️ カレンダーミラーは無効です（CALENDAR_MIRROR=0）", ephemeral=True)
+        return
+    try:
+        summary = await tenant.mirror.sync(full=True)
+        await interaction.followup.send(
+            f"🔄 **再同期しました**\n{summary['total']}件のイベントを取得\n{tenant.mirror.freshness_label()}",
+            ephemeral=True,
+        )
+    except Exception as e:
+        await interaction.followup.send(f"❌ 再同期エラー: {e}", ephemeral=True)
+
+@app_commands.command(name="check", description="A/B/C付きイベントを確認（手動変更の参考用）")
+@command_handler
+async def check_events(interaction: discord.Interaction):
+    tenant = current_tenant(interaction)
+    # 即座に応答
+    await interaction.response.send_message("🔍 イベントを分析中...", ephemeral=True)
+    
+    print("🔍 Check events command called")
+    # analyze_events APIを使用して詳細確認
+    try:
+        data = await tenant.gas.call("analyze_events", timeout=15)
+        http_ok = True
+    except GasHTTPError as e:
+        print(f"Check APIレスポンス: status={e.status_code}")
+        data = None
+        http_ok = False
+    
+    if http_ok:
+        try:
+            if data.get('ok'):
+                result = data.get('result', {})
+                summary = result.get('summary', {})
+                analysis = result.get('analysis', [])
+                
+                needs_conversion = summary.get('needsConversion', 0)
+                already_converted = summary.get('alreadyConverted', 0)
+                cannot_edit = summary.get('cannotEdit', 0)
+                
+                lines = [
+                    f"🔍 **A/B/C付きイベント確認結果**",
+                    f"",
+                    f"� **概要:**",
+                    f"• 変換が必要: **{needs_conversion}件**",
+                    f"• 既に変換済み: **{already_converted}件**",
+                    f"• 編集不可: **{cannot_edit}件**"
+                ]
+                
+                if needs_conversion > 0:
+                    lines.extend([
+                        f"",
+                        f"⚠️ **`/format`コマンドで自動変換可能です！**",
+                        f"💡 `/format`を実行すると{needs_conversion}件が★に変換されます"
+                    ])
+                elif already_converted > 0:
+                    lines.extend([
+                        f"",
+                        f"✅ **すべてのA/B/Cイベントは★に変換済みです**",
+                        f"🎉 {already_converted}件のイベントが既にフォーマット済み"
+                    ])
+                else:
+                    lines.extend([
+                        f"",
+                        f"💡 **A/B/C付きイベントは見つかりませんでした**",
+                        f"🆕 今後作成するタスクには自動で★が付与されます"
+                    ])
+                
+                lines.extend([
+                    f"",
+                    f"🔄 **使い方:**",
+                    f"• `/format`: 既存A/B/Cを★に一括変換",
+                    f"• `/task`: 新規タスク作成（自動★変換付き）"
+                ])
+                
+                result_text = "\n".join(lines)
+                await interaction.edit_original_response(content=result_text)
+            else:
+                raise Exception("API response not ok")
+                
+        except Exception as parse_error:
+            # APIエラーの場合は手動手順を表示
+            lines = [
+                f"🔍 **A/B/C付きイベント確認**",
+                f"",
+                f"📋 **手動確認手順:**",
+                f"1. Googleカレンダーを開く", 
+                f"2. 検索ボックスで「A」「B」「C」を検索",
+                f"3. `/format`コマンドで自動変換を試す",
+                f"",
+                f"💡 **今後作成するタスクは自動で★変換されます**"
+            ]
+            
+            result_text = "\n".join(lines)
+            await interaction.edit_original_response(content=result_text)
+    else:
+        await interaction.edit_original_response(
+            content=f"❌ **イベント確認エラー**\n"
+            f"カレンダーの確認中にエラーが発生しました。\n"
+            f"手動でGoogleカレンダーを確認してください。"
+        )
+    
+
+@app_commands.command(name="report_schedule", description="このチャンネルの定期進捗レポートを設定（cron形式・タイムゾーン付き）")
+@app_commands.describe(
+    action="list（一覧）/ add（追加）/ remove（削除）",
+    cron="「分 時 日 月 曜日」 例: 0 9 * * 1-5（平日9:00）",
+    timezone="タイムゾーン（例: Asia/Tokyo、省略時はテナントの設定）",
+    schedule_id="削除するスケジュールの番号（list で確認）",
+)
+@app_commands.default_permissions(manage_guild=True)
+@command_handler
+async def report_schedule(interaction: discord.Interaction, action: str = "list", cron: str = None,
+                          timezone: str = None, schedule_id: int = None):
+    tenant = current_tenant(interaction)
+    log.info("command", command="report_schedule", action=action)
+    channel_id = interaction.channel_id
+    if action == "add":
+        if not cron:
+            await interaction.response.send_message("⚠️ cron を指定してください（例: `0 9 * * 1-5`）", ephemeral=True)
+            return
+        try:
+            row = await scheduler.report_scheduler.add(tenant.name, channel_id, cron, timezone or tenant.timezone,
+                                             guild_id=interaction.guild_id)
+        except ScheduleError as e:
+            await interaction.response.send_message(f"⚠️ {e}", ephemeral=True)
+            return
+        next_fire = datetime.fromtimestamp(row["next_fire"], parse_timezone(row["tz"]))
+        await interaction.response.send_message(
+            f"✅ **スケジュール #{row['id']} を追加しました**\n`{row['cron']}` ({row['tz']})\n"
+            f"次回: {next_fire.strftime('%Y-%m-%d %H:%M')}", ephemeral=True)
+    elif action == "remove":
+        if schedule_id is None or not await scheduler.report_scheduler.remove(schedule_id, channel_id=channel_id):
+            await interaction.response.send_message(
+                "⚠️ このチャンネルにそのスケジュールはありません（`list` で番号を確認してください）", ephemeral=True)
+            return
+        await interaction.response.send_message(f"🗑️ スケジュール #{schedule_id} を削除しました", ephemeral=True)
+    elif action == "list":
+        rows = scheduler.report_scheduler.list(channel_id=channel_id)
+        if not rows:
+            await interaction.response.send_message("📭 このチャンネルの定期レポートはありません", ephemeral=True)
+            return
+        lines = ["**🗓️ このチャンネルの定期レポート**", "```"]
+        for row in rows:
+            next_fire = datetime.fromtimestamp(row["next_fire"], parse_timezone(row["tz"]))
+            lines.append(f"#{row['id']:<4} {row['cron']:<16} {row['tz']:<16} 次回 {next_fire.strftime('%m/%d %H:%M')}")
+        lines.append("```")
+        await interaction.response.defer(ephemeral=True)
+        await send_chunks(interaction, "\n".join(lines))
+    else:
+        await interaction.response.send_message("⚠️ action は list / add / remove のいずれかです", ephemeral=True)
+
+COMMANDS = (t2g, schedule, report, done, undone, all_done, must_one, progress, format_events, stats, resync,
+            check_events, report_schedule)
+
+def register(tree):
+    """全スラッシュコマンドを bot.tree に登録する"""
+    for command in COMMANDS:
+        tree.add_command(command)
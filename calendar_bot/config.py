@@ -0,0 +1,97 @@
+# calendar_bot/config.py
+# 設定（環境変数・.env から読む）
+# discord.py などを読み込まずに済むよう、このモジュールは標準ライブラリと python-dotenv だけを使う。
+# 必須の設定が欠けているかの確認は validate()（起動時に __main__ が呼ぶ）
+
+import os
+import re
+
+from dotenv import load_dotenv
+
+load_dotenv()  # .env を読み込む（環境変数が優先）
+
+DISCORD_TOKEN = os.getenv("DISCORD_TOKEN")
+GAS_ENDPOINT  = os.getenv("GAS_ENDPOINT")
+API_KEY       = os.getenv("API_KEY")
+GUILD_ID      = os.getenv("GUILD_ID")
+CHANNEL_ID    = os.getenv("CHANNEL_ID")  # 🆕 進捗レポート送信チャンネル
+TENANTS_FILE  = os.getenv("TENANTS_FILE")  # 複数チームを1プロセスで扱う場合のテナント設定（JSON）
+SHARD_COUNT   = os.getenv("SHARD_COUNT")  # auto または総シャード数（未設定ならシャーディングしない）
+SHARD_IDS     = os.getenv("SHARD_IDS")    # このプロセスが担当するシャード（例: 0-3）
+STATS_SHARD_ROWS = int(os.getenv("STATS_SHARD_ROWS", "20"))  # /stats で1行ずつ表示するシャード数（超えた分は集計）
+METRICS_HOST  = os.getenv("METRICS_HOST", "127.0.0.1")
+METRICS_PORT  = int(os.getenv("METRICS_PORT", "9108"))  # 0で /metrics を無効化
+LOG_LEVEL     = os.getenv("LOG_LEVEL", "INFO").upper()
+LOG_REDACT    = os.getenv("LOG_REDACT", "1") != "0"  # 0で予定名・入力テキストもログに出す
+LOG_DEBUG_SAMPLE = float(os.getenv("LOG_DEBUG_SAMPLE", "0.1"))  # DEBUG時にGASレスポンスを出力する割合
+
+MIRROR_ENABLED = os.getenv("CALENDAR_MIRROR", "1") != "0"
+MIRROR_SYNC_SECONDS = int(os.getenv("MIRROR_SYNC_SECONDS", "60"))
+
+# 書き込み系コマンドの永続リトライキュー（GASの429/5xx・タイムアウト時に操作を失わない）
+DATA_DIR = os.getenv("DATA_DIR", "data")
+RETRY_ENABLED = os.getenv("RETRY_QUEUE", "1") != "0"
+
+# 既定のタイムゾーン（定期レポート・カレンダーリンクの時刻の解釈。テナントごとに timezone で変更可）
+DEFAULT_TIMEZONE = os.getenv("REPORT_TIMEZONE", "Asia/Tokyo")
+
+# テナント共通の既定値（テナント設定ファイルの defaults・各テナントの値で上書きできる）
+TENANT_DEFAULTS = {
+    "pool_size": int(os.getenv("GAS_POOL_SIZE", "10")),
+    "keepalive_timeout": float(os.getenv("GAS_KEEPALIVE_SECONDS", "60")),
+    "cache_size": int(os.getenv("GAS_CACHE_SIZE", "256")),
+    # Apps Scriptのクォータを超えないよう送信ペースを抑え、障害中は即座に失敗させる
+    "rate_per_second": float(os.getenv("GAS_RATE_PER_SECOND", "5")),
+    "rate_burst": float(os.getenv("GAS_RATE_BURST", "10")),
+    "breaker_failures": int(os.getenv("GAS_BREAKER_FAILURES", "3")),
+    "breaker_reset_seconds": float(os.getenv("GAS_BREAKER_RESET_SECONDS", "30")),
+    "mirror_days_back": int(os.getenv("MIRROR_DAYS_BACK", "7")),
+    "mirror_days_forward": int(os.getenv("MIRROR_DAYS_FORWARD", "30")),
+    "retry_workers": int(os.getenv("RETRY_WORKERS", "2")),
+    "retry_base_seconds": float(os.getenv("RETRY_BASE_SECONDS", "5")),
+    "retry_max_attempts": int(os.getenv("RETRY_MAX_ATTEMPTS", "8")),
+    "max_concurrent_batches": int(os.getenv("T2G_MAX_CONCURRENT_BATCHES", "2")),
+    "debug_sample": LOG_DEBUG_SAMPLE,
+    "timezone": DEFAULT_TIMEZONE,
+    "progress_max_age": float(os.getenv("PROGRESS_MAX_AGE_SECONDS", "900")),
+    "task_index_days": int(os.getenv("TASK_INDEX_DAYS", "7")),
+}
+
+# /done・/undone で一度に指定できるタスク数（GASへは1回のPOSTにまとめる）
+MAX_BULK_TASKS = int(os.getenv("MAX_BULK_TASKS", "25"))
+TASK_SEPARATORS = re.compile(r"[\n,、，]")
+
+# Bot内の進捗モデルをGASの generateDailyProgress_ と照合する間隔（ずれを計測して置き換える）
+PROGRESS_RECONCILE_SECONDS = int(os.getenv("PROGRESS_RECONCILE_SECONDS", "300"))
+
+# 定期進捗レポートのスケジュール（チャンネルごと・タイムゾーン付き）
+REPORT_CONCURRENCY = int(os.getenv("REPORT_CONCURRENCY", "20"))  # 同じ時刻に並列で送るチャンネル数
+REPORT_GRACE_SECONDS = float(os.getenv("REPORT_GRACE_SECONDS", "600"))  # 停止中に過ぎた時刻を送る猶予
+
+# /format は期間を数日ずつのウィンドウに分け、並列にGASへ送る（途中で止まっても続きから再開）
+FORMAT_DAYS_BACK = int(os.getenv("FORMAT_DAYS_BACK", "30"))
+FORMAT_DAYS_FORWARD = int(os.getenv("FORMAT_DAYS_FORWARD", "30"))
+FORMAT_WINDOW_DAYS = int(os.getenv("FORMAT_WINDOW_DAYS", "7"))
+FORMAT_CONCURRENCY = int(os.getenv("FORMAT_CONCURRENCY", "4"))
+FORMAT_WINDOW_TIMEOUT = float(os.getenv("FORMAT_WINDOW_TIMEOUT", "20"))
+
+# /schedule・/progress の1ページの件数（応答は1件のメッセージで、ボタンでページを送る）
+SCHEDULE_PAGE_SIZE = int(os.getenv("SCHEDULE_PAGE_SIZE", "10"))
+PROGRESS_PAGE_SIZE = int(os.getenv("PROGRESS_PAGE_SIZE", "20"))
+
+# Discordへの送信ペース（followup・定期レポート・DMは送信スケジューラ経由で送る）
+DISCORD_SEND_LIMIT = int(os.getenv("DISCORD_SEND_LIMIT", "5"))            # 送信先ごとに window 秒あたり何件まで
+DISCORD_SEND_WINDOW = float(os.getenv("DISCORD_SEND_WINDOW", "5"))        # 上の窓の秒数
+DISCORD_GLOBAL_SEND_LIMIT = int(os.getenv("DISCORD_GLOBAL_SEND_LIMIT", "40"))  # 全体で1秒あたり何件まで
+
+# スラッシュコマンドは定義のハッシュが前回の同期から変わったときだけ同期する（1で毎回同期）
+COMMAND_SYNC_FORCE = os.getenv("COMMAND_SYNC_FORCE", "0") == "1"
+
+# /t2g のバッチ設定（1回のGAS実行に送る行数。同時に実行するバッチ処理の数はテナントごと）
+T2G_BATCH_SIZE = int(os.getenv("T2G_BATCH_SIZE", "10"))
+
+
+def validate():
+    """必須の設定が揃っているか確認する（足りなければ RuntimeError）"""
+    if not DISCORD_TOKEN or not (TENANTS_FILE or (GAS_ENDPOINT and API_KEY)):
+        raise RuntimeError("環境変数 DISCORD_TOKEN と、GAS_ENDPOINT/API_KEY または TENANTS_FILE を設定してください。")
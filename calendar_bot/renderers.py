@@ -0,0 +1,103 @@
+# calendar_bot/renderers.py
+# 応答メッセージの整形（Discord・GASへの通信はしない）
+
+import discord
+
+import message_chunks
+import metrics
+from calendar_links import calendar_links
+from gas_client import GasCircuitOpen, GasHTTPError, GasTimeout
+from paginator import PagedEmbed
+from task_parser import priority_title
+
+from .config import DEFAULT_TIMEZONE, SCHEDULE_PAGE_SIZE
+
+RENDER_SECONDS = metrics.histogram(
+    "discord_render_seconds", "応答メッセージの整形時間（秒）", ("renderer",))
+
+DEGRADED_NOTE = "⚠️ GASで障害が続いているため、直前に取得した情報を表示しています"
+
+def render_preview(preview_items):
+    lines = []
+    for it in preview_items:
+        s = str(it['start']).replace('T',' ').split('.')[0]
+        e = str(it['end']).replace('T',' ').split('.')[0]
+        lines.append(f"- {it['title']}: {s} → {e}")
+    return "\n".join(lines) if lines else "(なし)"
+
+def event_time(value):
+    """GASの時刻（ISO文字列）を HH:MM にする（時刻が無ければそのまま）"""
+    return value.split('T')[1][:5] if 'T' in value else value
+
+def schedule_pages(date, events, note="", tz=DEFAULT_TIMEZONE, page_size=SCHEDULE_PAGE_SIZE):
+    """/schedule の予定一覧のページ（カレンダーリンクは表示するページの分だけ作る）"""
+    def render(page_events):
+        return [f"• [{ev.get('title', 'タイトルなし')}]({url}) "
+                f"`{event_time(ev.get('start', ''))}-{event_time(ev.get('end', ''))}`"
+                for ev, url in zip(page_events, calendar_links(page_events, tz))]
+    return PagedEmbed("schedule", f"📅 {date}の予定 ({len(events)}個)", [(None, ev) for ev in events], render,
+                      page_size=page_size, note=note, color=discord.Color.blue())
+
+@RENDER_SECONDS.timed(renderer="split_message")
+def split_message(content, max_length=1900):
+    """メッセージ（文字列または行の列）を分割（Discord 2000文字制限・コードブロックは分割位置で閉じて開き直す）"""
+    return message_chunks.split_message(content, max_length)
+
+@RENDER_SECONDS.timed(renderer="render_created")
+def render_created(created, tz=DEFAULT_TIMEZONE):
+    """作成したイベント一覧とカレンダーリンクのメッセージを作成"""
+    lines = []
+    for it in created:
+        s = str(it['start']).replace('T',' ').split('.')[0]
+        e = str(it['end']).replace('T',' ').split('.')[0]
+        lines.append(f"- {it['title']}: {s} → {e}")
+    
+    # 結果メッセージを作成
+    result_msg = f"**✅ {len(created)}個のタスクを作成しました**\n```\n" + "\n".join(lines) + "\n```"
+    
+    # Googleカレンダーリンクを追加（全イベント分をまとめて作る）
+    if created:
+        links = calendar_links(created, tz)
+        result_msg += "\n\n**🔗 Googleカレンダーで開く:**\n" + "\n".join(
+            f"📅 [{it['title']}](<{url}>)" for it, url in zip(created, links))
+    
+    return result_msg
+
+@RENDER_SECONDS.timed(renderer="render_parsed")
+def render_parsed(tasks):
+    """Bot側で解析したタスクの一覧（GASに送る前のプレビュー）"""
+    lines = []
+    for t in tasks:
+        if "start" in t:
+            when_str = f"{t['start'].strftime('%m/%d %H:%M')} → {t['end'].strftime('%H:%M')}"
+        else:
+            when = []
+            if t["dayAnchor"]:
+                when.append(t["dayAnchor"].strftime("%m/%d"))
+            if t["fixedStart"]:
+                when.append(t["fixedStart"].strftime("%H:%M〜"))
+            when_str = " ".join(when) if when else "空き時間に配置"
+        lines.append(f"- {priority_title(t['title'], t['priority'])}: {t['minutes']}分 / {when_str}")
+    return "\n".join(lines)
+
+@RENDER_SECONDS.timed(renderer="render_skipped")
+def render_skipped(skipped):
+    """期間が読み取れずGASでも無視される行の警告"""
+    if not skipped:
+        return ""
+    return (f"\n\n**⚠️ 期間が読み取れないため無視される行 ({len(skipped)}行):**\n```\n"
+            + "\n".join(skipped) + "\n```\n💡 例: `251030 タスクA 1h A`、`会議 30min B`")
+
+def error_message(e):
+    """例外をユーザー向けのメッセージにする"""
+    if isinstance(e, GasTimeout):
+        return "⏱️ **タイムアウト**\nサーバーの応答が遅れています。\nしばらく待ってから再度お試しください。"
+    if isinstance(e, GasCircuitOpen):
+        return f"⚡ **GAS一時停止中**\n{e}\nしばらく待ってから再度お試しください。"
+    if isinstance(e, GasHTTPError):
+        error_msg = f"HTTP Error {e.status_code}"
+        if e.text:
+            # レスポンステキストを短く制限
+            error_msg += ": " + (e.text[:200] + "..." if len(e.text) > 200 else e.text)
+        return f"🌐 **通信エラー:** {error_msg}"
+    return f"💥 **エラー:** {e}"
@@ -0,0 +1,125 @@
+# calendar_bot/scheduler.py
+# 定期実行: 自動進捗レポート（チャンネルごとのスケジュール）・カレンダーミラーの同期・進捗モデルの照合
+
+import asyncio
+import os
+from datetime import datetime
+
+from discord.ext import tasks
+
+import sharding
+from report_scheduler import ReportScheduler, parse_timezone
+from tenants import Tenant
+
+from . import app
+from .app import broadcast, fetch_progress, local_shards, log, served_tenants, shard_count
+from .config import (
+    DATA_DIR, MIRROR_SYNC_SECONDS, PROGRESS_RECONCILE_SECONDS, REPORT_CONCURRENCY, REPORT_GRACE_SECONDS,
+)
+
+async def send_progress_report(tenant: Tenant, channel_id: int = None, tz: str = None):
+    """テナントの進捗レポートをチャンネルに送信（省略時はテナントのチャンネル・タイムゾーン）"""
+    channel_id = channel_id or tenant.channel_id
+    try:
+        if not channel_id:
+            print(f"⚠️ [{tenant.name}] レポート送信先のチャンネル（channel_id）が設定されていません")
+            return
+            
+        channel = app.bot.get_channel(channel_id)
+        if not channel:
+            print(f"⚠️ [{tenant.name}] チャンネルが見つかりません: {channel_id}")
+            return
+        
+        print(f"🤖 [{tenant.name}] 自動進捗レポート送信開始")
+        data, _ = await fetch_progress(tenant)
+        
+        if not data.get("ok"):
+            await broadcast(channel, f"⚠️ 進捗レポート取得エラー: {data.get('error', 'Unknown error')}")
+            return
+        
+        progress_data = data.get("progress", {})
+        date = progress_data.get("date", "")
+        total = progress_data.get("totalTasks", 0)
+        completed_count = progress_data.get("completedCount", 0)
+        completion_rate = progress_data.get("completionRate", 0)
+        
+        # 簡潔な進捗レポート（時刻はスケジュールのタイムゾーンで表示）
+        now = datetime.now(parse_timezone(tz or tenant.timezone))
+        time_str = now.strftime("%H:%M")
+        
+        if total == 0:
+            message = f"🕐 **{time_str} 進捗レポート**\n今日予定されているタスクはありません。"
+        else:
+            progress_bar = "█" * (completion_rate // 10) + "░" * (10 - completion_rate // 10)
+            message = f"🕐 **{time_str} 進捗レポート ({date})**\n"
+            message += f"達成率: {completion_rate}% `{progress_bar}`\n"
+            message += f"完了: {completed_count}/{total} タスク"
+            
+            # 励ましメッセージ
+            if completion_rate >= 80:
+                message += " 🎉 素晴らしい進捗です！"
+            elif completion_rate >= 50:
+                message += " 👍 順調ですね！"
+            elif completion_rate >= 20:
+                message += " 💪 頑張りましょう！"
+            else:
+                message += " ⏰ まだ時間はあります！"
+        
+        await broadcast(channel, message)
+        print(f"✅ [{tenant.name}] 進捗レポート送信完了: {completion_rate}%")
+        
+    except Exception as e:
+        print(f"❌ [{tenant.name}] 自動進捗レポート送信エラー: {type(e).__name__}: {e}")
+        if channel_id:
+            try:
+                channel = app.bot.get_channel(channel_id)
+                if channel:
+                    await broadcast(channel, f"⚠️ 自動進捗レポート送信エラー: {e}")
+            except:
+                pass
+
+async def fire_scheduled_report(schedule):
+    """スケジューラーから呼ばれる定期進捗レポート送信"""
+    tenant = app.tenants.get(schedule["tenant"])
+    if tenant is None:
+        print(f"⚠️ スケジュール #{schedule['id']}: テナント {schedule['tenant']} は設定にありません")
+        return
+    # シャードを複数プロセスに分けていても、各スケジュールは担当の1プロセスだけが送る
+    local = local_shards()
+    if schedule["guild_id"]:
+        if local is not None and sharding.shard_for_guild(schedule["guild_id"], shard_count()) not in local:
+            return
+    elif not sharding.owns(tenant, shard_count(), local):
+        return
+    await send_progress_report(tenant, schedule["channel_id"], schedule["tz"])
+
+report_scheduler = None  # setup() が作る
+
+def setup(bot):
+    """定期レポートのスケジューラーを作り、Bot終了時に止める"""
+    global report_scheduler
+    report_scheduler = ReportScheduler(
+        os.path.join(DATA_DIR, "schedules.db"), fire_scheduled_report,
+        concurrency=REPORT_CONCURRENCY, grace=REPORT_GRACE_SECONDS,
+    )
+    bot.closers.append(report_scheduler.close)
+    return report_scheduler
+
+@tasks.loop(seconds=PROGRESS_RECONCILE_SECONDS)
+async def progress_reconcile():
+    """進捗モデルをGASの結果と照合し、ずれを記録して置き換える"""
+    async def reconcile(tenant):
+        data = await tenant.gas.call("progress", timeout=15)
+        if not data.get("ok") or data.get("degraded"):
+            return
+        drift = tenant.progress.reconcile(data.get("progress", {}))
+        if drift and any(drift.values()):
+            log.warning("progress_drift", tenant=tenant.name, **drift)
+    # GASの障害時は次の周期で再試行（モデルは max_age を過ぎたら使われなくなる）
+    await asyncio.gather(*(reconcile(t) for t in served_tenants()), return_exceptions=True)
+
+@tasks.loop(seconds=MIRROR_SYNC_SECONDS)
+async def calendar_sync():
+    """全テナントのカレンダーミラーの増分同期（初回は全件）"""
+    # エラーは各ミラーの last_error に記録済み、次回の周期で再試行（1つの失敗で他を止めない）
+    await asyncio.gather(*(t.mirror.sync() for t in served_tenants()), return_exceptions=True)
@@ -0,0 +1,121 @@
+# calendar_bot/startup.py
+# 起動処理（Bot の組み立て・ゲートウェイ接続後の初期化・スラッシュコマンドの同期・起動時間の計測）
+
+import os
+from time import perf_counter
+
+import discord
+
+import jsonlog
+import metrics
+from command_sync import SyncState, sync_if_changed
+from report_scheduler import report_time_cron
+
+from . import __version__, app, commands, scheduler
+from .config import (
+    COMMAND_SYNC_FORCE, DATA_DIR, DISCORD_TOKEN, GUILD_ID, METRICS_HOST, METRICS_PORT, MIRROR_ENABLED,
+    MIRROR_SYNC_SECONDS, PROGRESS_RECONCILE_SECONDS, RETRY_ENABLED,
+)
+from .scheduler import calendar_sync, progress_reconcile
+
+STARTED_AT = perf_counter()  # 起動時間の計測の起点（run() で python の起動時点に置き換える）
+
+metrics_runner = None  # /metrics のHTTPサーバー
+startup_timings = {}   # 起動の各段階までの秒数（ready・commands・complete）
+startup_begun = False  # on_ready の初回処理を始めたか（再接続で繰り返さない）
+
+metrics.gauge("discord_startup_seconds", "起動から各段階（ready=ゲートウェイ接続・commands=コマンド使用可・complete=初期化完了）までの秒数",
+              lambda: [({"phase": phase}, seconds) for phase, seconds in startup_timings.items()],
+              labels=("phase",))
+
+command_sync_state = SyncState(os.path.join(DATA_DIR, "command_sync.json"))
+
+def create_app():
+    """Bot・テナントなどを作り、コマンド・定期実行・起動処理を登録して bot を返す（2回目以降は同じ bot）"""
+    if app.bot is not None:
+        return app.bot
+    bot = app.create_bot()
+    commands.register(bot.tree)
+    scheduler.setup(bot)
+    bot.event(on_ready)
+    return bot
+
+async def on_ready():
+    # on_ready は再接続（RESUMEできなかったとき）のたびに呼ばれる。初期化は最初の1回だけ行う
+    global startup_begun
+    bot = app.bot
+    if startup_begun:
+        print("🔌 再接続しました（初期化済みのため同期・起動処理は省略）")
+        return
+    startup_begun = True
+    startup_timings["ready"] = perf_counter() - STARTED_AT
+    print(f'🤖 Discord Calendar Bot v{__version__}')
+    print(f'{bot.user} がログインしました（起動から {startup_timings["ready"]:.2f}秒）')
+    
+    # テナントごとにGAS用のkeep-aliveセッションを作成し、前回の未完了ジョブも含めてリトライキューを再開
+    await app.tenants.gather(lambda t: t.start(mirror_enabled=MIRROR_ENABLED, retry_enabled=RETRY_ENABLED))
+    print(f"🏢 テナント: {len(app.tenants)}件 ({', '.join(t.name for t in app.tenants)})")
+    
+    # スラッシュコマンドの同期（定義が前回から変わったときだけ。ここまで来ればコマンドは使える）
+    await sync_commands()
+    
+    # メトリクスのエンドポイントを起動
+    global metrics_runner
+    if METRICS_PORT and metrics_runner is None:
+        try:
+            metrics_runner = await metrics.start_http_server(METRICS_PORT, METRICS_HOST)
+            bot.closers.append(metrics_runner.cleanup)
+            print(f"📈 メトリクス: http://{METRICS_HOST}:{METRICS_PORT}/metrics")
+        except OSError as e:
+            print(f"⚠️ メトリクスサーバーを起動できません: {e}")
+    
+    # カレンダーミラーの増分同期を開始
+    if MIRROR_ENABLED and not calendar_sync.is_running():
+        calendar_sync.start()
+        print(f"🔄 カレンダーミラー同期を開始しました ({MIRROR_SYNC_SECONDS}秒ごと)")
+    
+    # 進捗モデルとGASの照合を開始
+    if not progress_reconcile.is_running():
+        progress_reconcile.start()
+        print(f"🧮 進捗モデルの照合を開始しました ({PROGRESS_RECONCILE_SECONDS}秒ごと)")
+    
+    # 定期レポートのスケジューラーを開始し、初回はテナント設定の report_times をチャンネルに登録
+    report_scheduler = scheduler.report_scheduler
+    await report_scheduler.start()
+    for tenant in app.tenants:
+        if tenant.channel_id:
+            await report_scheduler.seed(tenant.name, tenant.channel_id,
+                                        [report_time_cron(t) for t in tenant.report_times], tenant.timezone)
+    print(f"🕐 定期進捗レポート機能を開始しました ({report_scheduler.stats()['schedules']}件のスケジュール)")
+    startup_timings["complete"] = perf_counter() - STARTED_AT
+    print(f"✅ 初期化完了（起動から {startup_timings['complete']:.2f}秒）")
+
+async def sync_commands():
+    """スラッシュコマンドの定義が前回の同期から変わっていれば同期する"""
+    bot = app.bot
+    guild = discord.Object(id=int(GUILD_ID)) if GUILD_ID else None
+    scope = f"ギルド {GUILD_ID}" if GUILD_ID else "グローバル"
+    try:
+        result = await sync_if_changed(bot.tree, command_sync_state, bot.application_id or bot.user.id,
+                                       guild=guild, force=COMMAND_SYNC_FORCE)
+        if result["synced"]:
+            print(f'{scope}に {result["count"]} 個のコマンドを同期しました')
+        else:
+            print(f'⏭️ コマンド定義は前回の同期から変わっていません（{scope}・{result["count"]}個・同期を省略）')
+        print(f"Bot is ready! Invite URL: https://discord.com/api/oauth2/authorize?client_id={bot.user.id}&permissions=2048&scope=bot%20applications.commands")
+    except Exception as e:
+        print(f'コマンド同期エラー: {e}')
+    startup_timings["commands"] = perf_counter() - STARTED_AT
+    print(f"⏱️ コマンド使用可能まで: 起動から {startup_timings['commands']:.2f}秒")
+
+def run(started_at=None):
+    """Botを起動する（終了まで戻らない）。started_at は起動時間の計測の起点（perf_counter の値）"""
+    global STARTED_AT
+    if started_at is not None:
+        STARTED_AT = started_at
+    bot = create_app()
+    try:
+        # discord.py のログも同じJSON行で出す（log_handler=None で独自のハンドラを付けさせない）
+        bot.run(DISCORD_TOKEN, log_handler=None)
+    finally:
+        jsonlog.shutdown()
@@ -0,0 +1,98 @@
+# calendar_links.py
+# Googleカレンダーの「予定を作成」リンクをイベント一覧からまとめて作る
+# GASの時刻は2種類ある: オフセット付き（/t2g の created は toISOString() の UTC "...Z"）と、
+# オフセット無し（/schedule の formatEventForResponse_ はスクリプトのタイムゾーンの "yyyy-MM-ddTHH:mm:ss"）。
+# オフセット無しの時刻は zoneinfo でタイムゾーンの規則（夏時間を含む）に従ってUTCに直す
+
+from datetime import date, datetime, timedelta, timezone
+from urllib.parse import quote_plus
+from zoneinfo import ZoneInfo
+
+import jsonlog
+
+BASE_URL = "https://calendar.google.com/calendar/render"
+FALLBACK_URL = "https://calendar.google.com/"
+
+log = jsonlog.get_logger("links")
+
+
+class _UtcConverter:
+    """時刻文字列を Googleカレンダーの dates 形式（UTCの YYYYMMDDTHHMMSSZ、終日は YYYYMMDD）にする
+
+    オフセット無しの時刻のUTCオフセットは「日付と時・分」ごとに1回だけ zoneinfo で求めて使い回す。
+    連続した予定では前の予定の終了と次の予定の開始が同じ文字列になるので、変換結果も使い回す。
+    """
+
+    def __init__(self, tz: ZoneInfo):
+        self.tz = tz
+        self._offsets = {}  # "yyyy-MM-ddTHH:mm" -> UTCオフセット
+        self._stamps = {}   # 時刻文字列 -> 変換結果
+
+    def _offset(self, local: datetime, key: str) -> timedelta:
+        offset = self._offsets.get(key)
+        if offset is None:
+            offset = self._offsets[key] = local.replace(tzinfo=self.tz).utcoffset()
+        return offset
+
+    def _utc(self, local: datetime, key: str) -> datetime:
+        return local - self._offset(local, key)
+
+    def stamp(self, value) -> str:
+        if isinstance(value, str):
+            stamp = self._stamps.get(value)
+            if stamp is None:
+                stamp = self._stamps[value] = self._stamp_text(value)
+            return stamp
+        if isinstance(value, datetime):
+            if value.tzinfo is not None:
+                return _format_utc(value.astimezone(timezone.utc).replace(tzinfo=None))
+            return _format_utc(self._utc(value, value.isoformat()[:16]))
+        if isinstance(value, date):
+            return value.strftime("%Y%m%d")
+        raise TypeError(f"時刻ではありません: {value!r}")
+
+    def _stamp_text(self, value: str) -> str:
+        if "T" not in value:
+            # 終日（"yyyy-MM-dd"）
+            return date.fromisoformat(value[:10]).strftime("%Y%m%d")
+        rest = value[19:]
+        if rest.endswith("Z") or "+" in rest or "-" in rest:
+            # オフセット付き（"Z"・"+09:00" など、ミリ秒があってもよい）
+            dt = datetime.fromisoformat(value.replace("Z", "+00:00"))
+            return _format_utc(dt.astimezone(timezone.utc).replace(tzinfo=None))
+        return _format_utc(self._utc(datetime.fromisoformat(value[:19]), value[:16]))
+
+
+_STAMP_TABLE = str.maketrans("", "", "-:")
+
+
+def _format_utc(dt: datetime) -> str:
+    """UTC（オフセット無し）の datetime を YYYYMMDDTHHMMSSZ にする（strftime より速い）"""
+    return dt.replace(microsecond=0).isoformat().translate(_STAMP_TABLE) + "Z"
+
+
+def calendar_links(events, tz="Asia/Tokyo") -> list:
+    """イベントの一覧（title・start・end を持つdict）から、同じ順のリンクのリストを返す
+
+    tz はオフセット無しの時刻のタイムゾーンで、リンクの ctz にも使う。
+    時刻を解釈できないイベントは FALLBACK_URL にし、件数をログに残す。
+    """
+    zone = tz if isinstance(tz, ZoneInfo) else ZoneInfo(tz)
+    converter = _UtcConverter(zone)
+    # タイトル・日時以外は全イベント共通なので、URLの前後を先に作っておく
+    prefix = f"{BASE_URL}?action=TEMPLATE&text="
+    suffix = f"&ctz={quote_plus(zone.key)}"
+    links = []
+    failed = 0
+    for ev in events:
+        try:
+            # dates は数字・T・Z と "/" だけなので、"/" だけをエンコードして書く
+            dates = f"{converter.stamp(ev['start'])}%2F{converter.stamp(ev['end'])}"
+        except (KeyError, TypeError, ValueError):
+            failed += 1
+            links.append(FALLBACK_URL)
+            continue
+        links.append(f"{prefix}{quote_plus(str(ev.get('title', '')))}&dates={dates}{suffix}")
+    if failed:
+        log.warning("calendar_link_failed", count=failed, total=len(links))
+    return links
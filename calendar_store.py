@@ -0,0 +1,294 @@
+# calendar_store.py
+# Googleカレンダーのローカルミラー
+# GASの export_events で一括取得→増分同期し、/schedule や /progress をBot内で即答する
+
+import asyncio
+import time
+from bisect import bisect_left
+from datetime import datetime, timedelta, timezone
+
+import jsonlog
+
+log = jsonlog.get_logger("mirror")
+
+# GASはスクリプトのタイムゾーン（SETTINGS.TIMEZONE・既定 Asia/Tokyo）の時刻をオフセット無しで返す
+# テナントの timezone はそのGASの設定に合わせる（ミラー・進捗モデルはその現地時刻で扱う）
+JST = timezone(timedelta(hours=9), "Asia/Tokyo")
+
+
+def now_jst() -> datetime:
+    """現在のJST時刻（オフセット無し）"""
+    return datetime.now(JST).replace(tzinfo=None)
+
+
+def parse_event_time(value: str) -> datetime:
+    """GASのイベント時刻 (yyyy-MM-ddTHH:mm:ss) をdatetimeに変換"""
+    return datetime.fromisoformat(value[:19])
+
+
+def parse_utc_iso(value: str, tz=JST) -> datetime:
+    """GASの toISOString() (UTC) を tz（既定はJST）のdatetime（オフセット無し）に変換"""
+    dt = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    return dt.astimezone(tz).replace(tzinfo=None)
+
+
+def resolve_date(date_str: str, now: datetime = None) -> datetime:
+    """日付文字列を日付（0:00）に変換（GASの parseDateString_ と同じ規則）"""
+    now = now or now_jst()
+    today = datetime(now.year, now.month, now.day)
+    date_str = (date_str or "").strip()
+
+    if date_str in ("今日", "today"):
+        return today
+    if date_str in ("明日", "tomorrow"):
+        return today + timedelta(days=1)
+    if date_str == "明後日":
+        return today + timedelta(days=2)
+
+    try:
+        # yyyy-MM-dd形式
+        if len(date_str) == 10 and date_str[4] == "-" and date_str[7] == "-":
+            return datetime.strptime(date_str, "%Y-%m-%d")
+        # M/D形式
+        if "/" in date_str:
+            month, day = (int(x) for x in date_str.split("/"))
+            return datetime(now.year, month, day)
+    except ValueError:
+        pass
+
+    # デフォルトは今日
+    return today
+
+
+class CalendarMirror:
+    """GASから差分同期したイベントをメモリ上に保持するミラー
+
+    イベントは開始時刻順のインデックスで管理し、期間の重なり検索を二分探索で行う。
+    """
+
+    def __init__(self, gas, days_back: int = 7, days_forward: int = 30,
+                 max_staleness: float = 600, clock=time.time, tz=JST, name: str = "default"):
+        self.gas = gas
+        self.name = name  # ログ用のテナント名
+        self.tz = tz  # GASのイベント時刻のタイムゾーン（「今日」の判定にも使う）
+        self.days_back = days_back
+        self.days_forward = days_forward
+        # 最終同期からこの秒数を超えたら、ローカルでは答えずGASに問い合わせる
+        self.max_staleness = max_staleness
+        self._clock = clock
+
+        self._events = {}     # key -> event
+        self._index = []      # [(start, key)] 開始時刻順
+        self._starts = []     # bisect用の開始時刻リスト
+        self._max_duration = timedelta(0)
+
+        self.cursor = None
+        self.window_start = None
+        self.window_end = None
+        self._raw_window = None
+        self.synced_at = None
+        self.last_error = None
+        self.syncs = 0
+        self.local_reads = 0
+
+        self._lock = asyncio.Lock()
+        self._pending_sync = None
+
+    # ---------- 同期 ----------
+
+    async def sync(self, full: bool = False) -> dict:
+        """GASから差分（full=Trueなら全件）を取得して反映する"""
+        async with self._lock:
+            params = {"days_back": self.days_back, "days_forward": self.days_forward}
+            if not full and self.cursor:
+                params["since"] = self.cursor
+                if self._raw_window:
+                    params["known_start"] = self._raw_window["start"]
+                    params["known_end"] = self._raw_window["end"]
+            try:
+                data = await self.gas.call("export_events", **params)
+                if not data.get("ok"):
+                    raise RuntimeError(data.get("error", "Unknown error"))
+                summary = self.apply_export(data)
+            except Exception as e:
+                self.last_error = f"{type(e).__name__}: {e}"
+                log.warning("mirror_sync_failed", tenant=self.name, full=full, error=self.last_error)
+                raise
+            self.last_error = None
+            log.info("mirror_synced", tenant=self.name, full=full, **summary)
+            return summary
+
+    def apply_export(self, data: dict) -> dict:
+        """export_events のレスポンスをミラーに反映する"""
+        if data.get("full"):
+            self._events.clear()
+
+        upserted = 0
+        for ev in data.get("events", []):
+            event = dict(ev)
+            event["_start"] = parse_event_time(ev["start"])
+            event["_end"] = parse_event_time(ev["end"])
+            self._events[ev["key"]] = event
+            upserted += 1
+
+        # keys に含まれないイベントは削除（または期間外に出た）とみなす
+        removed = 0
+        if "keys" in data:
+            alive = set(data["keys"])
+            for key in [k for k in self._events if k not in alive]:
+                del self._events[key]
+                removed += 1
+
+        self._rebuild_index()
+        self.cursor = data.get("cursor", self.cursor)
+        window = data.get("window")
+        if window:
+            self._raw_window = window
+            self.window_start = parse_utc_iso(window["start"], self.tz)
+            self.window_end = parse_utc_iso(window["end"], self.tz)
+        self.synced_at = self._clock()
+        self.syncs += 1
+        return {"upserted": upserted, "removed": removed, "total": len(self._events)}
+
+    def _rebuild_index(self):
+        self._index = sorted((ev["_start"], key) for key, ev in self._events.items())
+        self._starts = [start for start, _ in self._index]
+        self._max_duration = max(
+            (ev["_end"] - ev["_start"] for ev in self._events.values()),
+            default=timedelta(0),
+        )
+
+    def request_sync(self):
+        """書き込み成功後などに、バックグラウンドで差分同期を1回走らせる"""
+        if self.synced_at is None:
+            return
+        if self._pending_sync is not None and not self._pending_sync.done():
+            return
+
+        async def _run():
+            try:
+                await self.sync()
+            except Exception:
+                pass  # エラーは sync() 内で記録済み
+
+        self._pending_sync = asyncio.ensure_future(_run())
+
+    # ---------- 読み取り ----------
+
+    def now(self) -> datetime:
+        """tz の現在時刻（オフセット無し・イベント時刻と同じ形）"""
+        return datetime.now(self.tz).replace(tzinfo=None)
+
+    @property
+    def age(self):
+        if self.synced_at is None:
+            return None
+        return self._clock() - self.synced_at
+
+    def is_fresh(self) -> bool:
+        age = self.age
+        return age is not None and age <= self.max_staleness
+
+    def covers(self, start: datetime, end: datetime, allow_stale: bool = False) -> bool:
+        """期間がミラーの保持範囲内か（allow_stale=True ならGAS障害中などで古くても使う）"""
+        usable = self.is_fresh() or (allow_stale and self.synced_at is not None)
+        return (usable and self.window_start is not None
+                and self.window_start <= start and end <= self.window_end)
+
+    def events_between(self, start: datetime, end: datetime) -> list:
+        """[start, end] と重なるイベントを開始時刻順で返す"""
+        # 開始が start - 最長イベント長 より前のものは重ならないので探索しない
+        lo = bisect_left(self._starts, start - self._max_duration)
+        result = []
+        for ev_start, key in self._index[lo:]:
+            if ev_start > end:
+                break
+            ev = self._events[key]
+            if ev["_end"] > start or ev_start >= start:
+                result.append(ev)
+        return result
+
+    def busy_intervals(self, start: datetime, end: datetime) -> list:
+        """空き時間検索用に、期間内の予定を (開始, 終了) で返す（終日予定は除く）"""
+        return [(ev["_start"], ev["_end"]) for ev in self.events_between(start, end) if not ev.get("allDay")]
+
+    def schedule(self, date_str: str, days: int, now: datetime = None, allow_stale: bool = False):
+        """GASの getScheduleForDate_ と同じ結果をローカルで返す（範囲外・古い場合はNone）"""
+        target = resolve_date(date_str, now or self.now())
+        start = target
+        # GASと同じく「指定日 + days日後の23:59:59」までを対象にする
+        end = target + timedelta(days=days, hours=23, minutes=59, seconds=59)
+        if not self.covers(start, end, allow_stale):
+            return None
+        self.local_reads += 1
+        return [_public_event(ev) for ev in self.events_between(start, end)]
+
+    def progress(self, now: datetime = None, allow_stale: bool = False):
+        """GASの generateDailyProgress_ と同じ結果をローカルで返す（古い場合はNone）"""
+        now = now or self.now()
+        start = datetime(now.year, now.month, now.day)
+        end = start + timedelta(hours=23, minutes=59, seconds=59)
+        if not self.covers(start, end, allow_stale):
+            return None
+        self.local_reads += 1
+
+        completed, pending = [], []
+        must_one = None
+        for ev in self.events_between(start, end):
+            if ev.get("allDay"):
+                continue
+            title = ev["title"]
+            task = {
+                "title": title,
+                "start": ev["_start"].strftime("%H:%M"),
+                "end": ev["_end"].strftime("%H:%M"),
+                "duration": round((ev["_end"] - ev["_start"]).total_seconds() / 60),
+            }
+            if "✓" in title:
+                task["title"] = title.replace("✓", "", 1).strip()
+                completed.append(task)
+            else:
+                if "☆" in title and must_one is None:
+                    must_one = task
+                pending.append(task)
+
+        total = len(completed) + len(pending)
+        return {
+            "date": now.strftime("%Y-%m-%d (%a)"),
+            "totalTasks": total,
+            "completedCount": len(completed),
+            "pendingCount": len(pending),
+            "completionRate": round(len(completed) / total * 100) if total else 0,
+            "completed": completed,
+            "pending": pending,
+            "mustOne": must_one,
+        }
+
+    def freshness_label(self) -> str:
+        """レスポンスに添える鮮度表示"""
+        age = self.age
+        if age is None:
+            return "🕒 未同期"
+        synced = datetime.fromtimestamp(self.synced_at, self.tz).strftime("%H:%M:%S")
+        return f"🕒 最終同期 {synced}（{int(age)}秒前）"
+
+    def stats(self) -> dict:
+        return {
+            "events": len(self._events),
+            "syncs": self.syncs,
+            "local_reads": self.local_reads,
+            "age": self.age,
+            "fresh": self.is_fresh(),
+            "last_error": self.last_error,
+        }
+
+
+def _public_event(ev: dict) -> dict:
+    """GASの formatEventForResponse_ と同じ形に戻す"""
+    return {
+        "title": ev["title"],
+        "start": ev["start"],
+        "end": ev["end"],
+        "startTime": ev.get("startTime", ev["start"][11:16]),
+        "endTime": ev.get("endTime", ev["end"][11:16]),
+    }
@@ -0,0 +1,71 @@
+# command_sync.py
+# スラッシュコマンドの定義のハッシュをディスクに保存し、変わったときだけ bot.tree.sync() を呼ぶ
+# tree.sync() は遅くレート制限のあるREST呼び出しで（グローバルは反映にも時間がかかる）、
+# 起動・再接続のたびに呼ぶと使えるようになるまでが遅れる
+
+import hashlib
+import json
+import os
+import time
+
+
+def tree_hash(tree, guild=None) -> str:
+    """コマンドツリー（guild 指定ならそのギルドのコマンド）の定義のハッシュ
+
+    Discordに送る内容（tree.sync() と同じ to_dict）を名前順に並べてハッシュするので、
+    コマンド・引数・説明・選択肢のどれかが変われば値が変わる。
+    """
+    payload = sorted((command.to_dict(tree) for command in tree.get_commands(guild=guild)),
+                     key=lambda c: (c.get("type", 1), c["name"]))
+    text = json.dumps(payload, ensure_ascii=False, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def scope_key(application_id, guild_id=None) -> str:
+    """同期先（アプリケーション・ギルド／グローバル）ごとの保存キー"""
+    return f"{application_id}:{f'guild:{guild_id}' if guild_id else 'global'}"
+
+
+class SyncState:
+    """同期先ごとの最後に同期したハッシュを JSON ファイルに保存する"""
+
+    def __init__(self, path: str, clock=time.time):
+        self.path = path
+        self._clock = clock
+
+    def _load(self) -> dict:
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                data = json.load(f)
+            return data if isinstance(data, dict) else {}
+        except (OSError, ValueError):
+            return {}
+
+    def get(self, key: str):
+        entry = self._load().get(key)
+        return entry.get("hash") if isinstance(entry, dict) else None
+
+    def set(self, key: str, value: str, count: int):
+        data = self._load()
+        data[key] = {"hash": value, "commands": count, "synced_at": self._clock()}
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        tmp = f"{self.path}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False, indent=2)
+        os.replace(tmp, self.path)  # 書きかけのファイルを残さない
+
+
+async def sync_if_changed(tree, state: SyncState, application_id, guild=None, force: bool = False) -> dict:
+    """定義が前回の同期から変わっていれば tree.sync() を呼ぶ
+
+    戻り値は {"synced": 同期したか, "count": コマンド数, "hash": ハッシュ}。
+    同期に失敗したときは例外をそのまま投げ、ハッシュは保存しない（次の起動で再試行する）。
+    """
+    key = scope_key(application_id, guild.id if guild else None)
+    current = tree_hash(tree, guild)
+    count = len(tree.get_commands(guild=guild))
+    if not force and state.get(key) == current:
+        return {"synced": False, "count": count, "hash": current}
+    synced = await tree.sync(guild=guild)
+    state.set(key, current, len(synced))
+    return {"synced": True, "count": len(synced), "hash": current}
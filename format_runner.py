@@ -0,0 +1,232 @@
+# format_runner.py
+# /format（既存イベントの A/B/C → ★ 変換）を日付ウィンドウに分けて実行する
+# 1回のGAS実行で数十日分を処理するとイベントの多いカレンダーではタイムアウトするため、
+# 期間を数日ずつのウィンドウに区切り、同時実行数を抑えて並列に送る。
+# 終わったウィンドウはSQLiteに記録し、途中で止まっても次の /format は残りから再開する
+
+import asyncio
+import os
+import sqlite3
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, timedelta
+
+import aiohttp
+
+import metrics
+from gas_client import GasCircuitOpen, GasError, GasTimeout
+
+FORMAT_WINDOWS = metrics.counter(
+    "format_windows_total", "/format のウィンドウごとのGAS呼び出し（結果別）", ("tenant", "result"))
+
+LEGACY_ERROR = "GASが期間指定に未対応です（Text2GCalenderAddon_fixed.gs を再デプロイしてください）"
+
+
+def split_windows(start: date, end: date, days: int) -> list:
+    """start〜end（両端含む）を days 日ずつの [(開始日, 終了日)] に分ける"""
+    windows = []
+    current = start
+    while current <= end:
+        last = min(current + timedelta(days=days - 1), end)
+        windows.append((current, last))
+        current = last + timedelta(days=1)
+    return windows
+
+
+def pending_windows(windows: list, done: list) -> list:
+    """windows のうち、終わったウィンドウ（途中で分割されたものを含む）に入っていない日の連続区間"""
+    finished = set()
+    for start, end, *_ in done:
+        finished.update(start + timedelta(days=i) for i in range((end - start).days + 1))
+    pending = []
+    for start, end in windows:
+        run_start = None
+        day = start
+        while day <= end:
+            if day not in finished and run_start is None:
+                run_start = day
+            elif day in finished and run_start is not None:
+                pending.append((run_start, day - timedelta(days=1)))
+                run_start = None
+            day += timedelta(days=1)
+        if run_start is not None:
+            pending.append((run_start, end))
+    return pending
+
+
+def halve(window) -> list:
+    """タイムアウトしたウィンドウを前半・後半に分ける（1日なら分けられないので空）"""
+    start, end = window
+    if start >= end:
+        return []
+    middle = start + timedelta(days=(end - start).days // 2)
+    return [(start, middle), (middle + timedelta(days=1), end)]
+
+
+class FormatCursor:
+    """テナントごとの /format の進み具合（終わったウィンドウと件数）をSQLiteに保存する
+
+    同じ期間・同じウィンドウ幅の実行が max_age 秒以内に中断されていれば、その続きから再開する。
+    """
+
+    def __init__(self, path: str, max_age: float = 86400, clock=time.time):
+        self.path = path
+        self.max_age = max_age
+        self._clock = clock
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="format-cursor")
+        self._db = None
+
+    # ---------- SQLite（専用スレッドで実行） ----------
+
+    async def _run(self, fn, *args):
+        if self._db is None:
+            await asyncio.get_running_loop().run_in_executor(self._executor, self._open)
+        return await asyncio.get_running_loop().run_in_executor(self._executor, fn, *args)
+
+    def _open(self):
+        if self._db is not None:
+            return
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        db = sqlite3.connect(self.path, check_same_thread=False)
+        db.execute("""
+            CREATE TABLE IF NOT EXISTS runs (
+                tenant TEXT PRIMARY KEY,
+                range_start TEXT NOT NULL,
+                range_end TEXT NOT NULL,
+                window_days INTEGER NOT NULL,
+                updated_at REAL NOT NULL
+            )
+        """)
+        db.execute("""
+            CREATE TABLE IF NOT EXISTS windows (
+                tenant TEXT NOT NULL,
+                start TEXT NOT NULL,
+                end TEXT NOT NULL,
+                converted INTEGER NOT NULL,
+                skipped INTEGER NOT NULL,
+                PRIMARY KEY (tenant, start)
+            )
+        """)
+        db.commit()
+        self._db = db
+
+    def _begin(self, tenant, start, end, window_days):
+        db = self._db
+        row = db.execute("SELECT range_start, range_end, window_days, updated_at FROM runs WHERE tenant = ?",
+                         (tenant,)).fetchone()
+        now = self._clock()
+        if row is not None and row[:3] == (start, end, window_days) and now - row[3] <= self.max_age:
+            done = db.execute("SELECT start, end, converted, skipped FROM windows WHERE tenant = ?",
+                              (tenant,)).fetchall()
+            return [(date.fromisoformat(s), date.fromisoformat(e), c, k) for s, e, c, k in done]
+        with db:
+            db.execute("DELETE FROM windows WHERE tenant = ?", (tenant,))
+            db.execute("INSERT OR REPLACE INTO runs VALUES (?, ?, ?, ?, ?)",
+                       (tenant, start, end, window_days, now))
+        return None
+
+    def _complete(self, tenant, start, end, converted, skipped):
+        with self._db as db:
+            db.execute("INSERT OR REPLACE INTO windows VALUES (?, ?, ?, ?, ?)",
+                       (tenant, start, end, converted, skipped))
+            db.execute("UPDATE runs SET updated_at = ? WHERE tenant = ?", (self._clock(), tenant))
+
+    def _finish(self, tenant):
+        with self._db as db:
+            db.execute("DELETE FROM windows WHERE tenant = ?", (tenant,))
+            db.execute("DELETE FROM runs WHERE tenant = ?", (tenant,))
+
+    # ---------- 公開API ----------
+
+    async def begin(self, tenant: str, start: date, end: date, window_days: int):
+        """実行を始める。続きから再開できるなら終わったウィンドウ [(開始日, 終了日, 変換, スキップ)] を返す"""
+        return await self._run(self._begin, tenant, start.isoformat(), end.isoformat(), window_days)
+
+    async def complete(self, tenant: str, window, converted: int, skipped: int):
+        await self._run(self._complete, tenant, window[0].isoformat(), window[1].isoformat(), converted, skipped)
+
+    async def finish(self, tenant: str):
+        """全ウィンドウが終わったら記録を消す（次の /format は最初から）"""
+        await self._run(self._finish, tenant)
+
+    async def close(self):
+        if self._db is not None:
+            await asyncio.get_running_loop().run_in_executor(self._executor, self._db.close)
+            self._db = None
+        self._executor.shutdown(wait=False)
+
+
+async def run_windows(gas, windows: list, concurrency: int = 4, timeout: float = 20,
+                      on_window=None, tenant: str = "default") -> dict:
+    """ウィンドウごとに format_events を呼ぶ（同時実行数 concurrency）
+
+    タイムアウトしたウィンドウは半分に分けて送り直す（1日でもタイムアウトしたら失敗として残す）。
+    GASの障害でブレーカーが開いたら、残りのウィンドウは送らない。
+    on_window(window, result) は終わったウィンドウごとに呼ばれる（失敗時は result=None）。
+
+    戻り値:
+        converted / skipped: このウィンドウ群での件数
+        changes: 変換したイベント（GASの results）
+        failed:  [(window, エラー)] 次回の /format で再開するウィンドウ
+        legacy:  GASが start/end に未対応だった（再デプロイ前）
+    """
+    result = {"converted": 0, "skipped": 0, "changes": [], "failed": [], "legacy": False}
+    slots = asyncio.Semaphore(concurrency)
+    circuit_open = False
+
+    async def run(window):
+        nonlocal circuit_open
+        async with slots:
+            if circuit_open:
+                result["failed"].append((window, "GASの障害で中断"))
+                return
+            if result["legacy"]:
+                result["failed"].append((window, LEGACY_ERROR))
+                return
+            try:
+                data = await gas.call("format_events", start=window[0].isoformat(),
+                                      end=window[1].isoformat(), timeout=timeout)
+            except (GasTimeout, asyncio.TimeoutError) as e:
+                parts = halve(window)
+                FORMAT_WINDOWS.inc(tenant=tenant, result="split" if parts else "timeout")
+                if not parts:
+                    result["failed"].append((window, str(e) or type(e).__name__))
+                    if on_window is not None:
+                        await on_window(window, None)
+                    return
+            except (GasError, aiohttp.ClientError) as e:
+                FORMAT_WINDOWS.inc(tenant=tenant, result="error")
+                circuit_open = circuit_open or isinstance(e, GasCircuitOpen)
+                result["failed"].append((window, str(e) or type(e).__name__))
+                if on_window is not None:
+                    await on_window(window, None)
+                return
+            else:
+                parts = None
+        if parts:
+            # 枠を返してから分割分を送る（分割分同士も同時実行数の制限に従う）
+            await asyncio.gather(*(run(part) for part in parts))
+            return
+        if not data.get("ok"):
+            FORMAT_WINDOWS.inc(tenant=tenant, result="error")
+            result["failed"].append((window, data.get("error", "Unknown error")))
+            if on_window is not None:
+                await on_window(window, None)
+            return
+        if "window" not in data:
+            # 期間指定に未対応のGASは既定の範囲（7日前〜30日先）を1回で処理している
+            result["legacy"] = True
+        FORMAT_WINDOWS.inc(tenant=tenant, result="ok")
+        window_result = data.get("result", {})
+        result["converted"] += window_result.get("converted", 0)
+        result["skipped"] += window_result.get("skipped", 0)
+        result["changes"].extend(window_result.get("results", []))
+        if on_window is not None:
+            await on_window(window, window_result)
+
+    await asyncio.gather(*(run(window) for window in windows))
+    result["failed"].sort()
+    result["changes"].sort(key=lambda c: (c.get("date", ""), c.get("time", "")))
+    return result
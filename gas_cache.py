@@ -0,0 +1,121 @@
+# gas_cache.py
+# GAS読み取りレスポンスのインメモリTTLキャッシュ
+# 同じ (mode, date, days) の問い合わせが短時間に繰り返されてもGASを再実行しない
+
+import json
+import time
+from collections import OrderedDict
+
+# 読み取り系modeごとのキャッシュ有効期間（秒）
+DEFAULT_TTLS = {
+    "get_schedule": 60,
+    "progress": 30,
+    "weekly_report": 300,
+}
+
+# 書き込み系modeが成功したときに無効化する読み取り系mode
+# ✓や☆はタイトルに付くため、完了系でも予定一覧と進捗の両方が変わる
+INVALIDATES = {
+    "create": ("get_schedule", "progress", "weekly_report"),
+    "mark_complete": ("get_schedule", "progress"),
+    "unmark_complete": ("get_schedule", "progress"),
+    "mark_complete_batch": ("get_schedule", "progress"),
+    "unmark_complete_batch": ("get_schedule", "progress"),
+    "set_must_one": ("get_schedule", "progress"),
+    "mark_all_complete": ("get_schedule", "progress"),
+    "format_events": ("get_schedule", "progress", "weekly_report"),
+    "daily_format": ("get_schedule", "progress", "weekly_report"),
+    "weekly_format": ("get_schedule", "progress", "weekly_report"),
+}
+
+
+def cache_key(payload: dict) -> str:
+    """リクエストpayloadを正規化したキャッシュキー（キー順・前後空白を無視）"""
+    normalized = {k: v.strip() if isinstance(v, str) else v for k, v in payload.items()}
+    return json.dumps(normalized, sort_keys=True, ensure_ascii=False)
+
+
+class GasCache:
+    """サイズ上限付きLRU＋mode別TTLのキャッシュ"""
+
+    def __init__(self, ttls: dict = None, max_size: int = 256, stale_ttl: float = 3600,
+                 clock=time.monotonic):
+        self.ttls = dict(DEFAULT_TTLS if ttls is None else ttls)
+        self.max_size = max_size
+        # 期限切れ後もこの秒数は保持し、GAS障害中の代替応答（get_stale）に使う
+        self.stale_ttl = stale_ttl
+        self._clock = clock
+        self._entries = OrderedDict()  # key -> (mode, expires_at, value)
+        # 書き込みごとに進む世代番号（書き込みと並行した読み取りが古い結果を保存しないように）
+        self._generation = 0
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    def is_cacheable(self, mode: str) -> bool:
+        return mode in self.ttls
+
+    @property
+    def generation(self) -> int:
+        return self._generation
+
+    def get(self, payload: dict):
+        """キャッシュ済みの値を返す（無い・期限切れならNone）"""
+        key = cache_key(payload)
+        entry = self._entries.get(key)
+        now = self._clock()
+        if entry is None or entry[1] <= now:
+            if entry is not None and entry[1] + self.stale_ttl <= now:
+                del self._entries[key]
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return entry[2]
+
+    def get_stale(self, payload: dict):
+        """期限切れでも stale_ttl 以内なら値を返す（GAS障害中の代替応答用）"""
+        entry = self._entries.get(cache_key(payload))
+        if entry is None or entry[1] + self.stale_ttl <= self._clock():
+            return None
+        return entry[2]
+
+    def put(self, payload: dict, value, generation: int = None):
+        """値を保存する。generation が現在と違えば（途中で書き込みがあれば）保存しない"""
+        if generation is not None and generation != self._generation:
+            return
+        mode = payload.get("mode")
+        ttl = self.ttls.get(mode)
+        if not ttl:
+            return
+        key = cache_key(payload)
+        self._entries[key] = (mode, self._clock() + ttl, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+    def invalidate_for(self, write_mode: str):
+        """書き込み系modeの影響を受けるエントリを削除する"""
+        modes = INVALIDATES.get(write_mode)
+        if not modes:
+            return
+        self._generation += 1
+        stale = [key for key, entry in self._entries.items() if entry[0] in modes]
+        for key in stale:
+            del self._entries[key]
+        self.invalidations += len(stale)
+
+    def clear(self):
+        self._generation += 1
+        self._entries.clear()
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "max_size": self.max_size,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": (self.hits / lookups * 100) if lookups else 0.0,
+            "invalidations": self.invalidations,
+        }
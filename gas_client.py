@@ -0,0 +1,324 @@
+# gas_client.py
+# Google Apps Script Web API 非同期クライアント
+# discord.py のイベントループをブロックしないよう、全コマンドの GAS 呼び出しをここに集約する
+
+import asyncio
+import json
+import time
+
+import aiohttp
+
+import jsonlog
+import metrics
+from gas_cache import cache_key
+
+# 副作用のない読み取り系mode（同一payloadの同時呼び出しを1回にまとめてよい）
+READ_MODES = frozenset({"get_schedule", "progress", "weekly_report", "analyze_events"})
+
+# カレンダーを書き換えるmode（成功時にキャッシュ無効化・書き込みリスナー通知を行う）
+WRITE_MODES = frozenset({
+    "create", "mark_complete", "unmark_complete", "set_must_one",
+    "mark_all_complete", "format_events", "daily_format", "weekly_format",
+    "mark_complete_batch", "unmark_complete_batch",
+})
+
+# 複数タスクをまとめて書き換えるmodeと、1件ずつの場合のmode
+# （リスナーには成功した項目ごとに1件ずつのmodeで通知する）
+BATCH_WRITE_MODES = {
+    "mark_complete_batch": "mark_complete",
+    "unmark_complete_batch": "unmark_complete",
+}
+
+
+def expand_write(mode: str, payload: dict, data: dict):
+    """書き込みの結果を (mode, payload, data) の列にする（一括modeは成功した項目ごとに分ける）"""
+    single = BATCH_WRITE_MODES.get(mode)
+    if single is None:
+        yield mode, payload, data
+        return
+    for item, result in zip(payload.get("items", []), data.get("results", [])):
+        if result.get("ok"):
+            # GASが実際に更新したイベントのキー（入力にキーが無くても進捗モデルが同じタスクを選べる）
+            yield single, {**item, "event_key": result.get("event_key") or item.get("event_key")}, result
+
+
+GAS_SECONDS = metrics.histogram(
+    "gas_request_seconds", "GAS Web APIの往復時間（秒）", ("tenant", "mode", "status"))
+GAS_ERRORS = metrics.counter(
+    "gas_errors_total", "GAS呼び出しのエラー件数（種類別）", ("tenant", "mode", "error"))
+
+log = jsonlog.get_logger("gas")
+
+
+class GasError(Exception):
+    """GAS API呼び出しエラーの基底クラス"""
+
+
+class GasHTTPError(GasError):
+    """GASがHTTPエラーステータスを返した"""
+
+    def __init__(self, status_code, text=""):
+        super().__init__(f"HTTP Error {status_code}")
+        self.status_code = status_code
+        self.text = text
+
+
+class GasTimeout(GasError):
+    """GASが制限時間内に応答しなかった"""
+
+    def __init__(self, mode, timeout):
+        super().__init__(f"GAS APIが{timeout}秒以内に応答しませんでした (mode={mode})")
+        self.mode = mode
+        self.timeout = timeout
+
+
+class GasCircuitOpen(GasError):
+    """障害が続いているため、サーキットブレーカーがGAS呼び出しを止めている"""
+
+    def __init__(self, mode, retry_after):
+        super().__init__(f"GASで障害が続いているため呼び出しを一時停止中です（あと{retry_after:.0f}秒, mode={mode}）")
+        self.mode = mode
+        self.retry_after = retry_after
+
+
+class GasClient:
+    """GAS Web APIへの非同期クライアント
+
+    requests.post と違いイベントループを止めないため、
+    N人が同時にコマンドを実行してもGAS呼び出しは並行して進む。
+    """
+
+    def __init__(self, endpoint: str, api_key: str, default_timeout: float = 30,
+                 pool_size: int = 10, keepalive_timeout: float = 60, dns_ttl: int = 300,
+                 cache=None, limiter=None, breaker=None, debug_sample: float = 1.0,
+                 name: str = "default"):
+        self._url = f"{endpoint}?key={api_key}"
+        self.name = name  # テナント名（メトリクス・ログのラベル）
+        self.cache = cache
+        # 送信ペースの制限（gas_guard.TokenBucket）と障害時の即時失敗（gas_guard.CircuitBreaker）
+        self.limiter = limiter
+        self.breaker = breaker
+        self.degraded_responses = 0
+        # DEBUGログでレスポンス本文（切り詰め・伏せ字済み）を出力する割合
+        self.debug_sample = debug_sample
+        self.default_timeout = default_timeout
+        self.pool_size = pool_size
+        self.keepalive_timeout = keepalive_timeout
+        self.dns_ttl = dns_ttl
+        self._session = None
+        self._connector = None
+        # 接続プールの計測値
+        self.connections_created = 0
+        self.connections_reused = 0
+        self.requests_sent = 0
+        # 同一payloadで実行中の読み取りリクエスト（single-flight）
+        self._inflight = {}
+        self.coalesced_calls = 0
+        self._write_listeners = []
+
+    def add_write_listener(self, listener):
+        """書き込み系modeが成功したときに listener(mode, payload, data) を呼ぶ"""
+        self._write_listeners.append(listener)
+
+    async def start(self):
+        """Bot全体で共有するkeep-aliveセッションを作成（作成済みなら何もしない）"""
+        self._get_session()
+
+    def _get_session(self) -> aiohttp.ClientSession:
+        if self._session is None or self._session.closed:
+            # 上限付きの接続プール＋keep-alive＋DNSキャッシュで、毎回のTCP/TLSハンドシェイクを避ける
+            self._connector = aiohttp.TCPConnector(
+                limit=self.pool_size,
+                keepalive_timeout=self.keepalive_timeout,
+                use_dns_cache=True,
+                ttl_dns_cache=self.dns_ttl,
+            )
+            trace = aiohttp.TraceConfig()
+            trace.on_connection_create_end.append(self._on_connection_create)
+            trace.on_connection_reuseconn.append(self._on_connection_reuse)
+            trace.on_request_start.append(self._on_request_start)
+            self._session = aiohttp.ClientSession(connector=self._connector, trace_configs=[trace])
+        return self._session
+
+    async def _on_connection_create(self, session, ctx, params):
+        self.connections_created += 1
+
+    async def _on_connection_reuse(self, session, ctx, params):
+        self.connections_reused += 1
+
+    async def _on_request_start(self, session, ctx, params):
+        self.requests_sent += 1
+
+    def pool_stats(self) -> dict:
+        """接続プールの状態（再利用回数・オープン中の接続数など）"""
+        in_use = idle = 0
+        if self._connector is not None and not self._connector.closed:
+            in_use = len(getattr(self._connector, "_acquired", ()))
+            idle = sum(len(conns) for conns in getattr(self._connector, "_conns", {}).values())
+        return {
+            "pool_size": self.pool_size,
+            "requests": self.requests_sent,
+            "connections_created": self.connections_created,
+            "connections_reused": self.connections_reused,
+            "open_connections": in_use + idle,
+            "in_use": in_use,
+            "idle": idle,
+        }
+
+    async def post(self, payload: dict, timeout: float = None) -> dict:
+        """payloadをGASにPOSTし、JSONレスポンスを返す
+
+        読み取り系modeはキャッシュを参照し、書き込み系modeは成功後に関連キャッシュを無効化する。
+        """
+        mode = payload.get("mode", "create")
+        cache = self.cache
+        if cache is not None and cache.is_cacheable(mode):
+            cached = cache.get(payload)
+            if cached is not None:
+                return cached
+            generation = cache.generation
+            try:
+                data = await self._send_coalesced(payload, timeout)
+            except GasCircuitOpen:
+                # 障害中は期限切れでも直近の結果を返す（degraded=True を付ける）
+                stale = cache.get_stale(payload)
+                if stale is None:
+                    raise
+                self.degraded_responses += 1
+                return {**stale, "degraded": True}
+            if data.get("ok"):
+                cache.put(payload, data, generation)
+            return data
+
+        if mode in READ_MODES:
+            return await self._send_coalesced(payload, timeout)
+
+        data = await self._send(payload, timeout)
+        if mode in WRITE_MODES and data.get("ok"):
+            if cache is not None:
+                cache.invalidate_for(mode)
+            for write in expand_write(mode, payload, data):
+                for listener in self._write_listeners:
+                    listener(*write)
+        return data
+
+    async def _send_coalesced(self, payload: dict, timeout: float = None) -> dict:
+        """同じ読み取りpayloadが実行中なら、その結果を待って共有する"""
+        key = cache_key(payload)
+        inflight = self._inflight.get(key)
+        if inflight is not None:
+            self.coalesced_calls += 1
+            return await asyncio.shield(inflight)
+
+        task = asyncio.ensure_future(self._send(payload, timeout))
+        self._inflight[key] = task
+
+        def _done(t):
+            self._inflight.pop(key, None)
+            # 待っていた全員がキャンセルされても例外が未回収のまま残らないようにする
+            if not t.cancelled():
+                t.exception()
+
+        task.add_done_callback(_done)
+        # 1人がキャンセルしても共有中のリクエストは止めない
+        return await asyncio.shield(task)
+
+    def coalescing_stats(self) -> dict:
+        return {
+            "in_flight": len(self._inflight),
+            "deduplicated": self.coalesced_calls,
+        }
+
+    @property
+    def circuit_open(self) -> bool:
+        """サーキットブレーカーが閉じていない（GAS障害中）か"""
+        return self.breaker is not None and self.breaker.state != self.breaker.CLOSED
+
+    def guard_stats(self) -> dict:
+        return {
+            "breaker": self.breaker.stats() if self.breaker is not None else None,
+            "limiter": self.limiter.stats() if self.limiter is not None else None,
+            "degraded_responses": self.degraded_responses,
+        }
+
+    async def _send(self, payload: dict, timeout: float = None) -> dict:
+        """サーキットブレーカーとレート制限を通してGASに送信する"""
+        mode = payload.get("mode", "create")
+        breaker, limiter = self.breaker, self.limiter
+        if breaker is not None and not breaker.allow():
+            GAS_ERRORS.inc(tenant=self.name, mode=mode, error="circuit_open")
+            raise GasCircuitOpen(mode, breaker.retry_after())
+        if limiter is not None:
+            await limiter.acquire()
+
+        healthy = None
+        try:
+            data = await self._request(payload, timeout)
+            healthy = True
+            return data
+        except GasHTTPError as e:
+            # 429（クォータ超過）と5xxはGAS側の障害、それ以外の4xxはGASには届いている
+            healthy = e.status_code < 500 and e.status_code != 429
+            if e.status_code == 429 and limiter is not None:
+                limiter.penalize()
+            raise
+        except (GasError, aiohttp.ClientError):
+            healthy = False
+            raise
+        finally:
+            if breaker is not None:
+                if healthy is True:
+                    breaker.record_success()
+                elif healthy is False:
+                    breaker.record_failure()
+                else:
+                    breaker.release()
+            if healthy and limiter is not None:
+                limiter.reward()
+
+    async def _request(self, payload: dict, timeout: float = None) -> dict:
+        mode = payload.get("mode", "create")
+        timeout = timeout or self.default_timeout
+        session = self._get_session()
+        started = time.perf_counter()
+        try:
+            async with session.post(
+                self._url,
+                json=payload,
+                timeout=aiohttp.ClientTimeout(total=timeout),
+            ) as resp:
+                text = await resp.text()
+                elapsed = time.perf_counter() - started
+                GAS_SECONDS.observe(elapsed, tenant=self.name, mode=mode, status=resp.status)
+                log.info("gas_request", tenant=self.name, mode=mode, status=resp.status,
+                         seconds=round(elapsed, 3))
+                if resp.status >= 400:
+                    GAS_ERRORS.inc(tenant=self.name, mode=mode, error=f"http_{resp.status}")
+                    raise GasHTTPError(resp.status, text)
+        except asyncio.TimeoutError as e:
+            GAS_SECONDS.observe(time.perf_counter() - started, tenant=self.name, mode=mode, status="timeout")
+            GAS_ERRORS.inc(tenant=self.name, mode=mode, error="timeout")
+            raise GasTimeout(mode, timeout) from e
+        except aiohttp.ClientError as e:
+            GAS_ERRORS.inc(tenant=self.name, mode=mode, error=type(e).__name__)
+            raise
+
+        try:
+            data = json.loads(text)
+        except ValueError as e:
+            GAS_ERRORS.inc(tenant=self.name, mode=mode, error="invalid_json")
+            raise GasError(f"GAS APIのレスポンスがJSONではありません: {text[:200]}") from e
+        if log.enabled(jsonlog.DEBUG):
+            log.debug("gas_response", sample=self.debug_sample, tenant=self.name, mode=mode,
+                      summary=jsonlog.summarize(data), response=data)
+        return data
+
+    async def call(self, mode: str, timeout: float = None, **params) -> dict:
+        """mode と追加パラメータからリクエストを組み立てて呼び出す"""
+        return await self.post({"mode": mode, **params}, timeout=timeout)
+
+    async def close(self):
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
+        self._connector = None
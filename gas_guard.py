@@ -0,0 +1,163 @@
+# gas_guard.py
+# GAS呼び出しのレート制限とサーキットブレーカー
+# Apps Scriptの実行数・同時実行数の上限を超えないように送信ペースを抑え、
+# 障害中は30秒待たずに即座に失敗させる（キャッシュ・ミラーで代替応答できるようにする）
+
+import asyncio
+import time
+
+import jsonlog
+
+log = jsonlog.get_logger("guard")
+
+
+class TokenBucket:
+    """トークンバケット方式のレート制限（429を受けたら送信レートを自動で下げる）
+
+    rate 件/秒でトークンが貯まり、最大 capacity 件までまとめて送れる。
+    penalize() でレートを半分に、reward() で少しずつ元のレートまで戻す（AIMD）。
+    """
+
+    def __init__(self, rate: float = 5.0, capacity: float = 10, min_rate: float = 0.2,
+                 recovery: float = 0.1, clock=time.monotonic, sleep=asyncio.sleep):
+        self.base_rate = rate
+        self.rate = rate
+        self.capacity = capacity
+        self.min_rate = min_rate
+        self.recovery = recovery
+        self._clock = clock
+        self._sleep = sleep
+        self._tokens = float(capacity)
+        self._updated = clock()
+        self.waits = 0
+        self.waited_seconds = 0.0
+        self.penalties = 0
+
+    def _refill(self):
+        now = self._clock()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def try_acquire(self) -> float:
+        """トークンを1つ予約し、送信まで待つべき秒数を返す（0なら即送信可）
+
+        トークンが足りなくても予約はする（残量がマイナスになる）ので、
+        同時に待っている呼び出し同士で同じトークンを取り合わない。
+        """
+        self._refill()
+        self._tokens -= 1
+        if self._tokens >= 0:
+            return 0.0
+        return -self._tokens / self.rate
+
+    async def acquire(self):
+        wait = self.try_acquire()
+        if wait > 0:
+            self.waits += 1
+            self.waited_seconds += wait
+            await self._sleep(wait)
+
+    def penalize(self):
+        """429（クォータ超過）を受けたとき: レートを半分にする"""
+        self._refill()
+        self.rate = max(self.min_rate, self.rate / 2)
+        self.penalties += 1
+
+    def reward(self):
+        """成功したとき: 元のレートまで少しずつ戻す"""
+        if self.rate < self.base_rate:
+            self._refill()
+            self.rate = min(self.base_rate, self.rate + self.recovery)
+
+    def stats(self) -> dict:
+        self._refill()
+        return {
+            "rate": self.rate,
+            "base_rate": self.base_rate,
+            "capacity": self.capacity,
+            "tokens": max(0.0, self._tokens),
+            "waits": self.waits,
+            "waited_seconds": self.waited_seconds,
+            "penalties": self.penalties,
+        }
+
+
+class CircuitBreaker:
+    """連続失敗で開き、一定時間後に1件だけ試してから閉じるサーキットブレーカー
+
+    closed:    通常どおり呼び出す。連続 failure_threshold 回失敗したら open へ
+    open:      呼び出さずに即座に失敗させる。reset_timeout 秒後に half_open へ
+    half_open: 1件だけ試しに呼び出す。成功なら closed、失敗なら再び open へ
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, failure_threshold: int = 3, reset_timeout: float = 30,
+                 clock=time.monotonic, name: str = "default"):
+        self.name = name  # ログ用のテナント名
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._clock = clock
+        self._state = self.CLOSED
+        self._opened_at = None
+        self._probe_in_flight = False
+        self.consecutive_failures = 0
+        self.times_opened = 0
+        self.rejected = 0
+
+    @property
+    def state(self) -> str:
+        if self._state == self.OPEN and self._clock() - self._opened_at >= self.reset_timeout:
+            self._state = self.HALF_OPEN
+            self._probe_in_flight = False
+        return self._state
+
+    def allow(self) -> bool:
+        """呼び出してよいか（half_open では最初の1件だけ許可する）"""
+        state = self.state
+        if state == self.CLOSED:
+            return True
+        if state == self.HALF_OPEN and not self._probe_in_flight:
+            self._probe_in_flight = True
+            return True
+        self.rejected += 1
+        return False
+
+    def retry_after(self) -> float:
+        """次に試せるまでの秒数"""
+        if self._state != self.OPEN:
+            return 0.0
+        return max(0.0, self.reset_timeout - (self._clock() - self._opened_at))
+
+    def record_success(self):
+        self._state = self.CLOSED
+        self._probe_in_flight = False
+        self.consecutive_failures = 0
+
+    def record_failure(self):
+        self.consecutive_failures += 1
+        if self._state == self.HALF_OPEN or self.consecutive_failures >= self.failure_threshold:
+            if self._state != self.OPEN:
+                self.times_opened += 1
+                log.warning("breaker_opened", tenant=self.name, consecutive_failures=self.consecutive_failures,
+                            reset_timeout=self.reset_timeout)
+            self._state = self.OPEN
+            self._opened_at = self._clock()
+            self._probe_in_flight = False
+
+    def release(self):
+        """結果が出ないまま終わった呼び出し（キャンセルなど）の試行枠を返す"""
+        self._probe_in_flight = False
+
+    def stats(self) -> dict:
+        return {
+            "state": self.state,
+            "consecutive_failures": self.consecutive_failures,
+            "failure_threshold": self.failure_threshold,
+            "reset_timeout": self.reset_timeout,
+            "retry_after": self.retry_after(),
+            "times_opened": self.times_opened,
+            "rejected": self.rejected,
+        }
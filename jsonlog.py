@@ -0,0 +1,178 @@
+# jsonlog.py
+# キュー経由の構造化ログ（1行1JSON）
+# イベントループ側はレベル判定・サンプリング・切り詰めだけを行ってキューに積み、
+# JSONへの変換と標準出力への書き込みは別スレッドで行う（大きなGASレスポンスでループを止めない）
+
+import json
+import logging
+import logging.handlers
+import queue
+import random
+import sys
+from datetime import datetime, timezone
+
+# カレンダーの中身（予定名・入力テキストなど）を含むキー。redact=True なら長さだけを残す
+SENSITIVE_KEYS = frozenset({
+    "title", "text", "task", "tasks", "description", "location", "message",
+    "completed", "already_done", "key", "api_key",
+})
+
+DEBUG, INFO, WARNING, ERROR = logging.DEBUG, logging.INFO, logging.WARNING, logging.ERROR
+LEVELS = {"DEBUG": DEBUG, "INFO": INFO, "WARNING": WARNING, "ERROR": ERROR}
+
+_settings = {"redact": True, "max_items": 5, "max_chars": 200}
+_listener = None
+sampled_out = 0  # サンプリングで捨てた件数
+dropped = 0      # キューが一杯で捨てた件数
+
+
+def scrub(value, redact=None, max_items=None, max_chars=None, _depth=0):
+    """ログ用に値を縮める（長いリスト・文字列の切り詰めと、機密キーの伏せ字）
+
+    出力の大きさは入力の件数に依らず max_items・max_chars で決まるので、
+    500件の予定リストでも呼び出し側のコストは一定。
+    """
+    redact = _settings["redact"] if redact is None else redact
+    max_items = _settings["max_items"] if max_items is None else max_items
+    max_chars = _settings["max_chars"] if max_chars is None else max_chars
+    if _depth > 4:
+        return "…"
+    if isinstance(value, dict):
+        result = {}
+        for k, v in value.items():
+            if redact and k in SENSITIVE_KEYS and v is not None:
+                result[k] = _redacted(v)
+            else:
+                result[k] = scrub(v, redact, max_items, max_chars, _depth + 1)
+        return result
+    if isinstance(value, (list, tuple)):
+        items = [scrub(v, redact, max_items, max_chars, _depth + 1) for v in value[:max_items]]
+        if len(value) > max_items:
+            items.append(f"…(+{len(value) - max_items}件)")
+        return items
+    if isinstance(value, str) and len(value) > max_chars:
+        return value[:max_chars] + f"…(+{len(value) - max_chars}文字)"
+    if value is None or isinstance(value, (bool, int, float, str)):
+        return value
+    return scrub(str(value), redact, max_items, max_chars, _depth)
+
+
+def _redacted(value):
+    if isinstance(value, (list, tuple, dict, str)):
+        return f"<redacted len={len(value)}>"
+    return "<redacted>"
+
+
+def summarize(data):
+    """GASレスポンスの要約（ok・エラーとリストの件数だけ）"""
+    if not isinstance(data, dict):
+        return {"type": type(data).__name__}
+    summary = {}
+    for k, v in data.items():
+        if isinstance(v, (list, tuple)):
+            summary[k] = len(v)
+        elif isinstance(v, dict):
+            summary[k] = {kk: len(vv) if isinstance(vv, (list, tuple)) else "…" for kk, vv in list(v.items())[:10]}
+        elif k in ("ok", "error", "mode", "degraded", "total"):
+            summary[k] = v
+    return summary
+
+
+class JsonFormatter(logging.Formatter):
+    """LogRecord を {"ts", "level", "logger", "event", ...fields} の1行JSONにする"""
+
+    def format(self, record):
+        entry = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname.lower(),
+            "logger": record.name,
+            "event": record.getMessage(),
+        }
+        entry.update(getattr(record, "fields", None) or {})
+        if record.exc_info:
+            entry["exc"] = self.formatException(record.exc_info)
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+class _QueueHandler(logging.handlers.QueueHandler):
+    # 標準の prepare() は呼び出し側のスレッドで format() するので、そのまま積む
+    def prepare(self, record):
+        return record
+
+    def enqueue(self, record):
+        global dropped
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            dropped += 1
+
+
+class EventLogger:
+    """イベント名＋キーワード引数でログを出すロガー
+
+    log.debug("gas_response", sample=0.1, mode="progress", response=data)
+    無効なレベルなら引数を一切加工せずに戻る。sample は0〜1の記録割合。
+    """
+
+    def __init__(self, name: str):
+        self._logger = logging.getLogger(name)
+
+    def enabled(self, level: int) -> bool:
+        return self._logger.isEnabledFor(level)
+
+    def log(self, level: int, event: str, sample: float = None, **fields):
+        global sampled_out
+        if not self._logger.isEnabledFor(level):
+            return
+        if sample is not None and random.random() >= sample:
+            sampled_out += 1
+            return
+        self._logger.log(level, event, extra={"fields": scrub(fields)})
+
+    def debug(self, event, sample=None, **fields):
+        self.log(logging.DEBUG, event, sample, **fields)
+
+    def info(self, event, sample=None, **fields):
+        self.log(logging.INFO, event, sample, **fields)
+
+    def warning(self, event, sample=None, **fields):
+        self.log(logging.WARNING, event, sample, **fields)
+
+    def error(self, event, sample=None, **fields):
+        self.log(logging.ERROR, event, sample, **fields)
+
+
+def get_logger(name: str) -> EventLogger:
+    return EventLogger(name)
+
+
+def setup(level="INFO", stream=None, redact=True, max_items=5, max_chars=200, maxsize=10000):
+    """ルートロガーの出力をキュー経由のJSON行にする（再呼び出し時は前の設定を止めて置き換える）
+
+    キューが maxsize 件で一杯のときは、待たずにその行を捨てる。
+    """
+    global _listener
+    shutdown()
+    _settings.update(redact=redact, max_items=max_items, max_chars=max_chars)
+
+    output = logging.StreamHandler(stream or sys.stdout)
+    output.setFormatter(JsonFormatter())
+    log_queue = queue.Queue(maxsize)
+    _listener = logging.handlers.QueueListener(log_queue, output, respect_handler_level=False)
+
+    root = logging.getLogger()
+    for handler in list(root.handlers):
+        if isinstance(handler, _QueueHandler):
+            root.removeHandler(handler)
+    root.addHandler(_QueueHandler(log_queue))
+    root.setLevel(LEVELS.get(str(level).upper(), logging.INFO))
+    _listener.start()
+    return _listener
+
+
+def shutdown():
+    """キューに残っている行を書き出してから書き込みスレッドを止める"""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
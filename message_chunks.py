@@ -0,0 +1,102 @@
+# message_chunks.py
+# 応答メッセージをDiscordの文字数制限に収まるチャンクに分ける
+# 全文を1つの文字列に連結してから分けるのではなく、行の列から順にチャンクを作る。
+# 行はリストに溜めて join し、長さは足し算で数える（文字列の += を繰り返さない）。
+# コードブロック（```）の途中で分けるときは、チャンク末尾で閉じて次のチャンクで開き直す
+
+import re
+
+FENCE = "```"
+DEFAULT_MAX_LENGTH = 1900  # Discordの上限2000文字から「(続き i/n)」の見出し分を残す
+
+_FENCE_OPEN = re.compile(r"^\s*```([\w+-]{0,20})\s*$")
+
+
+def _fence_header(line: str) -> str:
+    """コードブロックを開き直すときの行（言語指定だけ引き継ぐ）"""
+    m = _FENCE_OPEN.match(line)
+    return f"{FENCE}{m.group(1)}" if m else FENCE
+
+
+def _width(max_length: int, fence: str) -> int:
+    """開き直しの行（fence）・閉じる行を足しても1行が収まる幅（0以下なら分けられない）"""
+    width = max_length - (len(FENCE) + 1) - len(fence) - 1
+    if width <= 0:
+        raise ValueError(f"max_length={max_length} ではコードブロックの開閉を含むチャンクに分けられません")
+    return width
+
+
+def _pieces(line: str, width: int):
+    """1行が width を超えるときに分ける（なるべく空白で区切る）"""
+    while len(line) > width:
+        cut = line.rfind(" ", width // 2, width)
+        if cut <= 0:
+            cut = width
+        yield line[:cut]
+        line = line[cut + 1:] if line[cut] == " " else line[cut:]
+    yield line
+
+
+def iter_chunks(lines, max_length: int = DEFAULT_MAX_LENGTH):
+    """行の列（改行を含む文字列でもよい）から max_length 文字以下のチャンクを順に返す
+
+    - 各チャンクのコードブロックは閉じている（入力自体が閉じていない最後のチャンクを除く）
+    - 1行が長すぎるときはその行の途中で分ける
+    - 空のチャンクは返さない
+    - max_length が短すぎてコードブロックの開閉の行を除くと1文字も入らないときは ValueError
+    """
+    if isinstance(lines, str):
+        lines = (lines,)
+    closer = len(FENCE) + 1  # "\n```"
+    parts = []        # 今のチャンクの行
+    size = -1         # "\n".join(parts) の長さ（空なら -1）
+    fence = None      # 開いているコードブロックの開き直し用の行
+    fence_at = -1     # parts の中でコードブロックを開いた行の位置
+
+    # 開き直しの行・閉じる行を足しても1行が収まる幅（コードブロックの開閉で変わる）
+    width = _width(max_length, FENCE)
+    for text in lines:
+        for line in (text.split("\n") if "\n" in text else (text,)):
+            for piece in (_pieces(line, width) if len(line) > width else (line,)):
+                toggles = FENCE in piece and piece.count(FENCE) % 2 == 1
+                length = size + 1 + len(piece)
+                if parts and length + (closer if (fence is None) == toggles else 0) > max_length:
+                    carry = []
+                    if (fence is not None and fence_at == len(parts) - 1 and len(parts) > 1
+                            and len(parts[-1]) + 1 + len(piece) + (0 if toggles else closer) <= max_length):
+                        # 開いた直後で分けると空のコードブロックになるので、開く行ごと次へ送る
+                        carry = [parts.pop()]
+                        chunk = "\n".join(parts)
+                    elif fence is not None:
+                        chunk = "\n".join(parts) + "\n" + FENCE
+                        carry = [fence]
+                    else:
+                        chunk = "\n".join(parts)
+                    if chunk.strip():
+                        yield chunk
+                    parts = carry
+                    fence_at = 0 if carry else -1
+                    length = (len(carry[0]) if carry else -1) + 1 + len(piece)
+                parts.append(piece)
+                size = length
+                if toggles:
+                    if fence is None:
+                        fence = _fence_header(piece)
+                        fence_at = len(parts) - 1
+                        width = _width(max_length, fence)
+                    else:
+                        fence = None
+                        fence_at = -1
+                        width = _width(max_length, FENCE)
+
+    if parts:
+        chunk = "\n".join(parts)
+        if chunk.strip():
+            yield chunk
+
+
+def split_message(content, max_length: int = DEFAULT_MAX_LENGTH) -> list:
+    """メッセージ（文字列または行の列）をチャンクのリストにする"""
+    if isinstance(content, str) and len(content) <= max_length:
+        return [content]
+    return list(iter_chunks(content, max_length))
@@ -0,0 +1,214 @@
+# metrics.py
+# Prometheus形式のメトリクス（カウンター・ヒストグラム・ゲージ）とローカルの /metrics エンドポイント
+# print() のログでは集計できないレイテンシやエラー件数を、コマンド別・GASのmode別に記録する
+
+import functools
+import math
+import threading
+import time
+from contextlib import contextmanager
+
+# 秒単位のヒストグラムの既定バケット（GASは数百ms〜30秒、Discordの送信は数十ms）
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names, values, extra=()) -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    pairs += [f'{name}="{_escape(value)}"' for name, value in extra]
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value) -> str:
+    if value == math.inf:
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+class _Metric:
+    kind = None
+
+    def __init__(self, name: str, help: str, labels=()):
+        self.name = name
+        self.help = help
+        self.label_names = tuple(labels)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: dict) -> tuple:
+        if set(labels) != set(self.label_names):
+            raise ValueError(f"{self.name}: ラベルは {self.label_names} を指定してください（指定: {tuple(labels)}）")
+        return tuple(str(labels[name]) for name in self.label_names)
+
+    def _header(self) -> list:
+        return [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+
+
+class Counter(_Metric):
+    """単調増加するカウンター（エラー件数など）"""
+
+    kind = "counter"
+
+    def __init__(self, name, help, labels=()):
+        super().__init__(name, help, labels)
+        self._values = {}
+
+    def inc(self, amount: float = 1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels) -> float:
+        return self._values.get(self._key(labels), 0)
+
+    def render(self) -> list:
+        lines = self._header()
+        for key, value in sorted(self._values.items()):
+            lines.append(f"{self.name}{_format_labels(self.label_names, key)} {_format_value(value)}")
+        return lines
+
+
+class Histogram(_Metric):
+    """固定バケットのヒストグラム（レイテンシなど）"""
+
+    kind = "histogram"
+
+    def __init__(self, name, help, labels=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, help, labels)
+        self.buckets = tuple(sorted(buckets)) + (math.inf,)
+        self._series = {}  # key -> [バケットごとの件数, 合計, 件数]
+
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [[0] * len(self.buckets), 0.0, 0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series[0][i] += 1
+                    break
+            series[1] += value
+            series[2] += 1
+
+    @contextmanager
+    def time(self, **labels):
+        """with ブロックの実行時間を記録する"""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, **labels)
+
+    def timed(self, **labels):
+        """関数の実行時間を記録するデコレーター（同期関数用）"""
+        def decorator(func):
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                with self.time(**labels):
+                    return func(*args, **kwargs)
+            return wrapper
+        return decorator
+
+    def snapshot(self, **labels) -> dict:
+        series = self._series.get(self._key(labels))
+        if series is None:
+            return {"count": 0, "sum": 0.0}
+        return {"count": series[2], "sum": series[1]}
+
+    def render(self) -> list:
+        lines = self._header()
+        for key, (counts, total, count) in sorted(self._series.items()):
+            cumulative = 0
+            for bound, n in zip(self.buckets, counts):
+                cumulative += n
+                labels = _format_labels(self.label_names, key, [("le", _format_value(bound))])
+                lines.append(f"{self.name}_bucket{labels} {cumulative}")
+            labels = _format_labels(self.label_names, key)
+            lines.append(f"{self.name}_sum{labels} {_format_value(total)}")
+            lines.append(f"{self.name}_count{labels} {count}")
+        return lines
+
+
+class Gauge(_Metric):
+    """出力時に callback() で値を読むゲージ（接続数・ブレーカー状態など）
+
+    callback はラベル無しなら数値を、ラベル有りなら [(ラベルdict, 数値)] を返す。
+    """
+
+    kind = "gauge"
+
+    def __init__(self, name, help, callback, labels=()):
+        super().__init__(name, help, labels)
+        self.callback = callback
+
+    def render(self) -> list:
+        lines = self._header()
+        try:
+            value = self.callback()
+        except Exception as e:
+            return lines + [f"# {self.name} の取得に失敗: {_escape(e)}"]
+        samples = [({}, value)] if not self.label_names else value
+        for labels, sample in samples:
+            if sample is None:
+                continue
+            lines.append(f"{self.name}{_format_labels(self.label_names, self._key(labels))} "
+                         f"{_format_value(sample)}")
+        return lines
+
+
+class Registry:
+    def __init__(self):
+        self._metrics = {}
+
+    def register(self, metric):
+        if metric.name in self._metrics:
+            raise ValueError(f"メトリクス {metric.name} は登録済みです")
+        self._metrics[metric.name] = metric
+        return metric
+
+    def get(self, name):
+        return self._metrics.get(name)
+
+    def render(self) -> str:
+        lines = []
+        for metric in self._metrics.values():
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+
+def counter(name, help, labels=(), registry=REGISTRY) -> Counter:
+    return registry.register(Counter(name, help, labels))
+
+
+def histogram(name, help, labels=(), buckets=DEFAULT_BUCKETS, registry=REGISTRY) -> Histogram:
+    return registry.register(Histogram(name, help, labels, buckets))
+
+
+def gauge(name, help, callback, labels=(), registry=REGISTRY) -> Gauge:
+    return registry.register(Gauge(name, help, callback, labels))
+
+
+async def start_http_server(port: int, host: str = "127.0.0.1", registry=REGISTRY):
+    """GET /metrics でPrometheus形式のテキストを返すサーバーを起動する（戻り値は停止用のrunner）"""
+    from aiohttp import web  # サーバーを起動するときだけ読み込む（メトリクスの定義だけなら不要）
+
+    async def handle(request):
+        return web.Response(
+            body=registry.render().encode("utf-8"),
+            headers={"Content-Type": "text/plain; version=0.0.4; charset=utf-8"},
+        )
+
+    app = web.Application()
+    app.router.add_get("/metrics", handle)
+    runner = web.AppRunner(app, access_log=None)
+    await runner.setup()
+    await web.TCPSite(runner, host, port).start()
+    return runner
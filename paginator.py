@@ -0,0 +1,150 @@
+# paginator.py
+# 件数の多い応答（/schedule・/progress）を、Embed 1件と前後ボタンのページ送りで表示する
+# 結果は最初の1回だけ取得してメモリに持つ。ボタンを押したときはそのページの分だけ描画する
+# （GASは呼び直さず、全ページを先に作ることもしない）
+
+import discord
+
+import metrics
+
+EMBED_DESCRIPTION_LIMIT = 4096  # Discord の Embed 説明文の上限
+DEFAULT_PAGE_SIZE = 10
+VIEW_TIMEOUT = 600  # ボタンの有効時間（秒）。応答を編集できる15分より短くする
+
+PAGE_VIEWS = metrics.counter(
+    "discord_page_views_total", "ページ送りで表示したページ数（最初の表示とボタン操作）", ("view", "trigger"))
+PAGE_RENDER_SECONDS = metrics.histogram(
+    "discord_page_render_seconds", "1ページ分の Embed の描画時間（秒）", ("view",),
+    buckets=(0.0001, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.1))
+
+
+class PagedEmbed:
+    """(見出し, 項目) の一覧を page_size 件ずつの Embed にする
+
+    render(items) はそのページの項目だけを受け取り、1項目1行の行のリストを返す
+    （カレンダーリンクのような重い整形も、そのページを開いたときにだけ行う）。
+    header の行は全ページの先頭に、note は全ページの末尾に付ける。
+    """
+
+    def __init__(self, name, title, items, render, page_size=DEFAULT_PAGE_SIZE,
+                 header=(), note="", empty="", color=None):
+        self.name = name
+        self.title = title
+        self.items = list(items)
+        self.render = render
+        self.page_size = max(1, page_size)
+        self.header = list(header)
+        self.note = note
+        self.empty = empty
+        self.color = color
+
+    @property
+    def pages(self) -> int:
+        return max(1, -(-len(self.items) // self.page_size))
+
+    def lines(self, index: int) -> list:
+        """index ページ目の説明文の行（見出しはページが変わったら「（続き）」を付けて出し直す）"""
+        start = index * self.page_size
+        page = self.items[start:start + self.page_size]
+        lines = list(self.header)
+        if not page:
+            if self.empty:
+                lines.append(self.empty)
+            return lines
+        section = self.items[start - 1][0] if start > 0 else None
+        for (item_section, _), line in zip(page, self.render([item for _, item in page])):
+            if item_section != section:
+                if item_section:
+                    lines.append(f"\n**{item_section}**")
+                section = item_section
+            elif item_section and len(lines) == len(self.header):
+                # 前のページから続く見出し
+                lines.append(f"\n**{item_section}（続き）**")
+            lines.append(line)
+        return lines
+
+    def description(self, index: int) -> str:
+        """説明文（上限を超える分は行単位で省略し、省略した件数を書く）"""
+        lines = self.lines(index)
+        tail = f"\n\n{self.note}" if self.note else ""
+        text = "\n".join(lines)
+        if len(text) + len(tail) <= EMBED_DESCRIPTION_LIMIT:
+            return text + tail
+        budget = EMBED_DESCRIPTION_LIMIT - len(tail) - 20  # 「…（N行省略）」の分
+        kept = []
+        size = -1
+        for line in lines:
+            if size + 1 + len(line) > budget:
+                break
+            kept.append(line)
+            size += 1 + len(line)
+        return "\n".join(kept) + f"\n…（{len(lines) - len(kept)}行省略）" + tail
+
+    def embed(self, index: int) -> discord.Embed:
+        with PAGE_RENDER_SECONDS.time(view=self.name):
+            embed = discord.Embed(title=self.title, description=self.description(index), color=self.color)
+            if self.pages > 1:
+                embed.set_footer(text=f"ページ {index + 1}/{self.pages}（全{len(self.items)}件）")
+        return embed
+
+
+class PageView(discord.ui.View):
+    """前後ボタンでページを切り替える（ボタンの応答はそのページの描画だけ）"""
+
+    def __init__(self, source: PagedEmbed, user_id=None, timeout=VIEW_TIMEOUT):
+        super().__init__(timeout=timeout)
+        self.source = source
+        self.user_id = user_id
+        self.index = 0
+        self.interaction = None  # タイムアウト時にボタンを無効にするための元の応答
+        self._sync()
+
+    def _sync(self):
+        self.previous.disabled = self.index == 0
+        self.next.disabled = self.index >= self.source.pages - 1
+        self.position.label = f"{self.index + 1}/{self.source.pages}"
+
+    async def show(self, interaction: discord.Interaction, delta: int):
+        self.index = min(max(self.index + delta, 0), self.source.pages - 1)
+        self._sync()
+        PAGE_VIEWS.inc(view=self.source.name, trigger="button")
+        await interaction.response.edit_message(embed=self.source.embed(self.index), view=self)
+
+    @discord.ui.button(label="◀ 前へ", style=discord.ButtonStyle.secondary)
+    async def previous(self, interaction: discord.Interaction, button: discord.ui.Button):
+        await self.show(interaction, -1)
+
+    @discord.ui.button(label="1/1", style=discord.ButtonStyle.secondary, disabled=True)
+    async def position(self, interaction: discord.Interaction, button: discord.ui.Button):
+        pass
+
+    @discord.ui.button(label="次へ ▶", style=discord.ButtonStyle.primary)
+    async def next(self, interaction: discord.Interaction, button: discord.ui.Button):
+        await self.show(interaction, 1)
+
+    async def interaction_check(self, interaction: discord.Interaction) -> bool:
+        return self.user_id is None or interaction.user.id == self.user_id
+
+    async def on_timeout(self):
+        for item in self.children:
+            item.disabled = True
+        if self.interaction is not None:
+            try:
+                await self.interaction.edit_original_response(view=self)
+            except discord.HTTPException:
+                pass  # 応答が削除された・編集期限切れ
+
+
+async def send_pages(interaction: discord.Interaction, source: PagedEmbed):
+    """最初のページで元の応答（defer・送信済みのメッセージ）を置き換える
+
+    1ページに収まるときはボタンを付けない。メッセージは常に1件。
+    """
+    PAGE_VIEWS.inc(view=source.name, trigger="initial")
+    if source.pages == 1:
+        await interaction.edit_original_response(content=None, embed=source.embed(0))
+        return None
+    view = PageView(source, user_id=interaction.user.id)
+    view.interaction = interaction
+    await interaction.edit_original_response(content=None, embed=source.embed(0), view=view)
+    return view
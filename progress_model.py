@@ -0,0 +1,260 @@
+# progress_model.py
+# 今日の進捗をBot側で保持するモデル
+# /done・/undone・/ad・/must_one・/t2g が成功したら、GASと同じ規則でその場で更新する。
+# /progress と定期レポートはこのモデルから即答し、GASの generateDailyProgress_ を
+# 毎回走らせない。定期的にGASの結果と照合して差分（ドリフト）を記録し、置き換える
+
+import time
+from bisect import insort
+from datetime import datetime
+
+import metrics
+from calendar_store import JST, parse_utc_iso
+from task_index import key_start
+
+PROGRESS_RECONCILES = metrics.counter(
+    "progress_reconciles_total", "進捗モデルとGASの照合回数（結果別）", ("tenant", "result"))
+PROGRESS_DRIFT = metrics.counter(
+    "progress_drift_total", "照合時に見つかった進捗モデルとGASのずれ（項目別の件数）", ("tenant", "field"))
+
+# タイトルを書き換えるがモデルでは追えない書き込み（次の照合まで使わない）
+_INVALIDATING_MODES = frozenset({"format_events", "daily_format", "weekly_format"})
+
+
+class ProgressModel:
+    """1日分のタスク（完了/未完了）と件数を保持し、GASと同じ形の進捗を返す
+
+    件数は更新時に増減させ、progress() の結果は次の更新までそのまま使い回す。
+    日付・時刻は tz（テナントのタイムゾーン）で扱う。
+    """
+
+    def __init__(self, name: str = "default", max_age: float = 900, clock=time.time, now=None, tz=JST):
+        self.name = name
+        # 最終照合からこの秒数を超えたら使わない（照合が止まっていてもずれ続けない）
+        self.max_age = max_age
+        self._clock = clock
+        self.tz = tz
+        self._now = now or (lambda: datetime.now(tz).replace(tzinfo=None))
+
+        self.date = None        # モデルの日付（tz）
+        self._tasks = []        # [(開始 "HH:MM", 連番, task)] 開始時刻順
+        self._seq = 0
+        self.total = 0
+        self.completed = 0
+        self.loaded_at = None
+        self.applied = 0        # 最終照合以降にモデルへ反映した書き込み
+        self.stale = False      # 追えない書き込みがあった（次の照合まで使わない）
+        self._snapshot = None
+
+        self.local_reads = 0
+        self.updates = 0
+        self.reconciles = 0
+        self.drifted = 0
+        self.last_drift = None
+
+    # ---------- 読み込み・照合 ----------
+
+    def load(self, progress: dict, now: datetime = None):
+        """GASの progress（または同じ形のミラーの結果）で置き換える"""
+        now = now or self._now()
+        self.date = now.date()
+        self._tasks = []
+        self._seq = 0
+        for task in progress.get("completed", []):
+            self._insert(dict(task, done=True))
+        for task in progress.get("pending", []):
+            self._insert(dict(task, done=False))
+        self.total = len(self._tasks)
+        self.completed = sum(1 for _, _, t in self._tasks if t["done"])
+        self.loaded_at = self._clock()
+        self.applied = 0
+        self.stale = False
+        self._snapshot = None
+
+    def reconcile(self, progress: dict, now: datetime = None) -> dict:
+        """GASの結果と比べてずれを記録し、GASの結果で置き換える
+
+        戻り値は項目ごとのずれ {"total", "completed", "pending", "mustOne", "tasks"}。
+        モデルが未読み込み・別の日付なら比較せずに読み込むだけ（None を返す）。
+        """
+        now = now or self._now()
+        drift = None
+        if self.date == now.date() and self.loaded_at is not None:
+            local = self._build(now)
+            drift = {
+                "total": abs(local["totalTasks"] - progress.get("totalTasks", 0)),
+                "completed": abs(local["completedCount"] - progress.get("completedCount", 0)),
+                "pending": abs(local["pendingCount"] - progress.get("pendingCount", 0)),
+                "mustOne": int(_title(local["mustOne"]) != _title(progress.get("mustOne"))),
+                "tasks": len(_task_keys(local) ^ _task_keys(progress)),
+            }
+            self.reconciles += 1
+            if any(drift.values()):
+                self.drifted += 1
+                self.last_drift = {"at": self._clock(), "stale": self.stale, **drift}
+                for field, count in drift.items():
+                    if count:
+                        PROGRESS_DRIFT.inc(count, tenant=self.name, field=field)
+            PROGRESS_RECONCILES.inc(tenant=self.name, result="drift" if any(drift.values()) else "match")
+        else:
+            PROGRESS_RECONCILES.inc(tenant=self.name, result="loaded")
+        self.load(progress, now)
+        return drift
+
+    # ---------- 書き込みの反映 ----------
+
+    def apply_write(self, mode: str, payload: dict, data: dict):
+        """GasClient の書き込みリスナー: 成功した書き込みをGASと同じ規則でモデルに反映する"""
+        if self.loaded_at is None or self.date != self._now().date():
+            return
+        # イベントキー指定の更新は、その開始時刻のタスクを優先する
+        start = key_start(payload.get("event_key"), self.tz)
+        if start is not None and start.date() != self.date:
+            # モデルの今日に置けない書き込みは反映を確かめられないので、次の照合まで使わない
+            self.stale = True
+            self._snapshot = None
+            return
+        at = start.strftime("%H:%M") if start else None
+        if mode in _INVALIDATING_MODES:
+            self.stale = True
+        elif mode == "mark_complete":
+            self._update(self._find(payload.get("task", ""), done=False, at=at), done=True)
+        elif mode == "unmark_complete":
+            self._update(self._find(payload.get("task", ""), done=True, at=at), done=False)
+        elif mode == "mark_all_complete":
+            for _, _, task in self._tasks:
+                if not task["done"]:
+                    task["done"] = True
+                    self.completed += 1
+        elif mode == "set_must_one":
+            # マストワンは1つだけ（既存の☆を外してから付ける）
+            for _, _, task in self._tasks:
+                if "☆" in task["title"]:
+                    task["title"] = task["title"].replace("☆", "").strip()
+            # GASは一致するタスクが無くても既存の☆を外す（ok=False でも呼んでよい）
+            task = self._find(payload.get("task", ""), done=False, at=at)
+            if task is not None:
+                task["title"] = "☆ " + task["title"]
+        elif mode == "create":
+            self._add_created(data.get("created", []))
+        else:
+            return
+        self.updates += 1
+        self.applied += 1
+        self._snapshot = None
+
+    def _find(self, text: str, done: bool, at: str = None):
+        """GASと同じく、開始時刻順で最初に部分一致したタスク（at があればその開始時刻を優先）"""
+        candidates = [task for _, _, task in self._tasks if task["done"] == done and text in task["title"]]
+        if at is not None:
+            for task in candidates:
+                if task.get("start") == at:
+                    return task
+        return candidates[0] if candidates else None
+
+    def _update(self, task, done: bool):
+        if task is None:
+            # GASでは一致したのにモデルに無い＝ずれている
+            self.stale = True
+            return
+        task["done"] = done
+        self.completed += 1 if done else -1
+
+    def _add_created(self, created):
+        for item in created:
+            try:
+                start = parse_utc_iso(item["start"], self.tz)
+                end = parse_utc_iso(item["end"], self.tz)
+            except (KeyError, TypeError, ValueError):
+                self.stale = True
+                continue
+            if start.date() != self.date:
+                continue
+            title = item.get("title", "")
+            done = "✓" in title
+            self._insert({
+                "title": title.replace("✓", "", 1).strip() if done else title,
+                "start": start.strftime("%H:%M"),
+                "end": end.strftime("%H:%M"),
+                "duration": round((end - start).total_seconds() / 60),
+                "done": done,
+            })
+            self.total += 1
+            self.completed += int(done)
+
+    def _insert(self, task):
+        self._seq += 1
+        insort(self._tasks, (task.get("start", ""), self._seq, task))
+
+    # ---------- 読み取り ----------
+
+    def is_usable(self, now: datetime = None) -> bool:
+        if self.loaded_at is None or self.stale:
+            return False
+        if self.date != (now or self._now()).date():
+            return False
+        return self._clock() - self.loaded_at <= self.max_age
+
+    def progress(self, now: datetime = None):
+        """GASの generateDailyProgress_ と同じ形の進捗（使えない状態ならNone）"""
+        now = now or self._now()
+        if not self.is_usable(now):
+            return None
+        self.local_reads += 1
+        if self._snapshot is None:
+            self._snapshot = self._build(now)
+        return self._snapshot
+
+    def _build(self, now: datetime) -> dict:
+        completed, pending = [], []
+        must_one = None
+        for _, _, task in self._tasks:
+            public = {k: task[k] for k in ("title", "start", "end", "duration") if k in task}
+            if task["done"]:
+                completed.append(public)
+            else:
+                if must_one is None and "☆" in task["title"]:
+                    must_one = public
+                pending.append(public)
+        return {
+            "date": now.strftime("%Y-%m-%d (%a)"),
+            "totalTasks": self.total,
+            "completedCount": self.completed,
+            "pendingCount": self.total - self.completed,
+            "completionRate": round(self.completed / self.total * 100) if self.total else 0,
+            "completed": completed,
+            "pending": pending,
+            "mustOne": must_one,
+        }
+
+    def freshness_label(self) -> str:
+        if self.loaded_at is None:
+            return "🧮 未照合"
+        checked = datetime.fromtimestamp(self.loaded_at, self.tz).strftime("%H:%M:%S")
+        return f"🧮 Bot内で集計（GASと照合 {checked}・以降 {self.applied}件の更新を反映）"
+
+    def stats(self) -> dict:
+        return {
+            "date": self.date.isoformat() if self.date else None,
+            "total": self.total,
+            "completed": self.completed,
+            "usable": self.is_usable(),
+            "local_reads": self.local_reads,
+            "updates": self.updates,
+            "reconciles": self.reconciles,
+            "drifted": self.drifted,
+            "last_drift": self.last_drift,
+        }
+
+
+def _title(task):
+    return task.get("title") if task else None
+
+
+def _task_keys(progress: dict) -> set:
+    """タスクの比較キー（タイトル・時刻・完了状態）"""
+    keys = set()
+    for done, field in ((True, "completed"), (False, "pending")):
+        for task in progress.get(field) or []:
+            keys.add((task.get("title"), task.get("start"), task.get("end"), done))
+    return keys
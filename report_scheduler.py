@@ -0,0 +1,394 @@
+# report_scheduler.py
+# 定期進捗レポートのスケジューラー
+# チャンネルごとのcron形式のスケジュール（タイムゾーン付き）をSQLiteに保存し、
+# 次の実行時刻の最小ヒープで待つ。同じ時刻に数千チャンネルが重なっても、
+# 同時実行数を制限して並列に送る（1件ずつの直列ループにしない）
+
+import asyncio
+import heapq
+import os
+import sqlite3
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+
+import jsonlog
+import metrics
+
+REPORT_LATENESS = metrics.histogram(
+    "report_schedule_lateness_seconds", "予定時刻からレポート送信開始までの遅れ（秒）",
+    buckets=(0.1, 0.5, 1, 2.5, 5, 10, 30, 60, 300))
+REPORT_FIRES = metrics.counter(
+    "report_schedule_fires_total", "スケジュールされたレポートの実行件数（結果別）", ("result",))
+
+log = jsonlog.get_logger("report")
+
+# 曜日は cron と同じく 0=日曜（7も日曜）
+_FIELDS = (("分", 0, 59), ("時", 0, 23), ("日", 1, 31), ("月", 1, 12), ("曜日", 0, 7))
+_MAX_SEARCH_DAYS = 366 * 5  # 2/29 だけのスケジュールでも見つかる範囲
+
+
+class ScheduleError(ValueError):
+    """cron式・タイムゾーンの指定が不正"""
+
+
+def parse_timezone(name: str) -> ZoneInfo:
+    try:
+        return ZoneInfo(name)
+    except (ZoneInfoNotFoundError, ValueError) as e:
+        raise ScheduleError(f"タイムゾーンが見つかりません: {name}（例: Asia/Tokyo）") from e
+
+
+def _parse_field(text, label, low, high):
+    values = set()
+    for part in text.split(","):
+        step = 1
+        if "/" in part:
+            part, step_text = part.split("/", 1)
+            if not step_text.isdigit() or int(step_text) < 1:
+                raise ScheduleError(f"{label}の間隔が不正です: /{step_text}")
+            step = int(step_text)
+        if part == "*":
+            first, last = low, high
+        elif "-" in part:
+            a, b = part.split("-", 1)
+            if not (a.isdigit() and b.isdigit()):
+                raise ScheduleError(f"{label}の範囲が不正です: {part}")
+            first, last = int(a), int(b)
+        elif part.isdigit():
+            first = int(part)
+            last = high if step > 1 else first
+        else:
+            raise ScheduleError(f"{label}の指定が不正です: {part}")
+        if first < low or last > high or first > last:
+            raise ScheduleError(f"{label}は {low}〜{high} で指定してください: {part}")
+        values.update(range(first, last + 1, step))
+    return values
+
+
+class CronSchedule:
+    """「分 時 日 月 曜日」の5項目のcron式（*・範囲・リスト・/間隔に対応）
+
+    日と曜日の両方を指定した場合は、通常のcronと同じくどちらかに一致すれば実行する。
+    """
+
+    def __init__(self, expr: str):
+        fields = expr.split()
+        if len(fields) != 5:
+            raise ScheduleError(f"cron式は「分 時 日 月 曜日」の5項目で指定してください: {expr!r}")
+        parsed = [_parse_field(f, *spec) for f, spec in zip(fields, _FIELDS)]
+        self.expr = " ".join(fields)
+        self.minutes = sorted(parsed[0])
+        self.hours = sorted(parsed[1])
+        self.days = parsed[2]
+        self.months = parsed[3]
+        self.weekdays = {d % 7 for d in parsed[4]}
+        self._any_day = fields[2] == "*"
+        self._any_weekday = fields[4] == "*"
+
+    def _day_matches(self, d) -> bool:
+        if d.month not in self.months:
+            return False
+        day_ok = d.day in self.days
+        weekday_ok = (d.weekday() + 1) % 7 in self.weekdays  # Pythonは0=月曜
+        if self._any_day:
+            return weekday_ok
+        if self._any_weekday:
+            return day_ok
+        return day_ok or weekday_ok
+
+    def next_after(self, after: datetime, tz) -> datetime:
+        """after（タイムゾーン付き）より後で、tz の現地時刻が式に一致する最初の時刻"""
+        local = after.astimezone(tz)
+        day = local.date()
+        for _ in range(_MAX_SEARCH_DAYS):
+            if self._day_matches(day):
+                for hour in self.hours:
+                    for minute in self.minutes:
+                        candidate = datetime(day.year, day.month, day.day, hour, minute, tzinfo=tz)
+                        if candidate.astimezone(timezone.utc) > after:
+                            return candidate
+            day += timedelta(days=1)
+        raise ScheduleError(f"実行される日がありません: {self.expr}")
+
+
+def report_time_cron(t) -> str:
+    """テナント設定の report_times（time）を毎日実行のcron式にする"""
+    return f"{t.minute} {t.hour} * * *"
+
+
+class ReportScheduler:
+    """チャンネルごとのレポートスケジュールを保存し、時刻になったら fire(schedule) を呼ぶ
+
+    schedule は {"id", "tenant", "channel_id", "guild_id", "cron", "tz", "next_fire", "last_fire"}。
+    次の実行時刻は最小ヒープで管理し、削除・変更されたエントリは取り出し時に読み飛ばす。
+    停止中に過ぎた時刻は grace 秒以内なら起動直後に送り、それより古ければ次の時刻まで飛ばす。
+    """
+
+    def __init__(self, path: str, fire, concurrency: int = 50, grace: float = 600,
+                 clock=time.time):
+        self.path = path
+        self.fire = fire
+        self.concurrency = concurrency
+        self.grace = grace
+        self._clock = clock
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="report-scheduler")
+        self._db = None
+        self._schedules = {}
+        self._crons = {}
+        self._heap = []
+        self._wakeup = None
+        self._task = None
+        self._slots = None
+        self._batches = set()
+        self.fired = 0
+        self.failed = 0
+        self.last_batch = None  # {"size", "seconds", "lateness"}
+
+    # ---------- SQLite（専用スレッドで実行） ----------
+
+    async def _run(self, fn, *args):
+        return await asyncio.get_running_loop().run_in_executor(self._executor, fn, *args)
+
+    def _connect(self):
+        """DBを開く（開いていなければ。start() より前の seed()・add() からも呼ばれる）"""
+        if self._db is not None:
+            return self._db
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        db = sqlite3.connect(self.path, check_same_thread=False)
+        db.execute("""
+            CREATE TABLE IF NOT EXISTS schedules (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                tenant TEXT NOT NULL,
+                channel_id INTEGER NOT NULL,
+                guild_id INTEGER,
+                cron TEXT NOT NULL,
+                tz TEXT NOT NULL,
+                next_fire REAL,
+                last_fire REAL,
+                created_at REAL NOT NULL
+            )
+        """)
+        # テナント設定の report_times から初期登録済みのチャンネル（削除後に復活させない）
+        db.execute("""
+            CREATE TABLE IF NOT EXISTS seeded (
+                tenant TEXT NOT NULL,
+                channel_id INTEGER NOT NULL,
+                PRIMARY KEY (tenant, channel_id)
+            )
+        """)
+        db.commit()
+        self._db = db
+        return db
+
+    def _open(self):
+        columns = ("id", "tenant", "channel_id", "guild_id", "cron", "tz", "next_fire", "last_fire")
+        rows = self._connect().execute(f"SELECT {', '.join(columns)} FROM schedules").fetchall()
+        return [dict(zip(columns, row)) for row in rows]
+
+    def _insert(self, tenant, channel_id, guild_id, cron, tz, next_fire):
+        cur = self._connect().execute(
+            "INSERT INTO schedules (tenant, channel_id, guild_id, cron, tz, next_fire, created_at) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (tenant, channel_id, guild_id, cron, tz, next_fire, self._clock()),
+        )
+        self._db.commit()
+        return cur.lastrowid
+
+    def _seed(self, tenant, channel_id, rows):
+        """未登録のチャンネルなら rows [(cron, tz, next_fire)] を登録して、その id を返す"""
+        self._connect()
+        cur = self._db.execute("INSERT OR IGNORE INTO seeded (tenant, channel_id) VALUES (?, ?)",
+                               (tenant, channel_id))
+        if cur.rowcount == 0:
+            self._db.commit()
+            return []
+        ids = []
+        for cron, tz, next_fire in rows:
+            ids.append(self._db.execute(
+                "INSERT INTO schedules (tenant, channel_id, cron, tz, next_fire, created_at) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (tenant, channel_id, cron, tz, next_fire, self._clock()),
+            ).lastrowid)
+        self._db.commit()
+        return ids
+
+    def _delete(self, schedule_id):
+        self._connect().execute("DELETE FROM schedules WHERE id = ?", (schedule_id,))
+        self._db.commit()
+
+    def _save_fires(self, rows):
+        self._db.executemany("UPDATE schedules SET next_fire = ?, last_fire = ? WHERE id = ?", rows)
+        self._db.commit()
+
+    # ---------- 公開API ----------
+
+    async def start(self):
+        """DBを読み込んでスケジューラーを起動する（起動済みなら何もしない）"""
+        if self._task is not None:
+            return
+        rows = await self._run(self._open)
+        now = self._clock()
+        for row in rows:
+            if row["id"] in self._schedules:
+                continue  # start() より前に seed()・add() で登録済み（ヒープにも入っている）
+            try:
+                cron, tz = CronSchedule(row["cron"]), parse_timezone(row["tz"])
+            except ScheduleError as e:
+                log.warning("schedule_invalid", schedule_id=row["id"], tenant=row["tenant"],
+                            channel_id=row["channel_id"], error=str(e))
+                continue
+            if row["next_fire"] is None or row["next_fire"] < now - self.grace:
+                row["next_fire"] = self._next_fire(cron, tz, now)
+            self._track(row, cron)
+        self._wakeup = asyncio.Event()
+        self._slots = asyncio.Semaphore(self.concurrency)
+        self._task = asyncio.ensure_future(self._loop())
+        log.info("report_scheduler_started", schedules=len(self._schedules))
+
+    async def close(self):
+        tasks = [t for t in (self._task, *self._batches) if t is not None]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._task = None
+        if self._db is not None:
+            await self._run(self._db.close)
+            self._db = None
+        self._executor.shutdown(wait=False)
+
+    async def add(self, tenant: str, channel_id: int, cron: str, tz: str, guild_id: int = None) -> dict:
+        """スケジュールを追加する（cron式・タイムゾーンが不正なら ScheduleError）"""
+        schedule, zone = CronSchedule(cron), parse_timezone(tz)
+        next_fire = self._next_fire(schedule, zone, self._clock())
+        schedule_id = await self._run(self._insert, tenant, channel_id, guild_id, schedule.expr, tz, next_fire)
+        row = {"id": schedule_id, "tenant": tenant, "channel_id": channel_id, "guild_id": guild_id,
+               "cron": schedule.expr, "tz": tz, "next_fire": next_fire, "last_fire": None}
+        self._track(row, schedule)
+        self._wake()
+        return row
+
+    async def seed(self, tenant: str, channel_id: int, crons, tz: str) -> int:
+        """テナント設定の既定スケジュールを、そのチャンネルで初めてのときだけ登録する"""
+        zone = parse_timezone(tz)
+        now = self._clock()
+        parsed = [CronSchedule(c) for c in crons]
+        rows = [(c.expr, tz, self._next_fire(c, zone, now)) for c in parsed]
+        ids = await self._run(self._seed, tenant, channel_id, rows)
+        for schedule_id, cron, (_, _, next_fire) in zip(ids, parsed, rows):
+            self._track({"id": schedule_id, "tenant": tenant, "channel_id": channel_id, "guild_id": None,
+                         "cron": cron.expr, "tz": tz, "next_fire": next_fire, "last_fire": None}, cron)
+        if ids:
+            self._wake()
+        return len(ids)
+
+    async def remove(self, schedule_id: int, channel_id: int = None) -> bool:
+        """スケジュールを削除する（channel_id を指定したら、そのチャンネルのものだけ）"""
+        row = self._schedules.get(schedule_id)
+        if row is None or (channel_id is not None and row["channel_id"] != channel_id):
+            return False
+        await self._run(self._delete, schedule_id)
+        # ヒープのエントリは取り出し時に読み飛ばす
+        self._schedules.pop(schedule_id, None)
+        self._crons.pop(schedule_id, None)
+        return True
+
+    def list(self, channel_id: int = None, tenant: str = None) -> list:
+        rows = [row for row in self._schedules.values()
+                if (channel_id is None or row["channel_id"] == channel_id)
+                and (tenant is None or row["tenant"] == tenant)]
+        return sorted(rows, key=lambda row: (row["next_fire"], row["id"]))
+
+    def stats(self) -> dict:
+        return {
+            "schedules": len(self._schedules),
+            "next_fire": self._heap[0][0] if self._heap else None,
+            "fired": self.fired,
+            "failed": self.failed,
+            "running": len(self._batches),
+            "last_batch": self.last_batch,
+        }
+
+    # ---------- 内部 ----------
+
+    def _next_fire(self, cron, tz, after_ts) -> float:
+        after = datetime.fromtimestamp(after_ts, timezone.utc)
+        return cron.next_after(after, tz).timestamp()
+
+    def _track(self, row, cron):
+        self._schedules[row["id"]] = row
+        self._crons[row["id"]] = cron
+        heapq.heappush(self._heap, (row["next_fire"], row["id"]))
+
+    def _wake(self):
+        if self._wakeup is not None:
+            self._wakeup.set()
+
+    def _pop_due(self, now):
+        due = []
+        while self._heap and self._heap[0][0] <= now:
+            fire_at, schedule_id = heapq.heappop(self._heap)
+            row = self._schedules.get(schedule_id)
+            if row is None or row["next_fire"] != fire_at:
+                continue  # 削除済み・時刻変更済みの古いエントリ
+            due.append(row)
+        return due
+
+    async def _loop(self):
+        while True:
+            self._wakeup.clear()
+            now = self._clock()
+            due = self._pop_due(now)
+            if due:
+                # 次の時刻を先に決めてヒープに戻し、送信中も次のスケジュールを待てるようにする
+                saved = []
+                for row in due:
+                    scheduled = row["next_fire"]
+                    row["last_fire"] = scheduled
+                    row["next_fire"] = self._next_fire(
+                        self._crons[row["id"]], parse_timezone(row["tz"]), max(now, scheduled))
+                    heapq.heappush(self._heap, (row["next_fire"], row["id"]))
+                    saved.append((row["next_fire"], scheduled, row["id"]))
+                await self._run(self._save_fires, saved)
+                batch = asyncio.ensure_future(self._fan_out([(dict(row), row["last_fire"]) for row in due]))
+                self._batches.add(batch)
+                batch.add_done_callback(self._batches.discard)
+                continue
+            # 時計の変更にも追従できるよう、最長60秒ごとに確認し直す
+            timeout = min(60.0, self._heap[0][0] - now) if self._heap else 60.0
+            # wait_for は起床と同時に cancel されるとキャンセルを取りこぼす（Python 3.11）ので wait を使う
+            waiter = asyncio.ensure_future(self._wakeup.wait())
+            try:
+                await asyncio.wait((waiter,), timeout=timeout)
+            finally:
+                waiter.cancel()
+
+    async def _fan_out(self, due):
+        """同じ時刻のスケジュールを同時実行数 concurrency までで並列に送る"""
+        started = self._clock()
+        lateness = []
+
+        async def run(row, scheduled):
+            async with self._slots:
+                late = max(0.0, self._clock() - scheduled)
+                lateness.append(late)
+                REPORT_LATENESS.observe(late)
+                try:
+                    await self.fire(row)
+                    self.fired += 1
+                    REPORT_FIRES.inc(result="ok")
+                except Exception as e:
+                    self.failed += 1
+                    REPORT_FIRES.inc(result="error")
+                    log.error("report_fire_failed", schedule_id=row["id"], tenant=row["tenant"],
+                              channel_id=row["channel_id"], error=f"{type(e).__name__}: {e}")
+
+        await asyncio.gather(*(run(row, scheduled) for row, scheduled in due))
+        self.last_batch = {
+            "size": len(due),
+            "seconds": self._clock() - started,
+            "lateness": max(lateness) if lateness else 0.0,
+        }
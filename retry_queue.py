@@ -0,0 +1,263 @@
+# retry_queue.py
+# 書き込み系コマンドの永続リトライキュー
+# GASが429/5xxやタイムアウトを返したリクエストをSQLiteに保存し、
+# ジッター付き指数バックオフで再送する（同時実行数はワーカー数で制限）
+
+import asyncio
+import json
+import os
+import random
+import sqlite3
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+import aiohttp
+
+import jsonlog
+from gas_client import GasCircuitOpen, GasHTTPError, GasTimeout
+
+log = jsonlog.get_logger("retry")
+
+# 再試行する価値のあるHTTPステータス
+RETRYABLE_STATUS = frozenset({429, 500, 502, 503, 504})
+
+# 同じ chain のジョブは登録順に1件ずつ実行する（前のジョブが done/dead になるまで次は待つ）
+_READY = (
+    "status = 'pending' AND NOT EXISTS ("
+    "SELECT 1 FROM jobs AS prev WHERE prev.chain = jobs.chain AND prev.rowid < jobs.rowid "
+    "AND prev.status IN ('pending', 'running'))"
+)
+
+
+def new_idempotency_key() -> str:
+    return uuid.uuid4().hex
+
+
+def with_idempotency_key(payload: dict) -> dict:
+    """書き込みpayloadに冪等キーを付ける（同じキーの再送はGAS側で1回分として扱われる）"""
+    if "idempotency_key" in payload:
+        return payload
+    return {**payload, "idempotency_key": new_idempotency_key()}
+
+
+def is_retryable(error: Exception) -> bool:
+    """一時的な障害（再送で成功しうるエラー）かどうか"""
+    if isinstance(error, GasHTTPError):
+        return error.status_code in RETRYABLE_STATUS
+    return isinstance(error, (GasTimeout, GasCircuitOpen, asyncio.TimeoutError, aiohttp.ClientError))
+
+
+class RetryQueue:
+    """SQLiteに永続化する書き込みジョブのキュー
+
+    ジョブは冪等キーを主キーとして保存する。Botを再起動しても未完了のジョブは再開される。
+    chain（例: ユーザーごと）を指定したジョブは、同じ chain 内で登録順に実行される。
+    SQLiteへのアクセスは専用スレッド1本で行い、イベントループをブロックしない。
+    """
+
+    def __init__(self, gas, path: str, workers: int = 2, base_delay: float = 5,
+                 max_delay: float = 600, max_attempts: int = 8, timeout: float = 30,
+                 notifier=None, clock=time.time, name: str = "default"):
+        self.gas = gas
+        self.name = name  # ログ用のテナント名
+        self.path = path
+        self.workers = workers
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.max_attempts = max_attempts
+        self.timeout = timeout
+        # notifier(job, data, error): 完了（data）またはデッドレター（error）時に呼ばれる
+        self.notifier = notifier
+        self._clock = clock
+
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="retry-queue")
+        self._db = None
+        self._wakeup = None
+        self._tasks = []
+        self.succeeded = 0
+        self.dead_lettered = 0
+        self.retried = 0
+
+    # ---------- SQLite（専用スレッドで実行） ----------
+
+    async def _run(self, fn, *args):
+        return await asyncio.get_running_loop().run_in_executor(self._executor, fn, *args)
+
+    def _open(self):
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        db = sqlite3.connect(self.path, check_same_thread=False)
+        db.execute("""
+            CREATE TABLE IF NOT EXISTS jobs (
+                key TEXT PRIMARY KEY,
+                payload TEXT NOT NULL,
+                notify TEXT,
+                chain TEXT,
+                status TEXT NOT NULL DEFAULT 'pending',
+                attempts INTEGER NOT NULL DEFAULT 0,
+                next_attempt REAL NOT NULL,
+                last_error TEXT,
+                created_at REAL NOT NULL,
+                updated_at REAL NOT NULL
+            )
+        """)
+        db.execute("CREATE INDEX IF NOT EXISTS jobs_due ON jobs (status, next_attempt)")
+        # 前回の実行中に停止したジョブは待機状態に戻す
+        db.execute("UPDATE jobs SET status = 'pending' WHERE status = 'running'")
+        db.commit()
+        self._db = db
+
+    def _insert(self, key, payload, notify, chain, next_attempt):
+        now = self._clock()
+        self._db.execute(
+            "INSERT OR IGNORE INTO jobs (key, payload, notify, chain, next_attempt, created_at, updated_at) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (key, json.dumps(payload, ensure_ascii=False), json.dumps(notify or {}, ensure_ascii=False),
+             chain, next_attempt, now, now),
+        )
+        self._db.commit()
+
+    def _claim_due(self):
+        """実行時刻を過ぎたジョブを1件取り出して running にする（無ければ次の実行時刻を返す）"""
+        now = self._clock()
+        row = self._db.execute(
+            f"SELECT key, payload, notify, attempts FROM jobs "
+            f"WHERE {_READY} AND next_attempt <= ? ORDER BY next_attempt, rowid LIMIT 1",
+            (now,),
+        ).fetchone()
+        if row is None:
+            nxt = self._db.execute(f"SELECT MIN(next_attempt) FROM jobs WHERE {_READY}").fetchone()[0]
+            return None, nxt
+        self._db.execute("UPDATE jobs SET status = 'running', updated_at = ? WHERE key = ?", (now, row[0]))
+        self._db.commit()
+        job = {"key": row[0], "payload": json.loads(row[1]), "notify": json.loads(row[2] or "{}"),
+               "attempts": row[3]}
+        return job, None
+
+    def _finish(self, key, status, attempts, error=None, next_attempt=None):
+        now = self._clock()
+        self._db.execute(
+            "UPDATE jobs SET status = ?, attempts = ?, last_error = ?, next_attempt = COALESCE(?, next_attempt), "
+            "updated_at = ? WHERE key = ?",
+            (status, attempts, error, next_attempt, now, key),
+        )
+        self._db.commit()
+
+    def _counts(self):
+        rows = self._db.execute("SELECT status, COUNT(*) FROM jobs GROUP BY status").fetchall()
+        return dict(rows)
+
+    # ---------- 公開API ----------
+
+    async def start(self):
+        """DBを開いてワーカーを起動する（起動済みなら何もしない）"""
+        if self._tasks:
+            return
+        if self._db is None:
+            await self._run(self._open)
+        self._wakeup = asyncio.Event()
+        self._tasks = [asyncio.ensure_future(self._worker()) for _ in range(self.workers)]
+
+    async def enqueue(self, payload: dict, notify: dict = None, chain: str = None,
+                      delay: float = None) -> str:
+        """書き込みpayloadをキューに入れる。notify は通知先（user_id / channel_id / label）"""
+        payload = with_idempotency_key(payload)
+        key = payload["idempotency_key"]
+        if delay is None:
+            delay = self._backoff(0)
+        await self._run(self._insert, key, payload, notify, chain, self._clock() + delay)
+        log.info("retry_enqueued", tenant=self.name, mode=payload.get("mode"), idempotency_key=key[:8],
+                 delay=round(delay, 1))
+        self._wake()
+        return key
+
+    def _wake(self):
+        if self._wakeup is not None:
+            self._wakeup.set()
+
+    async def close(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        if self._db is not None:
+            await self._run(self._db.close)
+            self._db = None
+        self._executor.shutdown(wait=False)
+
+    async def stats(self) -> dict:
+        counts = await self._run(self._counts) if self._db is not None else {}
+        return {
+            "pending": counts.get("pending", 0) + counts.get("running", 0),
+            "done": counts.get("done", 0),
+            "dead": counts.get("dead", 0),
+            "retried": self.retried,
+            "succeeded": self.succeeded,
+            "dead_lettered": self.dead_lettered,
+        }
+
+    # ---------- ワーカー ----------
+
+    def _backoff(self, attempts: int) -> float:
+        """ジッター付き指数バックオフ（base * 2^attempts を上限 max_delay、0.5〜1.5倍のジッター）"""
+        delay = min(self.max_delay, self.base_delay * (2 ** attempts))
+        return delay * random.uniform(0.5, 1.5)
+
+    async def _worker(self):
+        while True:
+            # 取り出しより前にクリアし、取り出し中に登録されたジョブの通知を取りこぼさない
+            self._wakeup.clear()
+            job, next_due = await self._run(self._claim_due)
+            if job is None:
+                wait = None if next_due is None else max(0.0, next_due - self._clock())
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout=wait)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+            await self._attempt(job)
+
+    async def _attempt(self, job):
+        attempts = job["attempts"] + 1
+        self.retried += 1
+        try:
+            data = await self.gas.post(job["payload"], timeout=self.timeout)
+        except GasCircuitOpen as e:
+            # GASを呼んでいないので試行回数に数えず、ブレーカーが半開になる頃に再試行する
+            delay = max(e.retry_after, 1.0) * random.uniform(1.0, 1.5)
+            await self._run(self._finish, job["key"], "pending", job["attempts"], str(e), self._clock() + delay)
+            return
+        except Exception as e:
+            error = f"{type(e).__name__}: {e}"
+            if is_retryable(e) and attempts < self.max_attempts:
+                delay = self._backoff(attempts)
+                await self._run(self._finish, job["key"], "pending", attempts, error, self._clock() + delay)
+                log.warning("retry_scheduled", tenant=self.name, mode=job["payload"].get("mode"),
+                            idempotency_key=job["key"][:8], attempts=attempts, max_attempts=self.max_attempts,
+                            delay=round(delay, 1), error=error)
+                return
+            await self._run(self._finish, job["key"], "dead", attempts, error)
+            self._wake()  # 同じ chain の後続ジョブを進める
+            self.dead_lettered += 1
+            log.error("retry_dead_lettered", tenant=self.name, mode=job["payload"].get("mode"),
+                      idempotency_key=job["key"][:8], attempts=attempts, error=error)
+            await self._notify(job, None, error)
+            return
+
+        await self._run(self._finish, job["key"], "done", attempts)
+        self._wake()
+        self.succeeded += 1
+        log.info("retry_succeeded", tenant=self.name, mode=job["payload"].get("mode"),
+                 idempotency_key=job["key"][:8], attempts=attempts)
+        await self._notify(job, data, None)
+
+    async def _notify(self, job, data, error):
+        if self.notifier is None:
+            return
+        try:
+            await self.notifier(job, data, error)
+        except Exception as e:
+            log.warning("retry_notify_failed", tenant=self.name, mode=job["payload"].get("mode"),
+                        idempotency_key=job["key"][:8], error=f"{type(e).__name__}: {e}")
@@ -0,0 +1,306 @@
+# send_scheduler.py
+# Discordへのメッセージ送信をまとめて管理する送信スケジューラ
+# 送信先のレート制限バケット（チャンネル・DM・インタラクションのfollowup）ごとに1本のワーカーが順に送り、
+# Discordの制限と同じ形（window 秒に limit 件）で数えて、429にならないペースに抑える。
+# 全体のレートは優先度付きのゲートで分け合い、コマンドへの応答を定期レポートなどの一斉送信より先に通す。
+# 同じ送信先にキューで隣り合った短いメッセージは、上限文字数に収まるなら1件にまとめて送る
+
+import asyncio
+import heapq
+import itertools
+import time
+from collections import deque
+
+import discord
+
+import metrics
+
+INTERACTIVE = 0  # コマンドへの応答（followup）
+BROADCAST = 1    # 定期レポート・リトライ結果の通知など
+PRIORITY_NAMES = {INTERACTIVE: "interactive", BROADCAST: "broadcast"}
+
+MAX_MESSAGE_LENGTH = 2000  # Discordのメッセージの上限文字数
+BROADCAST_SHARE = 0.75     # 全体の枠のうち一斉送信が使える割合（残りは応答のために空けておく）
+
+SEND_WAIT_SECONDS = metrics.histogram(
+    "discord_send_queue_wait_seconds", "送信キューに入ってから送信を始めるまでの待ち時間（秒）", ("priority",),
+    buckets=(0.001, 0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30))
+SEND_MESSAGES = metrics.counter(
+    "discord_send_messages_total", "送信スケジューラが送ったメッセージ数（結果別）", ("priority", "result"))
+SEND_MERGED = metrics.counter(
+    "discord_send_merged_total", "隣り合うメッセージを1件にまとめて減らした送信数", ("priority",))
+
+
+def channel_bucket(channel) -> str:
+    return f"channel:{channel.id}"
+
+
+def user_bucket(user) -> str:
+    return f"dm:{user.id}"
+
+
+def interaction_bucket(interaction) -> str:
+    # followup はインタラクションごとのWebhook（トークン）に送られる。トークンは鍵に使わない
+    return f"followup:{interaction.id}"
+
+
+class _WindowLimiter:
+    """直近 window 秒の送信が limit 件以下になるように待つ（Discordのレート制限バケットと同じ数え方）
+
+    トークンバケットのように平均レートで数えると、バースト直後の補充分で制限を超えることがある。
+    """
+
+    def __init__(self, limit: int, window: float, clock=time.monotonic, sleep=asyncio.sleep):
+        self.limit = max(1, int(limit))
+        self.window = window
+        self._clock = clock
+        self._sleep = sleep
+        self._sent = deque()
+        self.waits = 0
+        self.penalties = 0
+
+    def delay(self, limit: int = None) -> float:
+        """次の1件を送れるまでの秒数（0なら今送れる。limit で窓の件数をこれより少なく見ることもできる）"""
+        limit = self.limit if limit is None else limit
+        now = self._clock()
+        while self._sent and now - self._sent[0] >= self.window:
+            self._sent.popleft()
+        if len(self._sent) < limit:
+            return 0.0
+        return self.window - (now - self._sent[len(self._sent) - limit])
+
+    async def wait(self):
+        """送れるようになるまで待つ（記録はしない）"""
+        while True:
+            wait = self.delay()
+            if wait <= 0:
+                return
+            self.waits += 1
+            await self._sleep(wait)
+
+    def record(self):
+        self._sent.append(self._clock())
+
+    async def acquire(self):
+        await self.wait()
+        self.record()
+
+    def penalize(self):
+        """429を受けたとき: 今から1窓分は送らない"""
+        self.penalties += 1
+        self._sent = deque([self._clock()] * self.limit)
+
+    @property
+    def idle(self) -> bool:
+        """窓の中に送信記録が残っていない"""
+        self.delay()
+        return not self._sent
+
+
+class _PriorityGate:
+    """全バケット共通の送信レート。空いた枠は優先度の高い待ちから順に渡す
+
+    一斉送信は窓の BROADCAST_SHARE までしか使わないので、一斉送信の最中に来た応答もすぐに通る。
+    """
+
+    def __init__(self, limit: int, window: float = 1.0, clock=time.monotonic):
+        self.limiter = _WindowLimiter(limit, window, clock=clock)
+        self.broadcast_limit = max(1, int(self.limiter.limit * BROADCAST_SHARE))
+        self._waiters = []  # (priority, seq, future) の最小ヒープ
+        self._seq = itertools.count()
+        self._pump = None
+        self._wakeup = None  # 一斉送信のために待っている間に応答が来たら起こす
+
+    async def acquire(self, priority: int):
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._waiters, (priority, next(self._seq), future))
+        if self._pump is None or self._pump.done():
+            self._pump = asyncio.create_task(self._run())
+        elif priority <= INTERACTIVE and self._wakeup is not None and not self._wakeup.done():
+            self._wakeup.set_result(None)
+        await future
+
+    async def _run(self):
+        while self._waiters:
+            priority, _, future = self._waiters[0]
+            if future.done():  # キャンセルされた待ちは飛ばす
+                heapq.heappop(self._waiters)
+                continue
+            wait = self.limiter.delay(None if priority <= INTERACTIVE else self.broadcast_limit)
+            if wait > 0:
+                self._wakeup = asyncio.get_running_loop().create_future()
+                await asyncio.wait({self._wakeup}, timeout=wait)
+                self._wakeup = None
+                continue
+            heapq.heappop(self._waiters)
+            self.limiter.record()
+            future.set_result(None)
+
+    def close(self):
+        if self._pump is not None:
+            self._pump.cancel()
+
+
+class _Send:
+    __slots__ = ("priority", "seq", "send", "content", "enqueued", "future")
+
+    def __init__(self, priority, seq, send, content, enqueued, future):
+        self.priority = priority
+        self.seq = seq
+        self.send = send
+        self.content = content
+        self.enqueued = enqueued
+        self.future = future
+
+    def __lt__(self, other):
+        return (self.priority, self.seq) < (other.priority, other.seq)
+
+
+class SendScheduler:
+    """送信先のバケットごとにキューを持ち、レート制限を守って送る
+
+    send(bucket, send, content) の send は content を受け取って送信するコルーチン関数
+    （interaction.followup.send・channel.send など）。
+    同じ send で同じ優先度のメッセージがキューで隣り合っていれば、改行でつないで
+    max_length 文字以内の1件にまとめる（コードブロックは各メッセージで閉じているのでそのままつなげる）。
+    """
+
+    def __init__(self, limit: int = 5, window: float = 5.0, global_limit: int = 40, global_window: float = 1.0,
+                 max_length: int = MAX_MESSAGE_LENGTH, clock=time.monotonic, sleep=asyncio.sleep):
+        self.limit = limit
+        self.window = window
+        self.max_length = max_length
+        self._clock = clock
+        self._sleep = sleep
+        self._gate = _PriorityGate(global_limit, global_window, clock=clock)
+        self._queues = {}   # バケット -> _Send の最小ヒープ
+        self._limiters = {}  # バケット -> _WindowLimiter
+        self._workers = {}  # バケット -> ワーカータスク
+        self._seq = itertools.count()
+        self.sent = 0
+        self.merged = 0
+        self.failed = 0
+        self.throttled = 0  # 送信先の制限で待った回数
+
+    async def send(self, bucket: str, send, content: str, priority: int = INTERACTIVE):
+        """1件送り、送信結果（discord.Message など）を返す（まとめて送られたときは同じ結果）"""
+        return (await self.send_all(bucket, send, [content], priority))[0]
+
+    async def send_all(self, bucket: str, send, contents, priority: int = INTERACTIVE) -> list:
+        """複数のメッセージをこの順に送る（隣り合うものは上限内でまとめる）"""
+        loop = asyncio.get_running_loop()
+        queue = self._queues.setdefault(bucket, [])
+        items = []
+        for content in contents:
+            item = _Send(priority, next(self._seq), send, content, self._clock(), loop.create_future())
+            heapq.heappush(queue, item)
+            items.append(item)
+        worker = self._workers.get(bucket)
+        if worker is None or worker.done():
+            self._workers[bucket] = asyncio.create_task(self._work(bucket))
+        return list(await asyncio.gather(*(item.future for item in items)))
+
+    def _take(self, queue) -> list:
+        """先頭のメッセージと、それに続けてまとめられるメッセージを取り出す"""
+        batch = [heapq.heappop(queue)]
+        size = len(batch[0].content)
+        while queue:
+            nxt = queue[0]
+            if (nxt.send != batch[0].send or nxt.priority != batch[0].priority
+                    or size + 1 + len(nxt.content) > self.max_length):
+                break
+            batch.append(heapq.heappop(queue))
+            size += 1 + len(nxt.content)
+        return batch
+
+    async def _work(self, bucket: str):
+        queue = self._queues[bucket]
+        limiter = self._limiters.get(bucket)
+        if limiter is None:
+            limiter = self._limiters[bucket] = _WindowLimiter(self.limit, self.window, self._clock, self._sleep)
+        try:
+            while queue:
+                if limiter.delay() > 0:
+                    self.throttled += 1
+                # 送信先の窓が空くまで待ってから全体の枠を取り、実際に送る直前に送信先の記録を付ける
+                # （全体の枠を待っている間の分だけ、送信先の記録が実際の送信より早くならないように）
+                await limiter.wait()
+                await self._gate.acquire(queue[0].priority)
+                batch = [item for item in self._take(queue) if not item.future.done()]
+                if not batch:
+                    continue
+                limiter.record()
+                await self._deliver(batch, limiter)
+        finally:
+            if self._workers.get(bucket) is asyncio.current_task():
+                del self._workers[bucket]
+            if not queue and self._queues.get(bucket) is queue:
+                del self._queues[bucket]
+                # 空になったバケットの送信記録は、窓が過ぎたら捨てる
+                asyncio.get_running_loop().call_later(self.window + 0.1, self._forget, bucket)
+
+    def _forget(self, bucket: str):
+        limiter = self._limiters.get(bucket)
+        if bucket not in self._queues and limiter is not None and limiter.idle:
+            del self._limiters[bucket]
+
+    async def _deliver(self, batch, limiter):
+        head = batch[0]
+        priority = PRIORITY_NAMES.get(head.priority, str(head.priority))
+        now = self._clock()
+        for item in batch:
+            SEND_WAIT_SECONDS.observe(now - item.enqueued, priority=priority)
+        content = "\n".join(item.content for item in batch)
+        try:
+            result = await head.send(content)
+        except asyncio.CancelledError:
+            for item in batch:
+                item.future.cancel()
+            raise
+        except Exception as e:
+            if isinstance(e, discord.RateLimited) or getattr(e, "status", None) == 429:
+                limiter.penalize()
+            self.failed += 1
+            SEND_MESSAGES.inc(priority=priority, result="error")
+            for item in batch:
+                if not item.future.done():
+                    item.future.set_exception(e)
+            return
+        self.sent += 1
+        SEND_MESSAGES.inc(priority=priority, result="ok")
+        if len(batch) > 1:
+            self.merged += len(batch) - 1
+            SEND_MERGED.inc(len(batch) - 1, priority=priority)
+        for item in batch:
+            if not item.future.done():
+                item.future.set_result(result)
+
+    def depth(self) -> dict:
+        """優先度ごとの送信待ちの件数"""
+        depths = {name: 0 for name in PRIORITY_NAMES.values()}
+        for queue in self._queues.values():
+            for item in queue:
+                name = PRIORITY_NAMES.get(item.priority, str(item.priority))
+                depths[name] = depths.get(name, 0) + 1
+        return depths
+
+    def stats(self) -> dict:
+        return {
+            "depth": self.depth(),
+            "buckets": len(self._queues),
+            "throttled": self.throttled,
+            "sent": self.sent,
+            "merged": self.merged,
+            "failed": self.failed,
+        }
+
+    async def close(self):
+        """ワーカーを止め、送れなかったメッセージの待ちをキャンセルする"""
+        self._gate.close()
+        for worker in self._workers.values():
+            worker.cancel()
+        for queue in self._queues.values():
+            for item in queue:
+                item.future.cancel()
+        self._workers.clear()
+        self._queues.clear()
@@ -0,0 +1,126 @@
+# sharding.py
+# ゲートウェイのシャード設定と、シャードごとの統計
+# ギルド数が数千を超えたら AutoShardedBot で接続を分け、さらに複数プロセスに
+# シャードの範囲を割り振る。定期処理はテナントを担当する1プロセスだけが実行する
+
+import time
+from collections import defaultdict
+
+
+class ShardConfigError(ValueError):
+    """SHARD_COUNT / SHARD_IDS の指定が不正"""
+
+
+def parse_shard_ids(value: str) -> list:
+    """"0-3" や "0,2,4-5" をシャード番号のリストにする"""
+    ids = set()
+    for part in value.replace(" ", "").split(","):
+        if not part:
+            continue
+        try:
+            if "-" in part:
+                first, last = (int(x) for x in part.split("-", 1))
+                if first > last:
+                    raise ShardConfigError(f"シャード範囲の指定が逆です: {part}")
+                ids.update(range(first, last + 1))
+            else:
+                ids.add(int(part))
+        except ValueError as e:
+            raise ShardConfigError(f"シャード番号は数値・範囲（0-3）で指定してください: {part}") from e
+    return sorted(ids)
+
+
+def bot_options(shard_count: str = None, shard_ids: str = None):
+    """環境変数の値から AutoShardedBot に渡す引数を作る（シャーディングしないならNone）
+
+    shard_count: "auto"（Discordの推奨数）または総シャード数
+    shard_ids:   このプロセスが担当するシャード（省略時は全シャード）
+    """
+    if not shard_count and not shard_ids:
+        return None
+    options = {}
+    if shard_count and shard_count != "auto":
+        try:
+            options["shard_count"] = int(shard_count)
+        except ValueError as e:
+            raise ShardConfigError(f"SHARD_COUNT は auto または数値で指定してください: {shard_count}") from e
+        if options["shard_count"] < 1:
+            raise ShardConfigError("SHARD_COUNT は1以上にしてください")
+    if shard_ids:
+        if "shard_count" not in options:
+            # 他のプロセスと番号を揃えるため、範囲を指定するなら総数も必要
+            raise ShardConfigError("SHARD_IDS を指定する場合は SHARD_COUNT に総シャード数を指定してください")
+        ids = parse_shard_ids(shard_ids)
+        if not ids or ids[-1] >= options["shard_count"]:
+            raise ShardConfigError(f"SHARD_IDS は 0〜{options['shard_count'] - 1} の範囲で指定してください")
+        options["shard_ids"] = ids
+    return options
+
+
+def shard_for_guild(guild_id: int, shard_count: int) -> int:
+    """ギルドが接続されるシャード番号（Discordの割り当て式）"""
+    return (guild_id >> 22) % shard_count
+
+
+def owner_shard(tenant, shard_count: int) -> int:
+    """テナントの定期処理を担当するシャード
+
+    ギルドがあれば最小のギルドIDのシャード（複数プロセスに分かれていても1つに決まる）、
+    ユーザーだけのテナント・default はDMを受けるシャード0。
+    """
+    if tenant.guild_ids:
+        return shard_for_guild(min(tenant.guild_ids), shard_count)
+    return 0
+
+
+def owns(tenant, shard_count: int, local_shards) -> bool:
+    """このプロセスがテナントの定期レポートを送るか（local_shards=None は全シャード担当）"""
+    return local_shards is None or owner_shard(tenant, shard_count) in local_shards
+
+
+def serves(tenant, shard_count: int, local_shards) -> bool:
+    """このプロセスにテナントのコマンドが届きうるか（ミラー同期の対象にする）"""
+    if local_shards is None or tenant.default or not tenant.guild_ids:
+        return True
+    return any(shard_for_guild(g, shard_count) in local_shards for g in tenant.guild_ids)
+
+
+class ShardStats:
+    """シャードごとのインタラクション件数と直近 window 秒の到着レート
+
+    1秒単位のリングバッファで数えるので、記録は O(1)、レートの計算は O(window)。
+    """
+
+    def __init__(self, window: int = 60, clock=time.monotonic):
+        self.window = window
+        self._clock = clock
+        self.totals = defaultdict(int)
+        self.connects = defaultdict(int)
+        self.disconnects = defaultdict(int)
+        self._buckets = {}  # shard_id -> [秒ごとの件数], [そのバケットの秒]
+
+    def record(self, shard_id: int):
+        now = int(self._clock())
+        self.totals[shard_id] += 1
+        ring = self._buckets.get(shard_id)
+        if ring is None:
+            ring = self._buckets[shard_id] = ([0] * self.window, [-1] * self.window)
+        counts, seconds = ring
+        i = now % self.window
+        if seconds[i] != now:
+            seconds[i] = now
+            counts[i] = 0
+        counts[i] += 1
+
+    def rate(self, shard_id: int) -> float:
+        """直近 window 秒の平均（件/秒）"""
+        ring = self._buckets.get(shard_id)
+        if ring is None:
+            return 0.0
+        now = int(self._clock())
+        counts, seconds = ring
+        recent = sum(c for c, s in zip(counts, seconds) if now - s < self.window)
+        return recent / self.window
+
+    def shard_ids(self) -> list:
+        return sorted(set(self.totals) | set(self.connects))
@@ -0,0 +1,152 @@
+# slot_finder.py
+# 空き時間検索エンジン（GASの findNextAvailableSlot_ / planFromRaw_ の配置部分に相当）
+# 既存予定を「終了+GAP」まで広げた区間としてマージ・ソートし、二分探索で次の空きを探す
+# GAS版は候補ごとに全イベントを走査するため、予定が多い週では O(試行回数 × イベント数) になる
+
+from bisect import bisect_right
+from datetime import datetime, timedelta
+
+# GASの SETTINGS と同じ値
+WORK_START = (8, 0)       # 勤務開始時刻
+WORK_END = (21, 0)        # 勤務終了時刻
+GAP = timedelta(minutes=5)  # タスク間の最小間隔
+LOOKAHEAD_DAYS = 30       # 先読み日数
+MAX_SEARCH_DAYS = 14      # 最大検索日数
+
+
+class NoSlotError(Exception):
+    """MAX_SEARCH_DAYS 日先まで探しても空き時間が無い"""
+
+
+def at(day: datetime, hhmm) -> datetime:
+    """day の日付で指定時刻の datetime を作る（GASの dateAt_ に相当）"""
+    return datetime(day.year, day.month, day.day, hhmm[0], hhmm[1])
+
+
+class BusyIndex:
+    """既存予定のマージ済み区間インデックス
+
+    区間は [開始, 終了 + GAP) として保持する（直後のタスクとの間隔を確保するため）。
+    重なる・接する区間はまとめてあるので、区間同士は必ず離れている。
+    """
+
+    def __init__(self, events=(), gap: timedelta = GAP):
+        intervals = sorted((start, end + gap) for start, end in events if end > start)
+        merged = []
+        for start, end in intervals:
+            if merged and start <= merged[-1][1]:
+                if end > merged[-1][1]:
+                    merged[-1][1] = end
+            else:
+                merged.append([start, end])
+        self._starts = [start for start, _ in merged]
+        self._ends = [end for _, end in merged]
+
+    def __len__(self):
+        return len(self._starts)
+
+    def is_free(self, start: datetime, end: datetime) -> bool:
+        i = bisect_right(self._ends, start)
+        return i >= len(self._starts) or self._starts[i] >= end
+
+    def scan(self, cursor: datetime, length: timedelta, day_end: datetime):
+        """cursor 以降で length 分空いている最初の時刻を探す
+
+        戻り値: (開始時刻, 営業時間内に収まったか)
+        収まらない場合の開始時刻は、GASが営業時間外に強制配置するときと同じ位置になる。
+        """
+        start = cursor
+        starts, ends = self._starts, self._ends
+        i = bisect_right(ends, start)
+        while True:
+            if start + length > day_end:
+                return start, False
+            if i >= len(starts) or starts[i] >= start + length:
+                return start, True
+            # 重なった区間の終わり（GAP込み）まで進める。マージ済みなので次の区間はその先
+            start = max(start, ends[i])
+            i += 1
+
+
+def find_next_slot(index: BusyIndex, cursor: datetime, day_end: datetime, minutes: int,
+                   allow_overflow: bool = True, max_days: int = MAX_SEARCH_DAYS) -> dict:
+    """次の空き時間を返す（GASの findNextAvailableSlot_ に相当）
+
+    allow_overflow=False（日付指定タスク）では翌日に送らず、営業時間外に強制配置する。
+    戻り値: {"start", "end", "cursor"(次の検索開始), "dayEnd"}
+    """
+    length = timedelta(minutes=minutes)
+    current, current_day_end = cursor, day_end
+    for _ in range(max_days):
+        start, fits = index.scan(current, length, current_day_end)
+        if fits:
+            return {"start": start, "end": start + length, "cursor": start + length + GAP,
+                    "dayEnd": current_day_end}
+        if not allow_overflow:
+            end = start + length
+            return {"start": start, "end": end, "cursor": end + GAP, "dayEnd": end}
+        # 翌日の営業開始時刻に移動
+        next_day = datetime(current.year, current.month, current.day) + timedelta(days=1)
+        current, current_day_end = at(next_day, WORK_START), at(next_day, WORK_END)
+    raise NoSlotError(f"{minutes / 60:.1f}時間の空き時間が見つかりません（{max_days}日先まで検索済み）")
+
+
+def plan_tasks(tasks: list, busy_events, now: datetime) -> list:
+    """解析済みタスクを空き時間に配置する（GASの planFromRaw_ の配置部分に相当）
+
+    tasks は task_parser.parse_text() の tasks。busy_events は (開始, 終了) の列（終日予定は除く）。
+    戻り値は入力と同じ順ではなく、GASと同じく日付指定→日付なし、各グループ内は優先度順。
+    """
+    index = BusyIndex(busy_events)
+
+    cursor = max(now, at(now, WORK_START))
+    day_end = at(now, WORK_END)
+    if now > day_end:
+        tomorrow = datetime(now.year, now.month, now.day) + timedelta(days=1)
+        cursor, day_end = at(tomorrow, WORK_START), at(tomorrow, WORK_END)
+
+    by_date, no_date = {}, []
+    for task in tasks:
+        if task["dayAnchor"]:
+            by_date.setdefault(task["dayAnchor"].date(), []).append(task)
+        else:
+            no_date.append(task)
+
+    def priority_key(task):
+        return (task["rank"], task["order"])
+
+    planned = []
+    for day, day_tasks in by_date.items():
+        day_tasks.sort(key=priority_key)
+        anchor = day_tasks[0]["dayAnchor"]
+        day_cursor, day_end_time = at(anchor, WORK_START), at(anchor, WORK_END)
+        if day == now.date() and now > day_cursor:
+            day_cursor = now
+        for task in day_tasks:
+            try:
+                slot = find_next_slot(index, day_cursor, day_end_time, task["minutes"], allow_overflow=False)
+                start, end, day_cursor = slot["start"], slot["end"], slot["cursor"]
+            except NoSlotError:
+                start = day_cursor
+                end = start + timedelta(minutes=task["minutes"])
+                day_cursor = end + GAP
+            planned.append(dict(task, start=start, end=end))
+
+    no_date.sort(key=priority_key)
+    for task in no_date:
+        if task["fixedStart"]:
+            start = task["fixedStart"]
+            end = start + timedelta(minutes=task["minutes"])
+            cursor = end + GAP
+            day_end = at(cursor, WORK_END)
+        else:
+            try:
+                slot = find_next_slot(index, cursor, day_end, task["minutes"])
+                start, end, cursor, day_end = slot["start"], slot["end"], slot["cursor"], slot["dayEnd"]
+            except NoSlotError:
+                start = cursor
+                end = start + timedelta(minutes=task["minutes"])
+                cursor = end + GAP
+        planned.append(dict(task, start=start, end=end))
+
+    return planned
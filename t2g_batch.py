@@ -0,0 +1,66 @@
+# t2g_batch.py
+# /t2g の大量入力をバッチに分けてGASへ順番に送る
+# 1回のGAS実行（30秒制限）に収まる量ずつ作成し、途中で失敗しても作成済み分を正確に返す
+
+import asyncio
+
+import aiohttp
+
+from gas_client import GasError, GasTimeout
+from retry_queue import is_retryable, with_idempotency_key
+from task_parser import split_lines
+
+
+def split_batches(text: str, batch_size: int) -> list:
+    """入力をタスク単位の行に分け、batch_size 行ずつのバッチにする
+
+    1行に複数タスクを並べた貼り付けもタスクごとに分離してからバッチにする。
+    """
+    lines = split_lines(text)
+    return [lines[i:i + batch_size] for i in range(0, len(lines), batch_size)]
+
+
+async def run_batches(gas, batches: list, on_progress=None, timeout: float = 30) -> dict:
+    """バッチを順番に create し、結果をまとめて返す
+
+    前のバッチで作成した予定を次のバッチの空き時間検索に反映させるため、並列ではなく順番に送る。
+    通信エラー（タイムアウト・HTTPエラー）が起きたら残りのバッチは送らない。
+    各バッチには冪等キーを付けるので、結果不明のバッチは同じ payload で安全に再送できる。
+
+    戻り値:
+        created: 作成されたイベント（全バッチ分）
+        failed:  GASがエラーを返したバッチ [{"lines", "error", "payload", "retryable"}]
+        unknown: タイムアウト等で作成されたか不明なバッチ [{"lines", "error", "payload", "retryable"}]
+        unsent:  送信しなかった行
+    """
+    total_lines = sum(len(batch) for batch in batches)
+    result = {"created": [], "failed": [], "unknown": [], "unsent": []}
+    done_lines = 0
+
+    for index, batch in enumerate(batches):
+        payload = with_idempotency_key({"mode": "create", "text": "\n".join(batch)})
+        try:
+            resp = await gas.post(payload, timeout=timeout)
+        except (GasError, asyncio.TimeoutError, aiohttp.ClientError) as e:
+            # タイムアウト・切断はGAS側で作成が進んでいる可能性があるため「不明」として扱う
+            entry = {"lines": batch, "error": str(e) or type(e).__name__,
+                     "payload": payload, "retryable": is_retryable(e)}
+            if isinstance(e, (GasTimeout, asyncio.TimeoutError, aiohttp.ClientError)):
+                result["unknown"].append(entry)
+            else:
+                result["failed"].append(entry)
+            for rest in batches[index + 1:]:
+                result["unsent"].extend(rest)
+            break
+
+        if resp.get("ok"):
+            result["created"].extend(resp.get("created", []))
+        else:
+            result["failed"].append({"lines": batch, "error": resp.get("error", "Unknown error"),
+                                     "payload": payload, "retryable": False})
+
+        done_lines += len(batch)
+        if on_progress is not None:
+            await on_progress(done_lines, total_lines, len(result["created"]))
+
+    return result
@@ -0,0 +1,174 @@
+# task_index.py
+# /done・/undone・/must_one 用のタスク名インデックス
+# カレンダーミラーの今日〜数日先のイベントからトライグラムの転置インデックスを作り、
+# 入力途中の文字列からオートコンプリートの候補を返す。候補の値はイベントキー
+# （exportEventsSince_ の "イベントID@開始時刻ms"）なので、GASは今日の予定を走査せずに更新できる
+
+import unicodedata
+from datetime import datetime, timedelta
+
+from calendar_store import JST
+
+MARKS = "✓☆★"
+_MARK_TABLE = str.maketrans("", "", MARKS)
+
+
+def normalize(text: str) -> str:
+    """比較用に全角半角・大文字小文字・✓☆★・空白の違いを無くす"""
+    text = unicodedata.normalize("NFKC", text or "").lower().translate(_MARK_TABLE)
+    return " ".join(text.split())
+
+
+def trigrams(text: str) -> set:
+    """前後を空白で埋めたトライグラム（2文字の入力や語頭の一致も拾えるようにする）"""
+    padded = f"  {text} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def strip_done(title: str) -> str:
+    """タイトル末尾の完了マーク ✓ を外す（GASの unmarkTaskAsComplete_ と同じ）"""
+    return title.replace("✓", "", 1).strip() if "✓" in title else title
+
+
+def key_start(key: str, tz=JST):
+    """イベントキーの開始時刻（tz（既定はJST）・オフセット無し）。キーでなければNone"""
+    _, sep, millis = (key or "").rpartition("@")
+    if not sep or not millis.isdigit():
+        return None
+    return datetime.fromtimestamp(int(millis) / 1000, tz).replace(tzinfo=None)
+
+
+class TaskIndex:
+    """今日から days 日先までのタスク名のトライグラムインデックス
+
+    ミラーが同期されるたびに作り直し（refresh）、書き込み成功時は✓・☆だけその場で反映する。
+    """
+
+    def __init__(self, days: int = 7, min_similarity: float = 0.3):
+        self.days = days
+        self.min_similarity = min_similarity
+        self._entries = {}    # key -> entry
+        self._order = []      # 開始時刻順のキー
+        self._grams = {}      # trigram -> {key}
+        self.date = None
+        self._source_version = None
+        self.rebuilds = 0
+        self.lookups = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    # ---------- 構築 ----------
+
+    def refresh(self, mirror, now: datetime) -> bool:
+        """ミラーが前回から同期されていれば作り直す（ミラーが使えなければ空にする）"""
+        version = (mirror.syncs, now.date())
+        if version == self._source_version:
+            return False
+        start = datetime(now.year, now.month, now.day)
+        end = start + timedelta(days=self.days, hours=23, minutes=59, seconds=59)
+        events = mirror.events_between(start, end) if mirror.covers(start, end, allow_stale=True) else []
+        self.rebuild(events, now)
+        self._source_version = version
+        return True
+
+    def rebuild(self, events, now: datetime):
+        """ミラーのイベント（key・title・_start・allDay）から作り直す"""
+        self._entries.clear()
+        self._grams.clear()
+        self.date = now.date()
+        for ev in events:
+            if ev.get("allDay") or "key" not in ev:
+                continue
+            self._add(ev["key"], ev["title"], ev["_start"])
+        self._order = sorted(self._entries, key=lambda k: self._entries[k]["start"])
+        self.rebuilds += 1
+
+    def _add(self, key, title, start):
+        norm = normalize(title)
+        entry = {"key": key, "title": title, "start": start, "norm": norm, "grams": trigrams(norm)}
+        self._entries[key] = entry
+        for gram in entry["grams"]:
+            self._grams.setdefault(gram, set()).add(key)
+
+    # ---------- 検索 ----------
+
+    def get(self, key: str):
+        return self._entries.get(key)
+
+    def _matches(self, entry, done, today_only):
+        if done is not None and ("✓" in entry["title"]) != done:
+            return False
+        return not today_only or entry["start"].date() == self.date
+
+    def search(self, query: str, done: bool = None, limit: int = 25, today_only: bool = False) -> list:
+        """入力途中の文字列に近いタスク（前方一致 > 部分一致 > トライグラムの類似度、同順位は今日・開始順）"""
+        self.lookups += 1
+        q = normalize(query)
+        if not q:
+            keys = [k for k in self._order if self._matches(self._entries[k], done, today_only)]
+            return [self._entries[k] for k in keys[:limit]]
+
+        # 入力途中なので語末の埋め字を含むトライグラムは数えない
+        q_grams = {g for g in trigrams(q) if not g.endswith(" ")}
+        shared = {}
+        for gram in q_grams:
+            for key in self._grams.get(gram, ()):
+                shared[key] = shared.get(key, 0) + 1
+        if len(q) < 3:
+            # 2文字以下は語中のトライグラムが作れないので、部分一致も拾う
+            for key, entry in self._entries.items():
+                if q in entry["norm"]:
+                    shared.setdefault(key, 0)
+
+        scored = []
+        for key, count in shared.items():
+            entry = self._entries[key]
+            if not self._matches(entry, done, today_only):
+                continue
+            if entry["norm"].startswith(q):
+                score = 3.0
+            elif q in entry["norm"]:
+                score = 2.0
+            else:
+                score = count / len(q_grams)
+                if score < self.min_similarity:
+                    continue
+            scored.append((-score, entry["start"].date() != self.date, entry["start"], key))
+        scored.sort()
+        return [self._entries[key] for *_, key in scored[:limit]]
+
+    def resolve(self, text: str, done: bool):
+        """GASと同じ規則（今日の予定を開始順に見て最初の部分一致）でイベントを決める"""
+        for key in self._order:
+            entry = self._entries[key]
+            if self._matches(entry, done, today_only=True) and text in entry["title"]:
+                return entry
+        return None
+
+    # ---------- 書き込みの反映 ----------
+
+    def apply_write(self, mode: str, payload: dict, data: dict):
+        """GasClient の書き込みリスナー: キー指定の更新なら✓・☆を次の同期を待たずに反映する"""
+        entry = self._entries.get(payload.get("event_key"))
+        if entry is None:
+            return
+        if mode == "mark_complete" and "✓" not in entry["title"]:
+            entry["title"] += " ✓"
+        elif mode == "unmark_complete":
+            entry["title"] = strip_done(entry["title"])
+        elif mode == "set_must_one":
+            for other in self._entries.values():
+                if "☆" in other["title"]:
+                    other["title"] = other["title"].replace("☆", "").strip()
+            entry["title"] = "☆ " + entry["title"]
+
+    def label(self, entry) -> str:
+        """オートコンプリートの表示名（100文字まで）"""
+        start = entry["start"]
+        day = "" if start.date() == self.date else start.strftime("%m/%d ")
+        return f"{day}{start.strftime('%H:%M')} {entry['title']}"[:100]
+
+    def stats(self) -> dict:
+        return {"entries": len(self._entries), "grams": len(self._grams),
+                "rebuilds": self.rebuilds, "lookups": self.lookups}
@@ -0,0 +1,265 @@
+# task_parser.py
+# /t2g の入力テキストの解析（GASの parseLine_ / splitMultipleTasks_ などのPython移植）
+# GASに送る前にBot側で入力を検証・プレビューするために使う
+#
+# GAS側と同じ解釈になるよう、正規表現と置換の順序は .gs の実装に合わせている。
+# JavaScriptの \b はASCII単語境界なので、_B で同じ挙動を再現している（「時間」「分」の直後など）。
+
+import math
+import re
+from datetime import datetime, timedelta
+
+from calendar_store import now_jst
+
+PRIORITY_ORDER = {"A": 1, "B": 2, "C": 3}
+
+# JavaScript（uフラグ無し）の \b と同じASCII単語境界
+_W = r"[A-Za-z0-9_]"
+_B = rf"(?:(?<={_W})(?!{_W})|(?<!{_W})(?={_W}))"
+
+_HOUR_UNITS = r"(?:h|hr|hrs|hour|hours|時間)"
+_MIN_UNITS = r"(?:m|min|mins|minute|minutes|分)"
+_ANY_UNIT = r"(h|hr|hrs|hour|hours|時間|m|min|mins|minute|minutes|分)"
+
+_TASK_PATTERN = re.compile(
+    r"(.+?)\s+([0-9]+(?:\.[0-9]+)?)\s*(?:h|hr|hrs|hour|hours|時間|m|min|mins|minute|minutes|分)\s*([ABC]?)\s*",
+    re.I,
+)
+_UNIT_IN_MATCH = re.compile(_ANY_UNIT, re.I)
+_DATE_PREFIX = re.compile(r"^([0-9]{6})\s*")
+_CLEAN_NAME = re.compile(r"\s+[ABC]\s*$")
+
+_HOURS = re.compile(rf"([0-9]+(?:\.[0-9]+)?)\s*{_HOUR_UNITS}{_B}", re.I)
+_MINUTES = re.compile(rf"([0-9]+)\s*{_MIN_UNITS}{_B}", re.I)
+_RANGE = re.compile(r"([0-9]{1,2})[:：]([0-9]{2})-([0-9]{1,2})[:：]([0-9]{2})")
+_DATE_TOKEN = re.compile(
+    r"@?([0-9]{6}|[0-9]{4}-[0-9]{2}-[0-9]{2}|[0-9]{1,2}/[0-9]{1,2}|今日|明日|明後日|月|火|水|木|金|土|日)"
+)
+_TIME_PLAIN = re.compile(r"(?:^|\s)([0-9]{1,2})[:：]([0-9]{2})(?:-[0-9]{1,2}[:：][0-9]{2})?(?:\s|$)")
+_TIME_PLAIN_STRIP = re.compile(r"(?:^|\s)[0-9]{1,2}[:：][0-9]{2}(?:-[0-9]{1,2}[:：][0-9]{2})?")
+_TIME_AT = re.compile(r"@(午前|午後)?\s?([0-9]{1,2})(?:[:：]([0-9]{2}))?時?|@([0-9]{1,2}):([0-9]{2})")
+_TIME_AT_STRIP = re.compile(r"@(午前|午後)?\s?[0-9]{1,2}(?:[:：][0-9]{2})?時?")
+_TIME_AT_STRIP2 = re.compile(r"@[0-9]{1,2}:[0-9]{2}")
+_STARS = re.compile(r"★{1,3}")
+_STARS_STRIP = re.compile(r"★{1,3}\s*")
+_TAG_MID = re.compile(r"(?:^|\s)([ABCａｂｃ])\s", re.I)
+_TAG_END = re.compile(r"(?:^|\s)([ABCａｂｃ])\s*$", re.I)
+_TAG_STRIP = re.compile(r"(?:^|\s)[ABCａｂｃ]\s*", re.I)
+_TAG_STRIP_END = re.compile(r"\s[ABCａｂｃ]\s*$", re.I)
+_AT_WORD = re.compile(r"@\S+")
+_LEADING_DATE = re.compile(r"^[0-9]{6}\s*")
+_SPACES = re.compile(r"\s{2,}")
+_STRIKE = re.compile(r"^~~.*~~$")
+
+# JavaScriptの Date.getDay() と同じ曜日番号（日曜=0）
+_WEEKDAYS = {"日": 0, "月": 1, "火": 2, "水": 3, "木": 4, "金": 5, "土": 6}
+
+
+def _js_round(value: float) -> int:
+    """JavaScriptの Math.round（.5は切り上げ）"""
+    return math.floor(value + 0.5)
+
+
+def _js_date(year: int, month0: int, day: int) -> datetime:
+    """new Date(year, month0, day) と同じく、範囲外の月日を繰り越して日付を作る"""
+    year += month0 // 12
+    month0 %= 12
+    return datetime(year, month0 + 1, 1) + timedelta(days=day - 1)
+
+
+def _today(now: datetime) -> datetime:
+    return datetime(now.year, now.month, now.day)
+
+
+def extract_date_prefix(line: str):
+    """行頭の日付プレフィックス（例: 251030）を分離する"""
+    m = _DATE_PREFIX.match(line)
+    if m:
+        return m.group(1) + " ", line[m.end():]
+    return "", line
+
+
+def clean_task_name(task_name: str) -> str:
+    return _CLEAN_NAME.sub("", task_name, count=1).strip()
+
+
+def extract_tasks_from_line(line: str) -> list:
+    """「タスク名 時間 優先度」の並びを1件ずつ取り出す"""
+    tasks = []
+    for m in _TASK_PATTERN.finditer(line):
+        time_value = m.group(2)
+        time_unit = _UNIT_IN_MATCH.search(m.group(0)).group(0)
+        priority = m.group(3) or "C"
+        task_name = clean_task_name(m.group(1).strip())
+        tasks.append({
+            "taskName": task_name,
+            "timeString": f"{time_value}{time_unit}",
+            "priority": priority,
+            "fullTask": f"{task_name} {time_value}{time_unit} {priority}".strip(),
+        })
+    return tasks
+
+
+def split_multiple_tasks(line: str) -> list:
+    """1行に複数のタスクが含まれていれば分離する（日付プレフィックスは各タスクに付け直す）"""
+    date_prefix, remaining = extract_date_prefix(line)
+    tasks = extract_tasks_from_line(remaining)
+    if not tasks:
+        return [date_prefix + remaining]
+    return [date_prefix + task["fullTask"] for task in tasks]
+
+
+def split_lines(raw: str) -> list:
+    """改行で分け、さらに1行内の複数タスクを分離した行リストを返す"""
+    lines = [line.strip() for line in re.split(r"\r?\n", raw) if line.strip()]
+    expanded = []
+    for line in lines:
+        expanded.extend(split_multiple_tasks(line))
+    return expanded
+
+
+def parse_date_token(token: str, now: datetime) -> datetime:
+    today = _today(now)
+    if token == "今日":
+        return today
+    if token == "明日":
+        return today + timedelta(days=1)
+    if token == "明後日":
+        return today + timedelta(days=2)
+    if token in _WEEKDAYS:
+        current = (now.weekday() + 1) % 7
+        delta = (_WEEKDAYS[token] - current + 7) % 7 or 7
+        return today + timedelta(days=delta)
+    if re.fullmatch(r"[0-9]{4}-[0-9]{2}-[0-9]{2}", token):
+        y, m, d = (int(x) for x in token.split("-"))
+        return _js_date(y, m - 1, d)
+    if re.fullmatch(r"[0-9]{1,2}/[0-9]{1,2}", token):
+        m, d = (int(x) for x in token.split("/"))
+        return _js_date(now.year, m - 1, d)
+    if re.fullmatch(r"[0-9]{6}", token):
+        # YYMMDD形式 (例: 251030 → 2025-10-30)
+        return _js_date(2000 + int(token[:2]), int(token[2:4]) - 1, int(token[4:6]))
+    return today
+
+
+def parse_line(line: str, now: datetime = None):
+    """1タスク分の行を解析する（期間が無い・無効ならNone）
+
+    戻り値: {"title", "minutes", "dayAnchor", "fixedStart", "priority"}
+    """
+    now = now or now_jst()
+
+    minutes = None
+    hr = _HOURS.search(line)
+    mn = _MINUTES.search(line)
+    if hr:
+        minutes = _js_round(float(hr.group(1)) * 60)
+    elif mn:
+        minutes = int(mn.group(1))
+    else:
+        # 時刻範囲から期間を計算（例：10:00-11:00）
+        rng = _RANGE.search(line)
+        if rng:
+            sh, sm, eh, em = (int(x) for x in rng.groups())
+            minutes = (eh * 60 + em) - (sh * 60 + sm)
+            if minutes <= 0:
+                minutes = 60  # デフォルト1時間
+
+    if not minutes or minutes <= 0:
+        return None
+
+    # 日付（@なしの251030形式も対応）
+    day_anchor = None
+    m_date = _DATE_TOKEN.search(line)
+    if m_date:
+        token = m_date.group(1)
+        day_anchor = parse_date_token(token, now)
+        if "@" + token in line:
+            line = line.replace("@" + token, "", 1).strip()
+        else:
+            line = line.replace(token, "", 1).strip()
+
+    # 時刻（@なしを先に試し、無ければ@あり）
+    fixed_start = None
+    base = _today(day_anchor or now)
+    m_time = _TIME_PLAIN.search(line)
+    if m_time:
+        fixed_start = base + timedelta(hours=int(m_time.group(1)), minutes=int(m_time.group(2)))
+        line = _TIME_PLAIN_STRIP.sub("", line, count=1).strip()
+    else:
+        m_time = _TIME_AT.search(line)
+        if m_time:
+            if m_time.group(4):
+                hours, mins = int(m_time.group(4)), int(m_time.group(5))
+            else:
+                hours = int(m_time.group(2))
+                ampm = m_time.group(1)
+                if ampm == "午後" and hours < 12:
+                    hours += 12
+                if ampm == "午前" and hours == 12:
+                    hours = 0
+                mins = int(m_time.group(3)) if m_time.group(3) else 0
+            fixed_start = base + timedelta(hours=hours, minutes=mins)
+            line = _TIME_AT_STRIP.sub("", line, count=1)
+            line = _TIME_AT_STRIP2.sub("", line, count=1).strip()
+
+    # 優先度（★の数 または A/B/C）
+    priority = "C"
+    stars = _STARS.search(line)
+    if stars:
+        priority = {3: "A", 2: "B"}.get(len(stars.group(0)), "C")
+        line = _STARS_STRIP.sub("", line, count=1).strip()
+    else:
+        tag = _TAG_MID.search(line) or _TAG_END.search(line)
+        if tag:
+            priority = tag.group(1).upper()
+            # GASと同じく、最初に見つかった「空白+A/B/C」を取り除く（単語の先頭でも一致する）
+            line = _TAG_STRIP.sub(" ", line, count=1)
+            line = _TAG_STRIP_END.sub("", line, count=1).strip()
+
+    title = _HOURS.sub("", line)
+    title = _MINUTES.sub("", title)
+    title = _AT_WORD.sub("", title)
+    title = _LEADING_DATE.sub("", title, count=1)
+    title = _SPACES.sub(" ", title).strip()
+    if not title:
+        title = "Untitled Task"
+
+    return {
+        "title": title,
+        "minutes": minutes,
+        "dayAnchor": day_anchor,
+        "fixedStart": fixed_start,
+        "priority": priority,
+    }
+
+
+def parse_text(raw: str, now: datetime = None) -> dict:
+    """/t2g の入力全体を解析する（planFromRaw_ の解析部分に相当）
+
+    戻り値:
+        tasks:   解析できたタスク（入力順の order と優先度順位 rank 付き）
+        skipped: 期間が読み取れず、GASでも無視される行
+    """
+    now = now or now_jst()
+    tasks, skipped = [], []
+    for order, line in enumerate(split_lines(raw), start=1):
+        if _STRIKE.match(line):
+            continue
+        parsed = parse_line(line, now)
+        if not parsed or not parsed["minutes"]:
+            skipped.append(line)
+            continue
+        parsed["order"] = order
+        parsed["rank"] = PRIORITY_ORDER.get(parsed["priority"], 3)
+        parsed["line"] = line
+        tasks.append(parsed)
+    return {"tasks": tasks, "skipped": skipped}
+
+
+def priority_title(title: str, priority: str) -> str:
+    """プレビュー用のタイトル（★付き、GASのpreviewと同じ規則）"""
+    if "★" in title:
+        return title
+    stars = {"A": "★★★", "B": "★★", "C": "★"}.get(priority or "C")
+    return f"{title} {stars}" if stars else title
@@ -0,0 +1,240 @@
+# tenants.py
+# 1つのBotプロセスで複数チーム（ギルド・ユーザー）のカレンダーを扱うためのテナント管理
+# テナントごとにGASエンドポイント・APIキー・レポート送信先を持ち、
+# 接続プール・レート制限・キャッシュ・ミラー・リトライキューも分けるので、
+# 1つのカレンダーが遅くても他のテナントのコマンドは待たされない
+
+import asyncio
+import json
+import os
+import re
+from datetime import datetime, time
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+
+from calendar_store import CalendarMirror
+from gas_cache import GasCache
+from gas_client import GasClient
+from gas_guard import CircuitBreaker, TokenBucket
+from progress_model import ProgressModel
+from retry_queue import RetryQueue
+from task_index import TaskIndex
+
+NAME_PATTERN = re.compile(r"^[A-Za-z0-9_-]+$")
+
+# 設定ファイルで省略した項目の既定値（main.py が環境変数で上書きする）
+DEFAULTS = {
+    "report_times": ["13:00", "20:00"],
+    "timezone": "Asia/Tokyo",
+    "pool_size": 10,
+    "keepalive_timeout": 60,
+    "cache_size": 256,
+    "rate_per_second": 5,
+    "rate_burst": 10,
+    "breaker_failures": 3,
+    "breaker_reset_seconds": 30,
+    "mirror_days_back": 7,
+    "mirror_days_forward": 30,
+    "retry_workers": 2,
+    "retry_base_seconds": 5,
+    "retry_max_attempts": 8,
+    "max_concurrent_batches": 2,
+    "debug_sample": 1.0,
+    "progress_max_age": 900,
+    "task_index_days": 7,
+}
+
+
+class TenantConfigError(ValueError):
+    """テナント設定ファイルの内容が不正"""
+
+
+def parse_report_time(value) -> time:
+    """"13:00" 形式の文字列を time にする"""
+    try:
+        hour, minute = (int(part) for part in str(value).split(":"))
+        return time(hour, minute)
+    except ValueError as e:
+        raise TenantConfigError(f"レポート時刻は HH:MM 形式で指定してください: {value!r}") from e
+
+
+class Tenant:
+    """1チーム分の設定と、GAS呼び出しに使う部品一式"""
+
+    def __init__(self, name: str, gas_endpoint: str, api_key: str, guild_ids=(), user_ids=(),
+                 channel_id=None, default: bool = False, data_dir: str = "data", notifier=None,
+                 **options):
+        if not NAME_PATTERN.match(name or ""):
+            raise TenantConfigError(f"テナント名は英数字・_・- で指定してください: {name!r}")
+        if not gas_endpoint or not api_key:
+            raise TenantConfigError(f"テナント {name}: gas_endpoint と api_key は必須です")
+        unknown = set(options) - set(DEFAULTS)
+        if unknown:
+            raise TenantConfigError(f"テナント {name}: 不明な設定項目 {sorted(unknown)}")
+        opts = {**DEFAULTS, **options}
+
+        self.name = name
+        self.guild_ids = {int(g) for g in guild_ids}
+        self.user_ids = {int(u) for u in user_ids}
+        self.channel_id = int(channel_id) if channel_id else None
+        self.default = default
+        # レポート時刻はこのタイムゾーンの現地時刻（スケジューラーへの初期登録に使う）
+        self.report_times = [parse_report_time(t) for t in opts["report_times"]]
+        try:
+            ZoneInfo(opts["timezone"])
+        except (ZoneInfoNotFoundError, ValueError) as e:
+            raise TenantConfigError(f"テナント {name}: タイムゾーンが見つかりません: {opts['timezone']!r}") from e
+        self.timezone = opts["timezone"]
+        self.tz = ZoneInfo(self.timezone)  # GASのイベント時刻・「今日」もこのタイムゾーン
+
+        # キャッシュ・接続プール・レート制限・ブレーカーはテナントごとに独立させる
+        self.gas = GasClient(
+            gas_endpoint,
+            api_key,
+            pool_size=int(opts["pool_size"]),
+            keepalive_timeout=float(opts["keepalive_timeout"]),
+            cache=GasCache(max_size=int(opts["cache_size"])),
+            limiter=TokenBucket(rate=float(opts["rate_per_second"]), capacity=float(opts["rate_burst"])),
+            breaker=CircuitBreaker(
+                failure_threshold=int(opts["breaker_failures"]),
+                reset_timeout=float(opts["breaker_reset_seconds"]),
+                name=name,
+            ),
+            debug_sample=float(opts["debug_sample"]),
+            name=name,
+        )
+        self.mirror = CalendarMirror(
+            self.gas,
+            days_back=int(opts["mirror_days_back"]),
+            days_forward=int(opts["mirror_days_forward"]),
+            tz=self.tz,
+            name=name,
+        )
+        # 既存の単一テナント構成（default）は従来のファイル名を使い続ける
+        db_name = "retry_queue.db" if name == "default" else f"retry_queue_{name}.db"
+        self.retry_queue = RetryQueue(
+            self.gas,
+            os.path.join(data_dir, db_name),
+            workers=int(opts["retry_workers"]),
+            base_delay=float(opts["retry_base_seconds"]),
+            max_attempts=int(opts["retry_max_attempts"]),
+            notifier=notifier,
+            name=name,
+        )
+        # 今日の進捗（書き込み成功時にその場で更新し、定期的にGASと照合する）
+        self.progress = ProgressModel(name, max_age=float(opts["progress_max_age"]), tz=self.tz)
+        self.gas.add_write_listener(self.progress.apply_write)
+        # /done などのオートコンプリート用のタスク名インデックス（ミラーから作る）
+        self.task_index = TaskIndex(days=int(opts["task_index_days"]))
+        self.gas.add_write_listener(self.task_index.apply_write)
+        # 大量 /t2g の同時実行数もテナントごと
+        self.batch_slots = asyncio.Semaphore(int(opts["max_concurrent_batches"]))
+        self._mirror_listener = None
+
+    def __repr__(self):
+        return f"<Tenant {self.name}>"
+
+    def now(self):
+        """このテナントのタイムゾーンの現在時刻（オフセット無し）"""
+        return datetime.now(self.tz).replace(tzinfo=None)
+
+    async def start(self, mirror_enabled: bool = True, retry_enabled: bool = True):
+        await self.gas.start()
+        if mirror_enabled:
+            # 書き込み系コマンドが成功したら差分同期を前倒しする（再接続時に重複登録しない）
+            if self._mirror_listener is None:
+                self._mirror_listener = lambda mode, payload, data: self.mirror.request_sync()
+                self.gas.add_write_listener(self._mirror_listener)
+        if retry_enabled:
+            await self.retry_queue.start()
+
+    async def close(self):
+        await self.retry_queue.close()
+        await self.gas.close()
+
+
+class TenantRegistry:
+    """ギルドID・ユーザーIDからテナントを引く
+
+    ユーザーIDの割り当てを優先し、次にギルドID、どちらにも無ければ default のテナントを使う。
+    """
+
+    def __init__(self, tenants):
+        self.tenants = list(tenants)
+        if not self.tenants:
+            raise TenantConfigError("テナントが1つも設定されていません")
+        self._by_name = {}
+        self._by_guild = {}
+        self._by_user = {}
+        self.default = None
+        for tenant in self.tenants:
+            if tenant.name in self._by_name:
+                raise TenantConfigError(f"テナント名が重複しています: {tenant.name}")
+            self._by_name[tenant.name] = tenant
+            for mapping, ids, kind in ((self._by_guild, tenant.guild_ids, "ギルド"),
+                                       (self._by_user, tenant.user_ids, "ユーザー")):
+                for id_ in ids:
+                    if id_ in mapping:
+                        raise TenantConfigError(
+                            f"{kind} {id_} が {mapping[id_].name} と {tenant.name} の両方に割り当てられています")
+                    mapping[id_] = tenant
+            if tenant.default:
+                if self.default is not None:
+                    raise TenantConfigError(f"default のテナントが複数あります: {self.default.name}, {tenant.name}")
+                self.default = tenant
+
+    def __iter__(self):
+        return iter(self.tenants)
+
+    def __len__(self):
+        return len(self.tenants)
+
+    def get(self, name: str):
+        return self._by_name.get(name)
+
+    def resolve(self, guild_id=None, user_id=None):
+        """コマンドを実行したユーザー・ギルドのテナント（該当なしならNone）"""
+        if user_id is not None and user_id in self._by_user:
+            return self._by_user[user_id]
+        if guild_id is not None and guild_id in self._by_guild:
+            return self._by_guild[guild_id]
+        return self.default
+
+    async def gather(self, func):
+        """全テナントに対して func(tenant) を並行に実行する（1つの失敗で他を止めない）"""
+        return await asyncio.gather(*(func(tenant) for tenant in self.tenants), return_exceptions=True)
+
+
+def load_tenants(path: str, defaults: dict = None, data_dir: str = "data", notifier=None) -> TenantRegistry:
+    """JSONの設定ファイルからテナントを読み込む
+
+    {
+      "defaults": {"report_times": ["13:00", "20:00"], "timezone": "Asia/Tokyo", "pool_size": 4},
+      "tenants": [
+        {"name": "team-a", "gas_endpoint": "https://...", "api_key_env": "TEAM_A_API_KEY",
+         "guild_ids": [123], "channel_id": 456, "default": true},
+        {"name": "alice", "gas_endpoint": "https://...", "api_key": "...", "user_ids": [789]}
+      ]
+    }
+    api_key_env を指定するとAPIキーは環境変数から読む（設定ファイルに秘密を書かない）。
+    """
+    try:
+        with open(path, encoding="utf-8") as f:
+            config = json.load(f)
+    except (OSError, ValueError) as e:
+        raise TenantConfigError(f"テナント設定ファイルを読めません: {path}: {e}") from e
+    if not isinstance(config, dict) or not isinstance(config.get("tenants"), list):
+        raise TenantConfigError(f"{path}: \"tenants\" のリストが必要です")
+
+    base = {**(defaults or {}), **config.get("defaults", {})}
+    tenants = []
+    for entry in config["tenants"]:
+        entry = dict(entry)
+        key_env = entry.pop("api_key_env", None)
+        if key_env:
+            entry["api_key"] = os.getenv(key_env)
+            if not entry["api_key"]:
+                raise TenantConfigError(f"テナント {entry.get('name')}: 環境変数 {key_env} が設定されていません")
+        options = {k: v for k, v in base.items() if k in DEFAULTS}
+        options.update(entry)
+        tenants.append(Tenant(data_dir=data_dir, notifier=notifier, **options))
+    return TenantRegistry(tenants)